@@ -1,69 +1,91 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random  # nosec B311 - random used for test/sample data generation
-import math
 
-# Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Seed for reproducibility
+SEED = 42
 
 # Number of policies to generate
 num_policies = 5000
 
+# Policies are generated in chunks of this size, each with its own random stream
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Policy start dates between 2019-01-01 and 2022-12-31
+POLICY_START = np.datetime64("2019-01-01", "D")
+
+# Date the book is valued at (used for claim status and reserve adjustments)
+VALUATION_DATE = np.datetime64("2023-01-01", "D")
+
+TABLES = ["policies", "claims", "risk_factors", "payments", "reserve_adjustments"]
+
+OUTPUT_FILES = {
+    "policies": "insurance_policies",
+    "claims": "insurance_claims",
+    "risk_factors": "insurance_risk_factors",
+    "payments": "insurance_payments",
+    "reserve_adjustments": "insurance_reserve_adjustments",
+}
+
+
+def _format_ids(prefix, numbers, width):
+    """Format integer ids as zero-padded strings, e.g. P000001."""
+    return prefix + pd.Series(numbers, dtype="int64").astype(str).str.zfill(width)
+
+
+def _days(values):
+    return np.asarray(values).astype("timedelta64[D]")
+
+
+def _choice(rng, options, size, p=None):
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=size, p=p)]
+
 
 # Generate policy data
-def generate_policy_data(num_policies):
+def generate_policy_data(num_policies, rng=None, start_id=1):
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+
     # Policy start dates between 2019-01-01 and 2022-12-31
-    start_dates = [
-        datetime(2019, 1, 1) + timedelta(days=random.randint(0, 1460))  # nosec B311 - used for test/sample data generation
-        for _ in range(num_policies)
-    ]
+    start_dates = POLICY_START + _days(rng.integers(0, 1461, size=num_policies))
 
     # Policy IDs
-    policy_ids = [f"P{i:06d}" for i in range(1, num_policies + 1)]
+    policy_ids = _format_ids("P", np.arange(start_id, start_id + num_policies), 6)
 
     # Policy duration (6 months or 12 months)
-    durations = np.random.choice([6, 12], size=num_policies, p=[0.3, 0.7])
+    durations = rng.choice([6, 12], size=num_policies, p=[0.3, 0.7])
 
-    # Policy end dates - Convert numpy.int64 to int
-    end_dates = [
-        start + timedelta(days=int(duration * 30))
-        for start, duration in zip(start_dates, durations)
-    ]
+    # Policy end dates
+    end_dates = start_dates + _days(durations * 30)
 
     # Product types
-    product_types = np.random.choice(
-        ["Auto", "Home", "Life", "Health"], size=num_policies, p=[0.4, 0.3, 0.2, 0.1]
+    product_types = _choice(
+        rng, ["Auto", "Home", "Life", "Health"], num_policies, p=[0.4, 0.3, 0.2, 0.1]
     )
 
     # Geographic regions
-    regions = np.random.choice(
-        ["North", "South", "East", "West", "Central"], size=num_policies
-    )
+    regions = _choice(rng, ["North", "South", "East", "West", "Central"], num_policies)
 
     # Risk scores (1-100, higher means riskier)
-    risk_scores = np.random.normal(50, 15, num_policies)
+    risk_scores = rng.normal(50, 15, num_policies)
     risk_scores = np.clip(risk_scores, 1, 100).round(2)
 
     # Premium calculation
     base_premiums = {"Auto": 800, "Home": 1200, "Life": 500, "Health": 2000}
 
-    premiums = []
-    for product, risk, duration in zip(product_types, risk_scores, durations):
-        # Base premium adjusted for risk and duration
-        base = base_premiums[product]
-        risk_factor = 0.5 + (risk / 100 * 1.5)  # 0.5 to 2.0
-        duration_factor = duration / 12
-
-        # Add some random noise
-        noise = np.random.normal(1, 0.1)
-
-        premium = base * risk_factor * duration_factor * noise
-        premiums.append(round(premium, 2))
+    # Base premium adjusted for risk and duration, plus some random noise
+    base = pd.Series(product_types).map(base_premiums).to_numpy(dtype=float)
+    risk_factor = 0.5 + (risk_scores / 100 * 1.5)  # 0.5 to 2.0
+    duration_factor = durations / 12
+    noise = rng.normal(1, 0.1, num_policies)
+    premiums = (base * risk_factor * duration_factor * noise).round(2)
 
     # Client age
-    ages = np.random.normal(45, 15, num_policies).astype(int)
+    ages = rng.normal(45, 15, num_policies).astype(int)
     ages = np.clip(ages, 18, 90)
 
     # Create DataFrame
@@ -84,527 +106,519 @@ def generate_policy_data(num_policies):
     return policies_df
 
 
-# Generate claims data
-def generate_claims_data(policies_df):
+def _generate_claims(policies_df, rng):
+    """Generate claims with integer claim numbers starting at 0."""
     # Probability of claim for each product type
     claim_probabilities = {"Auto": 0.15, "Home": 0.08, "Life": 0.02, "Health": 0.20}
 
-    # Generate claims based on product type and risk score
-    claims = []
-    claim_ids = []
-    claim_counter = 1
-
-    for _, policy in policies_df.iterrows():
-        # Base probability of claim
-        base_prob = claim_probabilities[policy["product_type"]]
-
-        # Adjust based on risk score
-        risk_adjustment = (
-            policy["risk_score"] / 50
-        )  # normalize to have 1.0 at risk_score = 50
-        prob = min(base_prob * risk_adjustment, 0.95)  # cap at 95%
-
-        # Determine number of claims
-        if policy["product_type"] == "Life":
-            # Life policies can have at most 1 claim
-            num_claims = np.random.binomial(1, prob)
-        else:
-            # Other policies can have multiple claims
-            policy_duration = (
-                policy["end_date"] - policy["start_date"]
-            ).days / 365  # in years
-            # Poisson distribution for number of claims, scaled by policy duration
-            lambda_param = prob * policy_duration * 2
-            num_claims = np.random.poisson(lambda_param)
-            num_claims = min(num_claims, 5)  # Cap at 5 claims per policy
-
-        for _ in range(num_claims):
-            # Claim date between policy start and end date
-            claim_date = policy["start_date"] + timedelta(
-                days=random.randint(0, (policy["end_date"] - policy["start_date"]).days)  # nosec B311 - used for test/sample data generation
-            )
-
-            # Claim amount - this will depend on product type and have a long tail
-            if policy["product_type"] == "Auto":
-                # Auto claims - mixed distribution
-                if random.random() < 0.8:  # nosec B311 - used for test/sample data generation  # Minor claims
-                    amount = np.random.gamma(2, 1000)
-                else:  # Major claims
-                    amount = np.random.gamma(5, 5000)
-
-            elif policy["product_type"] == "Home":
-                # Home claims - higher variance
-                if random.random() < 0.9:  # nosec B311 - used for test/sample data generation  # Regular claims
-                    amount = np.random.gamma(2, 2000)
-                else:  # Catastrophic claims
-                    amount = np.random.gamma(3, 15000)
-
-            elif policy["product_type"] == "Life":
-                # Life claims - typically the full policy amount
-                base_amount = 100000
-                age_factor = math.exp(-0.03 * (policy["client_age"] - 40))
-                amount = base_amount * age_factor * (1 + np.random.normal(0, 0.1))
-
-            else:  # Health
-                # Health claims - wide range
-                if random.random() < 0.7:  # nosec B311 - used for test/sample data generation  # Regular claims
-                    amount = np.random.gamma(1.5, 1000)
-                elif random.random() < 0.95:  # nosec B311 - used for test/sample data generation  # Serious condition
-                    amount = np.random.gamma(3, 5000)
-                else:  # Critical condition
-                    amount = np.random.gamma(2, 25000)
-
-            # Add seasonality for certain claim types
-            if policy["product_type"] == "Auto" and claim_date.month in [
-                12,
-                1,
-                2,
-            ]:  # Winter months
-                amount *= 1.2  # Higher claims in winter
-            elif policy["product_type"] == "Home" and claim_date.month in [
-                6,
-                7,
-                8,
-                9,
-            ]:  # Summer/hurricane season
-                amount *= 1.3  # Higher claims in hurricane season
-
-            # Status - open, closed, in litigation
-            days_since_claim = (datetime(2023, 1, 1) - claim_date).days
-
-            if days_since_claim < 30:
-                status = "Open"
-            elif days_since_claim < 90:
-                status = np.random.choice(["Open", "Closed"], p=[0.3, 0.7])
-            else:
-                if random.random() < 0.05:  # nosec B311 - used for test/sample data generation  # 5% of old claims are in litigation
-                    status = "Litigation"
-                else:
-                    status = "Closed"
-
-            # Claim settlement amount
-            if status == "Closed":
-                settlement_factor = np.random.beta(8, 2)  # Usually close to 1
-                settlement = round(amount * settlement_factor, 2)
-            else:
-                settlement = None
+    products = policies_df["product_type"].to_numpy()
+    risk_scores = policies_df["risk_score"].to_numpy()
+    start_dates = policies_df["start_date"].to_numpy().astype("datetime64[D]")
+    end_dates = policies_df["end_date"].to_numpy().astype("datetime64[D]")
+    duration_days = (end_dates - start_dates).astype(int)
+
+    # Base probability of claim, adjusted by risk score (1.0 at risk_score = 50)
+    base_prob = pd.Series(products).map(claim_probabilities).to_numpy(dtype=float)
+    prob = np.minimum(base_prob * risk_scores / 50, 0.95)  # cap at 95%
+
+    # Life policies can have at most 1 claim. Other policies draw a Poisson
+    # number of claims scaled by policy duration, capped at 5 claims per policy.
+    is_life = products == "Life"
+    num_claims = np.where(
+        is_life,
+        rng.binomial(1, prob),
+        np.minimum(rng.poisson(prob * duration_days / 365 * 2), 5),
+    )
 
-            # Time to close (days)
-            if status == "Closed":
-                time_to_close = int(np.random.gamma(3, 10))
-                time_to_close = min(time_to_close, days_since_claim)
-            else:
-                time_to_close = None
-
-            # Claim ID
-            claim_id = f"C{claim_counter:07d}"
-            claim_counter += 1
-
-            # Claim type
-            if policy["product_type"] == "Auto":
-                claim_types = [
-                    "Collision",
-                    "Theft",
-                    "Vandalism",
-                    "Injury",
-                    "Property Damage",
-                ]
-                claim_type = np.random.choice(claim_types, p=[0.5, 0.1, 0.1, 0.2, 0.1])
-            elif policy["product_type"] == "Home":
-                claim_types = [
-                    "Fire",
-                    "Theft",
-                    "Water Damage",
-                    "Liability",
-                    "Natural Disaster",
-                ]
-                claim_type = np.random.choice(claim_types, p=[0.1, 0.2, 0.4, 0.1, 0.2])
-            elif policy["product_type"] == "Life":
-                claim_type = "Death Benefit"
-            else:  # Health
-                claim_types = [
-                    "Illness",
-                    "Surgery",
-                    "Accident",
-                    "Preventive Care",
-                    "Chronic Condition",
-                ]
-                claim_type = np.random.choice(claim_types, p=[0.3, 0.2, 0.2, 0.1, 0.2])
-
-            claims.append(
-                {
-                    "claim_id": claim_id,
-                    "policy_id": policy["policy_id"],
-                    "claim_date": claim_date,
-                    "claim_amount": round(amount, 2),
-                    "claim_type": claim_type,
-                    "status": status,
-                    "settlement_amount": settlement,
-                    "time_to_close_days": time_to_close,
-                }
-            )
+    # One row per claim
+    idx = np.repeat(np.arange(len(policies_df)), num_claims)
+    n = len(idx)
+    claim_products = products[idx]
+
+    # Claim date between policy start and end date
+    claim_dates = start_dates[idx] + _days(rng.integers(0, duration_days[idx] + 1))
+
+    # Claim amount - depends on product type and has a long tail
+    auto = claim_products == "Auto"
+    home = claim_products == "Home"
+    life = claim_products == "Life"
+    health = claim_products == "Health"
+    u1 = rng.random(n)
+    u2 = rng.random(n)
+    conditions = [
+        auto & (u1 < 0.8),  # Auto minor claims
+        auto,  # Auto major claims
+        home & (u1 < 0.9),  # Home regular claims
+        home,  # Home catastrophic claims
+        health & (u1 < 0.7),  # Health regular claims
+        health & (u2 < 0.95),  # Health serious condition
+        health,  # Health critical condition
+    ]
+    shape = np.select(conditions, [2, 5, 2, 3, 1.5, 3, 2], default=1.0)
+    scale = np.select(conditions, [1000, 5000, 2000, 15000, 1000, 5000, 25000], default=1.0)
+    amounts = rng.gamma(shape, scale)
+
+    # Life claims - typically the full policy amount
+    ages = policies_df["client_age"].to_numpy()[idx]
+    life_amounts = 100000 * np.exp(-0.03 * (ages - 40)) * (1 + rng.normal(0, 0.1, n))
+    amounts = np.where(life, life_amounts, amounts)
+
+    # Add seasonality: higher Auto claims in winter, higher Home claims in
+    # summer/hurricane season
+    months = claim_dates.astype("datetime64[M]").astype(int) % 12 + 1
+    amounts = np.where(auto & np.isin(months, [12, 1, 2]), amounts * 1.2, amounts)
+    amounts = np.where(home & np.isin(months, [6, 7, 8, 9]), amounts * 1.3, amounts)
+
+    # Status - open, closed, in litigation (5% of old claims are in litigation)
+    days_since_claim = (VALUATION_DATE - claim_dates).astype(int)
+    u3 = rng.random(n)
+    status = np.where(
+        days_since_claim < 30,
+        "Open",
+        np.where(
+            days_since_claim < 90,
+            np.where(u3 < 0.3, "Open", "Closed"),
+            np.where(u3 < 0.05, "Litigation", "Closed"),
+        ),
+    ).astype(object)
+    closed = status == "Closed"
+
+    # Claim settlement amount, usually close to the claim amount
+    settlements = np.where(closed, (amounts * rng.beta(8, 2, n)).round(2), np.nan)
+
+    # Time to close (days)
+    time_to_close = np.minimum(rng.gamma(3, 10, n).astype(int), days_since_claim)
+    time_to_close = pd.array(np.where(closed, time_to_close, 0), dtype="Int64")
+    time_to_close[~closed] = pd.NA
+
+    # Claim type
+    claim_types = np.full(n, "Death Benefit", dtype=object)
+    claim_type_options = {
+        "Auto": (
+            ["Collision", "Theft", "Vandalism", "Injury", "Property Damage"],
+            [0.5, 0.1, 0.1, 0.2, 0.1],
+        ),
+        "Home": (
+            ["Fire", "Theft", "Water Damage", "Liability", "Natural Disaster"],
+            [0.1, 0.2, 0.4, 0.1, 0.2],
+        ),
+        "Health": (
+            ["Illness", "Surgery", "Accident", "Preventive Care", "Chronic Condition"],
+            [0.3, 0.2, 0.2, 0.1, 0.2],
+        ),
+    }
+    for product, (options, p) in claim_type_options.items():
+        mask = claim_products == product
+        claim_types[mask] = _choice(rng, options, mask.sum(), p=p)
+
+    claims_df = pd.DataFrame(
+        {
+            "claim_id": np.arange(n),
+            "policy_id": policies_df["policy_id"].to_numpy()[idx],
+            "claim_date": claim_dates,
+            "claim_amount": amounts.round(2),
+            "claim_type": claim_types,
+            "status": status,
+            "settlement_amount": settlements,
+            "time_to_close_days": time_to_close,
+        }
+    )
+    return claims_df
 
-            claim_ids.append(claim_id)
 
-    claims_df = pd.DataFrame(claims)
+# Generate claims data
+def generate_claims_data(policies_df, rng=None, start_claim_id=1):
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+    claims_df = _generate_claims(policies_df, rng)
+    claims_df["claim_id"] = _format_ids("C", claims_df["claim_id"] + start_claim_id, 7)
     return claims_df
 
 
 # Generate risk factor data
-def generate_risk_factors(policies_df):
-    risk_factors = []
-
-    for _, policy in policies_df.iterrows():
-        # Auto-specific risk factors
-        if policy["product_type"] == "Auto":
-            # Vehicle age (years)
-            vehicle_age = max(1, int(np.random.gamma(3, 2)))
-
-            # Vehicle value
-            vehicle_value = max(5000, int(np.random.gamma(3, 5000)))
-
-            # Engine power (HP)
-            engine_power = int(np.random.normal(150, 50))
-
-            # Driver experience (years)
-            driver_exp = max(1, int(policy["client_age"] - 18 - np.random.gamma(1, 2)))
-
-            # Prior accidents
-            prior_accidents = int(
-                np.random.poisson(max(0.2, (100 - policy["risk_score"]) / 100))
-            )
-
-            risk_factors.append(
-                {
-                    "policy_id": policy["policy_id"],
-                    "vehicle_age": vehicle_age,
-                    "vehicle_value": vehicle_value,
-                    "engine_power": engine_power,
-                    "driver_experience": driver_exp,
-                    "prior_accidents": prior_accidents,
-                    "home_value": None,
-                    "construction_year": None,
-                    "construction_type": None,
-                    "security_system": None,
-                    "smoker": None,
-                    "health_condition": None,
-                    "family_history": None,
-                    "occupation_risk": None,
-                }
-            )
-
-        # Home-specific risk factors
-        elif policy["product_type"] == "Home":
-            # Home value
-            home_value = int(np.random.gamma(5, 50000))
-
-            # Construction year
-            construction_year = int(np.random.normal(1990, 20))
-            construction_year = min(2022, max(1900, construction_year))
-
-            # Construction type
-            construction_types = ["Wood", "Brick", "Concrete", "Steel Frame"]
-            construction_type = np.random.choice(construction_types)
-
-            # Security system
-            security_system = np.random.choice([True, False], p=[0.7, 0.3])
-
-            risk_factors.append(
-                {
-                    "policy_id": policy["policy_id"],
-                    "vehicle_age": None,
-                    "vehicle_value": None,
-                    "engine_power": None,
-                    "driver_experience": None,
-                    "prior_accidents": None,
-                    "home_value": home_value,
-                    "construction_year": construction_year,
-                    "construction_type": construction_type,
-                    "security_system": security_system,
-                    "smoker": None,
-                    "health_condition": None,
-                    "family_history": None,
-                    "occupation_risk": None,
-                }
-            )
-
-        # Life-specific risk factors
-        elif policy["product_type"] == "Life":
-            # Smoker - Fix the probability calculation to ensure it's between 0 and 1
-            smoker_prob = min(max(0.2 + (policy["risk_score"] - 50) / 100, 0.05), 0.7)
-            smoker = np.random.choice([True, False], p=[smoker_prob, 1 - smoker_prob])
-
-            # Family history (0-5 scale, higher is worse)
-            # Ensure parameters for beta distribution are positive
-            alpha = max(0.1, policy["risk_score"] / 20)
-            beta = max(0.1, 5 - policy["risk_score"] / 20)
-            family_history = int(np.random.beta(alpha, beta) * 5)
-
-            # Occupation risk (0-10 scale)
-            # Ensure parameters for beta distribution are positive
-            alpha = max(0.1, policy["risk_score"] / 20)
-            beta = max(0.1, 10 - policy["risk_score"] / 20)
-            occupation_risk = int(np.random.beta(alpha, beta) * 10)
-
-            risk_factors.append(
-                {
-                    "policy_id": policy["policy_id"],
-                    "vehicle_age": None,
-                    "vehicle_value": None,
-                    "engine_power": None,
-                    "driver_experience": None,
-                    "prior_accidents": None,
-                    "home_value": None,
-                    "construction_year": None,
-                    "construction_type": None,
-                    "security_system": None,
-                    "smoker": smoker,
-                    "health_condition": None,
-                    "family_history": family_history,
-                    "occupation_risk": occupation_risk,
-                }
-            )
-
-        # Health-specific risk factors
-        else:
-            # Smoker - Fix the probability calculation
-            smoker_prob = min(max(0.15 + (policy["risk_score"] - 50) / 150, 0.05), 0.5)
-            smoker = np.random.choice([True, False], p=[smoker_prob, 1 - smoker_prob])
-
-            # Health condition (0-5 scale, higher is worse)
-            # Ensure parameters for beta distribution are positive
-            alpha = max(0.1, policy["risk_score"] / 20)
-            beta = max(0.1, 5 - policy["risk_score"] / 20)
-            health_condition = int(np.random.beta(alpha, beta) * 5)
-
-            # Family history (0-5 scale, higher is worse)
-            # Ensure parameters for beta distribution are positive
-            alpha = max(0.1, policy["risk_score"] / 25)
-            beta = max(0.1, 5 - policy["risk_score"] / 25)
-            family_history = int(np.random.beta(alpha, beta) * 5)
-
-            risk_factors.append(
-                {
-                    "policy_id": policy["policy_id"],
-                    "vehicle_age": None,
-                    "vehicle_value": None,
-                    "engine_power": None,
-                    "driver_experience": None,
-                    "prior_accidents": None,
-                    "home_value": None,
-                    "construction_year": None,
-                    "construction_type": None,
-                    "security_system": None,
-                    "smoker": smoker,
-                    "health_condition": health_condition,
-                    "family_history": family_history,
-                    "occupation_risk": None,
-                }
-            )
-
-    risk_factors_df = pd.DataFrame(risk_factors)
+def generate_risk_factors(policies_df, rng=None):
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+
+    n = len(policies_df)
+    products = policies_df["product_type"].to_numpy()
+    risk_scores = policies_df["risk_score"].to_numpy()
+    ages = policies_df["client_age"].to_numpy()
+
+    def int_column():
+        return pd.array([pd.NA] * n, dtype="Int64")
+
+    columns = {
+        "vehicle_age": int_column(),
+        "vehicle_value": int_column(),
+        "engine_power": int_column(),
+        "driver_experience": int_column(),
+        "prior_accidents": int_column(),
+        "home_value": int_column(),
+        "construction_year": int_column(),
+        "construction_type": pd.array([pd.NA] * n, dtype="string"),
+        "security_system": pd.array([pd.NA] * n, dtype="boolean"),
+        "smoker": pd.array([pd.NA] * n, dtype="boolean"),
+        "health_condition": int_column(),
+        "family_history": int_column(),
+        "occupation_risk": int_column(),
+    }
+
+    def beta_scale(risk, divisor, upper, scale):
+        # Ensure parameters for beta distribution are positive
+        alpha = np.maximum(0.1, risk / divisor)
+        beta = np.maximum(0.1, upper - risk / divisor)
+        return (rng.beta(alpha, beta) * scale).astype(int)
+
+    # Auto-specific risk factors
+    auto = products == "Auto"
+    k, risk = auto.sum(), risk_scores[auto]
+    columns["vehicle_age"][auto] = np.maximum(1, rng.gamma(3, 2, k).astype(int))
+    columns["vehicle_value"][auto] = np.maximum(5000, rng.gamma(3, 5000, k).astype(int))
+    columns["engine_power"][auto] = rng.normal(150, 50, k).astype(int)
+    columns["driver_experience"][auto] = np.maximum(
+        1, (ages[auto] - 18 - rng.gamma(1, 2, k)).astype(int)
+    )
+    columns["prior_accidents"][auto] = rng.poisson(np.maximum(0.2, (100 - risk) / 100))
+
+    # Home-specific risk factors
+    home = products == "Home"
+    k = home.sum()
+    columns["home_value"][home] = rng.gamma(5, 50000, k).astype(int)
+    columns["construction_year"][home] = np.clip(
+        rng.normal(1990, 20, k).astype(int), 1900, 2022
+    )
+    columns["construction_type"][home] = _choice(
+        rng, ["Wood", "Brick", "Concrete", "Steel Frame"], k
+    )
+    columns["security_system"][home] = rng.random(k) < 0.7
+
+    # Life-specific risk factors
+    life = products == "Life"
+    k, risk = life.sum(), risk_scores[life]
+    smoker_prob = np.clip(0.2 + (risk - 50) / 100, 0.05, 0.7)
+    columns["smoker"][life] = rng.random(k) < smoker_prob
+    # Family history (0-5 scale) and occupation risk (0-10 scale), higher is worse
+    columns["family_history"][life] = beta_scale(risk, 20, 5, 5)
+    columns["occupation_risk"][life] = beta_scale(risk, 20, 10, 10)
+
+    # Health-specific risk factors
+    health = products == "Health"
+    k, risk = health.sum(), risk_scores[health]
+    smoker_prob = np.clip(0.15 + (risk - 50) / 150, 0.05, 0.5)
+    columns["smoker"][health] = rng.random(k) < smoker_prob
+    # Health condition and family history (0-5 scale), higher is worse
+    columns["health_condition"][health] = beta_scale(risk, 20, 5, 5)
+    columns["family_history"][health] = beta_scale(risk, 25, 5, 5)
+
+    risk_factors_df = pd.DataFrame(
+        {"policy_id": policies_df["policy_id"].to_numpy(), **columns}
+    )
     return risk_factors_df
 
 
 # Generate payment history
-def generate_payment_history(policies_df):
-    payments = []
-
-    for _, policy in policies_df.iterrows():
-        # Determine payment schedule (monthly, quarterly, semi-annual, annual)
-        if policy["duration_months"] == 6:
-            schedule_options = ["Monthly", "Quarterly", "Semi-Annual"]
-            schedule_probs = [0.4, 0.3, 0.3]
-        else:  # 12 months
-            schedule_options = ["Monthly", "Quarterly", "Semi-Annual", "Annual"]
-            schedule_probs = [0.5, 0.2, 0.2, 0.1]
-
-        payment_schedule = np.random.choice(schedule_options, p=schedule_probs)
-
-        # Determine number of payments and amount per payment
-        if payment_schedule == "Monthly":
-            num_payments = int(policy["duration_months"])
-            amount_per_payment = policy["premium"] / num_payments
-        elif payment_schedule == "Quarterly":
-            num_payments = int(policy["duration_months"]) // 3
-            amount_per_payment = policy["premium"] / num_payments
-        elif payment_schedule == "Semi-Annual":
-            num_payments = int(policy["duration_months"]) // 6
-            amount_per_payment = policy["premium"] / num_payments
-        else:  # Annual
-            num_payments = 1
-            amount_per_payment = policy["premium"]
-
-        # Generate payments
-        payment_dates = []
-        current_date = policy["start_date"]
-
-        for i in range(int(num_payments)):
-            if payment_schedule == "Monthly":
-                next_date = current_date + timedelta(days=30)
-            elif payment_schedule == "Quarterly":
-                next_date = current_date + timedelta(days=90)
-            elif payment_schedule == "Semi-Annual":
-                next_date = current_date + timedelta(days=182)
-            else:  # Annual
-                next_date = current_date + timedelta(days=365)
-
-            # If next payment is after policy end, don't include it
-            if next_date > policy["end_date"]:
-                break
-
-            payment_dates.append(current_date)
-            current_date = next_date
-
-        # Generate payment status and actual amounts
-        for i, payment_date in enumerate(payment_dates):
-            # Payment status
-            # First payment is always made
-            if i == 0:
-                status = "Paid"
-                payment_amount = amount_per_payment
-            else:
-                # Some randomness in payment behavior
-                if (
-                    policy["risk_score"] > 80
-                ):  # Higher risk clients more likely to miss payments
-                    status_prob = [0.8, 0.1, 0.1]  # [Paid, Late, Missed]
-                elif policy["risk_score"] > 60:
-                    status_prob = [0.9, 0.07, 0.03]
-                else:
-                    status_prob = [0.97, 0.02, 0.01]
-
-                status = np.random.choice(["Paid", "Late", "Missed"], p=status_prob)
-
-                if status == "Paid":
-                    payment_amount = amount_per_payment
-                elif status == "Late":
-                    # Late fee
-                    payment_amount = amount_per_payment * 1.05
-                else:  # Missed
-                    payment_amount = 0
-
-            payments.append(
-                {
-                    "policy_id": policy["policy_id"],
-                    "payment_date": payment_date,
-                    "scheduled_amount": round(amount_per_payment, 2),
-                    "actual_amount": round(payment_amount, 2),
-                    "status": status,
-                    "payment_schedule": payment_schedule,
-                }
-            )
+def generate_payment_history(policies_df, rng=None):
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+
+    n = len(policies_df)
+    durations = policies_df["duration_months"].to_numpy()
+    premiums = policies_df["premium"].to_numpy()
+    risk_scores = policies_df["risk_score"].to_numpy()
+    start_dates = policies_df["start_date"].to_numpy().astype("datetime64[D]")
+    end_dates = policies_df["end_date"].to_numpy().astype("datetime64[D]")
+
+    # Determine payment schedule (monthly, quarterly, semi-annual, annual).
+    # 6 month policies: [0.4, 0.3, 0.3, 0.0], 12 month policies: [0.5, 0.2, 0.2, 0.1]
+    schedules = np.array(["Monthly", "Quarterly", "Semi-Annual", "Annual"], dtype=object)
+    cumulative = np.where(
+        (durations == 6)[:, None],
+        np.array([0.4, 0.7, 1.0, 1.0]),
+        np.array([0.5, 0.7, 0.9, 1.0]),
+    )
+    schedule_idx = (rng.random(n)[:, None] >= cumulative).sum(axis=1)
+    schedule_idx = np.minimum(schedule_idx, 3)
+
+    # Number of payments, amount per payment and days between payments
+    num_payments = np.select(
+        [schedule_idx == 0, schedule_idx == 1, schedule_idx == 2],
+        [durations, durations // 3, durations // 6],
+        default=1,
+    )
+    amount_per_payment = premiums / num_payments
+    interval = np.array([30, 90, 182, 365])[schedule_idx]
+
+    # Payments falling after the policy end are not included
+    policy_days = (end_dates - start_dates).astype(int)
+    num_payments = np.minimum(num_payments, policy_days // interval)
+
+    # One row per payment
+    idx = np.repeat(np.arange(n), num_payments)
+    offsets = np.cumsum(num_payments) - num_payments
+    payment_number = np.arange(len(idx)) - np.repeat(offsets, num_payments)
+    payment_dates = start_dates[idx] + _days(payment_number * interval[idx])
+
+    # Some randomness in payment behavior; higher risk clients are more likely
+    # to miss payments. Probabilities are [Paid, Late, Missed].
+    risk = risk_scores[idx]
+    paid_p = np.select([risk > 80, risk > 60], [0.8, 0.9], default=0.97)
+    late_p = np.select([risk > 80, risk > 60], [0.1, 0.07], default=0.02)
+    u = rng.random(len(idx))
+    status = np.where(
+        u < paid_p, "Paid", np.where(u < paid_p + late_p, "Late", "Missed")
+    ).astype(object)
+    # First payment is always made
+    status[payment_number == 0] = "Paid"
+
+    # Late payments include a late fee, missed payments are zero
+    scheduled = amount_per_payment[idx]
+    payment_amount = np.select(
+        [status == "Paid", status == "Late"], [scheduled, scheduled * 1.05], default=0
+    )
 
-    payments_df = pd.DataFrame(payments)
+    payments_df = pd.DataFrame(
+        {
+            "policy_id": policies_df["policy_id"].to_numpy()[idx],
+            "payment_date": payment_dates,
+            "scheduled_amount": scheduled.round(2),
+            "actual_amount": payment_amount.round(2),
+            "status": status,
+            "payment_schedule": schedules[schedule_idx][idx],
+        }
+    )
     return payments_df
 
 
 # Generate reserve adjustments for open claims
-def generate_reserve_adjustments(claims_df):
-    adjustments = []
+def generate_reserve_adjustments(claims_df, rng=None):
+    rng = rng if rng is not None else np.random.default_rng(SEED)
 
     # Only generate adjustments for open or litigation claims
     open_claims = claims_df[claims_df["status"].isin(["Open", "Litigation"])]
+    claim_dates = open_claims["claim_date"].to_numpy().astype("datetime64[D]")
+    claim_amounts = open_claims["claim_amount"].to_numpy()
+    days_range = (VALUATION_DATE - claim_dates).astype(int)
+
+    # Number of adjustments (1-5), fewer if claim is very recent
+    num_adjustments = rng.integers(1, 6, size=len(open_claims))
+    num_adjustments = np.where(days_range < 30, np.minimum(num_adjustments, 2), num_adjustments)
+    # Adjustments need distinct days between the claim date and today
+    num_adjustments = np.where(
+        (days_range > 1) & (num_adjustments < days_range), num_adjustments, 0
+    )
 
-    for _, claim in open_claims.iterrows():
-        # Number of adjustments (1-5)
-        num_adjustments = np.random.randint(1, 6)
-
-        claim_date = claim["claim_date"]
-        today = datetime(2023, 1, 1)
-        days_range = (today - claim_date).days
-
-        # If claim is very recent, fewer adjustments
-        if days_range < 30:
-            num_adjustments = min(num_adjustments, 2)
-
-        # Initial reserve is typically close to claim amount
-        current_reserve = claim["claim_amount"] * np.random.normal(0.9, 0.1)
-        current_reserve = max(current_reserve, 0)
-
-        # Generate adjustment dates, spaced out from claim date to today
-        if days_range > 1 and num_adjustments < days_range:
-            adjustment_days = sorted(
-                np.random.choice(
-                    range(1, days_range),
-                    size=min(num_adjustments, days_range - 1),
-                    replace=False,
-                )
-            )
-            adjustment_dates = [
-                claim_date + timedelta(days=int(day)) for day in adjustment_days
-            ]
-
-            for i, adj_date in enumerate(adjustment_dates):
-                # Previous reserve
-                prev_reserve = current_reserve
-
-                # Direction of adjustment
-                if i < len(adjustment_dates) - 1:
-                    # Earlier adjustments more random
-                    direction = np.random.choice([-1, 1], p=[0.4, 0.6])
-
-                    # Adjustment magnitude (as percentage of previous reserve)
-                    magnitude = np.random.beta(2, 5) * 0.3  # Usually small adjustments
-
-                    # New reserve
-                    current_reserve = prev_reserve * (1 + direction * magnitude)
-                    current_reserve = max(current_reserve, 0)
-                else:
-                    # Last adjustment typically moves closer to final expected payout
-                    if claim["status"] == "Litigation":
-                        # Litigation cases often have higher reserves
-                        expected_payout = claim["claim_amount"] * np.random.normal(
-                            1.2, 0.2
-                        )
-                    else:
-                        expected_payout = claim["claim_amount"] * np.random.normal(
-                            0.95, 0.1
-                        )
-
-                    # Move towards expected payout
-                    current_reserve = prev_reserve * 0.3 + expected_payout * 0.7
-
-                adjustments.append(
-                    {
-                        "claim_id": claim["claim_id"],
-                        "adjustment_date": adj_date,
-                        "previous_reserve": round(prev_reserve, 2),
-                        "new_reserve": round(current_reserve, 2),
-                        "adjustment_amount": round(current_reserve - prev_reserve, 2),
-                        "adjustment_reason": np.random.choice(
-                            [
-                                "New Information",
-                                "Updated Estimate",
-                                "Policy Review",
-                                "Expert Assessment",
-                                "Claim Development",
-                            ]
-                        ),
-                    }
-                )
-
-    adjustments_df = pd.DataFrame(adjustments)
+    # Initial reserve is typically close to claim amount
+    initial_reserve = np.maximum(
+        claim_amounts * rng.normal(0.9, 0.1, len(open_claims)), 0
+    )
+
+    # One row per adjustment, on distinct days sampled without replacement
+    group = np.repeat(np.arange(len(open_claims)), num_adjustments)
+    adjustment_days = rng.integers(1, days_range[group])
+    while True:
+        order = np.lexsort((adjustment_days, group))
+        duplicate = (group[order][1:] == group[order][:-1]) & (
+            adjustment_days[order][1:] == adjustment_days[order][:-1]
+        )
+        if not duplicate.any():
+            break
+        redraw = order[1:][duplicate]
+        adjustment_days[redraw] = rng.integers(1, days_range[group[redraw]])
+    adjustment_days = adjustment_days[order]
+
+    n = len(group)
+    offsets = np.cumsum(num_adjustments) - num_adjustments
+    position = np.arange(n) - np.repeat(offsets, num_adjustments)
+    is_last = position == np.repeat(num_adjustments, num_adjustments) - 1
+
+    # Earlier adjustments are random and usually small (as a percentage of
+    # the previous reserve)
+    direction = np.where(rng.random(n) < 0.4, -1, 1)
+    magnitude = rng.beta(2, 5, n) * 0.3
+    factor = np.where(is_last, 1.0, 1 + direction * magnitude)
+
+    # Previous reserve is the initial reserve compounded by earlier adjustments
+    compounded = pd.Series(factor).groupby(group).cumprod().to_numpy()
+    prev_reserve = initial_reserve[group] * compounded / factor
+
+    # Last adjustment typically moves closer to final expected payout;
+    # litigation cases often have higher reserves
+    litigation = open_claims["status"].to_numpy()[group] == "Litigation"
+    payout_factor = np.where(
+        litigation, rng.normal(1.2, 0.2, n), rng.normal(0.95, 0.1, n)
+    )
+    expected_payout = claim_amounts[group] * payout_factor
+    new_reserve = np.where(
+        is_last, prev_reserve * 0.3 + expected_payout * 0.7, prev_reserve * factor
+    )
+
+    adjustments_df = pd.DataFrame(
+        {
+            "claim_id": open_claims["claim_id"].to_numpy()[group],
+            "adjustment_date": claim_dates[group] + _days(adjustment_days),
+            "previous_reserve": prev_reserve.round(2),
+            "new_reserve": new_reserve.round(2),
+            "adjustment_amount": (new_reserve - prev_reserve).round(2),
+            "adjustment_reason": _choice(
+                rng,
+                [
+                    "New Information",
+                    "Updated Estimate",
+                    "Policy Review",
+                    "Expert Assessment",
+                    "Claim Development",
+                ],
+                n,
+            ),
+        }
+    )
     return adjustments_df
 
 
+def generate_chunk(seed_seq, start_id, size):
+    """Generate every table for policies `start_id` .. `start_id + size - 1`.
+
+    Each chunk draws from its own random stream, so chunks can be generated in
+    any process and the output only depends on the seed and chunk size.
+    Claim ids are returned as chunk-local integers starting at 0.
+    """
+    rng = np.random.default_rng(seed_seq)
+    policies_df = generate_policy_data(size, rng, start_id=start_id)
+    claims_df = _generate_claims(policies_df, rng)
+    return {
+        "policies": policies_df,
+        "claims": claims_df,
+        "risk_factors": generate_risk_factors(policies_df, rng),
+        "payments": generate_payment_history(policies_df, rng),
+        "reserve_adjustments": generate_reserve_adjustments(claims_df, rng),
+    }
+
+
+def generate_chunks(num_policies, seed=SEED, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Yield the tables of each chunk in order, with globally numbered claim ids.
+
+    Chunks are generated by up to `workers` processes, keeping at most two
+    chunks per worker in flight to bound memory.
+    """
+    starts = list(range(0, num_policies, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [
+        (seed_seq, start + 1, min(chunk_size, num_policies - start))
+        for seed_seq, start in zip(seeds, starts)
+    ]
+
+    def with_claim_ids(chunks):
+        next_claim_id = 1
+        for tables in chunks:
+            claims_df = tables["claims"]
+            adjustments_df = tables["reserve_adjustments"]
+            claims_df["claim_id"] = _format_ids("C", claims_df["claim_id"] + next_claim_id, 7)
+            adjustments_df["claim_id"] = _format_ids(
+                "C", adjustments_df["claim_id"].astype("int64") + next_claim_id, 7
+            )
+            next_claim_id += len(claims_df)
+            yield tables
+
+    if workers <= 1:
+        yield from with_claim_ids(generate_chunk(*task) for task in tasks)
+        return
+
+    def ordered_results(executor):
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(generate_chunk, *task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from with_claim_ids(ordered_results(executor))
+
+
+class TableWriter:
+    """Streams DataFrame chunks to a CSV or Parquet file."""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, df):
+        if self.file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = table.cast(self._parquet_writer.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def write_dataset(
+    num_policies,
+    output_dir=".",
+    file_format="csv",
+    seed=SEED,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    workers=1,
+):
+    """Generate the synthetic book chunk by chunk and stream it to disk.
+
+    Returns the number of rows written per table.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    writers = {
+        table: TableWriter(
+            os.path.join(output_dir, f"{OUTPUT_FILES[table]}.{file_format}"), file_format
+        )
+        for table in TABLES
+    }
+    try:
+        for tables in generate_chunks(num_policies, seed, chunk_size, workers):
+            for table, df in tables.items():
+                writers[table].write(df)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return {table: writer.rows for table, writer in writers.items()}
+
+
 # Main execution
 if __name__ == "__main__":
-    # Generate datasets
-    policies_df = generate_policy_data(num_policies)
-    claims_df = generate_claims_data(policies_df)
-    risk_factors_df = generate_risk_factors(policies_df)
-    payments_df = generate_payment_history(policies_df)
-    reserve_adjustments_df = generate_reserve_adjustments(claims_df)
-
-    # Export to CSV
-    policies_df.to_csv("insurance_policies.csv", index=False)
-    claims_df.to_csv("insurance_claims.csv", index=False)
-    risk_factors_df.to_csv("insurance_risk_factors.csv", index=False)
-    payments_df.to_csv("insurance_payments.csv", index=False)
-    reserve_adjustments_df.to_csv("insurance_reserve_adjustments.csv", index=False)
-
-    print(f"Generated {len(policies_df)} policies")
-    print(f"Generated {len(claims_df)} claims")
-    print(f"Generated {len(payments_df)} payment records")
-    print(f"Generated {len(reserve_adjustments_df)} reserve adjustments")
+    parser = argparse.ArgumentParser(description="Generate synthetic actuarial data")
+    parser.add_argument("--policies", type=int, default=num_policies, help="Number of policies")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Policies per chunk"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default=".", help="Directory for the generated files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = write_dataset(
+        args.policies,
+        output_dir=args.output_dir,
+        file_format=args.format,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"Generated {rows['policies']} policies")
+    print(f"Generated {rows['claims']} claims")
+    print(f"Generated {rows['payments']} payment records")
+    print(f"Generated {rows['reserve_adjustments']} reserve adjustments")
+    print(f"Finished in {elapsed:.1f}s ({rows['policies'] / elapsed:,.0f} policies/s)")
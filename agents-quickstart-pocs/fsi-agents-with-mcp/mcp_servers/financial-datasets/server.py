@@ -1,10 +1,14 @@
 import json
 import os
-import httpx
 import logging
 import sys
+from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 
+# Make the helpers shared by all MCP servers importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.http_client import CachedHTTPClient  # noqa: E402
+
 # Configure logging to write to stderr
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +23,27 @@ mcp = FastMCP("financial-datasets")
 # Constants
 FINANCIAL_DATASETS_API_BASE = "https://api.financialdatasets.ai"
 
+# Cache TTLs (seconds) per endpoint. Reported financials change at most
+# quarterly, while snapshots are only reused for a few seconds.
+CACHE_TTLS = {
+    "financials": 24 * 60 * 60,
+    "prices/snapshot": 15,
+    "prices": 15 * 60,
+    "news": 5 * 60,
+    "crypto/prices/tickers": 24 * 60 * 60,
+    "crypto/prices/snapshot": 15,
+    "crypto/prices": 15 * 60,
+}
+
+# Shared pooled client reused by every tool call
+http_client = CachedHTTPClient(
+    name="financial-datasets",
+    base_url=FINANCIAL_DATASETS_API_BASE,
+    rate=float(os.environ.get("FINANCIAL_DATASETS_RATE_LIMIT", "5")),
+    burst=10,
+    ttls=CACHE_TTLS,
+)
+
 
 # Helper function to make API requests
 async def make_request(url: str) -> dict[str, any] | None:
@@ -30,18 +55,16 @@ async def make_request(url: str) -> dict[str, any] | None:
     # Add logging to debug
     logger.info(f"Making request to: {url}")
 
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
+    try:
+        data = await http_client.get_json(url, headers=headers)
 
-            # Log successful response
-            logger.info(f"Received response: {response.status_code}")
+        # Log successful response
+        logger.info("Received response")
 
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error making request: {str(e)}")
-            return {"Error": str(e)}
+        return data
+    except Exception as e:
+        logger.error(f"Error making request: {str(e)}")
+        return {"Error": str(e)}
 
 
 @mcp.tool()
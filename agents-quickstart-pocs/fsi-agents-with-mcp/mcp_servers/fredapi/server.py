@@ -1,13 +1,39 @@
-import httpx
 import os
+import sys
+from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 
+# Make the helpers shared by all MCP servers importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.http_client import CachedHTTPClient  # noqa: E402
+
 # Base URL for FRED API
 FRED_API_BASE = "https://api.stlouisfed.org/fred"
 
 # Initialize the MCP server
 mcp = FastMCP("fred")
 
+# Cache TTLs (seconds) per endpoint. FRED series and release calendars
+# rarely change intraday; category trees almost never change.
+CACHE_TTLS = {
+    "series/observations": 6 * 60 * 60,
+    "series/search": 60 * 60,
+    "category": 24 * 60 * 60,
+    "release/dates": 6 * 60 * 60,
+    "releases": 24 * 60 * 60,
+}
+
+# Shared pooled client reused by every tool call. FRED allows 120 requests
+# per minute per API key.
+http_client = CachedHTTPClient(
+    name="fred",
+    base_url=FRED_API_BASE,
+    rate=2,
+    burst=10,
+    ttls=CACHE_TTLS,
+    ignored_params=("api_key",),
+)
+
 
 # Helper function to call the FRED API and return JSON data
 async def call_fred(endpoint: str, params: dict) -> dict | None:
@@ -20,10 +46,7 @@ async def call_fred(endpoint: str, params: dict) -> dict | None:
     params_with_key.update(params)
     url = f"{FRED_API_BASE}/{endpoint}"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params_with_key, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        return await http_client.get_json(url, params=params_with_key)
     except Exception:
         return None
 
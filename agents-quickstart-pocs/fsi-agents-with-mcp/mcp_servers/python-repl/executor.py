@@ -0,0 +1,534 @@
+import asyncio
+import importlib
+import io
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+
+try:
+    import resource
+except ImportError:  # resource limits are only available on Unix
+    resource = None
+
+
+@dataclass
+class ExecutionLimits:
+    """Resource limits applied to every execution.
+
+    Attributes:
+        timeout: Wall-clock seconds before the worker is killed
+        cpu_seconds: CPU seconds a single execution may consume (RLIMIT_CPU)
+        memory_mb: Address space limit of each worker process (RLIMIT_AS)
+    """
+
+    timeout: float = 120.0
+    cpu_seconds: int = 120
+    memory_mb: int = 4096
+
+    @classmethod
+    def from_env(cls) -> "ExecutionLimits":
+        """Build limits from PYTHON_REPL_* environment variables."""
+        return cls(
+            timeout=float(os.environ.get("PYTHON_REPL_TIMEOUT", cls.timeout)),
+            cpu_seconds=int(os.environ.get("PYTHON_REPL_CPU_SECONDS", cls.cpu_seconds)),
+            memory_mb=int(os.environ.get("PYTHON_REPL_MEMORY_MB", cls.memory_mb)),
+        )
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of running code in a session."""
+
+    output: str = ""
+    errors: str = ""
+    result: str | None = None
+    error: str | None = None
+    cancelled: bool = False
+    timed_out: bool = False
+    session_reset: bool = False
+    variables: dict[str, str] = field(default_factory=dict)
+
+
+WORKER_EXITED = (
+    "The Python worker exited unexpectedly (possibly due to a resource limit). "
+    "The session was reset."
+)
+
+
+class CPULimitExceeded(Exception):
+    """Raised inside a worker when an execution exceeds its CPU budget."""
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+
+class _StreamWriter(io.TextIOBase):
+    """File-like object that forwards writes to the parent process."""
+
+    def __init__(self, conn, job_id: int, stream: str, buffer: io.StringIO):
+        self.conn = conn
+        self.job_id = job_id
+        self.stream = stream
+        self.buffer = buffer
+
+    def write(self, text: str) -> int:
+        if text:
+            self.buffer.write(text)
+            self.conn.send((self.stream, self.job_id, text))
+        return len(text)
+
+
+def _new_namespace() -> dict:
+    return {"__builtins__": __builtins__, "__name__": "__main__"}
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _set_cpu_budget(cpu_seconds: int):
+    """Allow the next execution `cpu_seconds` on top of the CPU already used."""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _run_code(conn, job_id: int, namespace: dict, code: str, limits: ExecutionLimits):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    reply = {"output": "", "errors": "", "result": None, "error": None}
+    try:
+        _set_cpu_budget(limits.cpu_seconds)
+        # Pick up packages installed since the worker started
+        importlib.invalidate_caches()
+        # WARNING: This is a Python REPL that intentionally executes arbitrary code
+        # Only use in trusted environments with proper sandboxing
+        with redirect_stdout(_StreamWriter(conn, job_id, "stdout", stdout)), redirect_stderr(
+            _StreamWriter(conn, job_id, "stderr", stderr)
+        ):
+            exec(code, namespace)  # nosec B102 - intentional for REPL functionality
+
+        if not stdout.getvalue() and not stderr.getvalue():
+            # Try to get the value of the last expression
+            try:
+                last_line = code.strip().split("\n")[-1]
+                # WARNING: Using eval for expression evaluation in REPL context
+                last_value = eval(last_line, namespace)  # nosec B307 - intentional for REPL functionality
+                reply["result"] = repr(last_value)
+            except (SyntaxError, ValueError, NameError):
+                pass
+    except KeyboardInterrupt:
+        reply["cancelled"] = True
+    except Exception:
+        reply["error"] = traceback.format_exc()
+
+    reply["output"] = stdout.getvalue()
+    reply["errors"] = stderr.getvalue()
+    return reply
+
+
+def _worker_main(conn, limits: ExecutionLimits):
+    """Entry point of a worker process.
+
+    Holds one namespace per session and executes requests sent by the parent
+    one at a time, streaming stdout/stderr back as it is written.
+    """
+    # Headless plotting backend for matplotlib-based analysis
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    if resource is not None:
+        memory = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+
+    sessions: dict[str, dict] = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except KeyboardInterrupt:
+            # A cancellation that arrived after the execution had finished
+            continue
+        except EOFError:
+            break
+
+        action, job_id, session_id, payload = message
+        namespace = sessions.setdefault(session_id, _new_namespace())
+
+        try:
+            # The parent starts the job's timeout, and allows it to be interrupted, from here
+            conn.send(("started", job_id, None))
+            if action == "exec":
+                reply = _run_code(conn, job_id, namespace, payload, limits)
+            elif action == "reset":
+                sessions[session_id] = _new_namespace()
+                reply = {}
+            elif action == "variables":
+                reply = {
+                    "variables": {
+                        k: repr(v)
+                        for k, v in namespace.items()
+                        if not k.startswith("_") and k != "__builtins__"
+                    }
+                }
+            else:
+                reply = {"error": f"Unknown action: {action}"}
+            conn.send(("done", job_id, reply))
+        except KeyboardInterrupt:
+            conn.send(("done", job_id, {"cancelled": True}))
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+
+class _Worker:
+    """Handle on a worker process and the job currently sent to it.
+
+    Only one job is sent to a worker at a time (see `busy`), so jobs waiting
+    for the worker stay in the parent, where they can still be cancelled.
+    """
+
+    def __init__(self, ctx, limits: ExecutionLimits, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, limits), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.sessions: set[str] = set()
+        self.jobs: dict[int, asyncio.Queue] = {}
+        self.busy = asyncio.Lock()
+        self.retired = False
+        self.send_lock = threading.Lock()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        """Relay messages from the worker into the per-job asyncio queues."""
+        while True:
+            try:
+                kind, job_id, payload = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            queue = self.jobs.get(job_id)
+            if queue is not None:
+                self.loop.call_soon_threadsafe(queue.put_nowait, (kind, payload))
+
+        # Worker exited: fail everything still waiting on it
+        for queue in list(self.jobs.values()):
+            self.loop.call_soon_threadsafe(queue.put_nowait, ("exit", None))
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def interrupt(self):
+        if self.process.is_alive() and hasattr(signal, "SIGINT") and os.name != "nt":
+            os.kill(self.process.pid, signal.SIGINT)
+            return True
+        return False
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+@dataclass
+class _Job:
+    """A request for a session, from when it is made until it completes."""
+
+    id: int
+    session_id: str
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    worker: _Worker | None = None
+    started: bool = False
+    cancel_requested: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+async def _acquire_unless_cancelled(lock: asyncio.Lock, job: _Job) -> bool:
+    """Wait for `lock`, giving up if `job` is cancelled first.
+
+    Returns:
+        True if the lock was acquired, False if the job was cancelled
+    """
+    acquire = asyncio.ensure_future(lock.acquire())
+    cancelled = asyncio.ensure_future(job.cancel_requested.wait())
+    try:
+        await asyncio.wait({acquire, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        cancelled.cancel()
+        if not acquire.cancel():
+            lock.release()
+        raise
+    cancelled.cancel()
+    if acquire.cancel():
+        return False
+    if job.cancel_requested.is_set():
+        lock.release()
+        return False
+    return True
+
+
+class ExecutionPool:
+    """Pool of worker processes executing REPL code with per-session namespaces.
+
+    Every session is pinned to one worker so its variables persist between
+    calls, while different sessions run in parallel on different workers.
+    A worker runs one execution at a time; the others wait in the pool until
+    it is free, and their timeout only starts when the worker starts them.
+    Executions are bounded by `ExecutionLimits`; a worker that times out or
+    dies is replaced, which discards the sessions it was holding.
+
+    Args:
+        size: Number of worker processes
+        limits: Resource limits applied to every execution
+        cancel_grace: Seconds to wait for an interrupted execution to stop
+            before the worker is killed
+    """
+
+    def __init__(
+        self,
+        size: int | None = None,
+        limits: ExecutionLimits | None = None,
+        cancel_grace: float = 2.0,
+    ):
+        self.size = size or int(
+            os.environ.get("PYTHON_REPL_WORKERS", min(4, os.cpu_count() or 1))
+        )
+        self.limits = limits or ExecutionLimits.from_env()
+        self.cancel_grace = cancel_grace
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: list[_Worker] = []
+        self._session_workers: dict[str, _Worker] = {}
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._jobs: dict[str, list[_Job]] = {}
+        self._job_ids = itertools.count()
+        self._workers_changed = asyncio.Condition()
+        self._start_lock = asyncio.Lock()
+        self._background: set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start the worker processes."""
+        loop = asyncio.get_running_loop()
+        async with self._start_lock:
+            while len(self._workers) < self.size:
+                self._workers.append(
+                    await loop.run_in_executor(None, _Worker, self._ctx, self.limits, loop)
+                )
+
+    async def shutdown(self):
+        """Stop every worker process."""
+        loop = asyncio.get_running_loop()
+        workers, self._workers = self._workers, []
+        self._session_workers.clear()
+        for worker in workers:
+            worker.retired = True
+            await loop.run_in_executor(None, worker.kill)
+
+    async def _worker_for(self, session_id: str) -> _Worker:
+        worker = self._session_workers.get(session_id)
+        if worker is None:
+            if not self._workers:
+                await self.start()
+            # Wait out a replacement if every worker is being replaced
+            async with self._workers_changed:
+                await self._workers_changed.wait_for(
+                    lambda: any(not w.retired for w in self._workers)
+                )
+            # Place new sessions on the least loaded worker
+            worker = min(
+                (w for w in self._workers if not w.retired), key=lambda w: len(w.sessions)
+            )
+            worker.sessions.add(session_id)
+            self._session_workers[session_id] = worker
+        return worker
+
+    async def _replace(self, worker: _Worker):
+        """Kill `worker`, forget its sessions and start a fresh process.
+
+        Stopping and starting processes blocks, so it runs in the default
+        executor rather than on the event loop.
+        """
+        if worker.retired:
+            return
+        worker.retired = True
+        for session_id in worker.sessions:
+            self._session_workers.pop(session_id, None)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.kill)
+        replacement = await loop.run_in_executor(
+            None, _Worker, self._ctx, self.limits, loop
+        )
+        if worker not in self._workers:
+            # The pool was shut down meanwhile
+            await loop.run_in_executor(None, replacement.kill)
+            return
+        self._workers[self._workers.index(worker)] = replacement
+        async with self._workers_changed:
+            self._workers_changed.notify_all()
+
+    def _replace_later(self, worker: _Worker):
+        """Replace `worker` from a callback that cannot await."""
+        task = asyncio.ensure_future(self._replace(worker))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _request(self, session_id: str, action: str, payload=None, on_output=None):
+        job = _Job(next(self._job_ids), session_id)
+        jobs = self._jobs.setdefault(session_id, [])
+        jobs.append(job)
+        try:
+            lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+            if not await _acquire_unless_cancelled(lock, job):
+                return ExecutionResult(cancelled=True)
+            try:
+                worker = await self._worker_for(session_id)
+                if not await _acquire_unless_cancelled(worker.busy, job):
+                    return ExecutionResult(cancelled=True)
+                try:
+                    if worker.retired:
+                        # The worker was killed while this job waited for it
+                        return ExecutionResult(session_reset=True, error=WORKER_EXITED)
+                    return await self._run(worker, job, action, payload, on_output)
+                finally:
+                    worker.busy.release()
+            finally:
+                lock.release()
+        finally:
+            jobs.remove(job)
+            if not jobs:
+                self._jobs.pop(session_id, None)
+
+    async def _run(self, worker: _Worker, job: _Job, action: str, payload, on_output):
+        job.worker = worker
+        worker.jobs[job.id] = job.queue
+        try:
+            try:
+                worker.send((action, job.id, job.session_id, payload))
+            except OSError:
+                await self._replace(worker)
+                return ExecutionResult(session_reset=True, error=WORKER_EXITED)
+            return await self._collect(worker, job, on_output)
+        except asyncio.CancelledError:
+            await self._cancel(worker, job)
+            raise
+        finally:
+            worker.jobs.pop(job.id, None)
+
+    async def _collect(self, worker: _Worker, job: _Job, on_output) -> ExecutionResult:
+        loop = asyncio.get_running_loop()
+        # No deadline until the worker reports that it has started the job
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - loop.time())
+            try:
+                kind, payload = await asyncio.wait_for(job.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self._replace(worker)
+                return ExecutionResult(
+                    timed_out=True,
+                    session_reset=True,
+                    error=f"Execution timed out after {self.limits.timeout:g} seconds. "
+                    "The session was reset.",
+                )
+
+            if kind == "started":
+                job.started = True
+                deadline = loop.time() + self.limits.timeout
+                if job.cancel_requested.is_set():
+                    self._interrupt(job)
+            elif kind in ("stdout", "stderr"):
+                if on_output is not None:
+                    await on_output(kind, payload)
+            elif kind == "done":
+                return ExecutionResult(**payload)
+            elif kind == "exit":
+                await self._replace(worker)
+                return ExecutionResult(session_reset=True, error=WORKER_EXITED)
+
+    def _interrupt(self, job: _Job):
+        """Interrupt a started job, killing its worker if it has not stopped after `cancel_grace`."""
+        worker = job.worker
+        if not worker.interrupt():
+            self._replace_later(worker)
+            return
+
+        def kill_if_still_running():
+            if job.id in worker.jobs:
+                self._replace_later(worker)
+
+        asyncio.get_running_loop().call_later(self.cancel_grace, kill_if_still_running)
+
+    async def _cancel(self, worker: _Worker, job: _Job):
+        """Interrupt the job of a cancelled request, killing the worker if it does not stop."""
+        try:
+            async with asyncio.timeout(self.cancel_grace):
+                if job.started and not worker.interrupt():
+                    raise TimeoutError
+                while True:
+                    kind, _ = await job.queue.get()
+                    if kind == "started" and not worker.interrupt():
+                        raise TimeoutError
+                    if kind in ("done", "exit"):
+                        return
+        except TimeoutError:
+            pass
+        await self._replace(worker)
+
+    async def execute(self, session_id: str, code: str, on_output=None) -> ExecutionResult:
+        """Execute `code` in the namespace of `session_id`.
+
+        Args:
+            session_id: Session whose namespace the code runs in
+            code: Python source to execute
+            on_output: Optional coroutine `on_output(stream, text)` called as
+                stdout/stderr is written
+        """
+        return await self._request(session_id, "exec", code, on_output)
+
+    async def reset(self, session_id: str) -> ExecutionResult:
+        """Clear all variables of `session_id`."""
+        return await self._request(session_id, "reset")
+
+    async def list_variables(self, session_id: str) -> dict[str, str]:
+        """Return the `repr` of every public variable in `session_id`."""
+        result = await self._request(session_id, "variables")
+        return result.variables
+
+    async def cancel(self, session_id: str) -> bool:
+        """Cancel the executions of `session_id`, running or waiting, if any.
+
+        Executions still waiting for the worker are dropped before they run.
+        A running execution is interrupted with a KeyboardInterrupt, which
+        keeps the session's variables. If it has not stopped after
+        `cancel_grace` seconds the worker is killed and the session reset.
+        """
+        jobs = self._jobs.get(session_id)
+        if not jobs:
+            return False
+
+        for job in jobs:
+            if job.cancel_requested.is_set():
+                continue
+            job.cancel_requested.set()
+            # Jobs sent to the worker but not yet started are interrupted once they start
+            if job.started:
+                self._interrupt(job)
+        return True
@@ -1,22 +1,27 @@
 import asyncio
-import io
 import subprocess  # nosec B404 - subprocess needed for system commands
 import re
-from contextlib import redirect_stdout, redirect_stderr
-import traceback
 from mcp.server import Server, NotificationOptions
 from mcp.server.models import InitializationOptions
 import mcp.server.stdio
 import mcp.types as types
 
+from executor import ExecutionPool
+
+DEFAULT_SESSION = "default"
+
+SESSION_ID_PROPERTY = {
+    "type": "string",
+    "description": "Session to use. Each session has its own variables and sessions run in parallel.",
+    "default": DEFAULT_SESSION,
+}
+
 
 class PythonREPLServer:
     def __init__(self):
         self.server = Server("python-repl")
-        # Shared namespace for all executions
-        self.global_namespace = {
-            "__builtins__": __builtins__,
-        }
+        # Worker processes holding one namespace per session
+        self.pool = ExecutionPool()
 
         # Set up handlers using decorators
         @self.server.list_tools()
@@ -47,6 +52,7 @@ class PythonREPLServer:
                             "description": "Reset the Python session (clear all variables)",
                             "default": False,
                         },
+                        "session_id": SESSION_ID_PROPERTY,
                     },
                     "required": ["code"],
                 },
@@ -56,7 +62,19 @@ class PythonREPLServer:
                 description="List all variables in the current session",
                 inputSchema={
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "session_id": SESSION_ID_PROPERTY,
+                    },
+                },
+            ),
+            types.Tool(
+                name="cancel_execution",
+                description="Cancel the code currently running in a session",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "session_id": SESSION_ID_PROPERTY,
+                    },
                 },
             ),
             types.Tool(
@@ -68,7 +86,8 @@ class PythonREPLServer:
                         "package": {
                             "type": "string",
                             "description": "Package name to install (e.g., 'pandas')",
-                        }
+                        },
+                        "session_id": SESSION_ID_PROPERTY,
                     },
                     "required": ["package"],
                 },
@@ -79,9 +98,11 @@ class PythonREPLServer:
         self, name: str, arguments: dict | None
     ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """Handle tool execution requests"""
-        if not arguments:
+        if arguments is None:
             raise ValueError("Missing arguments")
 
+        session_id = arguments.get("session_id") or DEFAULT_SESSION
+
         if name == "execute_python":
             code = arguments.get("code")
             if not code:
@@ -89,52 +110,49 @@ class PythonREPLServer:
 
             # Check if we should reset the session
             if arguments.get("reset", False):
-                self.global_namespace.clear()
-                self.global_namespace["__builtins__"] = __builtins__
+                await self.pool.reset(session_id)
                 return [
                     types.TextContent(
                         type="text", text="Python session reset. All variables cleared."
                     )
                 ]
 
-            # Capture stdout and stderr
-            stdout = io.StringIO()
-            stderr = io.StringIO()
+            # Run the code in a worker process, streaming output as it arrives
+            execution = await self.pool.execute(
+                session_id, code, on_output=self._output_streamer()
+            )
 
-            try:
-                # WARNING: This is a Python REPL that intentionally executes arbitrary code
-                # Only use in trusted environments with proper sandboxing
-                # Execute code with output redirection
-                with redirect_stdout(stdout), redirect_stderr(stderr):
-                    exec(code, self.global_namespace)  # nosec B102 - intentional for REPL functionality
-
-                # Combine output
-                output = stdout.getvalue()
-                errors = stderr.getvalue()
-
-                # Format response
-                result = ""
-                if output:
-                    result += f"Output:\n{output}"
-                if errors:
-                    result += f"\nErrors:\n{errors}"
-                if not output and not errors:
-                    # Try to get the value of the last expression
-                    try:
-                        last_line = code.strip().split("\n")[-1]
-                        # WARNING: Using eval for expression evaluation in REPL context
-                        last_value = eval(last_line, self.global_namespace)  # nosec B307 - intentional for REPL functionality
-                        result = f"Result: {repr(last_value)}"
-                    except (SyntaxError, ValueError, NameError):
-                        result = "Code executed successfully (no output)"
-
-                return [types.TextContent(type="text", text=result)]
-
-            except Exception as e:  # noqa: F841
+            if execution.session_reset:
+                return [types.TextContent(type="text", text=execution.error)]
+
+            if execution.error:
                 # Capture and format any exceptions
-                error_msg = f"Error executing code:\n{traceback.format_exc()}"
+                error_msg = f"Error executing code:\n{execution.error}"
                 return [types.TextContent(type="text", text=error_msg)]
 
+            # Format response
+            result = ""
+            if execution.output:
+                result += f"Output:\n{execution.output}"
+            if execution.errors:
+                result += f"\nErrors:\n{execution.errors}"
+            if execution.cancelled:
+                result += "\nExecution cancelled."
+            elif not execution.output and not execution.errors:
+                if execution.result is not None:
+                    result = f"Result: {execution.result}"
+                else:
+                    result = "Code executed successfully (no output)"
+
+            return [types.TextContent(type="text", text=result)]
+
+        elif name == "cancel_execution":
+            if await self.pool.cancel(session_id):
+                text = f"Cancelling execution in session '{session_id}'."
+            else:
+                text = f"No code is running in session '{session_id}'."
+            return [types.TextContent(type="text", text=text)]
+
         elif name == "install_package":
             package = arguments.get("package")
             if not package:
@@ -149,8 +167,9 @@ class PythonREPLServer:
                 ]
 
             try:
-                # Install package using uv
-                process = subprocess.run(  # nosec B603, B607 - subprocess needed for AWS CLI and agentcore commands
+                # Install package using uv without blocking other sessions
+                process = await asyncio.to_thread(
+                    subprocess.run,  # nosec B603, B607 - subprocess needed for AWS CLI and agentcore commands
                     ["uv", "pip", "install", package],
                     capture_output=True,
                     text=True,
@@ -165,30 +184,23 @@ class PythonREPLServer:
                         )
                     ]
 
-                # Import the package to make it available in the REPL
-                try:
-                    # WARNING: Using exec for package import in REPL context
-                    exec(f"import {package.split('[')[0]}", self.global_namespace)  # nosec B102 - intentional for REPL functionality
-                    return [
-                        types.TextContent(
-                            type="text",
-                            text=f"Successfully installed and imported {package}",
-                        )
-                    ]
-                except ImportError as e:
-                    return [
-                        types.TextContent(
-                            type="text",
-                            text=f"Successfully installed and imported {package}",
-                        )
-                    ]
-                except ImportError as e:
+                # Import the package to make it available in the REPL session
+                execution = await self.pool.execute(
+                    session_id, f"import {package.split('[')[0]}"
+                )
+                if execution.error:
                     return [
                         types.TextContent(
                             type="text",
-                            text=f"Package installed but import failed: {str(e)}",
+                            text=f"Package installed but import failed: {execution.error}",
                         )
                     ]
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=f"Successfully installed and imported {package}",
+                    )
+                ]
 
             except subprocess.CalledProcessError as e:
                 return [
@@ -198,12 +210,8 @@ class PythonREPLServer:
                 ]
 
         elif name == "list_variables":
-            # Filter out builtins and private variables
-            vars_dict = {
-                k: repr(v)
-                for k, v in self.global_namespace.items()
-                if not k.startswith("_") and k != "__builtins__"
-            }
+            # Builtins and private variables are filtered out by the worker
+            vars_dict = await self.pool.list_variables(session_id)
 
             if not vars_dict:
                 return [
@@ -223,21 +231,41 @@ class PythonREPLServer:
         else:
             raise ValueError(f"Unknown tool: {name}")
 
+    def _output_streamer(self):
+        """Return a callback that streams execution output to the client as log messages."""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            return None
+
+        async def on_output(stream: str, text: str):
+            await session.send_log_message(
+                level="error" if stream == "stderr" else "info",
+                data=text,
+                logger="python-repl",
+            )
+
+        return on_output
+
     async def run(self):
         """Run the server"""
-        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="python-repl",
-                    server_version="0.1.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={},
+        await self.pool.start()
+        try:
+            async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    InitializationOptions(
+                        server_name="python-repl",
+                        server_version="0.1.0",
+                        capabilities=self.server.get_capabilities(
+                            notification_options=NotificationOptions(),
+                            experimental_capabilities={},
+                        ),
                     ),
-                ),
-            )
+                )
+        finally:
+            await self.pool.shutdown()
 
 
 async def main():
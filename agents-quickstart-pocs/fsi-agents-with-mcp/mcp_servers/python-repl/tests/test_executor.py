@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executor import ExecutionLimits, ExecutionPool  # noqa: E402
+
+
+class TestExecutionPool(unittest.IsolatedAsyncioTestCase):
+    """Runs real worker processes; a pool of one worker makes sessions queue behind each other."""
+
+    async def asyncSetUp(self):
+        self.pool = ExecutionPool(
+            size=1, limits=ExecutionLimits(timeout=2.0), cancel_grace=1.0
+        )
+        await self.pool.start()
+
+    async def asyncTearDown(self):
+        await self.pool.shutdown()
+
+    async def wait_until_started(self, session_id):
+        while not any(job.started for job in self.pool._jobs.get(session_id, [])):
+            await asyncio.sleep(0.01)
+
+    async def test_cancel_running_execution_keeps_variables(self):
+        await self.pool.execute("a", "x = 1")
+        running = asyncio.create_task(
+            self.pool.execute("a", "import time\nwhile True: time.sleep(0.01)")
+        )
+        await self.wait_until_started("a")
+
+        self.assertTrue(await self.pool.cancel("a"))
+        result = await running
+
+        self.assertTrue(result.cancelled)
+        self.assertFalse(result.session_reset)
+        self.assertEqual((await self.pool.list_variables("a"))["x"], "1")
+
+    async def test_cancel_queued_session_leaves_running_session_alone(self):
+        running = asyncio.create_task(
+            self.pool.execute("a", "import time\ntime.sleep(0.5)\na_done = True")
+        )
+        await self.wait_until_started("a")
+        queued = asyncio.create_task(self.pool.execute("b", "b_ran = True"))
+        await asyncio.sleep(0.1)
+
+        self.assertTrue(await self.pool.cancel("b"))
+        queued_result = await queued
+        running_result = await running
+
+        self.assertTrue(queued_result.cancelled)
+        self.assertFalse(running_result.cancelled)
+        self.assertIsNone(running_result.error)
+        self.assertIn("a_done", await self.pool.list_variables("a"))
+        self.assertNotIn("b_ran", await self.pool.list_variables("b"))
+
+    async def test_time_spent_queued_does_not_count_towards_timeout(self):
+        running = asyncio.create_task(
+            self.pool.execute("a", "import time\ntime.sleep(1.5)\na_done = True")
+        )
+        await self.wait_until_started("a")
+        # Started 1.5s after it was submitted and runs 1s: 2.5s in total, over the 2s timeout
+        queued = asyncio.create_task(
+            self.pool.execute("b", "import time\ntime.sleep(1.0)\nb_done = True")
+        )
+
+        running_result = await running
+        queued_result = await queued
+
+        self.assertFalse(running_result.timed_out)
+        self.assertFalse(queued_result.timed_out)
+        self.assertIsNone(queued_result.error)
+        self.assertIn("a_done", await self.pool.list_variables("a"))
+        self.assertIn("b_done", await self.pool.list_variables("b"))
+
+    async def test_timeout_resets_only_after_running_too_long(self):
+        await self.pool.execute("a", "x = 1")
+        result = await self.pool.execute("a", "import time\ntime.sleep(10)")
+
+        self.assertTrue(result.timed_out)
+        self.assertTrue(result.session_reset)
+        self.assertEqual(await self.pool.list_variables("a"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+logger = logging.getLogger("mcp-http-client")
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Root directory for the on-disk response cache (one sub-directory per server)
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("MCP_HTTP_CACHE_DIR", Path.home() / ".cache" / "fsi-mcp-servers")
+)
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    request consumes one token and waits when the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class ResponseCache:
+    """On-disk JSON response cache with per-entry expiry."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached payload for `key`, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("data")
+
+    def set(self, key: str, data, ttl: float):
+        """Store `data` under `key` for `ttl` seconds."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"expires_at": time.time() + ttl, "data": data}, f)
+            # Atomic replace so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Unable to write cache entry {key}: {str(e)}")
+
+
+class CachedHTTPClient:
+    """Shared, pooled HTTP client for an MCP server.
+
+    Wraps a single long-lived `httpx.AsyncClient` (HTTP/2 when `h2` is
+    installed) with a token-bucket rate limiter, an on-disk response cache
+    with per-endpoint TTLs and coalescing of identical in-flight requests.
+
+    Args:
+        name: Server name, used as the cache sub-directory
+        base_url: API base URL, used to resolve endpoint TTLs
+        rate: Sustained requests per second allowed by the API
+        burst: Maximum number of requests that can be sent back to back
+        ttls: Mapping of endpoint path prefix to cache TTL in seconds. The
+            longest matching prefix wins; endpoints without a match are not cached.
+        ignored_params: Query parameters excluded from the cache key (e.g. API keys)
+        cache_dir: Root directory for the on-disk cache
+        max_connections: Size of the connection pool
+        transport: Optional httpx transport, e.g. `httpx.MockTransport` in tests
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        rate: float,
+        burst: int,
+        ttls: dict[str, float] | None = None,
+        ignored_params: tuple[str, ...] = (),
+        cache_dir: Path | None = None,
+        max_connections: int = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.base_path = urlsplit(base_url).path.rstrip("/")
+        self.limiter = TokenBucket(rate, burst)
+        self.cache = ResponseCache(Path(cache_dir or DEFAULT_CACHE_DIR) / name)
+        self.ignored_params = set(ignored_params)
+        self.max_connections = max_connections
+        # Sort prefixes longest first so the most specific TTL is picked
+        self.ttls = sorted((ttls or {}).items(), key=lambda item: -len(item[0]))
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazily create the pooled client inside the running event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=30.0,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    def ttl_for(self, url: str) -> float:
+        """Return the cache TTL configured for the endpoint of `url`."""
+        path = urlsplit(url).path
+        if path.startswith(self.base_path):
+            path = path[len(self.base_path) :]
+        path = path.strip("/")
+        for prefix, ttl in self.ttls:
+            if path.startswith(prefix.strip("/")):
+                return ttl
+        return 0
+
+    def cache_key(self, url: str, params: dict | None) -> str:
+        """Build a stable cache key from the URL and query parameters."""
+        parts = urlsplit(url)
+        query = sorted(
+            (k, str(v))
+            for k, v in {**dict(parse_qsl(parts.query)), **(params or {})}.items()
+            if k not in self.ignored_params
+        )
+        raw = f"{parts.netloc}{parts.path.rstrip('/')}?{urlencode(query)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get_json(
+        self, url: str, params: dict | None = None, headers: dict | None = None
+    ):
+        """GET `url` and return the decoded JSON body.
+
+        Fresh cached responses are returned without touching the network, and
+        concurrent calls for the same resource share a single upstream request.
+        Errors are raised to the caller and never cached.
+        """
+        key = self.cache_key(url, params)
+        ttl = self.ttl_for(url)
+
+        if ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Cache hit for: {url}")
+                return cached
+
+        # Coalesce identical requests that are already in flight. The request runs
+        # as its own task, so a caller being cancelled never cancels it for the others
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_cache(key, ttl, url, params, headers))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        return await asyncio.shield(task)
+
+    def _request_done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_and_cache(
+        self, key: str, ttl: float, url: str, params: dict | None, headers: dict | None
+    ):
+        data = await self._fetch(url, params, headers)
+        if ttl > 0:
+            self.cache.set(key, data, ttl)
+        return data
+
+    async def _fetch(self, url: str, params: dict | None, headers: dict | None):
+        await self.limiter.acquire()
+        response = await self.client.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.http_client import CachedHTTPClient  # noqa: E402
+
+BASE_URL = "https://api.example.com/v1"
+
+
+class StubAPI:
+    """Handler for `httpx.MockTransport` that records requests and can hold responses back."""
+
+    def __init__(self):
+        self.requests = []
+        self.sent_at = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.sent_at.append(time.monotonic())
+        await self.release.wait()
+        return httpx.Response(200, json={"path": request.url.path, "n": len(self.requests)})
+
+
+class TestCachedHTTPClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.api = StubAPI()
+
+    async def asyncTearDown(self):
+        await self.http.aclose()
+        self.cache_dir.cleanup()
+
+    def make_client(self, rate=100.0, burst=10, ttls=None):
+        self.http = CachedHTTPClient(
+            "test",
+            BASE_URL,
+            rate=rate,
+            burst=burst,
+            ttls=ttls,
+            cache_dir=self.cache_dir.name,
+            transport=httpx.MockTransport(self.api),
+        )
+        return self.http
+
+    async def test_concurrent_identical_requests_share_one_upstream_call(self):
+        http = self.make_client()
+        self.api.release.clear()
+
+        calls = [asyncio.create_task(http.get_json(f"{BASE_URL}/prices", {"ticker": "AMZN"})) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        self.api.release.set()
+        results = await asyncio.gather(*calls)
+
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(results, [{"path": "/v1/prices", "n": 1}] * 5)
+        self.assertEqual(http._in_flight, {})
+
+    async def test_cached_response_is_reused_until_it_expires(self):
+        http = self.make_client(ttls={"series": 60})
+
+        first = await http.get_json(f"{BASE_URL}/series", {"id": "GDP"})
+        cached = await http.get_json(f"{BASE_URL}/series", {"id": "GDP"})
+        with mock.patch("shared.http_client.time.time", return_value=time.time() + 61):
+            expired = await http.get_json(f"{BASE_URL}/series", {"id": "GDP"})
+
+        self.assertEqual(first, cached)
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual(expired["n"], 2)
+
+    async def test_requests_are_paced_by_the_token_bucket(self):
+        http = self.make_client(rate=20.0, burst=2)
+
+        await asyncio.gather(*(http.get_json(f"{BASE_URL}/prices", {"page": page}) for page in range(6)))
+
+        elapsed = [sent_at - self.api.sent_at[0] for sent_at in self.api.sent_at]
+        # The burst goes out at once, then one request every 1/20 s
+        self.assertLess(elapsed[1], 0.03)
+        self.assertGreaterEqual(elapsed[-1], (6 - 2) / 20 - 0.02)
+
+    async def test_cancelling_the_first_caller_does_not_fail_the_others(self):
+        http = self.make_client()
+        self.api.release.clear()
+
+        first = asyncio.create_task(http.get_json(f"{BASE_URL}/prices", {"ticker": "AMZN"}))
+        await asyncio.sleep(0.01)
+        others = [asyncio.create_task(http.get_json(f"{BASE_URL}/prices", {"ticker": "AMZN"})) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        self.api.release.set()
+        results = await asyncio.gather(*others)
+
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(results, [{"path": "/v1/prices", "n": 1}] * 3)
+        self.assertEqual(len(self.api.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Acronym Matcher for Transcript Text
+
+This module compiles the acronym dictionary into a word-level trie so that
+every dictionary term in a transcript segment is found in a single pass,
+including multi-word terms such as "Jumbo Loan".
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Any
+
+# Words are runs of letters/digits, so "Pre-approval" matches "pre approval" and "ARM's" matches ARM
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+
+@dataclass(frozen=True)
+class AcronymMatch:
+    """A dictionary term found in transcript text."""
+    term: str       # Canonical dictionary term
+    text: str       # Text as it appeared in the transcript
+    start: int      # Character offset of the match
+    end: int        # Character offset just past the match
+
+
+class AcronymMatcher:
+    """
+    Finds dictionary terms in text with a word-level trie.
+
+    Matching is case-insensitive, respects word boundaries (ARM does not match
+    "farm") and prefers the longest term at each position ("FHA Loan" over
+    "FHA"). Scanning is linear in the number of words in the text.
+    """
+
+    _TERM = object()  # Trie node key holding the canonical term
+
+    def __init__(self, dictionary: List[Dict[str, Any]]):
+        """Compile the trie from dictionary entries with a 'term' field."""
+        self._root: Dict[Any, Any] = {}
+        self.max_words = 0
+
+        for entry in dictionary:
+            words = [word.upper() for word in WORD_PATTERN.findall(entry['term'])]
+            if not words:
+                continue
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            node[self._TERM] = entry['term']
+            self.max_words = max(self.max_words, len(words))
+
+    def find_all(self, text: str) -> List[AcronymMatch]:
+        """Return every non-overlapping dictionary term in text, left to right."""
+        tokens = [(m.group().upper(), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            longest = None
+            j = i
+            while j < len(tokens) and tokens[j][0] in node:
+                node = node[tokens[j][0]]
+                j += 1
+                if self._TERM in node:
+                    longest = (node[self._TERM], j)
+
+            if longest:
+                term, j = longest
+                start, end = tokens[i][1], tokens[j - 1][2]
+                matches.append(AcronymMatch(term=term, text=text[start:end], start=start, end=end))
+                i = j
+            else:
+                i += 1
+        return matches
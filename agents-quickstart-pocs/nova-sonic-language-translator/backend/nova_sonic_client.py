@@ -37,6 +37,8 @@ class SessionMetrics:
     audio_bytes_sent: int = 0
     transcriptions_count: int = 0
     translations_count: int = 0
+    tool_calls_count: int = 0
+    acronyms_detected: int = 0
     latencies: list = field(default_factory=list)
     last_audio_input_time: float = 0.0
     
@@ -59,6 +61,8 @@ class SessionMetrics:
             'audioBytesSent': self.audio_bytes_sent,
             'transcriptionsCount': self.transcriptions_count,
             'translationsCount': self.translations_count,
+            'toolCallsCount': self.tool_calls_count,
+            'acronymsDetected': self.acronyms_detected,
             'averageLatency': round(self.get_average_latency() * 1000, 2),  # ms
             'lastLatency': round(self.latencies[-1] * 1000, 2) if self.latencies else 0,  # ms
         }
@@ -262,6 +266,15 @@ EXAMPLES:
 The tool tells you whether to preserve the English term or translate it. ALWAYS follow the tool's decision."""
             
             prompt += tool_instructions
+            
+            # Known terms are decided ahead of time, so the tool is only needed for terms not listed here
+            if self.tool_processor:
+                preserved = ', '.join(self.tool_processor.get_preserved_terms())
+                prompt += f"""
+
+PRE-DECIDED TERMS (do NOT call the tool for these, the decision is already made):
+should_translate = FALSE for: {preserved}
+Only call should_translate_acronym for financial or mortgage terms that are NOT in this list."""
         
         return prompt
     
@@ -591,6 +604,7 @@ The tool tells you whether to preserve the English term or translate it. ALWAYS
             
             # Call tool processor
             if self.tool_processor:
+                self.metrics.tool_calls_count += 1
                 result = await self.tool_processor.process_tool_async(tool_name, tool_input)
                 
                 logger.info(f"✅ TOOL EXECUTION COMPLETED: {tool_name}")
@@ -837,6 +851,8 @@ The tool tells you whether to preserve the English term or translate it. ALWAYS
             elif self.role == 'USER':
                 print(f"User (original): {text}")
                 self.metrics.transcriptions_count += 1
+                if self.tool_processor:
+                    self.metrics.acronyms_detected += len(self.tool_processor.find_acronyms(text))
                 
                 if self.on_transcript:
                     self.on_transcript(text, 'user')
@@ -8,9 +8,10 @@ execution for Nova Sonic, enabling intelligent acronym translation decisions.
 import asyncio
 import uuid
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from acronym_dictionary import ACRONYM_DICTIONARY
+from acronym_matcher import AcronymMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,22 @@ class ToolProcessor:
         # Load acronym dictionary into memory
         self.acronym_dictionary = ACRONYM_DICTIONARY
         
+        # Precompute the decision for every known term, keyed by upper-case term
+        self.decisions: Dict[str, Dict[str, Any]] = {
+            entry['term'].upper(): {
+                "success": True,
+                "term": entry['term'],
+                "full_name": entry['full_name'],
+                "definition": entry['definition'],
+                "should_translate": False,  # Preserve known financial acronyms
+                "error": None
+            }
+            for entry in self.acronym_dictionary
+        }
+        
+        # Compile the dictionary for single-pass matching over transcript text
+        self.matcher = AcronymMatcher(self.acronym_dictionary)
+        
         # Set up logging for tool operations
         logger.info(f"ToolProcessor initialized with {len(self.acronym_dictionary)} acronyms")
         logger.debug(f"Loaded acronyms: {[entry['term'] for entry in self.acronym_dictionary]}")
@@ -39,8 +56,8 @@ class ToolProcessor:
         """
         Determine if an acronym should be translated.
         
-        Performs case-insensitive lookup in the acronym dictionary and returns
-        structured information about the term.
+        Performs a case-insensitive lookup in the precomputed decision table and
+        returns structured information about the term.
         
         Args:
             acronym: The acronym to check
@@ -57,20 +74,12 @@ class ToolProcessor:
             }
         """
         # Perform case-insensitive lookup
-        acronym_upper = acronym.upper()
+        decision = self.decisions.get(acronym.strip().upper())
         
-        for entry in self.acronym_dictionary:
-            if entry['term'].upper() == acronym_upper:
-                # Found in dictionary - return full information
-                logger.info(f"Acronym '{acronym}' found in dictionary: {entry['full_name']}")
-                return {
-                    "success": True,
-                    "term": entry['term'],
-                    "full_name": entry['full_name'],
-                    "definition": entry['definition'],
-                    "should_translate": False,  # Preserve known financial acronyms
-                    "error": None
-                }
+        if decision:
+            # Found in dictionary - return full information
+            logger.info(f"Acronym '{acronym}' found in dictionary: {decision['full_name']}")
+            return dict(decision)
         
         # Not found - return default "preserve acronym" response
         logger.warning(f"Acronym '{acronym}' not found in dictionary, preserving as-is")
@@ -83,6 +92,32 @@ class ToolProcessor:
             "error": None
         }
     
+    def find_acronyms(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find every known acronym in a transcript segment in one pass.
+        
+        Args:
+            text: Transcript text
+            
+        Returns:
+            List of matches in order of appearance:
+            [{"term": str, "text": str, "start": int, "end": int, "should_translate": bool}]
+        """
+        return [
+            {
+                "term": match.term,
+                "text": match.text,
+                "start": match.start,
+                "end": match.end,
+                "should_translate": self.decisions[match.term.upper()]["should_translate"]
+            }
+            for match in self.matcher.find_all(text)
+        ]
+    
+    def get_preserved_terms(self) -> List[str]:
+        """Return the dictionary terms that must be kept in their original form."""
+        return [decision["term"] for decision in self.decisions.values() if not decision["should_translate"]]
+    
     async def _run_tool(self, tool_name: str, tool_content: Dict[str, Any]) -> Dict[str, Any]:
         """
         Internal method to execute the tool logic.
@@ -6,21 +6,30 @@ This server enables two browser windows to join the same call:
 - Browser 2: Customer (Spanish speaker)
 
 Each participant's speech is translated and sent to the other participant.
+
+Clients that join with "binaryAudio": true exchange audio as binary WebSocket
+frames: an 8-byte header (version, frame type, sample rate, sequence number,
+big-endian) followed by 16-bit mono PCM. Other clients keep receiving base64
+audio inside JSON text frames.
 """
 
 import asyncio
 import json
 import logging
 import os
+import struct
+import time
 import uuid
 import base64
+from collections import deque
+from dataclasses import dataclass
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 import uvicorn
 
 from nova_sonic_client import NovaSonicTranslator
-from config import is_supported_language, DEFAULT_LANGUAGE
+from config import is_supported_language, DEFAULT_LANGUAGE, INPUT_SAMPLE_RATE, OUTPUT_SAMPLE_RATE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -32,6 +41,152 @@ app = FastAPI(title="Two-Party Translation Server")
 # Active calls
 active_calls = {}
 
+# Binary audio frames: version, frame type, sample rate (Hz), sequence number
+AUDIO_FRAME_HEADER = struct.Struct('!BBHI')
+AUDIO_FRAME_VERSION = 1
+AUDIO_FRAME_PCM16 = 1
+
+# Per-connection backpressure limits
+MAX_QUEUED_AUDIO_BYTES = int(os.getenv("MAX_QUEUED_AUDIO_BYTES", str(OUTPUT_SAMPLE_RATE * 2 * 2)))  # ~2 s of audio
+MAX_QUEUED_MESSAGES = int(os.getenv("MAX_QUEUED_MESSAGES", "200"))
+MAX_AUDIO_FRAME_BYTES = 32 * 1024  # Queued audio is coalesced into frames up to this size
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+
+@dataclass
+class ConnectionMetrics:
+    """Outbound traffic metrics for one participant connection."""
+    audio_frames_sent: int = 0
+    audio_bytes_sent: int = 0
+    audio_chunks_dropped: int = 0
+    audio_bytes_dropped: int = 0
+    messages_sent: int = 0
+    messages_dropped: int = 0
+    max_queued_audio_bytes: int = 0
+    total_queue_delay: float = 0.0
+    max_queue_delay: float = 0.0
+    sends: int = 0
+
+    def record_send(self, queued_at: float):
+        delay = time.monotonic() - queued_at
+        self.sends += 1
+        self.total_queue_delay += delay
+        self.max_queue_delay = max(self.max_queue_delay, delay)
+
+    def to_dict(self) -> dict:
+        return {
+            'audioFramesSent': self.audio_frames_sent,
+            'audioBytesSent': self.audio_bytes_sent,
+            'audioChunksDropped': self.audio_chunks_dropped,
+            'audioBytesDropped': self.audio_bytes_dropped,
+            'messagesSent': self.messages_sent,
+            'messagesDropped': self.messages_dropped,
+            'maxQueuedAudioBytes': self.max_queued_audio_bytes,
+            'averageQueueDelay': round(self.total_queue_delay / self.sends * 1000, 2) if self.sends else 0,  # ms
+            'maxQueueDelay': round(self.max_queue_delay * 1000, 2),  # ms
+        }
+
+
+def encode_audio_frame(sequence: int, pcm: bytes, sample_rate: int = OUTPUT_SAMPLE_RATE) -> bytes:
+    """Build a binary audio frame: header followed by 16-bit PCM."""
+    return AUDIO_FRAME_HEADER.pack(AUDIO_FRAME_VERSION, AUDIO_FRAME_PCM16, sample_rate, sequence & 0xFFFFFFFF) + pcm
+
+
+def decode_audio_frame(frame: bytes) -> bytes:
+    """Return the PCM payload of a binary audio frame, or raise ValueError."""
+    if len(frame) < AUDIO_FRAME_HEADER.size:
+        raise ValueError("Audio frame is shorter than its header")
+    version, frame_type, sample_rate, _ = AUDIO_FRAME_HEADER.unpack_from(frame)
+    if version != AUDIO_FRAME_VERSION or frame_type != AUDIO_FRAME_PCM16:
+        raise ValueError(f"Unsupported audio frame version {version} type {frame_type}")
+    if sample_rate != INPUT_SAMPLE_RATE:
+        raise ValueError(f"Audio must be {INPUT_SAMPLE_RATE} Hz, got {sample_rate} Hz")
+    return frame[AUDIO_FRAME_HEADER.size:]
+
+
+class ParticipantConnection:
+    """Outbound side of one participant's WebSocket.
+
+    Messages and audio are queued without blocking the producer, and a single
+    sender task writes them in order as soon as it is woken, so nothing is
+    polled. Messages (transcripts, control) are small and never reordered, so
+    they go first; audio is coalesced into larger frames when it backs up.
+    When a client cannot keep up, the oldest audio is dropped beyond
+    MAX_QUEUED_AUDIO_BYTES, and a send that takes longer than SEND_TIMEOUT
+    closes the connection.
+    """
+
+    def __init__(self, ws: WebSocket, user_id: str, binary_audio: bool = False):
+        self.ws = ws
+        self.user_id = user_id
+        self.binary_audio = binary_audio
+        self.metrics = ConnectionMetrics()
+        self._messages = deque()  # (queued_at, dict)
+        self._audio = deque()  # (queued_at, pcm bytes)
+        self._queued_audio_bytes = 0
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+
+    def send_message(self, data: dict):
+        """Queue a JSON message."""
+        self._messages.append((time.monotonic(), data))
+        if len(self._messages) > MAX_QUEUED_MESSAGES:
+            self._messages.popleft()
+            self.metrics.messages_dropped += 1
+        self._wakeup.set()
+
+    def send_audio(self, audio_bytes: bytes):
+        """Queue PCM audio, dropping the oldest audio if the client has fallen too far behind."""
+        self._audio.append((time.monotonic(), audio_bytes))
+        self._queued_audio_bytes += len(audio_bytes)
+        while self._queued_audio_bytes > MAX_QUEUED_AUDIO_BYTES and len(self._audio) > 1:
+            _, dropped = self._audio.popleft()
+            self._queued_audio_bytes -= len(dropped)
+            self.metrics.audio_chunks_dropped += 1
+            self.metrics.audio_bytes_dropped += len(dropped)
+        self.metrics.max_queued_audio_bytes = max(self.metrics.max_queued_audio_bytes, self._queued_audio_bytes)
+        self._wakeup.set()
+
+    def clear_audio(self):
+        """Drop all queued audio (barge-in)."""
+        self._audio.clear()
+        self._queued_audio_bytes = 0
+
+    def _next_audio(self):
+        """Coalesce queued audio chunks into one payload of up to MAX_AUDIO_FRAME_BYTES."""
+        queued_at, pcm = self._audio.popleft()
+        parts = [pcm]
+        size = len(pcm)
+        while self._audio and size + len(self._audio[0][1]) <= MAX_AUDIO_FRAME_BYTES:
+            parts.append(self._audio.popleft()[1])
+            size += len(parts[-1])
+        self._queued_audio_bytes -= size
+        return queued_at, b''.join(parts)
+
+    async def run(self):
+        """Send queued messages and audio until cancelled."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._messages or self._audio:
+                if self._messages:
+                    queued_at, data = self._messages.popleft()
+                    await asyncio.wait_for(self.ws.send_text(json.dumps(data)), SEND_TIMEOUT)
+                    self.metrics.messages_sent += 1
+                else:
+                    queued_at, pcm = self._next_audio()
+                    if self.binary_audio:
+                        await asyncio.wait_for(self.ws.send_bytes(encode_audio_frame(self._sequence, pcm)), SEND_TIMEOUT)
+                    else:
+                        await asyncio.wait_for(self.ws.send_text(json.dumps({
+                            'type': 'audio',
+                            'audioData': base64.b64encode(pcm).decode('utf-8')
+                        })), SEND_TIMEOUT)
+                    self._sequence += 1
+                    self.metrics.audio_frames_sent += 1
+                    self.metrics.audio_bytes_sent += len(pcm)
+                self.metrics.record_send(queued_at)
+
 
 class TwoPartyCall:
     """Manages a 2-party translation call between LO (English) and Customer (Spanish)."""
@@ -42,7 +197,7 @@ class TwoPartyCall:
         self.forward_tasks = {}  # ws -> asyncio.Task
         logger.info(f"Created call: {call_id}")
     
-    async def add_participant(self, ws: WebSocket, user_id: str, target_language: str):
+    async def add_participant(self, ws: WebSocket, user_id: str, target_language: str, binary_audio: bool = False):
         """Add participant to call with target language only (source auto-detected)."""
         if len(self.participants) >= 2:
             raise Exception("Call already has 2 participants")
@@ -58,18 +213,14 @@ class TwoPartyCall:
         # NOTE: This translator processes audio FROM the other participant and translates
         # it into this participant's target_language. So the translated output should be
         # sent back to THIS participant (the translator's owner).
+        # The translator calls these synchronously from its response loop; they only
+        # enqueue onto the participant's connection, so no task is created per chunk.
         translator = NovaSonicTranslator(
             source_language='auto',  # Always auto-detect
             target_language=target_language,
-            on_audio_output=lambda audio, ws=ws: asyncio.create_task(
-                self._queue_audio_for_same(ws, audio)  # Send translated audio to THIS participant (the listener)
-            ),
-            on_transcript=lambda text, role, ws=ws, user_id=user_id: asyncio.create_task(
-                self._queue_transcript(ws, user_id, text, role)
-            ),
-            on_language_detected=lambda lang, ws=ws: asyncio.create_task(
-                self._notify_language_detected(ws, lang)
-            ),
+            on_audio_output=lambda audio, ws=ws: self._queue_audio_for_same(ws, audio),  # Send translated audio to THIS participant (the listener)
+            on_transcript=lambda text, role, ws=ws, user_id=user_id: self._queue_transcript(ws, user_id, text, role),
+            on_language_detected=lambda lang, ws=ws: self._notify_language_detected(ws, lang),
             on_error=lambda e: logger.error(f"Nova error for {user_id}: {e}")
         )
         
@@ -82,81 +233,66 @@ class TwoPartyCall:
             'user_id': user_id,
             'target_language': target_language,
             'translator': translator,
-            'audio_queue': asyncio.Queue(),
-            'text_queue': asyncio.Queue()
+            'connection': ParticipantConnection(ws, user_id, binary_audio)
         }
         
         # Start forwarding task
         self.forward_tasks[ws] = asyncio.create_task(self._forward_responses(ws))
         
-        logger.info(f"✓ {user_id} joined call {self.call_id}: auto → {target_language}")
+        logger.info(f"✓ {user_id} joined call {self.call_id}: auto → {target_language}"
+                    f"{' (binary audio)' if binary_audio else ''}")
         return len(self.participants)
     
-    async def _notify_language_detected(self, ws: WebSocket, language: str):
+    def send_message(self, ws: WebSocket, data: dict):
+        """Queue a JSON message for a participant, in order with everything else sent to them."""
+        participant = self.participants.get(ws)
+        if participant:
+            participant['connection'].send_message(data)
+    
+    def _notify_language_detected(self, ws: WebSocket, language: str):
         """Send language detection notification to frontend."""
         participant = self.participants.get(ws)
         if participant:
-            await participant['text_queue'].put({
+            participant['connection'].send_message({
                 'type': 'language_detected',
                 'language': language
             })
             logger.info(f"Notified {participant['user_id']} of detected language: {language}")
     
-    async def _queue_audio_for_same(self, owner_ws, audio_bytes: bytes):
+    def _interrupt(self, participant: dict):
+        """Drop a participant's queued audio and tell the frontend to stop playback."""
+        participant['connection'].clear_audio()
+        participant['connection'].send_message({
+            'type': 'interrupted',
+            'message': 'clear_audio_queue'
+        })
+        logger.info(f"🛑 Sent interruption signal to {participant['user_id']}")
+    
+    def _queue_audio_for_same(self, owner_ws, audio_bytes: bytes):
         """Queue translated audio to be sent back to the same participant who spoke."""
-        # Check for interruption signal
-        if audio_bytes == b'__INTERRUPTED__':
-            logger.info("🛑 Received interruption signal - clearing audio queue")
-            participant = self.participants.get(owner_ws)
-            if participant:
-                # Clear the queue
-                while not participant['audio_queue'].empty():
-                    try:
-                        participant['audio_queue'].get_nowait()
-                    except asyncio.QueueEmpty:
-                        break
-                
-                # Send interruption signal to frontend
-                await participant['text_queue'].put({
-                    'type': 'interrupted',
-                    'message': 'clear_audio_queue'
-                })
-                logger.info(f"🛑 Sent interruption signal to {participant['user_id']}")
-            return
-        
         participant = self.participants.get(owner_ws)
         if not participant:
             logger.warning("Participant not found")
             return
         
-        user_id = participant['user_id']
+        # Check for interruption signal
+        if audio_bytes == b'__INTERRUPTED__':
+            logger.info("🛑 Received interruption signal - clearing audio queue")
+            self._interrupt(participant)
+            return
         
         # Queue audio for the same participant (translation of their own speech)
-        await participant['audio_queue'].put(audio_bytes)
-        logger.info(f"🔊 Queued {len(audio_bytes)} bytes translated audio for {user_id}")
+        participant['connection'].send_audio(audio_bytes)
+        logger.debug(f"🔊 Queued {len(audio_bytes)} bytes translated audio for {participant['user_id']}")
     
-    async def _queue_audio_for_other(self, sender_ws, audio_bytes: bytes):
+    def _queue_audio_for_other(self, sender_ws, audio_bytes: bytes):
         """Queue audio to be sent to the other participant."""
         # Check for interruption signal
         if audio_bytes == b'__INTERRUPTED__':
             logger.info("🛑 Received interruption signal - clearing audio queues")
-            
-            # Clear audio queues for all participants
             for ws, participant in self.participants.items():
                 if ws != sender_ws:
-                    # Clear the queue
-                    while not participant['audio_queue'].empty():
-                        try:
-                            participant['audio_queue'].get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                    
-                    # Send interruption signal to frontend
-                    await participant['text_queue'].put({
-                        'type': 'interrupted',
-                        'message': 'clear_audio_queue'
-                    })
-                    logger.info(f"🛑 Sent interruption signal to {participant['user_id']}")
+                    self._interrupt(participant)
             return
         
         sender = self.participants.get(sender_ws)
@@ -167,19 +303,16 @@ class TwoPartyCall:
         sender_id = sender['user_id']
         queued_count = 0
         
-        # Debug: Log total participants
-        logger.info(f"🔊 Audio from {sender_id}, total participants: {len(self.participants)}")
-        
         for ws, participant in self.participants.items():
             if ws != sender_ws:
-                await participant['audio_queue'].put(audio_bytes)
+                participant['connection'].send_audio(audio_bytes)
                 queued_count += 1
-                logger.info(f"🔊 Queued {len(audio_bytes)} bytes audio from {sender_id} for {participant['user_id']}")
+                logger.debug(f"🔊 Queued {len(audio_bytes)} bytes audio from {sender_id} for {participant['user_id']}")
         
         if queued_count == 0:
             logger.warning(f"⚠️ No other participant to send audio to (only {sender_id} in call)")
     
-    async def _queue_transcript(self, translator_owner_ws, owner_user_id: str, text: str, role: str):
+    def _queue_transcript(self, translator_owner_ws, owner_user_id: str, text: str, role: str):
         """Queue transcript to be sent to participants.
         
         The translator_owner_ws is the participant whose translator produced this output.
@@ -222,9 +355,14 @@ class TwoPartyCall:
                 'language': owner.get('target_language', 'en-US')
             }
         
+        # Annotate known acronyms locally so clients can highlight them without a tool call
+        tool_processor = getattr(owner.get('translator'), 'tool_processor', None)
+        if tool_processor:
+            transcript_data['acronyms'] = tool_processor.find_acronyms(text)
+        
         # Send to all participants
-        for ws, participant in self.participants.items():
-            await participant['text_queue'].put(transcript_data)
+        for participant in self.participants.values():
+            participant['connection'].send_message(transcript_data)
     
     async def _forward_responses(self, ws: WebSocket):
         """Forward queued responses to WebSocket."""
@@ -236,52 +374,28 @@ class TwoPartyCall:
         logger.info(f"Started forward task for {user_id}")
         
         try:
-            while True:
-                # Check audio queue
-                try:
-                    audio_bytes = await asyncio.wait_for(
-                        participant['audio_queue'].get(),
-                        timeout=0.05
-                    )
-                    audio_msg = json.dumps({
-                        'type': 'audio',
-                        'audioData': base64.b64encode(audio_bytes).decode('utf-8')
-                    })
-                    await ws.send_text(audio_msg)
-                    logger.info(f"✅ Sent {len(audio_bytes)} bytes audio to {user_id}")
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Check text queue
-                try:
-                    text_data = await asyncio.wait_for(
-                        participant['text_queue'].get(),
-                        timeout=0.05
-                    )
-                    await ws.send_text(json.dumps(text_data))
-                    logger.info(f"📝 Sent transcript to {user_id}: {text_data.get('text', '')[:50]}")
-                except asyncio.TimeoutError:
-                    pass
-                
-                await asyncio.sleep(0.01)
-        
+            await participant['connection'].run()
         except asyncio.CancelledError:
             logger.info(f"Forward task cancelled for {user_id}")
+        except asyncio.TimeoutError:
+            # The client stopped reading; closing unblocks its receive loop, which cleans up
+            logger.warning(f"Send to {user_id} timed out after {SEND_TIMEOUT}s, closing connection")
+            try:
+                await ws.close()
+            except Exception:
+                pass
         except Exception as e:
             logger.error(f"Error forwarding to {user_id}: {e}")
     
-    async def process_audio(self, ws: WebSocket, audio_base64: str):
+    async def process_audio(self, ws: WebSocket, audio_bytes: bytes):
         """Process audio from participant by sending it to the OTHER participant's translator.
         
         This is the key routing logic: Speaker A's audio needs to be translated into
         Speaker B's target language, so it must be processed by Speaker B's translator.
         """
-        sender = self.participants.get(ws)
-        if not sender:
+        if ws not in self.participants:
             return
         
-        audio_bytes = base64.b64decode(audio_base64)
-        
         # Send audio to the OTHER participant's translator
         # Speaker A's speech → Speaker B's translator (which translates to Speaker B's target language)
         for other_ws, other_participant in self.participants.items():
@@ -294,6 +408,7 @@ class TwoPartyCall:
         if participant:
             user_id = participant['user_id']
             logger.info(f"Removing {user_id} from call {self.call_id}")
+            logger.info(f"Connection metrics for {user_id}: {participant['connection'].metrics.to_dict()}")
             
             # Cancel forward task
             if ws in self.forward_tasks:
@@ -305,20 +420,24 @@ class TwoPartyCall:
             del self.participants[ws]
             
             # Notify remaining participant
-            for other_ws in self.participants:
-                try:
-                    await other_ws.send_text(json.dumps({
-                        'type': 'participant_left',
-                        'userId': user_id
-                    }))
-                except:
-                    pass
+            for other in self.participants.values():
+                other['connection'].send_message({
+                    'type': 'participant_left',
+                    'userId': user_id
+                })
     
     def is_empty(self):
         return len(self.participants) == 0
     
     def get_participant_count(self):
         return len(self.participants)
+    
+    def get_metrics(self):
+        """Outbound connection metrics per participant."""
+        return {
+            participant['user_id']: participant['connection'].metrics.to_dict()
+            for participant in self.participants.values()
+        }
 
 
 # HTTP Health Check Endpoint
@@ -343,10 +462,18 @@ async def root():
         "service": "Two-Party Translation Server",
         "version": "1.0.0",
         "websocket_endpoint": "/ws",
-        "health_endpoint": "/health"
+        "health_endpoint": "/health",
+        "metrics_endpoint": "/metrics"
     }
 
 
+# Metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """Per-connection outbound metrics for every active call."""
+    return {call_id: call.get_metrics() for call_id, call in active_calls.items()}
+
+
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -356,10 +483,23 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         while True:
-            message = await websocket.receive_text()
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(message.get('code', 1000))
+            
+            # Binary frames carry microphone audio
+            if message.get('bytes') is not None:
+                if current_call_id and current_call_id in active_calls:
+                    try:
+                        audio_bytes = decode_audio_frame(message['bytes'])
+                    except ValueError as e:
+                        logger.error(f"Invalid audio frame: {e}")
+                        continue
+                    await active_calls[current_call_id].process_audio(websocket, audio_bytes)
+                continue
             
             try:
-                data = json.loads(message)
+                data = json.loads(message.get('text') or '')
                 msg_type = data.get('type')
                 
                 # Handle join request
@@ -367,6 +507,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     call_id = data.get('callId', str(uuid.uuid4())[:8])
                     user_id = data.get('userId', 'anonymous')
                     target_language = data.get('targetLanguage', DEFAULT_LANGUAGE)
+                    binary_audio = bool(data.get('binaryAudio', False))
                     
                     # Get or create call
                     if call_id not in active_calls:
@@ -374,17 +515,19 @@ async def websocket_endpoint(websocket: WebSocket):
                     
                     try:
                         count = await active_calls[call_id].add_participant(
-                            websocket, user_id, target_language
+                            websocket, user_id, target_language, binary_audio
                         )
                         current_call_id = call_id
                         
-                        await websocket.send_text(json.dumps({
+                        # Sent through the participant's queue so it cannot interleave with its sender task
+                        active_calls[call_id].send_message(websocket, {
                             'type': 'joined',
                             'callId': call_id,
                             'userId': user_id,
                             'targetLanguage': target_language,
+                            'binaryAudio': binary_audio,
                             'participantCount': count
-                        }))
+                        })
                         
                         logger.info(f"✅ {user_id} joined call {call_id} ({count}/2 participants)")
                     
@@ -397,8 +540,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Handle audio input
                 elif msg_type == 'audio':
                     if current_call_id and current_call_id in active_calls:
-                        audio_data = data.get('audioData', '')
-                        await active_calls[current_call_id].process_audio(websocket, audio_data)
+                        audio_bytes = base64.b64decode(data.get('audioData', ''))
+                        await active_calls[current_call_id].process_audio(websocket, audio_bytes)
                 
                 # Handle leave
                 elif msg_type == 'leave':
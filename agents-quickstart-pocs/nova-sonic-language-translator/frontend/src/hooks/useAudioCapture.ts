@@ -2,7 +2,7 @@ import { useEffect, useRef, useState, useCallback } from 'react';
 
 interface UseAudioCaptureConfig {
   enabled: boolean;
-  onAudioData: (audioData: string) => void;
+  onAudioData: (audioData: ArrayBuffer) => void;
   sampleRate?: number;
 }
 
@@ -20,7 +20,7 @@ interface UseAudioCaptureReturn {
  * - Requests microphone access with echo cancellation and noise suppression
  * - Resamples audio to target sample rate (default 16kHz)
  * - Converts Float32 audio to PCM Int16 format
- * - Base64 encodes audio data for transmission
+ * - Hands raw PCM to the caller, which sends it as a binary WebSocket frame
  */
 export function useAudioCapture(
   config: UseAudioCaptureConfig
@@ -68,9 +68,9 @@ export function useAudioCapture(
   );
 
   /**
-   * Convert Float32 audio data to PCM Int16 format and base64 encode
+   * Convert Float32 audio data to PCM Int16 format
    */
-  const encodePCM = useCallback((float32Data: Float32Array): string => {
+  const encodePCM = useCallback((float32Data: Float32Array): ArrayBuffer => {
     const int16Data = new Int16Array(float32Data.length);
 
     // Convert Float32 (-1.0 to 1.0) to Int16 (-32768 to 32767)
@@ -79,14 +79,7 @@ export function useAudioCapture(
       int16Data[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
     }
 
-    // Convert Int16Array to Uint8Array for base64 encoding
-    const uint8Array = new Uint8Array(int16Data.buffer);
-    let binary = '';
-    for (let i = 0; i < uint8Array.length; i++) {
-      binary += String.fromCharCode(uint8Array[i]);
-    }
-
-    return btoa(binary);
+    return int16Data.buffer;
   }, []);
 
   /**
@@ -138,7 +131,7 @@ export function useAudioCapture(
           sampleRate
         );
 
-        // Encode to PCM Int16 and base64
+        // Encode to PCM Int16
         const encodedData = encodePCM(resampledData);
 
         // Send encoded audio data using ref to avoid recreating startCapture
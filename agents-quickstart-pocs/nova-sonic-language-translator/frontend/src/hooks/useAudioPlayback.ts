@@ -1,7 +1,7 @@
 import { useRef, useState, useCallback, useEffect } from 'react';
 
 interface UseAudioPlaybackReturn {
-  queueAudio: (audioData: string) => void;
+  queueAudio: (audioData: string | ArrayBuffer) => void;
   stopPlayback: () => void;
   isPlaying: boolean;
   queueLength: number;
@@ -13,7 +13,7 @@ interface UseAudioPlaybackReturn {
  * Features:
  * - Creates AudioContext with 24kHz sample rate
  * - Maintains queue of audio buffers
- * - Decodes base64 audio to PCM Int16 to Float32
+ * - Decodes binary (or legacy base64) PCM Int16 audio to Float32
  * - Schedules sequential playback without gaps
  * - Resumes AudioContext if suspended
  */
@@ -47,20 +47,26 @@ export function useAudioPlayback(): UseAudioPlaybackReturn {
   }, []);
 
   /**
-   * Decode base64 audio data to Float32Array
-   * Converts: base64 -> binary -> PCM Int16 -> Float32
+   * Decode PCM audio data to Float32Array
+   * Converts: ArrayBuffer (or base64 -> binary) -> PCM Int16 -> Float32
    */
-  const decodeAudio = useCallback((base64Data: string): Float32Array => {
-    // Decode base64 to binary string
-    const binaryString = atob(base64Data);
-    const bytes = new Uint8Array(binaryString.length);
-
-    for (let i = 0; i < binaryString.length; i++) {
-      bytes[i] = binaryString.charCodeAt(i);
+  const decodeAudio = useCallback((audioData: string | ArrayBuffer): Float32Array => {
+    let pcm: ArrayBuffer;
+    if (typeof audioData === 'string') {
+      // Decode base64 to binary string
+      const binaryString = atob(audioData);
+      const bytes = new Uint8Array(binaryString.length);
+
+      for (let i = 0; i < binaryString.length; i++) {
+        bytes[i] = binaryString.charCodeAt(i);
+      }
+      pcm = bytes.buffer;
+    } else {
+      pcm = audioData;
     }
 
-    // Convert Uint8Array to Int16Array (PCM format)
-    const int16Array = new Int16Array(bytes.buffer);
+    // View the bytes as Int16 samples (PCM format)
+    const int16Array = new Int16Array(pcm, 0, pcm.byteLength >> 1);
 
     // Convert Int16 (-32768 to 32767) to Float32 (-1.0 to 1.0)
     const float32Array = new Float32Array(int16Array.length);
@@ -162,7 +168,7 @@ export function useAudioPlayback(): UseAudioPlaybackReturn {
    * Queue audio data for playback
    */
   const queueAudio = useCallback(
-    (audioData: string) => {
+    (audioData: string | ArrayBuffer) => {
       // Check for clear queue signal
       if (audioData === '__CLEAR_QUEUE__') {
         console.log('🛑 Clearing audio queue due to barge-in');
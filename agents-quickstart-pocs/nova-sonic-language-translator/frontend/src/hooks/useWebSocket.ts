@@ -7,11 +7,17 @@ import type {
   WebSocketMessage,
 } from '../types';
 
+// Binary audio frames: version (u8), frame type (u8), sample rate (u16), sequence (u32), big-endian, then PCM16
+const AUDIO_FRAME_HEADER_BYTES = 8;
+const AUDIO_FRAME_VERSION = 1;
+const AUDIO_FRAME_PCM16 = 1;
+const INPUT_SAMPLE_RATE = 16000;
+
 interface UseWebSocketConfig {
   url: string;
   onJoined?: (data: { callId: string; participantCount: number }) => void;
   onTranscript?: (message: TranscriptMessage) => void;
-  onAudio?: (audioData: string) => void;
+  onAudio?: (audioData: string | ArrayBuffer) => void;
   onLanguageDetected?: (language: LanguageLocale) => void;
   onParticipantLeft?: (userId: string) => void;
   onError?: (message: string) => void;
@@ -22,7 +28,7 @@ interface UseWebSocketReturn {
   participantCount: number;
   sessionId: string | null;
   join: (callId: string, userId: string, targetLanguage: LanguageLocale) => void;
-  sendAudio: (audioData: string) => void;
+  sendAudio: (audioData: ArrayBuffer) => void;
   leave: () => void;
 }
 
@@ -44,6 +50,7 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
   const isConnectingRef = useRef(false); // Prevent double connection in React Strict Mode
+  const audioSequenceRef = useRef(0);
 
   // Establish WebSocket connection
   useEffect(() => {
@@ -73,6 +80,7 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
         setStatus('connecting');
         const wsUrl = `${url}?token=${encodeURIComponent(token)}`;
         const ws = new WebSocket(wsUrl);
+        ws.binaryType = 'arraybuffer';
         wsRef.current = ws;
 
         // Handle connection open
@@ -99,8 +107,13 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
           }
         };
 
-        // Handle incoming messages (will be implemented in next subtask)
+        // Handle incoming messages
         ws.onmessage = (event) => {
+          // Binary frames carry translated audio
+          if (event.data instanceof ArrayBuffer) {
+            handleAudioFrame(event.data);
+            return;
+          }
           try {
             const message: WebSocketMessage = JSON.parse(event.data);
             handleMessage(message);
@@ -134,6 +147,25 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
     };
   }, [url]);
 
+  // Binary audio frame handler - validate the header and route the PCM payload
+  const handleAudioFrame = useCallback(
+    (frame: ArrayBuffer) => {
+      if (frame.byteLength < AUDIO_FRAME_HEADER_BYTES) {
+        console.error('Audio frame is shorter than its header');
+        return;
+      }
+      const header = new DataView(frame);
+      if (header.getUint8(0) !== AUDIO_FRAME_VERSION || header.getUint8(1) !== AUDIO_FRAME_PCM16) {
+        console.error('Unsupported audio frame', header.getUint8(0), header.getUint8(1));
+        return;
+      }
+      if (onAudio) {
+        onAudio(frame.slice(AUDIO_FRAME_HEADER_BYTES));
+      }
+    },
+    [onAudio]
+  );
+
   // Message handler - parse and route incoming messages
   const handleMessage = useCallback(
     (message: WebSocketMessage) => {
@@ -227,6 +259,7 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
         callId,
         userId,
         targetLanguage,
+        binaryAudio: true,
       };
 
       try {
@@ -242,21 +275,25 @@ export function useWebSocket(config: UseWebSocketConfig): UseWebSocketReturn {
     [onError]
   );
 
-  // Send audio data
+  // Send audio data as a binary frame (header + PCM16)
   const sendAudio = useCallback(
-    (audioData: string) => {
+    (audioData: ArrayBuffer) => {
       if (!wsRef.current || wsRef.current.readyState !== WebSocket.OPEN) {
         console.error('WebSocket is not connected');
         return;
       }
 
-      const message: WebSocketMessage = {
-        type: 'audio',
-        audioData,
-      };
+      const frame = new Uint8Array(AUDIO_FRAME_HEADER_BYTES + audioData.byteLength);
+      const header = new DataView(frame.buffer);
+      header.setUint8(0, AUDIO_FRAME_VERSION);
+      header.setUint8(1, AUDIO_FRAME_PCM16);
+      header.setUint16(2, INPUT_SAMPLE_RATE);
+      header.setUint32(4, audioSequenceRef.current);
+      audioSequenceRef.current = (audioSequenceRef.current + 1) >>> 0;
+      frame.set(new Uint8Array(audioData), AUDIO_FRAME_HEADER_BYTES);
 
       try {
-        wsRef.current.send(JSON.stringify(message));
+        wsRef.current.send(frame);
       } catch (error) {
         console.error('Failed to send audio data:', error);
         if (onError) {
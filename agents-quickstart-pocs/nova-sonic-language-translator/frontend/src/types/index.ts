@@ -45,7 +45,7 @@ export interface TranscriptMessage {
 
 // WebSocket message types (discriminated union)
 export type WebSocketMessage =
-  | { type: 'join'; callId: string; userId: string; targetLanguage: LanguageLocale }
+  | { type: 'join'; callId: string; userId: string; targetLanguage: LanguageLocale; binaryAudio?: boolean }
   | { type: 'joined'; callId: string; participantCount: number; targetLanguage: LanguageLocale }
   | { type: 'language_detected'; language: LanguageLocale }
   | { type: 'audio'; audioData: string }
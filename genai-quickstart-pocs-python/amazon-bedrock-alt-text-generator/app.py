@@ -47,6 +47,14 @@ def image_box(alt_text_result):
                         f"alt_text_result['page'] = {alt_text_result['page']} with type {type(alt_text_result['page'])}"
                     )
                     col2.write(f"Page Number: **{int(alt_text_result['page']) + 1}**")
+                if len(alt_text_result.get("occurrences", ())) > 1:
+                    other_pages = sorted(
+                        {page + 1 for page, _ in alt_text_result["occurrences"]}
+                    )
+                    col2.write(
+                        f"Appears **{len(alt_text_result['occurrences'])} times**, on pages: "
+                        + ", ".join(str(page) for page in other_pages)
+                    )
                 if "metadata" in alt_text_result:
                     metadata = alt_text_result["metadata"]["usage"]
                     col2.write(f"Metadata:")
@@ -96,8 +104,12 @@ if st.session_state["prompt_data"] is not None:
                     status.update(label="Data ready for inference!", state="complete")
 
             if "prompt_data" in st.session_state and st.session_state["prompt_data"]:
+                occurrence_count = sum(
+                    len(task["occurrences"]) for task in st.session_state["prompt_data"]
+                )
                 st.write(
-                    f"#### There are **{len(st.session_state['prompt_data'])} images** in this PDF."
+                    f"#### There are **{occurrence_count} images** in this PDF, "
+                    f"**{len(st.session_state['prompt_data'])} unique**."
                 )
                 if st.button(
                     "Start Inference",
@@ -105,8 +117,17 @@ if st.session_state["prompt_data"] is not None:
                     on_click=set_inference_started,
                 ):
                     try:
+                        progress_bar = st.progress(0.0, text="Generating alt text...")
+
+                        def show_progress(progress):
+                            progress_bar.progress(
+                                (progress.completed + progress.failed) / progress.total,
+                                text=f"Generated {progress.completed} of {progress.total} "
+                                f"(concurrency {progress.concurrency}, {progress.retries} retries)",
+                            )
+
                         st.session_state["full_result"] = generator.run_inference(
-                            st.session_state["prompt_data"], image_box
+                            st.session_state["prompt_data"], image_box, show_progress
                         )
                         st.session_state["inference_started"] = True
                         logger.debug("Inference started")
@@ -1,10 +1,7 @@
 import streamlit as st
 import json
 from pydantic import BaseModel, Field
-import concurrent.futures
 import boto3
-from botocore.exceptions import ClientError
-import time
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.messages import (
     HumanMessage,
@@ -12,11 +9,16 @@ from langchain_core.messages import (
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_aws import ChatBedrock
 import base64
+import hashlib
+import math
 import os
+import threading
 import fitz
 import logging
 from uuid import uuid4
 
+from pdf_image_alt_text_generator.request_scheduler import RequestScheduler
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -24,6 +26,19 @@ session = boto3.Session(region_name="us-east-1")
 
 MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
 
+# Images are downscaled so their longest side is at most this many pixels before being sent to the model
+MAX_IMAGE_DIMENSION = 1568
+# Generated alt text is cached here by image content and page context, so re-running a PDF is free
+CACHE_DIR = os.path.join("files", "alt_text_cache")
+
+# Upper bound on concurrent model calls; the scheduler backs off below it when throttled
+MAX_CONCURRENCY = int(os.environ.get("ALT_TEXT_MAX_CONCURRENCY", 8))
+# Optional tokens-per-minute budget, e.g. the account's Bedrock quota for MODEL_ID
+TOKENS_PER_MINUTE = int(os.environ.get("ALT_TEXT_TOKENS_PER_MINUTE", 0)) or None
+
+# PyMuPDF is not thread-safe, so images are extracted one at a time
+_pdf_lock = threading.Lock()
+
 
 class ModelOutput(BaseModel):
     altText: str = Field(description="The generated alt text")
@@ -54,129 +69,169 @@ def load_pdf(file_path):
 
 
 def load_pdf_images(file_path):
+    """
+    Finds every image occurrence in the PDF without decoding it.
+    Each occurrence is keyed by a hash of the image's raw stream bytes, so the same image
+    repeated across pages (a logo, a header) is recognised as one image.
+    returns:
+        list: One entry per occurrence with its page, image index, xref and content hash
+    """
     logger.debug(f"Loading PDF images from {file_path}")
     image_map = []
-    pdf_file = fitz.open(file_path)
-    images_path = os.path.join(file_path, "images").replace(".pdf", "_pdf")
-    if not os.path.exists(images_path):
-        os.makedirs(images_path)
-
-    for page_index in range(len(pdf_file)):
-        page = pdf_file[page_index]
-        image_list = page.get_images(full=True)
-
-        for image_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = fitz.Pixmap(pdf_file, xref)
-            if base_image.colorspace.name not in (
-                "DeviceGray",
-                "DeviceRGB",
-                "DeviceCMYK",
-            ):
-                base_image = fitz.Pixmap(fitz.csRGB, base_image)  # Convert to RGB
-
-            image_bytes = base_image.tobytes("jpg")
-            base64_image = base64.b64encode(image_bytes).decode("utf-8")
-
-            # Check for duplicates before appending
-            if not any(
-                d["page"] == page_index and d["image_index"] == image_index
-                for d in image_map
-            ):
+    xref_hashes = {}
+    with fitz.open(file_path) as pdf_file:
+        for page_index in range(len(pdf_file)):
+            page = pdf_file[page_index]
+            image_list = page.get_images(full=True)
+
+            for image_index, img in enumerate(image_list):
+                xref = img[0]
+                # The same xref drawn on many pages is hashed once
+                if xref not in xref_hashes:
+                    xref_hashes[xref] = hashlib.sha256(
+                        pdf_file.xref_stream_raw(xref)
+                    ).hexdigest()
                 image_map.append(
                     {
                         "page": page_index,
                         "image_index": image_index,
-                        "image": base64_image,
+                        "xref": xref,
+                        "hash": xref_hashes[xref],
+                        "file_path": file_path,
                     }
                 )
-            else:
-                logger.warning(
-                    f"Duplicate image found on page {page_index + 1}, image index {image_index + 1}"
-                )
 
-    logger.debug(f"Returning image_map with {len(image_map)} unique images")
+    logger.debug(
+        f"Returning image_map with {len(image_map)} images, "
+        f"{len(set(image['hash'] for image in image_map))} unique"
+    )
     return image_map
 
 
+def encode_image(file_path, xref):
+    """
+    Extracts an image from the PDF, downscales it to MAX_IMAGE_DIMENSION and encodes it as base64 JPEG.
+    Called when the image is submitted to the model, so only images in flight are held in memory.
+    """
+    with _pdf_lock:
+        with fitz.open(file_path) as pdf_file:
+            base_image = fitz.Pixmap(pdf_file, xref)
+        if base_image.colorspace.name not in (
+            "DeviceGray",
+            "DeviceRGB",
+            "DeviceCMYK",
+        ):
+            base_image = fitz.Pixmap(fitz.csRGB, base_image)  # Convert to RGB
+
+        longest_side = max(base_image.width, base_image.height)
+        if longest_side > MAX_IMAGE_DIMENSION:
+            # shrink() halves the size n times
+            base_image.shrink(math.ceil(math.log2(longest_side / MAX_IMAGE_DIMENSION)))
+
+        image_bytes = base_image.tobytes("jpg")
+    return base64.b64encode(image_bytes).decode("utf-8")
+
+
 def prep_data_for_model(pdf_data, image_map) -> list:
     """
-    Calls the LLM to generate alt text for the images
-    The process is parallelized to improve performance
+    Builds one model task per unique image, with the page text around its first occurrence as context.
+    Every occurrence of the image is listed on the task so the result can be fanned out to all of them.
     returns:
-        list: A list of results from the LLM calls
+        list: A list of tasks for the LLM calls
     """
     data = []
+    tasks_by_hash = {}
     print(f"Image map contains {len(image_map)} images")
     for image in image_map:
+        occurrence = (int(image.get("page")), image.get("image_index"))
+        if image["hash"] in tasks_by_hash:
+            tasks_by_hash[image["hash"]]["occurrences"].append(occurrence)
+            continue
+
         page_num = image.get("page")
         start_page = max(0, page_num - 1)
         end_page = min(len(pdf_data), page_num + 2)
         page_context = pdf_data[start_page:end_page]
         page_content = "\n".join(str(item.page_content) for item in page_context)
-        data.append(
-            {
-                "page": int(image.get("page")),
-                "image_index": image.get("image_index"),
-                "image": image.get("image"),
-                "pages": page_content,
-            }
-        )
+        task = {
+            "page": int(image.get("page")),
+            "image_index": image.get("image_index"),
+            "hash": image["hash"],
+            "xref": image["xref"],
+            "file_path": image["file_path"],
+            "occurrences": [occurrence],
+            "pages": page_content,
+        }
+        tasks_by_hash[image["hash"]] = task
+        data.append(task)
+    # Occurrences are final once the whole image map has been seen
+    for task in data:
+        task["occurrences"] = tuple(task["occurrences"])
+    print(f"Prepared {len(data)} tasks for {len(image_map)} images")
     return data
 
 
-def run_inference(tasks, callback, pause_time=60, max_retries=5):
+def expand_occurrences(result):
+    """
+    Copies a result for a unique image to every page/index the image occurs at.
+    returns:
+        list: One result per occurrence
+    """
+    if result is None:
+        return [None]
+    return [
+        {**result, "page": page, "image_index": image_index}
+        for page, image_index in result.get("occurrences", ((result["page"], result["image_index"]),))
+    ]
+
+
+def estimate_tokens(task):
+    # A full-size image is about 1,600 input tokens; the prompt and answer add the rest
+    return 2500
+
+
+def actual_tokens(result):
+    if result is None:
+        return None
+    if result.get("cached"):
+        return 0
+    return result.get("metadata", {}).get("usage", {}).get("total_tokens")
+
+
+def run_inference(tasks, callback, on_progress=None, max_retries=5, tokens_per_minute=None):
+    """
+    Generates alt text for every task, calling callback with each result as soon as it is ready.
+    Throttled requests are retried with their own backoff while the other requests keep running,
+    and concurrency adapts to how much Bedrock accepts.
+    """
     logger.debug("Starting run_inference")
     try:
         results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            logger.debug("Submitting chains for execution")
-            futures = {
-                executor.submit(execute_chain, task): tuple(task.items())
-                for task in tasks
-            }
-            retries = {tuple(task.items()): 0 for task in tasks}
-            while futures:
-                done, _ = concurrent.futures.wait(
-                    futures, return_when=concurrent.futures.FIRST_COMPLETED
-                )
-                for future in done:
-                    task_tuple = futures[future]
-                    task = dict(task_tuple)  # Convert back to dictionary
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        callback(result)
-                        del futures[future]
-                    except ClientError as e:
-                        if e.response["Error"]["Code"] == "ThrottlingException":
-                            retries[task_tuple] += 1
-                            if retries[task_tuple] <= max_retries:
-                                backoff_time = pause_time * (
-                                    2 ** (retries[task_tuple] - 1)
-                                )
-                                logger.warning(
-                                    f"Throttling exception encountered. Pausing for {backoff_time} seconds before retrying."
-                                )
-                                time.sleep(backoff_time)
-                                futures[executor.submit(execute_chain, task)] = (
-                                    task_tuple
-                                )
-                            else:
-                                logger.error(
-                                    f"Max retries reached for task {task}. Skipping."
-                                )
-                            del futures[future]
-                        else:
-                            logger.error(f"Error running inference (A): {e}")
-                            raise e
-                    except Exception as e:
-                        logger.error(f"Error running inference (B): {e}")
-                        raise e
+
+        def on_result(task, result):
+            results.extend(expand_occurrences(result))
+            callback(result)
+
+        scheduler = RequestScheduler(
+            max_concurrency=MAX_CONCURRENCY,
+            max_retries=max_retries,
+            tokens_per_minute=tokens_per_minute or TOKENS_PER_MINUTE,
+            estimate_tokens=estimate_tokens,
+            actual_tokens=actual_tokens,
+        )
+        scheduler.run(
+            tasks,
+            execute_chain,
+            on_result=on_result,
+            on_error=lambda task, e: logger.error(
+                f"Error running inference for image on page {task['page']}: {e}"
+            ),
+            on_progress=on_progress,
+        )
         st.session_state["inference_completed"] = True
         return results
     except Exception as e:
-        logger.error(f"Error running inference (C): {e}")
+        logger.error(f"Error running inference: {e}")
         raise e
 
 
@@ -208,30 +263,90 @@ def get_prompt(image, pages, parser):
     )
 
 
+def get_cache_path(task):
+    """
+    Returns the cache file for a task, keyed by model, image content and page context
+    """
+    key = hashlib.sha256(
+        "\n".join([MODEL_ID, task["hash"], task["pages"]]).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def load_cached_result(task, image):
+    cache_path = get_cache_path(task)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable cache entry {cache_path}: {e}")
+        return None
+    logger.debug(f"Using cached alt text for image {task['hash']}")
+    return {
+        **build_result(task, image, cached["alt_text"], cached["score"], cached["metadata"]),
+        "cached": True,
+    }
+
+
+def save_cached_result(task, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(get_cache_path(task), "w") as f:
+        json.dump(
+            {
+                "alt_text": result["alt_text"],
+                "score": result["score"],
+                "metadata": result["metadata"],
+            },
+            f,
+            default=str,
+        )
+
+
+def build_result(task, image, alt_text, score, metadata):
+    return {
+        "page": int(task["page"]),
+        "image_index": task["image_index"],
+        "occurrences": task["occurrences"],
+        "alt_text": alt_text,
+        "score": score,
+        "image": f"data:image/jpeg;base64,{image}",
+        "metadata": metadata,
+    }
+
+
 def execute_chain(task):
     """
-    Returns a langchain chain for the LLM call
+    Returns the alt text for a unique image, from the cache or from an LLM call.
+    The image is extracted and encoded only now, when the task is executed.
     """
-    pages, image = task["pages"], task["image"]
+    image = encode_image(task["file_path"], task["xref"])
+    cached = load_cached_result(task, image)
+    if cached is not None:
+        return cached
+
+    pages = task["pages"]
     llm = ChatBedrock(model_id=MODEL_ID)
     prompt = get_prompt(image, pages, parser)
     response = llm.invoke([prompt])
-    return parse_llm_response(response, task)
+    result = parse_llm_response(response, task, image)
+    if result is not None:
+        save_cached_result(task, result)
+    return result
 
 
-def parse_llm_response(llm_response, task):
+def parse_llm_response(llm_response, task, image):
     try:
         trimmed_response = strip_text_around_braces(llm_response.content)
         parsed_response = parser.parse(trimmed_response)
-        time.sleep(1)
-        return {
-            "page": int(task["page"]),
-            "image_index": task["image_index"],
-            "alt_text": parsed_response.altText,
-            "score": parsed_response.score,
-            "image": f"data:image/jpeg;base64,{task['image']}",
-            "metadata": llm_response.response_metadata,
-        }
+        return build_result(
+            task,
+            image,
+            parsed_response.altText,
+            parsed_response.score,
+            llm_response.response_metadata,
+        )
     except Exception as e:
         logger.error(f"Error parsing response: {e}")
 
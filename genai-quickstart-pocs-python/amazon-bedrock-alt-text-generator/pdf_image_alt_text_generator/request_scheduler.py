@@ -0,0 +1,256 @@
+"""
+Adaptive-concurrency scheduler for Amazon Bedrock requests.
+
+Requests run on a thread pool, but every decision and callback happens on the
+caller's thread, so callbacks may safely update a UI:
+
+- Concurrency follows AIMD: it grows by one after a window of successful
+  requests and is cut by a factor after throttling, at most once per window so
+  a burst of throttles from the same wave does not collapse it.
+- A throttled request is re-queued with its own jittered exponential backoff.
+  Nothing sleeps while it waits, so other requests keep running and results
+  keep being delivered.
+- An optional tokens-per-minute budget holds requests back until enough tokens
+  have been refilled, and is corrected with the actual usage when known.
+
+The module only depends on the standard library, so it can be copied into
+other POCs that fan requests out to Bedrock.
+"""
+
+import concurrent.futures
+import heapq
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ModelNotReadyException",
+)
+
+
+def is_throttling_error(error):
+    """
+    Returns True if the exception signals throttling, either as a botocore ClientError
+    or as an error that wraps one in its message (as LangChain does).
+    """
+    # Only botocore errors carry a dict; e.g. requests.HTTPError.response is a Response object
+    response = getattr(error, "response", None)
+    if isinstance(response, dict) and response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+        return True
+    message = str(error)
+    return any(code in message for code in THROTTLING_ERROR_CODES) or "Too many requests" in message
+
+
+@dataclass
+class SchedulerProgress:
+    """Snapshot passed to the progress callback."""
+
+    total: int
+    completed: int
+    failed: int
+    in_flight: int
+    waiting: int
+    concurrency: int
+    throttles: int
+    retries: int
+
+
+class TokenBucket:
+    """Tokens-per-minute budget that refills continuously."""
+
+    def __init__(self, tokens_per_minute, clock=time.monotonic):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens):
+        """
+        Takes tokens if available.
+        returns:
+            float: 0 if acquired, otherwise seconds until enough tokens will be available
+        """
+        self._refill()
+        # A request larger than the whole budget may go once the bucket is full
+        tokens = min(tokens, self.capacity)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def adjust(self, tokens):
+        """Charges (positive) or refunds (negative) the difference between estimated and actual usage."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - tokens)
+
+
+class RequestScheduler:
+    """
+    Runs fn(task) for every task with adaptive concurrency and non-blocking retries.
+
+    args:
+        max_concurrency: upper bound on requests in flight (and pool size)
+        initial_concurrency: concurrency to start with
+        min_concurrency: lower bound after throttling
+        decrease_factor: multiplier applied to concurrency after throttling
+        max_retries: throttling retries per task before it fails
+        base_backoff / max_backoff: seconds for the jittered exponential backoff
+        tokens_per_minute: optional token budget; requests are held back to stay within it
+        estimate_tokens: fn(task) -> expected tokens, used with tokens_per_minute
+        actual_tokens: fn(result) -> tokens actually used, or None if unknown
+        is_throttle: fn(exception) -> bool
+    """
+
+    def __init__(
+        self,
+        max_concurrency=16,
+        initial_concurrency=4,
+        min_concurrency=1,
+        decrease_factor=0.5,
+        max_retries=5,
+        base_backoff=2.0,
+        max_backoff=60.0,
+        tokens_per_minute=None,
+        estimate_tokens=None,
+        actual_tokens=None,
+        is_throttle=is_throttling_error,
+        clock=time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.budget = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self.estimate_tokens = estimate_tokens or (lambda task: 1000)
+        self.actual_tokens = actual_tokens
+        self.is_throttle = is_throttle
+        self.clock = clock
+        self.throttles = 0
+        self.retries = 0
+        self.errors = {}
+        self._last_decrease_at = float("-inf")
+
+    @property
+    def limit(self):
+        return max(self.min_concurrency, int(self.concurrency))
+
+    def _on_success(self):
+        # Additive increase: +1 after roughly one window of successes
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.limit)
+
+    def _on_throttle(self, submitted_at):
+        self.throttles += 1
+        # Multiplicative decrease, once per window: requests sent before the last cut were
+        # sent at the old rate, so their throttles are not new information
+        if submitted_at >= self._last_decrease_at:
+            self.concurrency = max(float(self.min_concurrency), self.concurrency * self.decrease_factor)
+            self._last_decrease_at = self.clock()
+            logger.warning(f"Throttled by Bedrock, reducing concurrency to {self.limit}")
+
+    def _backoff(self, attempt):
+        # Full jitter keeps retries from synchronising into another burst
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def run(self, tasks, fn, on_result=None, on_error=None, on_progress=None):
+        """
+        Runs all tasks and returns their results in task order (None for failed tasks).
+        on_result(task, result), on_error(task, exception) and on_progress(SchedulerProgress)
+        are called on the calling thread as soon as each event happens.
+        """
+        tasks = list(tasks)
+        results = [None] * len(tasks)
+        # (ready_at, index, attempt)
+        waiting = [(self.clock(), index, 0) for index in range(len(tasks))]
+        heapq.heapify(waiting)
+        in_flight = {}  # future -> (index, attempt, submitted_at, estimated_tokens)
+        completed = failed = 0
+
+        def progress():
+            if on_progress:
+                on_progress(SchedulerProgress(
+                    total=len(tasks), completed=completed, failed=failed,
+                    in_flight=len(in_flight), waiting=len(waiting), concurrency=self.limit,
+                    throttles=self.throttles, retries=self.retries,
+                ))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while waiting or in_flight:
+                # Submit everything that is due, within the concurrency limit and token budget
+                wake_at = None
+                while waiting and len(in_flight) < self.limit:
+                    ready_at, index, attempt = waiting[0]
+                    now = self.clock()
+                    if ready_at > now:
+                        wake_at = ready_at
+                        break
+                    estimate = self.estimate_tokens(tasks[index])
+                    if self.budget:
+                        wait = self.budget.try_acquire(estimate)
+                        if wait > 0:
+                            wake_at = now + wait
+                            break
+                    heapq.heappop(waiting)
+                    future = executor.submit(fn, tasks[index])
+                    in_flight[future] = (index, attempt, now, estimate)
+
+                if not in_flight:
+                    # Only backed-off or budget-limited tasks remain
+                    time.sleep(max(0.0, wake_at - self.clock()) if wake_at else 0.0)
+                    continue
+
+                timeout = max(0.0, wake_at - self.clock()) if wake_at else None
+                done, _ = concurrent.futures.wait(
+                    in_flight, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index, attempt, submitted_at, estimate = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if self.is_throttle(e) and attempt < self.max_retries:
+                            self._on_throttle(submitted_at)
+                            self.retries += 1
+                            if self.budget:
+                                self.budget.adjust(-estimate)
+                            delay = self._backoff(attempt)
+                            logger.info(f"Retrying task {index} in {delay:.1f}s (attempt {attempt + 2})")
+                            heapq.heappush(waiting, (self.clock() + delay, index, attempt + 1))
+                        else:
+                            if self.is_throttle(e):
+                                self._on_throttle(submitted_at)
+                                logger.error(f"Max retries reached for task {index}. Skipping.")
+                            else:
+                                logger.error(f"Error running task {index}: {e}")
+                            failed += 1
+                            self.errors[index] = e
+                            if on_error:
+                                on_error(tasks[index], e)
+                        progress()
+                        continue
+
+                    self._on_success()
+                    if self.budget and self.actual_tokens:
+                        used = self.actual_tokens(result)
+                        if used is not None:
+                            self.budget.adjust(used - estimate)
+                    completed += 1
+                    results[index] = result
+                    if on_result:
+                        on_result(tasks[index], result)
+                    progress()
+        return results
@@ -0,0 +1,95 @@
+import threading
+import unittest
+
+from pdf_image_alt_text_generator.request_scheduler import RequestScheduler, is_throttling_error
+
+
+class FakeClock:
+    """Advances one tick every time it is read, so backed-off tasks become due without sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.now += 1.0
+            return self.now
+
+
+class ThrottlingError(Exception):
+    def __init__(self):
+        super().__init__("An error occurred (ThrottlingException) when calling the InvokeModel operation")
+        self.response = {"Error": {"Code": "ThrottlingException"}}
+
+
+class FakeThrottlingClient:
+    """Throttles the first `throttled_calls` requests, then answers every request."""
+
+    def __init__(self, throttled_calls):
+        self.throttled_calls = throttled_calls
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def describe(self, task):
+        with self.lock:
+            self.calls += 1
+            throttle = self.calls <= self.throttled_calls
+        if throttle:
+            raise ThrottlingError()
+        return f"alt text for {task}"
+
+
+class HTTPErrorWithResponseObject(Exception):
+    """Like requests.HTTPError, whose response is a Response object rather than a dict."""
+
+    def __init__(self):
+        super().__init__("500 Server Error")
+        self.response = object()
+
+
+class TestIsThrottlingError(unittest.TestCase):
+    def test_botocore_throttling_error(self):
+        self.assertTrue(is_throttling_error(ThrottlingError()))
+
+    def test_error_with_non_dict_response(self):
+        self.assertFalse(is_throttling_error(HTTPErrorWithResponseObject()))
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def test_concurrency_decreases_once_per_throttled_wave_and_recovers(self):
+        client = FakeThrottlingClient(throttled_calls=8)
+        scheduler = RequestScheduler(
+            max_concurrency=8, initial_concurrency=8, base_backoff=0, clock=FakeClock()
+        )
+        limits = []
+
+        results = scheduler.run(
+            range(40), client.describe, on_progress=lambda progress: limits.append(progress.concurrency)
+        )
+
+        self.assertEqual(results, [f"alt text for {task}" for task in range(40)])
+        self.assertEqual(scheduler.throttles, 8)
+        self.assertEqual(scheduler.retries, 8)
+        # The whole first wave was throttled, but concurrency is halved only once
+        self.assertEqual(min(limits), 4)
+        self.assertGreater(limits[-1], min(limits))
+
+    def test_non_throttling_error_fails_the_task(self):
+        def fn(task):
+            if task == 1:
+                raise HTTPErrorWithResponseObject()
+            return task
+
+        errors = []
+        scheduler = RequestScheduler(clock=FakeClock())
+
+        results = scheduler.run(range(3), fn, on_error=lambda task, error: errors.append(task))
+
+        self.assertEqual(results, [0, None, 2])
+        self.assertEqual(errors, [1])
+        self.assertEqual(scheduler.throttles, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
 import os
 from dotenv import load_dotenv
 import boto3
+import botocore
 import json
+import re
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 
 
 # Loading environment variables
@@ -17,9 +22,27 @@ bedrock_client = boto3.client(
     aws_session_token=os.getenv("AWS_SESSION_TOKEN") # Comment this line if you are not using temporary session token
 )
 
+# Athena client shared by all queries; adaptive retries back off when Athena throttles
+athena_client = boto3.client(
+    'athena',
+    region_name=os.getenv('region_name'),
+    config=botocore.config.Config(retries={'mode': 'adaptive', 'max_attempts': 10})
+)
+
 # Define Bedrock Model
 MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
 
+# Results of identical queries are reused for this many seconds, locally and by Athena itself
+QUERY_CACHE_TTL_SECONDS = int(os.getenv('query_cache_ttl_seconds', 300))
+# Number of query results kept in the local cache
+QUERY_CACHE_MAX_ENTRIES = 64
+# Rows read from Athena per query; larger results are truncated
+MAX_RESULT_ROWS = 100000
+# Rows included in the answer prompt; larger results are summarized
+MAX_PROMPT_ROWS = 50
+# Longest value included in the answer prompt
+MAX_PROMPT_VALUE_CHARS = 200
+
 # Executing the SQL database chain with the users question
 def get_athena_query(question):
     """
@@ -163,7 +186,7 @@ def get_athena_answer(question, query):
     :return: The final answer in natural langauge along with the generated SQL query.
     """
 
-    athena_query_answer = execute_athena_query(query)
+    athena_query_answer = format_results_for_prompt(execute_athena_query(query))
     
     prompt_data = """
         <Instructions>
@@ -221,42 +244,228 @@ def get_athena_answer(question, query):
 
     return answer
 
-def execute_athena_query(query):
+@dataclass
+class QueryResult:
+    """
+    Result of an Athena query: column names, rows of values (strings, or None for NULL),
+    and whether the rows were truncated at MAX_RESULT_ROWS.
+    """
+    query_execution_id: str
+    columns: list
+    rows: list = field(default_factory=list)
+    truncated: bool = False
+    data_scanned_bytes: int = 0
+    cached: bool = False
+
+
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def normalize_sql(query):
+    """
+    Normalize a SQL query so that queries differing only in whitespace, letter case outside of
+    string literals, or a trailing semicolon share a cache entry.
+    :param query: SQL query
+    :return: The normalized query
+    """
+    # Odd parts are string literals and are kept as they are
+    parts = re.split(r"('(?:[^']|'')*')", query.strip().rstrip(';').strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).lower()
+        for i, part in enumerate(parts)
+    )
+
+
+def execute_athena_query(query, cache_ttl=QUERY_CACHE_TTL_SECONDS, max_rows=MAX_RESULT_ROWS):
+    """
+    This function is used to run the Amazon Athena query, reusing the result of an identical
+    query run within the last cache_ttl seconds
+    :param query: SQL query
+    :param cache_ttl: seconds a result may be reused for; 0 disables reuse
+    :param max_rows: maximum number of rows read from the result
+    :return: QueryResult with all rows of the Athena query, up to max_rows
     """
-    This function is used to run the Amazon Athena query 
-    :return: Answer from athena query
-    """         
-    client = boto3.client('athena', region_name=os.getenv('region_name'))
     database = os.getenv('database_name')
-    s3_output = os.getenv('s3_staging_dir')
-    # Start the query execution
-    response = client.start_query_execution(
-        QueryString=query,
-        QueryExecutionContext={
+    cache_key = (database, normalize_sql(query))
+    if cache_ttl:
+        with _query_cache_lock:
+            cached = _query_cache.get(cache_key)
+            if cached and cached[0] > time.monotonic():
+                _query_cache.move_to_end(cache_key)
+                return copy_result(cached[1], cached=True)
+
+    query_execution_id = start_athena_query(query, database, cache_ttl)
+    execution = wait_for_athena_query(query_execution_id)
+    result = read_athena_results(query_execution_id, max_rows, has_header_row(execution))
+    result.data_scanned_bytes = execution.get('Statistics', {}).get('DataScannedInBytes', 0)
+
+    if cache_ttl:
+        with _query_cache_lock:
+            _query_cache[cache_key] = (time.monotonic() + cache_ttl, copy_result(result))
+            _query_cache.move_to_end(cache_key)
+            while len(_query_cache) > QUERY_CACHE_MAX_ENTRIES:
+                _query_cache.popitem(last=False)
+    return result
+
+
+def copy_result(result, cached=False):
+    """
+    Copy a QueryResult with its own columns and rows, so that changing a result
+    returned to a caller never changes the cached one
+    """
+    return QueryResult(
+        query_execution_id=result.query_execution_id,
+        columns=list(result.columns),
+        rows=[list(row) for row in result.rows],
+        truncated=result.truncated,
+        data_scanned_bytes=result.data_scanned_bytes,
+        cached=cached,
+    )
+
+
+def has_header_row(execution):
+    """
+    Athena returns the column names as the first row of SELECT results only
+    :param execution: QueryExecution of the query
+    """
+    return (execution.get('StatementType') == 'DML'
+            and execution.get('SubstatementType', 'SELECT') == 'SELECT')
+
+
+def start_athena_query(query, database, cache_ttl=QUERY_CACHE_TTL_SECONDS):
+    """
+    Start the query execution. Athena reuses the stored result of the same query when it is
+    younger than cache_ttl, without scanning the data again.
+    :return: The query execution ID
+    """
+    params = {
+        'QueryString': query,
+        'QueryExecutionContext': {
             'Database': database
         },
-        ResultConfiguration={
-            'OutputLocation': s3_output,
+        'ResultConfiguration': {
+            'OutputLocation': os.getenv('s3_staging_dir'),
+        },
+    }
+    if cache_ttl >= 60:
+        params['ResultReuseConfiguration'] = {
+            'ResultReuseByAgeConfiguration': {
+                'Enabled': True,
+                'MaxAgeInMinutes': cache_ttl // 60
+            }
         }
-    )
+    response = athena_client.start_query_execution(**params)
+    return response['QueryExecutionId']
 
-    # Get the query execution ID
-    query_execution_id = response['QueryExecutionId']
 
-    # Wait for the query to complete
+def wait_for_athena_query(query_execution_id, initial_delay=0.2, max_delay=5, timeout=600):
+    """
+    Wait for the query to complete, polling quickly at first and backing off for long queries
+    :return: The QueryExecution of the succeeded query
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
     while True:
-        response = client.get_query_execution(QueryExecutionId=query_execution_id)
-        state = response['QueryExecution']['Status']['State']
-        
-        if state in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+        execution = athena_client.get_query_execution(QueryExecutionId=query_execution_id)['QueryExecution']
+        state = execution['Status']['State']
+
+        if state == 'SUCCEEDED':
+            return execution
+        if state in ['FAILED', 'CANCELLED']:
+            reason = execution['Status'].get('StateChangeReason', '')
+            raise Exception(f"Query failed with state: {state} {reason}".strip())
+        if time.monotonic() + delay > deadline:
+            athena_client.stop_query_execution(QueryExecutionId=query_execution_id)
+            raise Exception(f"Query timed out after {timeout} seconds")
+
+        time.sleep(delay)
+        delay = min(max_delay, delay * 1.5)
+
+
+def iter_athena_rows(query_execution_id, header_row=True):
+    """
+    Stream the rows of a query result, reading every page of get_query_results
+    :param header_row: whether the first row of the first page holds the column names, as for SELECT results
+    :return: Generator of the column names, followed by one list of values per row
+    """
+    paginator = athena_client.get_paginator('get_query_results')
+    columns = None
+    for page in paginator.paginate(QueryExecutionId=query_execution_id, PaginationConfig={'PageSize': 1000}):
+        rows = page['ResultSet']['Rows']
+        if columns is None:
+            columns = [column['Name'] for column in page['ResultSet']['ResultSetMetadata']['ColumnInfo']]
+            yield columns
+            if header_row:
+                rows = rows[1:]
+        for row in rows:
+            yield [datum.get('VarCharValue') for datum in row['Data']]
+
+
+def read_athena_results(query_execution_id, max_rows=MAX_RESULT_ROWS, header_row=True):
+    """
+    Read the rows of a query result, up to max_rows
+    :param header_row: whether the first row holds the column names, as for SELECT results
+    :return: QueryResult
+    """
+    rows = iter_athena_rows(query_execution_id, header_row)
+    result = QueryResult(query_execution_id=query_execution_id, columns=next(rows, []))
+    for row in rows:
+        if len(result.rows) == max_rows:
+            result.truncated = True
             break
-        
-        time.sleep(1)  # Wait for 1 second before checking again
-
-    # If the query succeeded, fetch and return the results
-    if state == 'SUCCEEDED':
-        response = client.get_query_results(QueryExecutionId=query_execution_id)
-        results = response['ResultSet']['Rows']
-        return results
-    else:
-        raise Exception(f"Query failed with state: {state}")
\ No newline at end of file
+        result.rows.append(row)
+    return result
+
+
+def format_results_for_prompt(result, max_rows=MAX_PROMPT_ROWS):
+    """
+    Render a query result compactly for the answer prompt: a pipe separated table of at most
+    max_rows rows and, for larger results, a summary of every column over all rows.
+    :param result: QueryResult
+    :return: The result as text
+    """
+    def cell(value):
+        if value is None:
+            return 'NULL'
+        value = str(value).replace('|', '/').replace('\n', ' ')
+        if len(value) > MAX_PROMPT_VALUE_CHARS:
+            value = value[:MAX_PROMPT_VALUE_CHARS] + '...'
+        return value
+
+    def number(value):
+        return str(int(value)) if value.is_integer() else str(round(value, 4))
+
+    total = f"{len(result.rows)}{'+' if result.truncated else ''}"
+    lines = [f"{total} rows"]
+    lines.append(" | ".join(result.columns))
+    lines.extend(" | ".join(cell(value) for value in row) for row in result.rows[:max_rows])
+    if len(result.rows) <= max_rows:
+        return "\n".join(lines)
+
+    lines.append(f"... showing the first {max_rows} of {total} rows. Summary of all rows:")
+    for i, column in enumerate(result.columns):
+        values = [row[i] for row in result.rows if row[i] is not None]
+        numbers = []
+        for value in values:
+            try:
+                numbers.append(float(value))
+            except ValueError:
+                break
+        if values and len(numbers) == len(values):
+            lines.append(
+                f"- {column}: min {number(min(numbers))}, max {number(max(numbers))}, "
+                f"mean {number(sum(numbers) / len(numbers))}, sum {number(sum(numbers))}"
+            )
+        else:
+            counts = {}
+            for value in values:
+                counts[value] = counts.get(value, 0) + 1
+            top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+            lines.append(
+                f"- {column}: {len(counts)} distinct values, most common: "
+                + ", ".join(f"{cell(value)} ({count})" for value, count in top)
+            )
+        if len(values) < len(result.rows):
+            lines[-1] += f", {len(result.rows) - len(values)} NULL"
+    return "\n".join(lines)
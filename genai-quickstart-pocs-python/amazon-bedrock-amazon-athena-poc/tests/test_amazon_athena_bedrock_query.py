@@ -0,0 +1,111 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+from botocore.stub import Stubber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.update({
+    "region_name": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "database_name": "moma",
+    "s3_staging_dir": "s3://athena-results/",
+})
+
+import amazon_athena_bedrock_query as athena  # noqa: E402
+
+QUERY = "SELECT full_name, nationality FROM artists WHERE nationality = 'French';"
+COLUMNS = ["full_name", "nationality"]
+
+
+def rows(*values):
+    return [{"Data": [{"VarCharValue": value} for value in row]} for row in values]
+
+
+def results_page(page_rows, next_token=None):
+    page = {
+        "ResultSet": {
+            "Rows": page_rows,
+            "ResultSetMetadata": {"ColumnInfo": [{"Name": name, "Type": "varchar"} for name in COLUMNS]},
+        }
+    }
+    if next_token:
+        page["NextToken"] = next_token
+    return page
+
+
+class TestExecuteAthenaQuery(unittest.TestCase):
+    def setUp(self):
+        athena._query_cache.clear()
+        self.stubber = Stubber(athena.athena_client)
+        self.stubber.activate()
+
+    def tearDown(self):
+        self.stubber.deactivate()
+
+    def expect_query(self, query_execution_id, pages, statement_type="DML", substatement_type="SELECT"):
+        self.stubber.add_response("start_query_execution", {"QueryExecutionId": query_execution_id})
+        self.stubber.add_response("get_query_execution", {"QueryExecution": {
+            "QueryExecutionId": query_execution_id,
+            "StatementType": statement_type,
+            "SubstatementType": substatement_type,
+            "Status": {"State": "SUCCEEDED"},
+            "Statistics": {"DataScannedInBytes": 1024},
+        }})
+        for page in pages:
+            self.stubber.add_response("get_query_results", page)
+
+    def test_reads_every_page_and_reuses_the_result(self):
+        self.expect_query("q1", [
+            results_page(rows(COLUMNS, ["Claude Monet", "French"], ["Edgar Degas", "French"]), next_token="t1"),
+            # A data row that happens to equal the column names is still data
+            results_page(rows(["full_name", "nationality"], ["Henri Matisse", "French"])),
+        ])
+
+        result = athena.execute_athena_query(QUERY)
+        result.rows.append(["changed", "by caller"])
+        same_query = athena.execute_athena_query("select full_name,  nationality\nFROM artists WHERE nationality = 'French'")
+        same_query.rows[0][0] = "changed by caller"
+        cached = athena.execute_athena_query(QUERY)
+
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual(result.columns, COLUMNS)
+        self.assertEqual(result.data_scanned_bytes, 1024)
+        self.assertFalse(result.cached)
+        self.assertTrue(cached.cached)
+        self.assertEqual(cached.rows, [
+            ["Claude Monet", "French"],
+            ["Edgar Degas", "French"],
+            ["full_name", "nationality"],
+            ["Henri Matisse", "French"],
+        ])
+
+    def test_runs_the_query_again_once_the_cached_result_expires(self):
+        self.expect_query("q1", [results_page(rows(COLUMNS, ["Claude Monet", "French"]))])
+        self.expect_query("q2", [results_page(rows(COLUMNS, ["Claude Monet", "French"]))])
+
+        first = athena.execute_athena_query(QUERY, cache_ttl=60)
+        with mock.patch.object(athena.time, "monotonic", return_value=athena.time.monotonic() + 61):
+            second = athena.execute_athena_query(QUERY, cache_ttl=60)
+
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual((first.query_execution_id, second.query_execution_id), ("q1", "q2"))
+        self.assertFalse(second.cached)
+
+    def test_keeps_the_first_row_of_results_without_a_header_row(self):
+        self.expect_query(
+            "q1", [results_page(rows(["artists", "table"], ["artworks", "table"]))], statement_type="UTILITY",
+            substatement_type="SHOW_TABLES",
+        )
+
+        result = athena.execute_athena_query("SHOW TABLES", cache_ttl=0)
+
+        self.assertEqual(result.rows, [["artists", "table"], ["artworks", "table"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
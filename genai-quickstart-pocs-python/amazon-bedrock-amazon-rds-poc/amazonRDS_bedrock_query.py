@@ -1,12 +1,20 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import yaml
+from sqlalchemy import create_engine
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.prompts.few_shot import FewShotPromptTemplate
 from langchain.prompts.prompt import PromptTemplate
 from langchain.sql_database import SQLDatabase
 from langchain.chains.sql_database.prompt import PROMPT_SUFFIX, _postgres_prompt
 from langchain.embeddings.huggingface import HuggingFaceEmbeddings
 from langchain.llms import Bedrock
+from langchain.prompts.example_selector.base import BaseExampleSelector
 from langchain.prompts.example_selector.semantic_similarity import (
     SemanticSimilarityExampleSelector,
 )
@@ -25,6 +33,189 @@ llm = Bedrock(
 )
 
 
+# Path of the few-shot examples
+EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SampleData", "moma_examples.yaml")
+# Directory where the embedded few-shot examples are persisted, so they are embedded once rather than per question
+EXAMPLE_INDEX_DIR = os.getenv("example_index_dir", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".example_index"))
+# Seconds the reflected schema and table info are reused before the database is reflected again
+SCHEMA_CACHE_TTL_SECONDS = int(os.getenv("schema_cache_ttl_seconds", 600))
+
+# Stage timings of the question being answered on the current thread
+_current = threading.local()
+
+
+@dataclass
+class StageTimings:
+    """
+    Seconds spent per stage while answering a question: table_info, example_selection, llm, sql_execution and total.
+    """
+    stages: dict = field(default_factory=dict)
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def __str__(self):
+        return ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.stages.items())
+
+
+def record_stage(stage, start):
+    """
+    Add the time since start (from time.perf_counter) to the stage timings of the current question, if any.
+    """
+    timings = getattr(_current, "timings", None)
+    if timings is not None:
+        timings.add(stage, time.perf_counter() - start)
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase whose table info (DDL and sample rows) is read from the database once and then reused.
+    Create a new instance to pick up schema changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._table_info_cache = {}
+        self._table_info_lock = threading.Lock()
+
+    def get_table_info(self, table_names=None):
+        start = time.perf_counter()
+        key = tuple(sorted(table_names)) if table_names else None
+        with self._table_info_lock:
+            if key not in self._table_info_cache:
+                self._table_info_cache[key] = super().get_table_info(table_names)
+            table_info = self._table_info_cache[key]
+        record_stage("table_info", start)
+        return table_info
+
+    def run(self, command, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().run(command, *args, **kwargs)
+        finally:
+            record_stage("sql_execution", start)
+
+
+class TimedExampleSelector(BaseExampleSelector):
+    """
+    Wraps an example selector to record the time spent selecting examples.
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+
+    def add_example(self, example):
+        return self.selector.add_example(example)
+
+    def select_examples(self, input_variables):
+        start = time.perf_counter()
+        try:
+            return self.selector.select_examples(input_variables)
+        finally:
+            record_stage("example_selection", start)
+
+
+class LLMTimingHandler(BaseCallbackHandler):
+    """
+    Records the time spent in LLM calls.
+    """
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.started = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.timings.add("llm", time.perf_counter() - self.started.pop(run_id))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.started.pop(run_id, None)
+
+
+@dataclass
+class RDSAnswer:
+    sql: str
+    result: str
+    timings: StageTimings
+
+
+class RDSQueryService:
+    """
+    Answers questions about the RDS database with resources created once per process: a pooled SQLAlchemy engine,
+    the embeddings model, the persistent few-shot example index, the reflected schema and the SQLDatabaseChain.
+    The schema is reflected again every schema_cache_ttl seconds, or when invalidate_schema() is called.
+    """
+
+    def __init__(self, llm, rds_uri=None, examples_path=EXAMPLES_PATH, schema_cache_ttl=SCHEMA_CACHE_TTL_SECONDS):
+        self.llm = llm
+        self.engine = create_engine(
+            rds_uri or get_rds_uri(),
+            pool_size=5,
+            max_overflow=5,
+            # Connections dropped by the database (idle timeouts, failovers) are replaced instead of failing a question
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+        # instantiating the hugging face embeddings model to be used to produce embeddings of user queries and prompts
+        self.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        self.example_selector = TimedExampleSelector(load_example_selector(self.embeddings, load_samples(examples_path)))
+        self.schema_cache_ttl = schema_cache_ttl
+        self.lock = threading.Lock()
+        self.invalidate_schema()
+
+    def invalidate_schema(self):
+        """
+        Reflect the database schema again, e.g. after tables were added or altered.
+        """
+        with self.lock:
+            self._load_schema()
+
+    def _load_schema(self):
+        # Called with self.lock held, so concurrent questions reflect the schema once
+        start = time.perf_counter()
+        self.db = CachedSQLDatabase(self.engine)
+        self.chain = load_few_shot_chain(self.llm, self.db, self.example_selector)
+        self.schema_loaded_at = time.monotonic()
+        record_stage("schema_reflection", start)
+
+    def answer(self, question):
+        """
+        Answer a natural language question.
+        :param question: The question the user passes in from the frontend
+        :return: RDSAnswer with the generated SQL query, the answer and the time spent per stage
+        """
+        timings = StageTimings()
+        _current.timings = timings
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                if time.monotonic() - self.schema_loaded_at > self.schema_cache_ttl:
+                    self._load_schema()
+                chain = self.chain
+            answer = chain(question, callbacks=[LLMTimingHandler(timings)])
+        finally:
+            _current.timings = None
+        timings.add("total", time.perf_counter() - start)
+        return RDSAnswer(sql=answer["intermediate_steps"][1], result=answer["result"], timings=timings)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_rds_query_service():
+    """
+    Returns the RDSQueryService shared by all questions, creating it on first use.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RDSQueryService(llm)
+        return _service
+
+
 # Executing the SQL database chain with the users question
 def rds_answer(question):
     """
@@ -33,18 +224,9 @@ def rds_answer(question):
     :param question: The question the user passes in from the frontend
     :return: The final answer in natural langauge along with the generated SQL query.
     """
-    # retrieving the final RDS URI to initiate a connection with the database
-    rds_uri = get_rds_uri()
-    # formatting the RDS URI and preparing it to be used with Langchain sql_db_chain
-    db = SQLDatabase.from_uri(rds_uri)
-    # loading the sample prompts from SampleData/moma_examples.yaml
-    examples = load_samples()
-    # initiating the sql_db_chain with the specific LLM we are using, the db connection string and the selected examples
-    sql_db_chain = load_few_shot_chain(llm, db, examples)
-    # the answer created by Amazon Bedrock and ultimately passed back to the end user
-    answer = sql_db_chain(question)
+    answer = get_rds_query_service().answer(question)
     # Passing back both the generated SQL query and the final result in a natural language format
-    return answer["intermediate_steps"][1], answer["result"]
+    return answer.sql, answer.result
 
 
 def get_rds_uri():
@@ -66,7 +248,7 @@ def get_rds_uri():
     return rds_uri
 
 
-def load_samples():
+def load_samples(examples_path=EXAMPLES_PATH):
     """
     Load the sql examples for few-shot prompting examples
     :return: The sql samples in from the moma_examples.yaml file
@@ -74,20 +256,53 @@ def load_samples():
     # instantiating the sql samples variable
     sql_samples = None
     # opening our prompt sample file
-    with open("Sampledata/moma_examples.yaml", "r") as stream:
+    with open(examples_path, "r") as stream:
         # reading our prompt samples into the sql_samples variable
         sql_samples = yaml.safe_load(stream)
     # returning the sql samples as a string
     return sql_samples
 
 
-def load_few_shot_chain(llm, db, examples):
+def load_example_selector(embeddings, examples, k=3):
+    """
+    Load the few-shot example index from EXAMPLE_INDEX_DIR, embedding the examples only if they are not indexed yet.
+    The collection is named after a hash of the examples, so editing the examples file builds a new index.
+    :param embeddings: The embeddings model used to index the examples and the questions
+    :param examples: The samples loaded from your examples file.
+    :return: An example selector returning the k examples most similar to a question
+    """
+    digest = hashlib.sha256(json.dumps(examples, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    collection_name = f"examples_{digest}"
+    k = min(k, len(examples))
+    vectorstore = Chroma(
+        collection_name=collection_name,
+        embedding_function=embeddings,
+        persist_directory=EXAMPLE_INDEX_DIR,
+    )
+    if len(vectorstore.get(include=[])["ids"]) == len(examples):
+        return SemanticSimilarityExampleSelector(vectorstore=vectorstore, k=k)
+    # The index is missing or was interrupted while being built
+    vectorstore.delete_collection()
+    # The example selector loads the examples, creates the embeddings, stores them in Chroma (vector store) and a
+    # semantic search is performed to see the similarity between the question and prompts, it returns the k most
+    # similar prompts
+    return SemanticSimilarityExampleSelector.from_examples(
+        examples,
+        embeddings,
+        Chroma,
+        k=k,
+        collection_name=collection_name,
+        persist_directory=EXAMPLE_INDEX_DIR,
+    )
+
+
+def load_few_shot_chain(llm, db, example_selector):
     """
     This function is used to load in the most similar prompts, format them along with the users question and then is
     passed in to Amazon Bedrock to generate an answer.
     :param llm: Large Language model you are using
     :param db: The rds database URL
-    :param examples: The samples loaded from your examples file.
+    :param example_selector: Selects the examples most similar to the question.
     :return: The results from the SQLDatabaseChain
     """
     # This is formatting the prompts that are retrieved from the SampleData/moma_examples.yaml
@@ -98,17 +313,6 @@ def load_few_shot_chain(llm, db, examples):
             " {sql_result}\nAnswer: {answer}"
         ),
     )
-    # instantiating the hugging face embeddings model to be used to produce embeddings of user queries and prompts
-    local_embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    # The example selector loads the examples, creates the embeddings, stores them in Chroma (vector store) and a
-    # semantic search is performed to see the similarity between the question and prompts, it returns the 3 most similar
-    # prompts as defined by k
-    example_selector = SemanticSimilarityExampleSelector.from_examples(
-        examples,
-        local_embeddings,
-        Chroma,
-        k=min(3, len(examples)),
-    )
     # This is orchestrating the example selector (finding similar prompts to the question), example_prompt (formatting
     # the retrieved prompts, and formatting the chat history and the user input
     few_shot_prompt = FewShotPromptTemplate(
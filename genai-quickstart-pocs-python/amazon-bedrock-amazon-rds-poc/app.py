@@ -1,5 +1,5 @@
 import streamlit as st
-from amazonRDS_bedrock_query import rds_answer
+from amazonRDS_bedrock_query import get_rds_query_service
 
 # title of the streamlit app
 st.title(f""":rainbow[Natural Language Query Against Amazon Relational Database Service]""")
@@ -27,18 +27,20 @@ if question := st.chat_input("Ask about your data stored in Amazon Relational Da
         message_placeholder = st.empty()
         # putting a spinning icon to show that the query is in progress
         with st.status("Determining the best possible answer!", expanded=False) as status:
-            # passing the question into the rds_answer function, which later invokes the llm
-            answer = rds_answer(question)
+            # passing the question into the long-lived query service, which later invokes the llm
+            answer = get_rds_query_service().answer(question)
             # writing the answer to the front end
             message_placeholder.markdown(f""" Answer:
-                            {answer[1]}
+                            {answer.result}
                             """)
             # writing the SQL query in code front end style on the sidebar
             with st.sidebar:
                 st.title(f""":green[The SQL command to get this answer was:]""")
-                st.code(answer[0], language="sql")
+                st.code(answer.sql, language="sql")
+                # showing where the time was spent answering the question
+                st.caption(f"Latency by stage: {answer.timings}")
             # showing a completion message to the front end
             status.update(label="Question Answered...", state="complete", expanded=False)
     # appending the results to the session state
     st.session_state.messages.append({"role": "assistant",
-                                      "content": answer})
\ No newline at end of file
+                                      "content": answer.result})
\ No newline at end of file
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark per-question latency of the RDS query service against the previous per-question setup.
+
+The previous rds_answer created the SQLAlchemy engine, reflected the schema, loaded the examples, loaded the
+embeddings model, embedded the examples into a new Chroma collection and built the chain for every question.
+RDSQueryService creates all of these once; this script reports the latency of both, broken down by stage.
+
+By default the LLM is replaced by a fixed list of responses, so the benchmark measures everything except Amazon
+Bedrock and runs without AWS access. Pass --bedrock to use the configured Amazon Bedrock model instead.
+
+Usage:
+    docker run --rm -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres:16
+    # set rds_username=postgres, rds_password=postgres, rds_endpoint=localhost, rds_port=5432, rds_db_name=postgres in .env
+    python3 sampledata_upload.py
+    python3 benchmark_rds_query.py [--questions N] [--bedrock]
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from langchain.llms.fake import FakeListLLM
+
+import amazonRDS_bedrock_query as rds
+
+QUESTIONS = [
+    "How many rows are in the artists table?",
+    "How many artists are French?",
+    "How many female artists are there?",
+    "What is the earliest birth year of an artist?",
+]
+
+# SQL generation, query check and answer, for every question
+FAKE_RESPONSES = [
+    "SELECT count(*) FROM artists;",
+    "SELECT count(*) FROM artists;",
+    "The artists table has the counted number of rows.",
+]
+
+
+# Previous implementation, kept here as the baseline
+def answer_with_per_question_setup(llm, question):
+    timings = rds.StageTimings()
+    start = time.perf_counter()
+    db = rds.SQLDatabase.from_uri(rds.get_rds_uri())
+    examples = rds.load_samples()
+    embeddings = rds.HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    example_selector = rds.SemanticSimilarityExampleSelector.from_examples(
+        examples, embeddings, rds.Chroma, k=min(3, len(examples))
+    )
+    chain = rds.load_few_shot_chain(llm, db, example_selector)
+    timings.add("setup", time.perf_counter() - start)
+    chain_start = time.perf_counter()
+    chain(question, callbacks=[rds.LLMTimingHandler(timings)])
+    timings.add("chain", time.perf_counter() - chain_start)
+    timings.add("total", time.perf_counter() - start)
+    # Chroma keeps in-memory collections for the life of the process; drop it like a new process would
+    example_selector.vectorstore.delete_collection()
+    return timings
+
+
+def report(name, all_timings):
+    totals = defaultdict(float)
+    for timings in all_timings:
+        for stage, seconds in timings.stages.items():
+            totals[stage] += seconds
+    stages = ", ".join(f"{stage} {seconds / len(all_timings) * 1000:.0f} ms" for stage, seconds in totals.items())
+    print(f"{name:<28} mean per question: {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--bedrock", action="store_true", help="use Amazon Bedrock instead of fixed responses")
+    args = parser.parse_args()
+
+    llm = rds.llm if args.bedrock else FakeListLLM(responses=FAKE_RESPONSES)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    baseline = [answer_with_per_question_setup(llm, question) for question in questions]
+    report("per-question setup", baseline)
+
+    start = time.perf_counter()
+    service = rds.RDSQueryService(llm)
+    print(f"{'service startup (once)':<28} {(time.perf_counter() - start) * 1000:.0f} ms")
+    answers = [service.answer(question) for question in questions]
+    report("RDSQueryService", [answer.timings for answer in answers])
+    report("RDSQueryService, warm", [answer.timings for answer in answers[1:]] or [answers[0].timings])
+
+
+if __name__ == "__main__":
+    main()
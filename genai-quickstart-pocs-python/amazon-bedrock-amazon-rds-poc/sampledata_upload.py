@@ -3,13 +3,18 @@ This script loads sample data to postgres database from moma_public_artists.txt
 use this to load data is you don't have tools installed to copy sample data into postgress database
 this module relies on connection details stored in .env file
 
+The files are streamed into PostgreSQL with COPY FROM STDIN, converting values row by row as they are read,
+so the whole file is never held in memory. Each table is created if needed and truncated before loading,
+in the same transaction as the load, so the script can be run again to reload the data.
+
 Usage: sampledata_upload.py
 """
 import csv
+import io
+import os
+import time
 
 import psycopg2
-from psycopg2.extras import execute_batch
-import os
 
 from dotenv import load_dotenv
 import logging
@@ -20,125 +25,173 @@ logging.basicConfig(level=logging.INFO)
 # Loading environment variables stored in .env
 load_dotenv()
 
+SAMPLE_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SampleData')
+
+ARTISTS_DDL = '''
+    CREATE TABLE IF NOT EXISTS artists (
+      artist_id INT PRIMARY KEY,
+      full_name varchar,
+      nationality varchar,
+      gender varchar,
+      birth_year INT,
+      death_year INT)
+    '''
+
+ARTWORKS_DDL = '''
+    CREATE TABLE IF NOT EXISTS artworks (
+        artwork_id INT PRIMARY KEY,
+        title varchar,
+        artist_id INT,
+        date INT,
+        medium varchar,
+        dimensions varchar,
+        acquisition_date date,
+        credit varchar,
+        catalogue varchar,
+        department varchar,
+        classification varchar,
+        object_number varchar,
+        diameter_cm FLOAT,
+        circumference_cm FLOAT,
+        height_cm FLOAT,
+        length_cm FLOAT,
+        width_cm FLOAT,
+        depth_cm FLOAT,
+        weight_kg FLOAT,
+        durations INT)
+    '''
+
+
+def connect():
+    return psycopg2.connect(user=os.getenv('rds_username'),
+                            password=os.getenv('rds_password'),
+                            host=os.getenv('rds_endpoint'),
+                            port=os.getenv('rds_port'),
+                            dbname=os.getenv('rds_db_name'))
+
+
+def find_sample_file(name):
+    """
+    Returns the path and delimiter of a sample data file: the pipe-delimited .txt export if present,
+    otherwise the comma-separated .csv file shipped in the SampleData directory
+    """
+    txt_path = os.path.join(SAMPLE_DATA_DIR, name + '.txt')
+    if os.path.exists(txt_path):
+        return txt_path, '|'
+    return os.path.join(SAMPLE_DATA_DIR, name + '.csv'), ','
+
+
+def to_int(default):
+    return lambda value: int(value) if value else default
+
+
+def to_float(value):
+    return float(value) if value else 0
+
+
+def to_date(value):
+    # empty dates are loaded as the epoch, and year-month dates as the first of the month
+    if not value:
+        return '1970-01-01'
+    return value + '-01' if len(value) == 7 else value
+
+
+ARTISTS_CONVERTERS = [int, str, str, str, to_int(-1), to_int(-1)]
+
+ARTWORKS_CONVERTERS = [int, str, to_int(0), to_int(0), str, str, to_date, str, str, str, str, str,
+                       to_float, to_float, to_float, to_float, to_float, to_float, to_float, to_int(0)]
+
+
+def escape_copy_value(value):
+    """
+    Formats a value for COPY's text format, where backslash, tab, newline and carriage return must be escaped
+    """
+    if not isinstance(value, str):
+        return str(value)
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class CopyStream(io.TextIOBase):
+    """
+    File-like object that COPY FROM STDIN reads from. Rows are read from the sample data file,
+    converted and formatted one at a time as COPY asks for more data.
+    """
+
+    def __init__(self, reader, converters):
+        self.reader = reader
+        self.converters = converters
+        self.rows = 0
+        self.buffer = ''
+
+    def readable(self):
+        return True
+
+    def next_line(self):
+        row = next(self.reader)
+        self.rows += 1
+        try:
+            values = [convert(value) for convert, value in zip(self.converters, row)]
+        except ValueError as e:
+            raise ValueError(f"could not convert data row {self.rows}: {row}") from e
+        return '\t'.join(escape_copy_value(value) for value in values) + '\n'
+
+    def read(self, size=-1):
+        lines = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            try:
+                line = self.next_line()
+            except StopIteration:
+                break
+            lines.append(line)
+            length += len(line)
+        data = ''.join(lines)
+        if size < 0:
+            self.buffer = ''
+            return data
+        self.buffer = data[size:]
+        return data[:size]
+
+
+def copy_sample_file(conn, table, ddl, name, converters):
+    """
+    Creates the table if needed, then replaces its contents with the sample data file in a single transaction
+    Returns:
+        int: Number of rows loaded
+    """
+    path, delimiter = find_sample_file(name)
+    start = time.perf_counter()
+    # utf-8-sig drops the byte order mark at the start of the .csv file
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f, conn.cursor() as cur:
+        reader = csv.reader(f, delimiter=delimiter)
+        # skip the header row; converters, like the table, follow the file's column order
+        next(reader)
+        cur.execute(ddl)
+        cur.execute(f'TRUNCATE TABLE {table}')
+        stream = CopyStream(reader, converters)
+        cur.copy_expert(f"COPY {table} FROM STDIN", stream)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Loaded {stream.rows} rows into {table} from {os.path.basename(path)} in {elapsed:.1f}s "
+                f"({stream.rows / elapsed:,.0f} rows/sec)")
+    return stream.rows
+
 
 def load_sampledata_to_rds_atrists():
     """
     Function to load data in postgres table artists from moma_public_artists.txt file
     """
-    with psycopg2.connect(user=os.getenv('rds_username'),
-                          password=os.getenv('rds_password'),
-                          host=os.getenv('rds_endpoint'),
-                          port=os.getenv('rds_port'),
-                          dbname=os.getenv('rds_db_name')) as conn:
-        conn.autocommit = True
-        with conn.cursor() as cur:
-
-            # write moma_public_artists.txt to RDS
-            cur.execute('''
-                        CREATE TABLE artists (
-                          artist_id INT PRIMARY KEY, 
-                          full_name varchar, 
-                          nationality varchar, 
-                          gender varchar, 
-                          birth_year INT, 
-                          death_year INT)
-                        ''')
-
-            with open('./SampleData/moma_public_artists.txt', 'r') as f:
-                reader = csv.reader(f, delimiter='|')
-                all_data = []
-                for idx, row in enumerate(reader):
-                    logger.info(row)
-                    if idx > 0:
-                        print(row)
-
-                        row[0] = int(row[0])
-                        row[1] = row[1].replace("'", "''")
-                        row[2] = row[2].replace("'", "''")
-                        row[3] = row[3].replace("'", "''")
-                        row[4] = int(row[4]) if row[4] else -1
-                        row[5] = int(row[5]) if row[5] else -1
-                        all_data.append(row)
-
-                execute_batch(cur,
-                    """INSERT INTO artists (artist_id, full_name, nationality, gender, birth_year, death_year) VALUES (%s, %s, %s, %s, %s, %s)""",
-                    all_data)
-
+    with connect() as conn:
+        return copy_sample_file(conn, 'artists', ARTISTS_DDL, 'moma_public_artists', ARTISTS_CONVERTERS)
 
 
 def load_sampledata_to_rds_artworks():
     """
-    Function to load data in postgres table artists from moma_public_artists.txt file
+    Function to load data in postgres table artworks from moma_public_artworks.txt file
     """
-    with psycopg2.connect(user=os.getenv('rds_username'),
-                          password=os.getenv('rds_password'),
-                          host=os.getenv('rds_endpoint'),
-                          port=os.getenv('rds_port'),
-                          dbname=os.getenv('rds_db_name')) as conn:
-        conn.autocommit = True
-        with conn.cursor() as cur:
-
-            # write moma_public_artists.txt to RDS
-            cur.execute('''
-                        CREATE TABLE artworks (
-                            artwork_id INT PRIMARY KEY, 
-                            title varchar, 
-                            artist_id INT, 
-                            date INT, 
-                            medium varchar, 
-                            dimensions varchar,
-                            acquisition_date date, 
-                            credit varchar, 
-                            catalogue varchar, 
-                            department varchar,
-                            classification varchar, 
-                            object_number varchar, 
-                            diameter_cm FLOAT, 
-                            circumference_cm FLOAT,
-                            height_cm FLOAT, 
-                            length_cm FLOAT, 
-                            width_cm FLOAT, 
-                            depth_cm FLOAT, 
-                            weight_kg FLOAT,
-                            durations INT)
-                        ''')
-
-            with open('./SampleData/moma_public_artworks.txt', 'r') as f:
-                reader = csv.reader(f, delimiter='|')
-                all_data = []
-                for idx, row in enumerate(reader):
-                    logger.info(row)
-                    if idx > 0:
-                        print(row)
-
-                        row[0] = int(row[0])
-                        row[1] = row[1].replace("'", "''")
-                        row[2] = int(row[2]) if row[2] else 0
-                        row[3] = int(row[3]) if row[3] else 0
-                        row[4] = row[4].replace("'", "''")
-                        row[5] = row[5].replace("'", "''")
-                        row[6] = row[6] if(row[6]) else '1970-01-01'
-                        row[6] = row[6]+'-01' if(len(row[6])==7) else row[6]
-                        row[7] = row[7].replace("'", "''")
-                        row[8] = row[8].replace("'", "''")
-                        row[9] = row[9].replace("'", "''")
-                        row[10] = row[10].replace("'", "''")
-                        row[11] = row[9].replace("'", "''")
-                        row[12] = float(row[12]) if row[12] else 0
-                        row[13] = float(row[13]) if row[13] else 0
-                        row[14] = float(row[14]) if row[14] else 0
-                        row[15] = float(row[15]) if row[15] else 0
-                        row[16] = float(row[16]) if row[16] else 0
-                        row[17] = float(row[17]) if row[17] else 0
-                        row[18] = float(row[18]) if row[18] else 0
-                        row[19] = int(row[19]) if row[19] else 0
-                        all_data.append(row)
-
-                execute_batch(cur, """INSERT INTO artworks 
-                                     (artwork_id, title, artist_id, date, medium, dimensions, acquisition_date, credit, catalogue, department, classification, object_number, diameter_cm, circumference_cm, height_cm, length_cm, width_cm, depth_cm, weight_kg, durations) 
-                                   VALUES 
-                                     (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                                all_data)
+    with connect() as conn:
+        return copy_sample_file(conn, 'artworks', ARTWORKS_DDL, 'moma_public_artworks', ARTWORKS_CONVERTERS)
 
 
 def load_sampledata_to_rds():
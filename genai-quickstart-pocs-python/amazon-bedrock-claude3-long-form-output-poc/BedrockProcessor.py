@@ -1,10 +1,10 @@
 import boto3  # AWS SDK for Python
 import botocore  # Low-level client for AWS services
 import json  # For working with JSON data
-import time  # For adding delays
+import time  # For measuring latency
 from io import StringIO  # For working with text streams
 from pypdf import PdfReader  # For reading PDF files
-from typing import Optional, Tuple, List, Any  # For type hints
+from typing import Optional, Tuple, List, Any, Callable, Dict  # For type hints
 
 class BedrockProcessor:
     def __init__(self, system_prompt_template: str, prompt_template: str, iterations: Optional[int]=10) -> None:
@@ -32,20 +32,32 @@ class BedrockProcessor:
         self.invocation_latency = 0  # Total invocation latency
         self.document_type = None  # Type of document (text or PDF)
         self.stop_reasons = []  # List to store stop reasons
-        self.sleep_time = 2  # Initial sleep time (in seconds)
+        self.iteration_metrics = []  # Token counts and latencies of each iteration
+        self.segments = []  # Output generated so far, one entry per iteration
+        self.prompt_caching = True  # Mark the static prompt prefix for Bedrock prompt caching
 
     # Change the system prompt and/or prompt template
     def change_prompt_template(self, system_prompt_template: Optional[str] = None, prompt_template: Optional[str] = None) -> None:
         self.system_prompt = system_prompt_template if system_prompt_template is not None else self.system_prompt
         self.prompt_template = prompt_template if prompt_template is not None else self.prompt_template
 
-    # Build the prompt based on the document type and user input
-    def build_prompt(self) -> None:
-        # Set the right prompt template
+    # Build the user prompt from the template; it is the same for every iteration of a document
+    def build_user_prompt(self) -> str:
         if self.document_type is not None:
-            self.prompt_template = self.prompt_template.format(document=self.document, user_input=self.user_input)
-        else:
-            self.prompt_template = self.prompt_template.format(user_input=self.user_input, retries=self.retries)
+            return self.prompt_template.format(document=self.document, user_input=self.user_input)
+        return self.prompt_template.format(user_input=self.user_input, retries=self.retries)
+
+    # Build the prompt based on the document type, user input and the segments generated so far
+    def build_prompt(self) -> None:
+        # Cache points mark the end of each reusable prefix: the system prompt, the user prompt
+        # (with the document) and the output generated up to the previous iteration
+        cache_point = {"cache_control": {"type": "ephemeral"}} if self.prompt_caching else {}
+
+        # The generated output is sent as one block per segment, so the blocks sent in earlier
+        # iterations are unchanged and read back from the cache
+        assistant_content = [{"type": "text", "text": segment} for segment in self.segments if segment]
+        if assistant_content:
+            assistant_content[-1].update(cache_point)
 
         # Create the prompt dictionary
         prompt = {
@@ -53,25 +65,21 @@ class BedrockProcessor:
             "max_tokens": self.max_tokens,
             "temperature": self.temperature,
             "top_p": self.top_p,
-            "system": self.system_prompt,
+            "system": [{"type": "text", "text": self.system_prompt, **cache_point}],
             "messages": [
                 {
                     "role": "user",
                     "content": [
                         {
                             "type": "text",
-                            "text": self.prompt_template
+                            "text": self.build_user_prompt(),
+                            **cache_point
                         }
                     ]
                 },
                 {
                     "role": "assistant",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"{self.chat_history}"
-                        }
-                    ]
+                    "content": assistant_content
                 }
             ]
         }
@@ -79,37 +87,60 @@ class BedrockProcessor:
         # Convert the prompt dictionary to JSON
         self.prompt = json.dumps(prompt)
 
-    #  Handle LLM Invoke
-    def process_invoke(self) -> Tuple[str, int, float]:
-        try:
-            # Invoke the Bedrock model
-            response = self.bedrock_runtime.invoke_model(
-                body=self.prompt,
-                modelId=self.model_id,
-                accept="application/json",
-                contentType="application/json"
-            )
-            
-            # Process the response
-            response_body = json.loads(response.get('body').read())
-            output_tokens = int(response['ResponseMetadata']['HTTPHeaders']['x-amzn-bedrock-output-token-count']) if response is not None else 0
-            invocation_latency = round(float(response['ResponseMetadata']['HTTPHeaders']['x-amzn-bedrock-invocation-latency']), 4) if response is not None else 0.0
-            answer = response_body.get('content')[0]['text']
-            self.stop_reasons.append(response_body.get('stop_reason'))
-        except:
-            # Handle exceptions
-            print("Invocation Error")
-            answer = "Invocation Error"
-        else:
-            # Print success message
-            print("Invocation completed successfully")
-        
-        return answer, output_tokens, invocation_latency
-    
+    #  Handle LLM Invoke, streaming the answer as it is generated
+    def process_invoke(self, on_text: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict[str, Any]]:
+        start_time = time.perf_counter()
+        metrics = {
+            "iteration": self.retries,
+            "input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "cache_write_input_tokens": 0,
+            "output_tokens": 0,
+            "first_token_latency": None,
+            "latency": 0.0,
+            "stop_reason": None,
+        }
+        answer = []
+
+        # Invoke the Bedrock model
+        response = self.bedrock_runtime.invoke_model_with_response_stream(
+            body=self.prompt,
+            modelId=self.model_id,
+            accept="application/json",
+            contentType="application/json"
+        )
+
+        # Process the streamed events
+        for event in response.get('body'):
+            chunk = json.loads(event['chunk']['bytes'])
+            if chunk['type'] == 'message_start':
+                usage = chunk['message'].get('usage', {})
+                metrics["input_tokens"] = usage.get('input_tokens', 0)
+                metrics["cache_read_input_tokens"] = usage.get('cache_read_input_tokens', 0)
+                metrics["cache_write_input_tokens"] = usage.get('cache_creation_input_tokens', 0)
+            elif chunk['type'] == 'content_block_delta' and chunk['delta'].get('type') == 'text_delta':
+                if metrics["first_token_latency"] is None:
+                    metrics["first_token_latency"] = round(time.perf_counter() - start_time, 4)
+                answer.append(chunk['delta']['text'])
+                if on_text is not None:
+                    on_text(chunk['delta']['text'])
+            elif chunk['type'] == 'message_delta':
+                metrics["stop_reason"] = chunk['delta'].get('stop_reason')
+                metrics["output_tokens"] = chunk.get('usage', {}).get('output_tokens', 0)
+            elif chunk['type'] == 'message_stop':
+                invocation_metrics = chunk.get('amazon-bedrock-invocationMetrics', {})
+                metrics["output_tokens"] = invocation_metrics.get('outputTokenCount', metrics["output_tokens"])
+
+        metrics["latency"] = round(time.perf_counter() - start_time, 4)
+        self.stop_reasons.append(metrics["stop_reason"])
+        return ''.join(answer), metrics
+
     #  Generate the long form output
-    def process_long_form_output(self) -> None:
-        # Initialize the chat history
-        chat_history = [self.chat_history]
+    def process_long_form_output(self, on_text: Optional[Callable[[str], None]] = None) -> None:
+        # The output so far is kept as segments without trailing whitespace (a prefill may not end
+        # in whitespace); whitespace at the end of a segment is carried into the next one
+        self.segments = [self.chat_history.rstrip()]
+        trailing = self.chat_history[len(self.segments[0]):]
 
         # Iterate over the specified number of iterations
         for retries in range(self.iterations):
@@ -117,24 +148,39 @@ class BedrockProcessor:
             print(f"Iteration: {self.retries}")  # Print the current iteration
 
             # Build the prompt and invoke the model
-            self.build_prompt()
-            answer, output_tokens, invocation_latency = self.process_invoke()
+            try:
+                self.build_prompt()
+                try:
+                    answer, metrics = self.process_invoke(on_text)
+                except botocore.exceptions.ClientError as e:
+                    if not (self.prompt_caching and e.response['Error']['Code'] == 'ValidationException'):
+                        raise
+                    # The model does not support prompt caching, so send the same prompt without cache points
+                    print("Prompt caching not supported by this model, continuing without it")
+                    self.prompt_caching = False
+                    self.build_prompt()
+                    answer, metrics = self.process_invoke(on_text)
+            except Exception as e:
+                # Handle exceptions
+                print(f"Invocation Error: {e}")
+                break
+            print(f"Iteration {retries} completed: {metrics}")
 
-            # Store the output token count and update the invocation latency
-            self.output_tokens.append((self.retries, int(output_tokens)))
-            self.invocation_latency += invocation_latency
+            # Store the token counts and latency of the iteration
+            self.iteration_metrics.append(metrics)
+            self.output_tokens.append((self.retries, int(metrics["output_tokens"])))
+            self.invocation_latency += metrics["latency"]
 
-            # Update the chat history
-            chat_history.append(answer)
-            self.chat_history = ''.join(chat_history)
+            # Update the generated segments and the chat history
+            segment = trailing + answer
+            self.segments.append(segment.rstrip())
+            trailing = segment[len(self.segments[-1]):]
+            self.chat_history = ''.join(self.segments) + trailing
 
-            # Check if the stop reason is 'end_turn' and break if true
-            if self.stop_reasons[retries] == 'end_turn':
+            # Continue immediately only if the output was cut off by the token limit
+            if metrics["stop_reason"] != 'max_tokens':
                 break
 
-            # Add a delay between iterations
-            time.sleep(self.sleep_time)
-
     # Reset the chat history
     def clear_chat_history(self) -> None:
         self.chat_history = "Hello, I am an AI~"
@@ -151,7 +197,7 @@ class BedrockProcessor:
             
             # Print the document length and calculate the number of iterations
             print(len(self.document))
-            self.iterations = int(len(self.document)/4096)
+            self.iterations = max(1, int(len(self.document)/4096))
             print(self.iterations)
         except:
             # Handle exceptions
@@ -163,7 +209,8 @@ class BedrockProcessor:
     # Main method to process the request from the user
     def process_request(self, model_id: str, user_input: str, max_tokens: int, temperature: float, top_p: float, 
                         document: Optional[bytes] = None, document_type: Optional[str] = 'text', 
-                        processing_type: Optional[str] = 'translation') -> Tuple[str, List[int], float]:
+                        processing_type: Optional[str] = 'translation',
+                        on_text: Optional[Callable[[str], None]] = None) -> Tuple[str, List[int], float]:
         # Update the model parameters
         self.model_id = model_id
         self.max_tokens = max_tokens
@@ -176,8 +223,8 @@ class BedrockProcessor:
             self.document_type = document_type
             self.process_documents(document)
     
-        # Process the long-form output
-        self.process_long_form_output()
+        # Process the long-form output, streaming each segment to on_text as it is generated
+        self.process_long_form_output(on_text)
         
         # Return the final output, output token counts, and invocation latency
         return self.chat_history, self.output_tokens, round(self.invocation_latency, 4)
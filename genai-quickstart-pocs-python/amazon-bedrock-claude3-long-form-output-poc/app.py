@@ -91,6 +91,15 @@ if button:
     bp = BedrockProcessor(system_prompt_template, prompt_template, iterations=max_iterations)  # Create a BedrockProcessor instance
     bp.clear_chat_history()  # Clear the chat history
     with st.status('Generating a response...', expanded=True, state="running") as status:  # Display a status message
+        output_placeholder = st.empty()  # Placeholder the response is streamed into
+        streamed_text = []
+
+        def show_text(text: str) -> None:
+            streamed_text.append(text)
+            # Re-render every few chunks rather than on every token
+            if len(streamed_text) % 20 == 0:
+                output_placeholder.markdown(''.join(streamed_text))
+
         final_response, output_tokens, invocation_latency = bp.process_request(model_id, 
                                                                                user_input, 
                                                                                max_output_tokens, 
@@ -98,11 +107,13 @@ if button:
                                                                                top_p, 
                                                                                document, 
                                                                                document_type, 
-                                                                               document_processing_type)  # Process the request
+                                                                               document_processing_type,
+                                                                               on_text=show_text)  # Process the request
         total_output_tokens = total_tokens(output_tokens)  # Calculate the total output tokens
-        st.markdown(final_response.split('~')[1])  # Display the final response
-        for x, y in output_tokens:
-            st.sidebar.markdown(f"Tokens in Iteration {x}: {y:,}")  # Display the number of tokens used in each iteration
+        output_placeholder.markdown(final_response.split('~')[1])  # Display the final response
+        for metrics in bp.iteration_metrics:
+            st.sidebar.markdown(f"Iteration {metrics['iteration']}: {metrics['output_tokens']:,} output tokens, "
+                                f"{metrics['input_tokens']:,} input tokens ({metrics['cache_read_input_tokens']:,} cached), "
+                                f"{metrics['latency']:,.2f} s")  # Display the tokens and latency of each iteration
         st.sidebar.markdown(f"Output Tokens used: {total_output_tokens:,}")  # Display the total output tokens used
         st.sidebar.markdown(f"Time Taken: {invocation_latency:,.2f} s")  # Display the time taken for the request
-
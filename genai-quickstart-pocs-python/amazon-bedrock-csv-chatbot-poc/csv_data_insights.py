@@ -1,13 +1,21 @@
 import boto3
 import botocore
 import streamlit as st
-import io
 import json
-import pandas as pd
+import re
+from local_analytics import load_dataset, format_profile
 
 # Setup Bedrock client
 config = botocore.config.Config(connect_timeout=300, read_timeout=300)
 bedrock = boto3.client('bedrock-runtime', 'us-east-1', config=config)
+model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+# Rows of raw data shown to the model next to the profile
+sample_rows = 20
+# Largest query result passed back to the model
+max_result_rows = 50
+# Attempts the model gets to write a query that runs
+max_sql_attempts = 2
 
 # Removes all XML tags so the CSV can be parsed as string
 def parse_xml(xml, tag):
@@ -26,34 +34,67 @@ def parse_xml(xml, tag):
             parsed_value = line.replace(tag_to_extract, "")
             return parsed_value
 
+def invoke_model(content, max_tokens=10000):
+    """
+    Send a single user message to Claude on Amazon Bedrock.
+    Args:
+        content (str or list): The message content.
+        max_tokens (int): Maximum number of tokens to generate.
+    Returns:
+        list: The content blocks of the model's response.
+    """
+    prompt = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.1,
+        "messages": [
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+    }
+
+    # Convert the prompt dictionary to a JSON string
+    json_prompt = json.dumps(prompt)
+
+    # Invoke the Anthropic language model with the JSON prompt
+    response = bedrock.invoke_model(body=json_prompt, modelId=model_id, accept="application/json", contentType="application/json")
+
+    # Parse the response body as JSON
+    response_body = json.loads(response.get('body').read())
+
+    return response_body['content']
+
+def extract_tag(text, tag):
+    """
+    Extract the content of the first <tag>...</tag> block, which may span multiple lines.
+    Args:
+        text (str): The model output.
+        tag (str): The XML tag to extract.
+    Returns:
+        str: The enclosed text, or None if the tag is not present.
+    """
+    match = re.search(rf"<{tag}>(.*?)</{tag}>", text, re.DOTALL)
+    return match.group(1).strip() if match else None
+
 def csv_to_text_analysis(csv_data, csv_subject):
     """
-    Convert CSV data to text and analyze the file using a language model prompt.
+    Profile the CSV data locally and analyze the profile using a language model prompt.
     Args:
         csv_data (bytes): The CSV data as bytes.
         csv_subject (str): The subject of the CSV data.
     Returns:
         str: Text generated by the language model based on the CSV data.
     """
-    # Set chunk size (adjust as needed)
-    chunk_size = 100000  # Reduced chunk size
-
-    # Create a TextIOWrapper for the CSV data
-    csv_io = io.StringIO(csv_data.decode('utf-8'))
-
-    # Read the CSV data in chunks
-    for chunk in pd.read_csv(csv_io, chunksize=chunk_size):
-        # Convert chunk to a JSON string
-        json_data = chunk.to_json(orient='records')
-
-        # Truncate the JSON data if it exceeds the maximum length
-        max_length = 100000  # Adjust the maximum length as needed
-        if len(json_data) > max_length:
-            json_data = json_data[:max_length]
-
-        # Setup prompt
-        user_prompt = f"""
-You are an {csv_subject} Analyst.You will be provided with CSV data. Based on the data, your goal is to provide the following:
+    # Parse and profile the full file once; repeated calls reuse the cached dataset
+    dataset = load_dataset(csv_data)
+    profile = format_profile(dataset.profile)
+    sample = dataset.df.head(sample_rows).to_csv(index=False)
+
+    # Setup prompt
+    user_prompt = f"""
+You are an {csv_subject} Analyst.You will be provided with a statistical profile of CSV data, computed over every row, and a sample of its first rows. Based on the data, your goal is to provide the following:
     A brief description of the data
     Insights or patterns you can identify from the data
         
@@ -65,109 +106,110 @@ Think through each step of your thought process and provide a detailed analysis.
 
 """
 
-        prompt = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 10000,
-            "temperature": 0.1,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": user_prompt
-                        },
-                        {
-                            "type": "text",
-                            "text": json_data
-                        }
-                    ]
-                }
-            ]
+    content = invoke_model([
+        {
+            "type": "text",
+            "text": user_prompt
+        },
+        {
+            "type": "text",
+            "text": f"Profile:\n{profile}\n\nSample rows:\n{sample}"
         }
-    
-        # Convert the prompt dictionary to a JSON string
-        json_prompt = json.dumps(prompt)
-
-        # Invoke the Anthropic language model with the JSON prompt
-        response = bedrock.invoke_model(body=json_prompt, modelId="anthropic.claude-3-sonnet-20240229-v1:0", accept="application/json", contentType="application/json")
-
-        # Parse the response body as JSON
-        response_body = json.loads(response.get('body').read())
-
-        # Extract the LLM Output from the response
-        llmOutput = response_body['content'][0]['text']
+    ])
 
-    return llmOutput
+    # Extract the LLM Output from the response
+    return content[0]['text']
 
-def chat_with_csv(csv_data, user_question, csv_subject):
+def generate_sql(profile, user_question, csv_subject, previous_query=None, error=None):
     """
-    Convert CSV data to text and answer a question provided by the user with a language model's response.
+    Ask the language model for a DuckDB SQL query that answers the user's question.
     Args:
-        csv_data (bytes): The CSV data as bytes.
+        profile (str): The formatted data profile.
+        user_question (str): The user's question.
         csv_subject (str): The subject of the CSV data.
+        previous_query (str): A query that failed, if retrying.
+        error (str): The error the previous query raised, if retrying.
     Returns:
-        str: Text generated by the language model based on the CSV data.
+        str: The SQL query, or None if the model did not provide one.
     """
-     
-    # Set chunk size (adjust as needed)
-    chunk_size = 100000  # Reduced chunk size
-
-    # Create a TextIOWrapper for the CSV data
-    csv_io = io.StringIO(csv_data.decode('utf-8'))
+    retry = ""
+    if previous_query:
+        retry = f"""
+Your previous query failed. Fix it.
+Previous query:
+{previous_query}
+Error:
+{error}
+"""
 
-    # Read the CSV data in chunks
-    for chunk in pd.read_csv(csv_io, chunksize=chunk_size):
-        # Convert chunk to a JSON string
-        json_data = chunk.to_json(orient='records')
+    user_prompt = f"""
+You are an AI {csv_subject} Analyst. The user's CSV data is loaded into a DuckDB table named "data". Write one DuckDB SQL SELECT query that computes what is needed to answer the user's question over the full table. Quote column names with double quotes. Aggregate or limit the result so it is small.
 
-        # Truncate the JSON data if it exceeds the maximum length
-        max_length = 100000  # Adjust the maximum length as needed
-        if len(json_data) > max_length:
-            json_data = json_data[:max_length]
+Data profile:
+{profile}
 
-        # Setup prompt
-        user_prompt = f"""
-You are an AI {csv_subject} Analyst. You will be provided with CSV data and a user question. Based on the data and the question, provide a detailed response. If the response is better suited in a tabular format, please provide the response in the following format:
+User Question:
+{user_question}
+{retry}
+Respond with the query only, in this format:
+<sql>(SQL query)</sql>
+"""
 
-CSV Data:
-{json_data}
+    content = invoke_model(user_prompt, max_tokens=1000)
+    return extract_tag(content[0]['text'], "sql")
 
+def chat_with_csv(csv_data, user_question, csv_subject):
+    """
+    Answer a question provided by the user by having a language model write SQL that runs locally
+    over the full CSV data, then explain the (small) result.
+    Args:
+        csv_data (bytes): The CSV data as bytes.
+        user_question (str): The user's question.
+        csv_subject (str): The subject of the CSV data.
+    Returns:
+        list: The content blocks of the language model's response.
+    """
+    dataset = load_dataset(csv_data)
+    profile = format_profile(dataset.profile)
+
+    # Let the model write a query, run it locally, and give it one chance to fix an error
+    query = None
+    error = None
+    result_text = None
+    for _ in range(max_sql_attempts):
+        query = generate_sql(profile, user_question, csv_subject, previous_query=query, error=error)
+        if not query:
+            break
+        try:
+            result, truncated = dataset.run_sql(query, max_rows=max_result_rows)
+            result_text = result.to_csv(index=False)
+            if truncated:
+                result_text += f"(showing the first {max_result_rows} rows)\n"
+            break
+        except Exception as e:
+            error = str(e)
+
+    if result_text is not None:
+        query_section = f"""
+SQL Query (run over all {dataset.profile['rows']} rows):
+{query}
+
+Query Result:
+{result_text}"""
+    else:
+        query_section = "\nNo query result is available, answer from the data profile.\n"
+
+    # Setup prompt
+    user_prompt = f"""
+You are an AI {csv_subject} Analyst. You will be provided with a profile of CSV data, the result of a query over the data, and a user question. Based on the data and the question, provide a detailed response. If the response is better suited in a tabular format, please provide the response in the following format:
+
+Data Profile:
+{profile}
+{query_section}
 User Question:
 {user_question}
 
 Provide a detailed response to the user's question based on the given CSV data.
 """
 
-        prompt = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 10000,
-            "temperature": 0.1,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": user_prompt
-                }
-            ]
-        }
-
-        # Convert the prompt dictionary to a JSON string
-        json_prompt = json.dumps(prompt)
-
-        # Invoke the Anthropic language model with the JSON prompt
-        response = bedrock.invoke_model(body=json_prompt, modelId="anthropic.claude-3-sonnet-20240229-v1:0", accept="application/json", contentType="application/json")
-
-        # Parse the response body as JSON
-        response_body = json.loads(response.get('body').read())
-        
-        # Extract the LLM Output from the response
-        llmOutput = response_body['content']
-    
-    return llmOutput
-
-
-
-
-        
-
-      
\ No newline at end of file
+    return invoke_model(user_prompt)
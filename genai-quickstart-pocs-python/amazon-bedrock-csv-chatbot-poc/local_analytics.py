@@ -0,0 +1,166 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+# Name of the table the uploaded CSV is exposed as in SQL
+TABLE_NAME = "data"
+# Number of parsed uploads kept in memory, so Streamlit reruns do not re-parse the file
+MAX_CACHED_DATASETS = 4
+
+_datasets = OrderedDict()
+# Streamlit runs each session's script on its own thread
+_datasets_lock = threading.Lock()
+
+
+class CsvDataset:
+    """
+    An uploaded CSV parsed once into a DataFrame, with a statistical profile and a
+    read-only DuckDB connection that runs SQL over the full dataset.
+    Datasets are cached and shared by Streamlit script threads; DuckDB connections are not
+    thread safe, so every query runs on its own cursor of the connection.
+    """
+
+    def __init__(self, df, top_k=5, max_correlations=10):
+        """
+        Args:
+            df (pandas.DataFrame): The parsed CSV data.
+            top_k (int): Number of most frequent values reported for each text column.
+            max_correlations (int): Number of strongest numeric correlations reported.
+        """
+        self.df = df
+        self.profile = profile_dataframe(df, top_k=top_k, max_correlations=max_correlations)
+        self.connection = duckdb.connect()
+        # Model-written SQL must not read or write local files, or turn that back on
+        self.connection.execute("SET enable_external_access = false")
+        self.connection.execute("SET lock_configuration = true")
+
+    def run_sql(self, query, max_rows=50):
+        """
+        Run a single read-only SQL query over the full dataset.
+        Args:
+            query (str): A SELECT (or WITH ... SELECT) statement over the table "data".
+            max_rows (int): Maximum number of result rows returned.
+        Returns:
+            tuple: (pandas.DataFrame with at most max_rows rows, bool whether the result was truncated)
+        Raises:
+            ValueError: If the query is not exactly one SELECT statement.
+            duckdb.Error: If the query fails to run.
+        """
+        with self.connection.cursor() as cursor:
+            statements = cursor.extract_statements(query)
+            if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+                raise ValueError("Only a single SELECT statement is allowed")
+            # Registered DataFrames are visible to their own cursor only; registering does not copy the data
+            cursor.register(TABLE_NAME, self.df)
+            result = cursor.execute(query)
+            rows = result.fetchmany(max_rows + 1)
+            columns = [column[0] for column in result.description]
+        table = pd.DataFrame(rows[:max_rows], columns=columns)
+        return table, len(rows) > max_rows
+
+
+def load_dataset(csv_data):
+    """
+    Parse CSV bytes into a CsvDataset, reusing the cached dataset if the same file was loaded before.
+    Args:
+        csv_data (bytes): The CSV data as bytes.
+    Returns:
+        CsvDataset: The parsed dataset with its profile.
+    """
+    key = hashlib.sha256(csv_data).hexdigest()
+    # Held while parsing too, so concurrent reruns with the same upload build the dataset once
+    with _datasets_lock:
+        if key in _datasets:
+            _datasets.move_to_end(key)
+            return _datasets[key]
+
+        df = pd.read_csv(io.BytesIO(csv_data))
+        dataset = CsvDataset(df)
+        _datasets[key] = dataset
+        if len(_datasets) > MAX_CACHED_DATASETS:
+            _datasets.popitem(last=False)
+        return dataset
+
+
+def profile_dataframe(df, top_k=5, max_correlations=10):
+    """
+    Compute a compact statistical profile of a DataFrame with vectorized pandas operations.
+    Args:
+        df (pandas.DataFrame): The data to profile.
+        top_k (int): Number of most frequent values reported for each non-numeric column.
+        max_correlations (int): Number of strongest numeric correlations reported.
+    Returns:
+        dict: Row/column counts, per-column statistics and the strongest correlations.
+    """
+    null_counts = df.isna().sum()
+    unique_counts = df.nunique(dropna=True)
+    numeric = df.select_dtypes(include="number")
+    numeric_stats = numeric.describe().T if not numeric.empty else pd.DataFrame()
+
+    columns = []
+    for name in df.columns:
+        column = {
+            "name": str(name),
+            "dtype": str(df[name].dtype),
+            "nulls": int(null_counts[name]),
+            "unique": int(unique_counts[name]),
+        }
+        if name in numeric_stats.index:
+            stats = numeric_stats.loc[name]
+            column["stats"] = {stat: _round(stats[stat]) for stat in ("mean", "std", "min", "25%", "50%", "75%", "max")}
+        elif column["unique"] < len(df) - column["nulls"]:
+            top_values = df[name].value_counts(dropna=True).head(top_k)
+            column["top_values"] = {str(value): int(count) for value, count in top_values.items()}
+        else:
+            # Every value is distinct (an ID or timestamp), so frequencies say nothing
+            column["top_values"] = {}
+        columns.append(column)
+
+    correlations = []
+    if numeric.shape[1] > 1:
+        corr = numeric.corr()
+        # Each pair once: keep the upper triangle above the diagonal
+        pairs = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack().dropna()
+        strongest = pairs.reindex(pairs.abs().sort_values(ascending=False).index).head(max_correlations)
+        correlations = [
+            {"columns": [str(a), str(b)], "correlation": _round(value)}
+            for (a, b), value in strongest.items()
+        ]
+
+    return {
+        "rows": int(len(df)),
+        "columns": columns,
+        "correlations": correlations,
+    }
+
+
+def format_profile(profile):
+    """
+    Render a profile as compact text for a prompt.
+    Args:
+        profile (dict): A profile returned by profile_dataframe.
+    Returns:
+        str: One line per column, followed by the strongest correlations.
+    """
+    lines = [f'Table "{TABLE_NAME}": {profile["rows"]} rows, {len(profile["columns"])} columns']
+    for column in profile["columns"]:
+        line = f'- "{column["name"]}" ({column["dtype"]}): {column["nulls"]} nulls, {column["unique"]} unique'
+        if "stats" in column:
+            line += ", " + ", ".join(f"{stat}={value}" for stat, value in column["stats"].items())
+        elif column["top_values"]:
+            line += ", top values: " + ", ".join(f"{value!r} ({count})" for value, count in column["top_values"].items())
+        lines.append(line)
+    if profile["correlations"]:
+        lines.append("Strongest correlations:")
+        for pair in profile["correlations"]:
+            lines.append(f'- "{pair["columns"][0]}" ~ "{pair["columns"][1]}": {pair["correlation"]}')
+    return "\n".join(lines)
+
+
+def _round(value, digits=4):
+    return None if pd.isna(value) else round(float(value), digits)
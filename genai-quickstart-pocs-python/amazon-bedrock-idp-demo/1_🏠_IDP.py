@@ -10,12 +10,14 @@ from PyPDF2 import PdfReader
 import pdf2image
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from urllib.parse import urlparse
 import re
 import numpy as np
 from utils.helper_function import invoke_blueprint_recommendation_async,wait_for_completion,get_blueprint_recommendation
 from utils.utils_streamlitApp import *
+from utils.bda_batch import TERMINAL_STATES, submit_invocations, wait_for_invocations, list_s3_keys, read_json_objects
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,6 +27,11 @@ load_dotenv()
 S3_BUCKET = os.environ.get("BUCKET_NAME")
 BEDROCK_REGION = os.environ.get("region_name")
 ACCOUNT_ID = os.environ.get("account_id")
+BDA_PROFILE_ARN = f"arn:aws:bedrock:{BEDROCK_REGION}:{ACCOUNT_ID}:data-automation-profile/us.data-automation-v1"
+
+# Batch processing settings
+BDA_MAX_CONCURRENCY = int(os.environ.get("BDA_MAX_CONCURRENCY", "8"))
+BDA_JOB_TIMEOUT = 60 * 60
 
 image_path = "./assets/Banner_1.jpg"
 site_icon=Image.open("./assets/IDP_Icon2.png")
@@ -340,26 +347,17 @@ def invoke_data_automation_async(project_arn, input_config, output_config):
 
 # Function to wait for BDA Invocation Aync Job to complete
 def wait_for_job_to_complete(invocationArn):
-    get_status_response = bda_runtime_client.get_data_automation_status(
-         invocationArn=invocationArn)
-    status = get_status_response['status']
     job_id = invocationArn.split('/')[-1]
-    max_iterations = 60
-    iteration_count = 0
-    while status not in ['Success', 'ServiceError', 'ClientError']:
-        print(f'Waiting for Job to Complete. Current status is {status}')
-        time.sleep(10)
-        iteration_count += 1
-        if iteration_count >= max_iterations:
-            print(f"Maximum number of iterations ({max_iterations}) reached. Breaking the loop.")
-            break
-        get_status_response = bda_runtime_client.get_data_automation_status(
-         invocationArn=invocationArn)
-        status = get_status_response['status']
-    if iteration_count >= max_iterations:
+    try:
+        get_status_response = wait_for_invocations(
+            bda_runtime_client, [invocationArn], timeout=BDA_JOB_TIMEOUT,
+            on_update=lambda statuses: print(f"Waiting for Job to Complete. Current status is {statuses[invocationArn]['status']}")
+        )[invocationArn]
+    except TimeoutError:
         raise Exception("Job did not complete within the expected time frame.")
-    else:
-        print(f"Invocation Job with id {job_id} completed. Status is {status}")
+    if get_status_response['status'] not in TERMINAL_STATES:
+        raise Exception(f"Could not read the job status: {get_status_response.get('pollError')}")
+    print(f"Invocation Job with id {job_id} completed. Status is {get_status_response['status']}")
 
     #return get_status_response
     return get_status_response['status'], get_status_response.get('statusMessage', '')
@@ -405,34 +403,34 @@ def get_data_automation_results(project_arn, job_id):
         return None
     
 def create_batch_job(project_arn, input_uris, output_prefix):
-    """Create a batch processing job for multiple files"""
-    job_arns = []
+    """Create a batch processing job for multiple files, submitting invocations in parallel"""
     progress_text = "Batch upload in progress. Please wait."
     progress_bar = st.progress(0,text=progress_text)
     
     status_text = st.empty()
-
-    for i,input_uri in enumerate(input_uris):
-        try:
-            status_text.text(f"Creating job {i+1}/{len(input_uris)}: {os.path.basename(input_uri)}")
-
-            response = bda_runtime_client.invoke_data_automation_async(
-                inputConfiguration={"s3Uri": input_uri},
-                outputConfiguration={"s3Uri": output_prefix},
-                dataAutomationConfiguration={
-                    "dataAutomationProjectArn": project_arn,
-                    "stage": "LIVE"
-                },
-                dataAutomationProfileArn=f"arn:aws:bedrock:{BEDROCK_REGION}:{ACCOUNT_ID}:data-automation-profile/us.data-automation-v1"
-            )
-            job_arns.append(response['invocationArn'])
-            #progress_bar.progress((i+1)/len(input_uris))
-
-            status_text.text(f"Created job {i+1}/{len(input_uris)}")
-            progress_bar.progress((i+1)/len(input_uris),text=progress_text)
-        except ClientError as e:
-            st.error(f"Error creating batch job: {e}")
-    return job_arns
+    submitted = []
+
+    def on_submitted(i, invocation_arn, error):
+        if error:
+            st.error(f"Error creating batch job for {os.path.basename(input_uris[i])}: {error}")
+        submitted.append(i)
+        status_text.text(f"Created job {len(submitted)}/{len(input_uris)}")
+        progress_bar.progress(len(submitted)/len(input_uris),text=progress_text)
+
+    requests = [
+        {
+            "inputConfiguration": {"s3Uri": input_uri},
+            "outputConfiguration": {"s3Uri": output_prefix},
+            "dataAutomationConfiguration": {
+                "dataAutomationProjectArn": project_arn,
+                "stage": "LIVE"
+            },
+            "dataAutomationProfileArn": BDA_PROFILE_ARN
+        }
+        for input_uri in input_uris
+    ]
+    job_arns = submit_invocations(bda_runtime_client, requests, max_workers=BDA_MAX_CONCURRENCY, on_submitted=on_submitted)
+    return [job_arn for job_arn in job_arns if job_arn]
         
 
     
@@ -442,24 +440,23 @@ def aggregate_results(output_prefix):
     all_results = []
     
     try:
-        # List all result files in the output prefix
+        # List all result files in the output prefix, across every page
         prefix = output_prefix.replace(f"s3://{S3_BUCKET}/", "")
-        objects = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix)
-        
-        for obj in objects.get('Contents', []):
-            if obj['Key'].endswith('.json'):
-                # Download and parse each result file
-                response = s3_client.get_object(Bucket=S3_BUCKET, Key=obj['Key'])
-                content = response['Body'].read().decode('utf-8')
-                result = json.loads(content)
-                
-                # Extract document name from S3 key
-                doc_name = os.path.basename(obj['Key']).split('_results')[0]
-                
-                # Transform to grid format
-                is_custom = 'matched_blueprint' in result
-                grid_data = transform_to_grid(result, is_custom, doc_name)
-                all_results.extend(grid_data)
+        keys = list_s3_keys(s3_client, S3_BUCKET, prefix, suffix='.json')
+
+        # Download and parse the result files in parallel
+        results = read_json_objects(s3_client, [f"s3://{S3_BUCKET}/{key}" for key in keys])
+
+        for key, result in zip(keys, results):
+            if result is None:
+                continue
+            # Extract document name from S3 key
+            doc_name = os.path.basename(key).split('_results')[0]
+            
+            # Transform to grid format
+            is_custom = 'matched_blueprint' in result
+            grid_data = transform_to_grid(result, is_custom, doc_name)
+            all_results.extend(grid_data)
                 
     except Exception as e:
         st.error(f"Error aggregating results: {str(e)}")
@@ -468,27 +465,33 @@ def aggregate_results(output_prefix):
 
 
 def monitor_data_automation_job(invocation_arn, job_id):
-    status = "InProgress"
+    statuses = monitor_data_automation_jobs([invocation_arn])
+    get_status_response = statuses[invocation_arn]
+    return get_status_response['status'], "", get_status_response
+
+
+def monitor_data_automation_jobs(invocation_arns):
+    """Monitor many Data Automation invocations with a single adaptive poller"""
     progress_bar = st.progress(0)
     status_placeholder = st.empty()
-    max_iterations = 60
-    iteration_count = 0
-    
-    while status not in ['Success', 'ServiceError', 'ClientError']:
-        time.sleep(10)
-        iteration_count += 1
-        if iteration_count >= max_iterations:
-            break
-        
-        get_status_response = bda_runtime_client.get_data_automation_status(
-            invocationArn=invocation_arn
-        )
-        status = get_status_response['status']
-        status_placeholder.markdown(f"**Status:** {status}")
-        progress_bar.progress(min(iteration_count/max_iterations, 0.95))
-    
+    latest = {}
+
+    def on_update(statuses):
+        latest.update(statuses)
+        done = sum(1 for response in statuses.values() if response['status'] in TERMINAL_STATES)
+        if len(statuses) == 1:
+            status_placeholder.markdown(f"**Status:** {next(iter(statuses.values()))['status']}")
+        else:
+            status_placeholder.markdown(f"**Completed:** {done}/{len(statuses)}")
+        progress_bar.progress(min(done/len(statuses), 0.95))
+
+    try:
+        wait_for_invocations(bda_runtime_client, invocation_arns, timeout=BDA_JOB_TIMEOUT, on_update=on_update)
+    except TimeoutError as e:
+        st.warning(str(e))
+
     progress_bar.progress(1.0)
-    return status, "", get_status_response
+    return latest
 
 def fetch_blueprint_recommendation(input_uri):
     """Get recommended blueprint for a document"""
@@ -1836,111 +1839,125 @@ def main():
                     )
                     output_prefix = f"s3://{target_bucket}/bda/output/batch/"
                     all_results = []
-                    
-                    for i, input_uri in enumerate(input_uris):
-                        try:
-                            # Get blueprint recommendation
-                            payload = {
-                                        "inputDataConfiguration":{
-                                            "s3Uri":f'{input_uri}'
-                                        },
-                                        "dataAutomationProfileArn":f"arn:aws:bedrock:{BEDROCK_REGION}:{ACCOUNT_ID}:data-automation-profile/us.data-automation-v1"
-                                    }
-                            response = invoke_blueprint_recommendation_async(bda_client,BEDROCK_REGION, json.dumps(payload))
-                            job_id = response['jobId']
-                            status_response = wait_for_completion(
-                                            client=None,
-                                            get_status_function=get_blueprint_recommendation,
-                                            status_kwargs={
-                                                'bda_client': bda_client,
-                                                'job_id': job_id,
-                                                'region_name': BEDROCK_REGION,
-                                                'credentials': boto3.Session().get_credentials().get_frozen_credentials(),
-                                            },
-                                            completion_states=['Completed'],
-                                            error_states=['ClientError', 'ServiceError'],
-                                            status_path_in_response='status',
-                                            max_iterations=15,
-                                            delay=30
-                                )
-                            blueprint_recommendation = next((result for result in status_response['results'] if result['type'] == 'BLUEPRINT_RECOMMENDATION'),None)
-                            recommended_blueprint_info = blueprint_recommendation['blueprintRecommendation']
-                            blueprint_arn = recommended_blueprint_info['matchedBlueprint']['blueprintArn']
-                            print(blueprint_arn)
 
-                            
-                            # Process with recommended blueprint if found
-                            if blueprint_arn:
-                                print("Found Recommended Blueprint")
-                                response = bda_runtime_client.invoke_data_automation_async(
-                                    inputConfiguration={"s3Uri": input_uri},
-                                    outputConfiguration={"s3Uri": f"{output_prefix}custom_{i}_"},
-                                    dataAutomationProfileArn=f"arn:aws:bedrock:{BEDROCK_REGION}:{ACCOUNT_ID}:data-automation-profile/us.data-automation-v1",
-                                    blueprints=[{
-                                        "blueprintArn": blueprint_arn,
-                                    }]
-                                )
-                                
-                                # Monitor job
-                                job_arn = response['invocationArn']
-                                final_status, _, response = monitor_data_automation_job(job_arn, job_arn.split('/')[-1])
-                                #print(response['outputConfiguration']['s3Uri'])
-                                if final_status == "Success":
-                                    metadata = get_s3_json_content(response['outputConfiguration']['s3Uri'])
-                                    #print(metadata)
-                                    if metadata and metadata.get('output_metadata'):
-                                        for asset in metadata['output_metadata']:
-                                            for segment in asset.get('segment_metadata', []):
-                                                if segment.get('custom_output_status') == "MATCH":
-                                                    result_uri = segment.get('custom_output_path')
-                                                    if result_uri:
-                                                        processed_content = get_s3_json_content(result_uri)
-                                                        #print(processed_content)
-                                                        if processed_content:
-                                                            grid_data = transform_and_display(
-                                                                    processed_content,
-                                                                    is_custom_output=True,
-                                                                    document_name=os.path.basename(input_uri)
-                                                                )
-                                                            print(grid_data)
-                                                            all_results.extend(grid_data)
-                                                            continue
-                            
-                            else:
-                                # Standard processing fallback
-                                response = bda_runtime_client.invoke_data_automation_async(
-                                    inputConfiguration={"s3Uri": input_uri},
-                                    outputConfiguration={"s3Uri": f"{output_prefix}standard_{i}_"},
-                                    dataAutomationConfiguration={
-                                        "dataAutomationProjectArn": project_arn,
-                                        "stage": "LIVE"
+                    # Get blueprint recommendations for all documents in parallel
+                    def recommend_blueprint(input_uri):
+                        payload = {
+                                    "inputDataConfiguration":{
+                                        "s3Uri":f'{input_uri}'
                                     },
-                                    dataAutomationProfileArn=f"arn:aws:bedrock:{BEDROCK_REGION}:{ACCOUNT_ID}:data-automation-profile/us.data-automation-v1"
+                                    "dataAutomationProfileArn":BDA_PROFILE_ARN
+                                }
+                        response = invoke_blueprint_recommendation_async(bda_client,BEDROCK_REGION, json.dumps(payload))
+                        job_id = response['jobId']
+                        status_response = wait_for_completion(
+                                        client=None,
+                                        get_status_function=get_blueprint_recommendation,
+                                        status_kwargs={
+                                            'bda_client': bda_client,
+                                            'job_id': job_id,
+                                            'region_name': BEDROCK_REGION,
+                                            'credentials': boto3.Session().get_credentials().get_frozen_credentials(),
+                                        },
+                                        completion_states=['Completed'],
+                                        error_states=['ClientError', 'ServiceError'],
+                                        status_path_in_response='status',
+                                        max_iterations=15,
+                                        delay=30
+                            )
+                        blueprint_recommendation = next((result for result in status_response['results'] if result['type'] == 'BLUEPRINT_RECOMMENDATION'),None)
+                        recommended_blueprint_info = blueprint_recommendation['blueprintRecommendation']
+                        return recommended_blueprint_info['matchedBlueprint']['blueprintArn']
+
+                    st.write("Getting blueprint recommendations...")
+                    blueprint_arns = {}
+                    with ThreadPoolExecutor(max_workers=BDA_MAX_CONCURRENCY) as executor:
+                        futures = {executor.submit(recommend_blueprint, input_uri): input_uri for input_uri in input_uris}
+                        for future in as_completed(futures):
+                            input_uri = futures[future]
+                            try:
+                                blueprint_arns[input_uri] = future.result()
+                                print(blueprint_arns[input_uri])
+                            except Exception as e:
+                                st.error(f"Failed to process {input_uri}: {str(e)}")
+
+                    # Process with the recommended blueprint if found, otherwise fall back to standard output
+                    requests = []
+                    for i, input_uri in enumerate(input_uris):
+                        if input_uri not in blueprint_arns:
+                            continue
+                        blueprint_arn = blueprint_arns[input_uri]
+                        if blueprint_arn:
+                            requests.append((input_uri, True, {
+                                "inputConfiguration": {"s3Uri": input_uri},
+                                "outputConfiguration": {"s3Uri": f"{output_prefix}custom_{i}_"},
+                                "dataAutomationProfileArn": BDA_PROFILE_ARN,
+                                "blueprints": [{
+                                    "blueprintArn": blueprint_arn,
+                                }]
+                            }))
+                        else:
+                            requests.append((input_uri, False, {
+                                "inputConfiguration": {"s3Uri": input_uri},
+                                "outputConfiguration": {"s3Uri": f"{output_prefix}standard_{i}_"},
+                                "dataAutomationConfiguration": {
+                                    "dataAutomationProjectArn": project_arn,
+                                    "stage": "LIVE"
+                                },
+                                "dataAutomationProfileArn": BDA_PROFILE_ARN
+                            }))
+
+                    def on_submitted(i, job_arn, error):
+                        if error:
+                            st.error(f"Failed to process {requests[i][0]}: {str(error)}")
+
+                    # Submit every invocation with bounded parallelism
+                    st.write(f"Submitting {len(requests)} documents to Bedrock Data Automation...")
+                    job_arns = submit_invocations(
+                        bda_runtime_client, [request for _, _, request in requests], max_workers=BDA_MAX_CONCURRENCY,
+                        on_submitted=on_submitted
+                    )
+                    jobs = [(input_uri, is_custom, job_arn) for (input_uri, is_custom, _), job_arn in zip(requests, job_arns) if job_arn]
+
+                    # Monitor all jobs with a single poller
+                    job_statuses = monitor_data_automation_jobs([job_arn for _, _, job_arn in jobs])
+                    completed_jobs = [
+                        (input_uri, is_custom, job_statuses[job_arn])
+                        for input_uri, is_custom, job_arn in jobs
+                        if job_statuses.get(job_arn, {}).get('status') == "Success"
+                    ]
+                    for input_uri, _, job_arn in jobs:
+                        job_status = job_statuses.get(job_arn, {})
+                        if job_status.get('status') not in TERMINAL_STATES and job_status.get('pollError'):
+                            st.error(f"Failed to process {input_uri}: could not read the job status: {job_status['pollError']}")
+                        elif job_status.get('status') != "Success":
+                            st.error(f"Failed to process {input_uri}: job ended with status {job_status.get('status')}")
+
+                    # Fetch job metadata and result files in parallel, then merge in input order
+                    metadata_list = read_json_objects(
+                        s3_client, [response['outputConfiguration']['s3Uri'] for _, _, response in completed_jobs]
+                    )
+                    result_uris = []
+                    for (input_uri, is_custom, _), metadata in zip(completed_jobs, metadata_list):
+                        if not metadata or not metadata.get('output_metadata'):
+                            continue
+                        for asset in metadata['output_metadata']:
+                            for segment in asset.get('segment_metadata', []):
+                                if is_custom:
+                                    if segment.get('custom_output_status') == "MATCH" and segment.get('custom_output_path'):
+                                        result_uris.append((input_uri, segment['custom_output_path']))
+                                elif segment.get('standard_output_path'):
+                                    result_uris.append((input_uri, segment['standard_output_path']))
+
+                    processed_contents = read_json_objects(s3_client, [result_uri for _, result_uri in result_uris])
+                    for (input_uri, _), processed_content in zip(result_uris, processed_contents):
+                        if processed_content:
+                            grid_data = transform_and_display(
+                                    processed_content,
+                                    is_custom_output=True,
+                                    document_name=os.path.basename(input_uri)
                                 )
-                                
-                                # Monitor job
-                                job_arn = response['invocationArn']
-                                final_status, _, response = monitor_data_automation_job(job_arn, job_arn.split('/')[-1])
-                                
-                                if final_status == "Success":
-                                    metadata = get_s3_json_content(response['outputConfiguration']['s3Uri'])
-                                    if metadata and metadata.get('output_metadata'):
-                                        for asset in metadata['output_metadata']:
-                                            for segment in asset.get('segment_metadata', []):
-                                                result_uri = segment.get('standard_output_path')
-                                                if result_uri:
-                                                    processed_content = get_s3_json_content(result_uri)
-                                                    if processed_content:
-                                                        grid_data = transform_and_display(
-                                                                    processed_content,
-                                                                    is_custom_output=True,
-                                                                    document_name=os.path.basename(input_uri)
-                                                            )                                                        
-                                                        
-                                                        all_results.extend(grid_data)
-                        
-                        except Exception as e:
-                            st.error(f"Failed to process {input_uri}: {str(e)}")
+                            all_results.extend(grid_data)
                     
                     if all_results:
                         st.session_state.batch_results = all_results
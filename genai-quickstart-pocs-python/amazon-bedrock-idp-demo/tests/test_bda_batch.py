@@ -0,0 +1,178 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bda_batch import list_s3_keys, submit_invocations, wait_for_invocations  # noqa: E402
+
+
+def client_error(code, http_status, operation):
+    return ClientError(
+        {'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': http_status}},
+        operation,
+    )
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances monotonic() instead of blocking"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeBDARuntime:
+    """
+    Answers get_data_automation_status from a script of statuses (or exceptions) per ARN.
+    The last entry of each script is repeated once the script runs out.
+    """
+
+    def __init__(self, scripts=None, failing_documents=()):
+        self.scripts = {arn: list(script) for arn, script in (scripts or {}).items()}
+        self.failing_documents = set(failing_documents)
+        self.polls = {arn: 0 for arn in self.scripts}
+        self.lock = threading.Lock()
+
+    def invoke_data_automation_async(self, inputConfiguration, **kwargs):
+        s3_uri = inputConfiguration['s3Uri']
+        if s3_uri in self.failing_documents:
+            raise client_error('ValidationException', 400, 'InvokeDataAutomationAsync')
+        return {'invocationArn': f"arn:{s3_uri}"}
+
+    def get_data_automation_status(self, invocationArn):
+        with self.lock:
+            script = self.scripts[invocationArn]
+            self.polls[invocationArn] += 1
+            result = script.pop(0) if len(script) > 1 else script[0]
+        if isinstance(result, Exception):
+            raise result
+        return {'status': result}
+
+
+class TestSubmitInvocations(unittest.TestCase):
+    def test_failed_submission_does_not_abort_the_batch(self):
+        client = FakeBDARuntime(failing_documents=['s3://bucket/b.pdf'])
+        requests = [{'inputConfiguration': {'s3Uri': f"s3://bucket/{name}.pdf"}} for name in ['a', 'b', 'c']]
+        submitted = []
+
+        arns = submit_invocations(
+            client, requests, max_workers=2,
+            on_submitted=lambda i, arn, error: submitted.append((i, arn, type(error).__name__ if error else None))
+        )
+
+        self.assertEqual(arns, ['arn:s3://bucket/a.pdf', None, 'arn:s3://bucket/c.pdf'])
+        self.assertEqual(sorted(submitted), [
+            (0, 'arn:s3://bucket/a.pdf', None),
+            (1, None, 'ClientError'),
+            (2, 'arn:s3://bucket/c.pdf', None),
+        ])
+
+
+class TestWaitForInvocations(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('utils.bda_batch.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_terminal_states(self):
+        client = FakeBDARuntime({
+            'ok': ['InProgress', 'Success'],
+            'service': ['ServiceError'],
+            'client': ['InProgress', 'InProgress', 'ClientError'],
+        })
+
+        statuses = wait_for_invocations(client, ['ok', 'service', 'client'])
+
+        self.assertEqual({arn: response['status'] for arn, response in statuses.items()},
+                         {'ok': 'Success', 'service': 'ServiceError', 'client': 'ClientError'})
+        # Finished invocations are not polled again
+        self.assertEqual(client.polls, {'ok': 2, 'service': 1, 'client': 3})
+
+    def test_delay_grows_while_idle_and_resets_on_change(self):
+        client = FakeBDARuntime({
+            'slow': ['InProgress', 'InProgress', 'InProgress', 'Success'],
+            'fast': ['InProgress'] * 5 + ['Success'],
+        })
+        rounds = []
+
+        wait_for_invocations(client, ['slow', 'fast'], min_delay=2, max_delay=5,
+                             on_update=lambda statuses: rounds.append(dict(statuses)))
+
+        # Round 1 changes state, rounds 2-3 are idle, round 4 finishes 'slow', round 5 is idle
+        self.assertEqual(self.clock.sleeps, [2, 3.0, 4.5, 2, 3.0])
+        self.assertEqual(len(rounds), 6)
+
+    def test_transient_poll_error_keeps_invocation_pending(self):
+        client = FakeBDARuntime({
+            'arn': ['InProgress', client_error('InternalServerException', 500, 'GetDataAutomationStatus'), 'Success'],
+        })
+        rounds = []
+
+        statuses = wait_for_invocations(client, ['arn'], on_update=lambda s: rounds.append(dict(s['arn'])))
+
+        self.assertEqual(rounds[1]['status'], 'InProgress')
+        self.assertIn('InternalServerException', rounds[1]['pollError'])
+        self.assertEqual(statuses['arn'], {'status': 'Success'})
+
+    def test_persistent_poll_error_is_reported_separately(self):
+        client = FakeBDARuntime({
+            'denied': ['InProgress', client_error('AccessDeniedException', 403, 'GetDataAutomationStatus')],
+            'ok': ['InProgress', 'InProgress', 'Success'],
+        })
+
+        statuses = wait_for_invocations(client, ['denied', 'ok'])
+
+        self.assertEqual(statuses['denied']['status'], 'InProgress')
+        self.assertIn('AccessDeniedException', statuses['denied']['pollError'])
+        self.assertEqual(client.polls['denied'], 2)
+        self.assertEqual(statuses['ok'], {'status': 'Success'})
+
+    def test_times_out_when_invocations_never_finish(self):
+        client = FakeBDARuntime({'arn': ['InProgress']})
+
+        with self.assertRaisesRegex(TimeoutError, '1 invocations did not complete within 60 seconds'):
+            wait_for_invocations(client, ['arn'], min_delay=2, max_delay=30, timeout=60)
+        self.assertLessEqual(sum(self.clock.sleeps), 60)
+
+
+class TestListS3Keys(unittest.TestCase):
+    def test_follows_pagination_and_filters_suffix(self):
+        s3 = boto3.client('s3', region_name='us-east-1',
+                          aws_access_key_id='testing', aws_secret_access_key='testing')  # nosec B106
+        stubber = Stubber(s3)
+        stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': 'out/a/result.json'}, {'Key': 'out/a/image.png'}],
+             'IsTruncated': True, 'NextContinuationToken': 'page-2'},
+            {'Bucket': 'bucket', 'Prefix': 'out/'},
+        )
+        stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': 'out/b/result.json'}], 'IsTruncated': False},
+            {'Bucket': 'bucket', 'Prefix': 'out/', 'ContinuationToken': 'page-2'},
+        )
+
+        with stubber:
+            keys = list_s3_keys(s3, 'bucket', 'out/', suffix='.json')
+
+        self.assertEqual(keys, ['out/a/result.json', 'out/b/result.json'])
+        stubber.assert_no_pending_responses()
+
+
+if __name__ == '__main__':
+    unittest.main()
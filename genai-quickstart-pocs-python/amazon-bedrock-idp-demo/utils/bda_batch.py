@@ -0,0 +1,152 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Final states of a Bedrock Data Automation invocation
+TERMINAL_STATES = ['Success', 'ServiceError', 'ClientError']
+
+# Error codes that are retried with backoff when submitting invocations
+THROTTLING_ERRORS = ['ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException']
+
+
+def _with_retries(call, max_retries=5, base_delay=1):
+    """
+    Run call(), retrying throttling errors with jittered exponential backoff
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except ClientError as e:
+            if e.response['Error']['Code'] not in THROTTLING_ERRORS or attempt == max_retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))  # nosec B311 - jitter only
+
+
+def _is_transient_error(error):
+    """
+    Throttling, server-side and connection errors may succeed on a later attempt
+    """
+    if isinstance(error, ClientError):
+        return (error.response['Error'].get('Code') in THROTTLING_ERRORS
+                or error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500)
+    return isinstance(error, BotoCoreError)
+
+
+def submit_invocations(bda_runtime_client, requests, max_workers=8, on_submitted=None):
+    """
+    Submit many invoke_data_automation_async requests with bounded parallelism.
+    :param bda_runtime_client: bedrock-data-automation-runtime client
+    :param requests: list of keyword arguments for invoke_data_automation_async
+    :param max_workers: maximum number of requests in flight
+    :param on_submitted: optional callback(index, invocation_arn, error) called from the calling thread
+    :return: invocation ARNs in the same order as requests (None for failed submissions)
+    """
+    invocation_arns = [None] * len(requests)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_with_retries, lambda r=request: bda_runtime_client.invoke_data_automation_async(**r)): i
+            for i, request in enumerate(requests)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            error = None
+            try:
+                invocation_arns[i] = future.result()['invocationArn']
+            except Exception as e:
+                # One document failing to submit must not abort the rest of the batch
+                error = e
+            if on_submitted:
+                on_submitted(i, invocation_arns[i], error)
+    return invocation_arns
+
+
+def wait_for_invocations(bda_runtime_client, invocation_arns, min_delay=2, max_delay=30, timeout=60 * 60,
+                         max_workers=8, on_update=None):
+    """
+    Wait for many invocations with a single poller.
+    Each round checks every pending invocation concurrently. The delay between rounds
+    grows while nothing changes and resets as soon as any invocation changes state.
+    An invocation whose status could not be read keeps its last known status and gets a
+    'pollError' message. Transient errors are retried on the next round; any other error
+    stops polling that invocation.
+    :param bda_runtime_client: bedrock-data-automation-runtime client
+    :param invocation_arns: invocation ARNs to wait for
+    :param on_update: optional callback(statuses) called from the calling thread after every round,
+        where statuses maps each ARN to its latest get_data_automation_status response
+    :return: dict of invocation ARN to its final get_data_automation_status response
+    """
+    statuses = {arn: {'status': 'Created'} for arn in invocation_arns}
+    pending = set(invocation_arns)
+    delay = min_delay
+    deadline = time.monotonic() + timeout
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending:
+            futures = {
+                executor.submit(
+                    _with_retries, lambda a=arn: bda_runtime_client.get_data_automation_status(invocationArn=a)
+                ): arn
+                for arn in pending
+            }
+            changed = False
+            for future in as_completed(futures):
+                arn = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    # The job itself may still be running, so do not report the poll error as its status
+                    statuses[arn] = {**statuses[arn], 'pollError': str(e)}
+                    if not _is_transient_error(e):
+                        pending.discard(arn)
+                    continue
+                if response['status'] != statuses[arn]['status']:
+                    changed = True
+                statuses[arn] = response
+                if response['status'] in TERMINAL_STATES:
+                    pending.discard(arn)
+
+            if on_update:
+                on_update(statuses)
+            if not pending:
+                break
+            delay = min_delay if changed else min(delay * 1.5, max_delay)
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"{len(pending)} invocations did not complete within {timeout} seconds")
+            time.sleep(delay)
+
+    return statuses
+
+
+def list_s3_keys(s3_client, bucket, prefix, suffix=''):
+    """
+    List every object key under a prefix, following pagination
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    return [
+        obj['Key']
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+        for obj in page.get('Contents', [])
+        if obj['Key'].endswith(suffix)
+    ]
+
+
+def read_json_objects(s3_client, s3_uris, max_workers=16):
+    """
+    Download and parse many JSON objects concurrently.
+    :return: parsed documents in the same order as s3_uris (None for objects that could not be read)
+    """
+    def read(s3_uri):
+        parsed_uri = urlparse(s3_uri)
+        try:
+            response = s3_client.get_object(Bucket=parsed_uri.netloc, Key=parsed_uri.path.lstrip('/'))
+            return json.loads(response['Body'].read().decode('utf-8'))
+        except Exception as e:
+            print(f"Error reading S3 object {s3_uri}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read, s3_uris))
@@ -1,8 +1,167 @@
+import time
 import boto3
 
 # Initialize the S3 and Textract client
 textract_client = boto3.client('textract')
 
+# Polling settings for asynchronous Textract jobs (seconds)
+INITIAL_POLL_DELAY = 1
+MAX_POLL_DELAY = 20
+JOB_TIMEOUT = 30 * 60
+
+
+class TextractDocument:
+    """
+    Index over the blocks returned by a Textract analysis job.
+    Every block is stored once in an Id -> block map, so relationships are resolved in constant time
+    and the key-value pairs and tables are built in a single linear pass over the document.
+    :param blocks: all blocks returned by the analysis job, across every result page
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.blocks_by_id = {block['Id']: block for block in blocks}
+        self.lines = [block for block in blocks if block['BlockType'] == 'LINE']
+        self.keys = [
+            block for block in blocks
+            if block['BlockType'] == 'KEY_VALUE_SET' and 'KEY' in block.get('EntityTypes', [])
+        ]
+        self.tables = [block for block in blocks if block['BlockType'] == 'TABLE']
+
+    def related(self, block, relationship_type):
+        """
+        Return the blocks linked to a block by a relationship type (e.g. CHILD, VALUE)
+        """
+        return [
+            self.blocks_by_id[block_id]
+            for relationship in block.get('Relationships', [])
+            if relationship['Type'] == relationship_type
+            for block_id in relationship['Ids']
+            if block_id in self.blocks_by_id
+        ]
+
+    def text(self, block, selected_marker=None):
+        """
+        Return the text of a block's WORD children. Selected checkboxes are rendered as selected_marker
+        """
+        words = []
+        for child in self.related(block, 'CHILD'):
+            if child['BlockType'] == 'WORD':
+                words.append(child['Text'])
+            elif child['BlockType'] == 'SELECTION_ELEMENT' and child.get('SelectionStatus') == 'SELECTED':
+                marker = selected_marker or child.get('Text')
+                if marker:
+                    words.append(marker)
+        return ' '.join(words)
+
+    def raw_text(self):
+        """
+        Return the document text, one LINE block per line
+        """
+        return ''.join(line['Text'] + "\n" for line in self.lines)
+
+    def key_value_pairs(self):
+        """
+        Return the form fields as {key: {"Value": value, "Confidence": confidence}}
+        """
+        key_value_pairs = {}
+        for key_block in self.keys:
+            key = self.text(key_block).strip()
+            value = ''
+            confidence = None
+
+            # Extract value and confidence score
+            for value_block in self.related(key_block, 'VALUE'):
+                confidence = value_block.get('Confidence', None)
+                value += self.text(value_block, selected_marker='X') + ' '
+            value = value.strip()
+
+            # Only add if value is not empty
+            if value:
+                key_value_pairs[key] = {"Value": value, "Confidence": confidence}
+        return key_value_pairs
+
+    def table_rows(self):
+        """
+        Return each table as a list of rows, where each row is a list of cell texts
+        """
+        tables = []
+        for table_block in self.tables:
+            cells = [cell for cell in self.related(table_block, 'CHILD') if cell['BlockType'] == 'CELL']
+            if not cells:
+                tables.append([])
+                continue
+            num_rows = max(cell['RowIndex'] for cell in cells)
+            num_columns = max(cell['ColumnIndex'] for cell in cells)
+            rows = [[''] * num_columns for _ in range(num_rows)]
+            for cell in cells:
+                rows[cell['RowIndex'] - 1][cell['ColumnIndex'] - 1] = self.text(cell, selected_marker='X')
+            tables.append(rows)
+        return tables
+
+
+def start_textract_job(bucket, document_key):
+    """
+    Start an asynchronous Textract analysis job for tables and forms
+    :param bucket: S3 bucket name
+    :param document_key: S3 file name
+    :return: the Textract job ID
+    """
+    response = textract_client.start_document_analysis(
+        DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': document_key}},
+        FeatureTypes=["TABLES", "FORMS"]
+    )
+    return response['JobId']
+
+
+def wait_for_textract_job(job_id, initial_delay=INITIAL_POLL_DELAY, max_delay=MAX_POLL_DELAY, timeout=JOB_TIMEOUT):
+    """
+    Poll a Textract job with exponential backoff until it completes
+    :param job_id: Textract job ID
+    :return: the first page of results of the completed job
+    """
+    delay = initial_delay
+    deadline = time.monotonic() + timeout
+    while True:
+        response = textract_client.get_document_analysis(JobId=job_id)
+        status = response['JobStatus']
+        if status in ("SUCCEEDED", "PARTIAL_SUCCESS"):
+            return response
+        if status == "FAILED":
+            raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage', 'unknown error')}")
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Textract job {job_id} did not complete within {timeout} seconds")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def iter_textract_blocks(job_id, first_page):
+    """
+    Yield every block of a completed Textract job, following NextToken across all result pages
+    :param job_id: Textract job ID
+    :param first_page: the first page of results, as returned when the job completed
+    """
+    response = first_page
+    while True:
+        yield from response['Blocks']
+        next_token = response.get('NextToken')
+        if not next_token:
+            break
+        response = textract_client.get_document_analysis(JobId=job_id, NextToken=next_token)
+
+
+def analyze_document(bucket_name, selected_file):
+    """
+    Run a single Textract analysis job over the whole document and index its results
+    :param bucket_name: S3 bucket name
+    :param selected_file: S3 file name
+    :return: a TextractDocument built from every result page
+    """
+    job_id = start_textract_job(bucket_name, selected_file)
+    first_page = wait_for_textract_job(job_id)
+    return TextractDocument(list(iter_textract_blocks(job_id, first_page)))
+
+
 def process_document(bucket_name, selected_file):
     """
     This function is used to start a Textract job by analyzing the document and extract the raw text and key-value pairs
@@ -10,119 +169,21 @@ def process_document(bucket_name, selected_file):
     :param selected_file: S3 file name
     :return: the raw text and key-value pairs extracted from the document
     """
+    document = analyze_document(bucket_name, selected_file)
 
-    # Start Textract job to extract the data
-    def start_textract_job(bucket, document_key):
-        response = textract_client.start_document_analysis(
-            DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': document_key}},
-            FeatureTypes=["TABLES", "FORMS"]
-        )
-        return response['JobId']
-
-    # Get Textract job results
-    def get_textract_job_results(job_id):
-        response = textract_client.get_document_analysis(JobId=job_id)
-        return response
+    # Extract raw text from the LINE blocks of every page
+    raw_text = document.raw_text()
 
-    # Invoke job start
-    job_id = start_textract_job(bucket_name, selected_file)
+    # Save the raw text to a local .txt file
+    with open("output/extracted_text.txt", "w", encoding="utf-8") as f:
+        f.write(raw_text)
 
-    # Poll Textract job status
-    status = ""
-    while status != "SUCCEEDED":
-        response = textract_client.get_document_analysis(JobId=job_id)
-        status = response['JobStatus']
+    # Extract key-value pairs from the same analysis job
+    key_value_pairs = document.key_value_pairs()
 
-    # Display results
-    if status == "SUCCEEDED":
-        textract_response = get_textract_job_results(job_id)
-
-        # Extract raw text from Textract response
-        raw_text = ""
-        blocks = textract_response['Blocks']
-        # For each raw text block, add to the raw_text string with a new line
-        for block in blocks:
-            if block['BlockType'] == 'LINE':
-                raw_text += block['Text'] + "\n"
-        
-        # Save the raw text to a local .txt file
-        with open("output/extracted_text.txt", "w", encoding="utf-8") as f:
-            f.write(raw_text)
-
-        # Analyze document for key-value pairs
-        def analyze_document_with_textract(s3_key):
-            response = textract_client.analyze_document(
-                Document={
-                    'S3Object': {
-                        'Bucket': bucket_name,
-                        'Name': s3_key
-                    }
-                },
-                FeatureTypes=["FORMS"]
-            )
-            return response
+    # Save the key-value pairs with confidence to 'key_value.txt'
+    with open("output/key_value.txt", "w", encoding="utf-8") as kv_file:
+        for key, value_info in key_value_pairs.items():
+            kv_file.write(f"Key: {key}, Value: {value_info['Value']}, Confidence: {value_info['Confidence']:.2f}%\n")
 
-        # Extract key-value pairs after analysis
-        def extract_key_value_pairs(response):
-            key_value_pairs = {}
-            
-            # For each block in the response, extract the key, value, and confidence score
-            for block in response['Blocks']:
-                if block['BlockType'] == 'KEY_VALUE_SET':
-                    if 'KEY' in block['EntityTypes']:
-                        key = ''
-                        value = ''
-                        confidence = None
-                        
-                        # Extract key
-                        for relationship in block.get('Relationships', []):
-                            if relationship['Type'] == 'CHILD':
-                                for child_id in relationship['Ids']:
-                                    child_block = next(b for b in response['Blocks'] if b['Id'] == child_id)
-                                    if child_block['BlockType'] == 'WORD':
-                                        key += child_block['Text'] + ' '
-                                    elif child_block['BlockType'] == 'SELECTION_ELEMENT':
-                                        if child_block['SelectionStatus'] == 'SELECTED':
-                                            key += child_block['Text'] + ' '
-
-                        key = key.strip()
-                        
-                        # Extract value and confidence score
-                        for relationship in block.get('Relationships', []):
-                            if relationship['Type'] == 'VALUE':
-                                for value_id in relationship['Ids']:
-                                    value_block = next(b for b in response['Blocks'] if b['Id'] == value_id)
-                                    confidence = value_block.get('Confidence', None)
-                                    for val_relationship in value_block.get('Relationships', []):
-                                        if val_relationship['Type'] == 'CHILD':
-                                            for val_child_id in val_relationship['Ids']:
-                                                val_child_block = next(b for b in response['Blocks'] if b['Id'] == val_child_id)
-                                                if val_child_block['BlockType'] == 'WORD':
-                                                    value += val_child_block['Text'] + ' '
-                                                elif val_child_block['BlockType'] == 'SELECTION_ELEMENT':
-                                                    if val_child_block['SelectionStatus'] == 'SELECTED':
-                                                        value += 'X '
-                        
-                        value = value.strip()
-                        
-                        # Check for specific values such as gender or values to denote selection (ex. "X")
-                        if value in ["M", "F", "X"]:  
-                            key_value_pairs[key] = {"Value": value, "Confidence": confidence}
-                        # Only add if value is not empty
-                        elif value:
-                            key_value_pairs[key] = {"Value": value, "Confidence": confidence}
-
-            return key_value_pairs
-
-        # Invoke analysis function
-        response = analyze_document_with_textract(selected_file)
-
-        # Extract key-value pairs from the Textract response
-        key_value_pairs = extract_key_value_pairs(response)
-
-        # Save the key-value pairs with confidence to 'key_value.txt'
-        with open("output/key_value.txt", "w", encoding="utf-8") as kv_file:
-            for key, value_info in key_value_pairs.items():
-                kv_file.write(f"Key: {key}, Value: {value_info['Value']}, Confidence: {value_info['Confidence']:.2f}%\n")
-                
     return raw_text, key_value_pairs
@@ -0,0 +1,16 @@
+import os
+import sys
+
+from moto import mock_aws
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never reach a real AWS account from the tests
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+os.environ["AWS_SESSION_TOKEN"] = "testing"
+os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+# utils creates AWS clients and looks up the account id when it is imported
+with mock_aws():
+    import utils  # noqa: E402,F401
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.stub import Stubber
+from moto import mock_aws
+
+import utils
+
+BUCKET = "10k-filings"
+FILING = {
+    "accessionNo": "0000320193-23-000106",
+    "periodOfReport": "2023-09-30",
+    "linkToFilingDetails": "https://www.sec.gov/Archives/edgar/data/320193/aapl-20230930.htm",
+}
+
+
+@mock_aws
+class TestProcessFiling(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        utils._s3_client = None
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        # A local copy from an earlier run, so nothing is downloaded
+        local_path = utils.get_local_filing_path(FILING, "AAPL")
+        local_path.parent.mkdir(parents=True)
+        local_path.write_text("<html>10-K</html>")
+        self.manifest_path = os.path.join(self.tmp.name, "ingestion_manifest.json")
+
+    def tearDown(self):
+        utils._s3_client = None
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_resumes_from_manifest_and_reuploads_when_etag_changes(self):
+        with mock.patch.object(utils, "download_filing") as download_filing:
+            first = utils.process_filing(BUCKET, "AAPL", FILING, utils.IngestionManifest(self.manifest_path))
+            # A new run reads the manifest saved by the previous one
+            second = utils.process_filing(BUCKET, "AAPL", FILING, utils.IngestionManifest(self.manifest_path))
+
+            entry = utils.IngestionManifest(self.manifest_path).get(FILING["accessionNo"])
+            utils.get_s3_client().put_object(Bucket=BUCKET, Key=entry["s3_key"], Body=b"changed")
+            third = utils.process_filing(BUCKET, "AAPL", FILING, utils.IngestionManifest(self.manifest_path))
+
+        self.assertEqual([first, second, third], ["uploaded", "skipped", "uploaded"])
+        download_filing.assert_not_called()
+        self.assertEqual(entry["s3_key"], "10k-reports/2023/AAPL/AAPL_2023_2023-09-30_10K.html")
+        self.assertEqual(entry["sha256"], utils.file_sha256(utils.get_local_filing_path(FILING, "AAPL")))
+
+
+class TestCreateKnowledgeBase(unittest.TestCase):
+    def setUp(self):
+        self.bedrock = boto3.client("bedrock-agent", region_name="us-east-1")
+        self.stubber = Stubber(self.bedrock)
+        self.stubber.activate()
+
+    def create(self):
+        return utils.create_knowledge_base(
+            "kb", self.bedrock, "arn:aws:iam::123456789012:role/kb-role", "vectors", "index"
+        )
+
+    @mock.patch("time.sleep")
+    def test_retries_while_the_role_propagates(self, sleep):
+        self.stubber.add_client_error("create_knowledge_base", "AccessDeniedException", "Access denied")
+        self.stubber.add_client_error(
+            "create_knowledge_base",
+            "ValidationException",
+            "Knowledge base role arn:aws:iam::123456789012:role/kb-role is not able to call specified embedding model",
+        )
+        knowledge_base = {
+            "knowledgeBaseId": "KB123",
+            "name": "kb",
+            "knowledgeBaseArn": "arn:aws:bedrock:us-east-1:123456789012:knowledge-base/KB123",
+            "roleArn": "arn:aws:iam::123456789012:role/kb-role",
+            "knowledgeBaseConfiguration": {"type": "VECTOR"},
+            "status": "ACTIVE",
+            "createdAt": "2025-01-01T00:00:00Z",
+            "updatedAt": "2025-01-01T00:00:00Z",
+        }
+        self.stubber.add_response("create_knowledge_base", {"knowledgeBase": {**knowledge_base, "status": "CREATING"}})
+        self.stubber.add_response("get_knowledge_base", {"knowledgeBase": knowledge_base})
+
+        self.assertEqual(self.create(), "KB123")
+        self.assertEqual(sleep.call_count, 2)
+        self.stubber.assert_no_pending_responses()
+
+    @mock.patch("time.sleep")
+    def test_configuration_errors_fail_fast(self, sleep):
+        self.stubber.add_client_error(
+            "create_knowledge_base", "ValidationException", "The provided storage configuration is invalid"
+        )
+
+        with self.assertRaises(utils.ClientError):
+            self.create()
+        sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
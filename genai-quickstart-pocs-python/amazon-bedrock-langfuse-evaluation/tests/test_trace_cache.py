@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import utils
+
+
+class FakeObservations:
+    """Langfuse observations API serving a fixed list of observations in pages."""
+
+    def __init__(self, observations_by_trace):
+        self.observations_by_trace = observations_by_trace
+        self.calls = []
+
+    def get_many(self, trace_id, page, limit):
+        self.calls.append((trace_id, page, limit))
+        observations = self.observations_by_trace[trace_id]
+        total_pages = max(1, -(-len(observations) // limit))
+        return SimpleNamespace(
+            data=observations[(page - 1) * limit:page * limit],
+            meta=SimpleNamespace(total_pages=total_pages),
+        )
+
+
+def fake_langfuse(observations_by_trace):
+    return SimpleNamespace(api=SimpleNamespace(observations=FakeObservations(observations_by_trace)))
+
+
+def observation(index, name):
+    start_time = datetime(2025, 1, 1, 12, 0, index, tzinfo=timezone.utc)
+    return SimpleNamespace(
+        name=name,
+        start_time=start_time,
+        input={"query": f"query {index}"},
+        output={"retrieved": f"context {index}", "at": start_time},
+    )
+
+
+class TestFetchTraceObservations(unittest.TestCase):
+    def test_reads_every_page(self):
+        observations = [observation(i, f"tool_{i}") for i in range(5)]
+        langfuse = fake_langfuse({"trace-1": observations})
+
+        fetched = utils.fetch_trace_observations(langfuse, "trace-1", page_size=2)
+
+        self.assertEqual(fetched, observations)
+        self.assertEqual(
+            langfuse.api.observations.calls,
+            [("trace-1", 1, 2), ("trace-1", 2, 2), ("trace-1", 3, 2)],
+        )
+
+
+class TestTraceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "trace_cache.parquet")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_traces_are_not_fetched_again_and_keep_their_types(self):
+        traces = [
+            SimpleNamespace(id="trace-1", input="What was revenue?", output="Revenue was $10B", metadata=None),
+            # Still running: no output yet, so it is not cached
+            SimpleNamespace(id="trace-2", input="And margin?", output=None, metadata=None),
+        ]
+        observations = {
+            "trace-1": [observation(1, "retrieve"), observation(0, "search")],
+            "trace-2": [observation(2, "search")],
+        }
+        langfuse = fake_langfuse(observations)
+
+        harvested = utils.harvest_traces(langfuse, traces, self.cache_path)
+        second_run = fake_langfuse(observations)
+        cached = utils.harvest_traces(second_run, traces, self.cache_path)
+
+        self.assertEqual([call[0] for call in second_run.api.observations.calls], ["trace-2"])
+        self.assertEqual(set(utils.load_trace_cache(self.cache_path)), {"trace-1"})
+        self.assertEqual(cached["trace-1"], harvested["trace-1"])
+        self.assertIsInstance(cached["trace-1"]["tool_usages"][0]["output"]["at"], datetime)
+        # Observations are ordered by start time
+        self.assertEqual([usage["name"] for usage in cached["trace-1"]["tool_usages"]], ["search", "retrieve"])
+        self.assertEqual(cached["trace-1"]["retrieved_contexts"], [str(observations["trace-1"][0].output)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,17 @@ import boto3
 import json
 import time
 import re
+import hashlib
+import threading
 import requests
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
+import pandas as pd
 from sec_api import QueryApi, RenderApi
 from ragas.dataset_schema import (
     SingleTurnSample,
@@ -36,6 +41,24 @@ account_id = sts_client.get_caller_identity()['Account']
 
 SEC_API_KEY='unset'
 
+# SEC fair access allows at most 10 requests per second; stay below it across all threads
+SEC_REQUESTS_PER_SECOND = float(os.environ.get("SEC_REQUESTS_PER_SECOND", 8))
+# Number of filings downloaded and uploaded at the same time
+INGESTION_MAX_WORKERS = int(os.environ.get("INGESTION_MAX_WORKERS", 8))
+# Records every uploaded filing, so re-runs skip filings that are already in S3
+MANIFEST_PATH = "ingestion_manifest.json"
+# Files larger than this are uploaded in parallel parts
+S3_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024, max_concurrency=4)
+
+# Number of traces whose observations are fetched from Langfuse at the same time
+TRACE_MAX_WORKERS = int(os.environ.get("TRACE_MAX_WORKERS", 8))
+# Observations fetched per Langfuse list call
+OBSERVATIONS_PAGE_SIZE = 100
+# Components of already harvested traces, so incremental evaluation only fetches new traces
+TRACE_CACHE_PATH = "trace_cache.parquet"
+# Columns of the trace cache that hold JSON encoded lists
+TRACE_COMPONENT_FIELDS = ["user_inputs", "agent_responses", "retrieved_contexts", "tool_usages", "available_tools"]
+
 
 # Headers for direct SEC requests
 headers = {
@@ -295,45 +318,46 @@ def create_and_get_index_arn(s3vectors_client, vector_store_name, vector_index_n
         logger.info(f"❌ Failed to create or retrieve index: {error_code} - {error_message}")
         raise
 
-def create_knowledge_base(kb_name, bedrock, roleArn, vector_store_name, vector_index_name):
-    # Wait for IAM role propagation
-    logger.info("Waiting for IAM role propagation (60 seconds)...")
-    time.sleep(60)  # Wait for all policies and resources to be fully propagated
+# Parts of the ValidationException messages Bedrock returns while a new role cannot be used yet
+ROLE_PROPAGATION_MESSAGES = ("not able to call", "not authorized", "unable to assume", "AccessDenied")
 
-    # Create the Knowledge Base
-    create_kb_response = bedrock.create_knowledge_base(
-        name=kb_name,
-        description='Amazon Bedrock Knowledge Bases with S3 Vector Store',
-        roleArn=roleArn,
-        knowledgeBaseConfiguration={
-            'type': 'VECTOR',
-            'vectorKnowledgeBaseConfiguration': {
-                # Specify the embedding model to use
-                'embeddingModelArn': f'arn:aws:bedrock:{region_name}::foundation-model/amazon.titan-embed-text-v2:0',
-                'embeddingModelConfiguration': {
-                    'bedrockEmbeddingModelConfiguration': {
-                        'dimensions': 1024,  # Should match the vector_dimension we defined earlier
-                        'embeddingDataType': 'FLOAT32'
-                    }
-                },
-            },
-        },
-        storageConfiguration={
-            'type': 'S3_VECTORS',
-            's3VectorsConfiguration': {
-                'indexArn': f'arn:aws:s3vectors:{region_name}:{account_id}:bucket/{vector_store_name}/index/{vector_index_name}',
-            },
-        }
-    )
+
+def is_role_propagation_error(error: ClientError) -> bool:
+    """Returns True if Bedrock rejected a request because the new IAM role has not propagated yet"""
+    error_code = error.response.get('Error', {}).get('Code', 'Unknown')
+    error_message = error.response.get('Error', {}).get('Message', '')
+    if error_code == 'AccessDeniedException':
+        return True
+    return error_code == 'ValidationException' and any(part in error_message for part in ROLE_PROPAGATION_MESSAGES)
+
+
+def create_knowledge_base(kb_name, bedrock, roleArn, vector_store_name, vector_index_name, max_wait=180):
+    # A new IAM role takes a while to propagate, and until it has Bedrock rejects it.
+    # Retry with backoff instead of sleeping a fixed 60 seconds.
+    start_time = time.time()
+    delay = 2
+    while True:
+        try:
+            create_kb_response = _create_knowledge_base_request(kb_name, bedrock, roleArn, vector_store_name, vector_index_name)
+            break
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
+            # Configuration errors fail straight away, only role propagation is worth waiting for
+            if not is_role_propagation_error(e) or time.time() - start_time > max_wait:
+                raise
+            logger.info(f"Waiting for IAM role propagation ({error_code}), retrying in {delay} seconds...")
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
 
     knowledge_base_id = create_kb_response["knowledgeBase"]["knowledgeBaseId"]
     logger.info(f"Knowledge base ID: {knowledge_base_id}")
 
     logger.info(f"\nWaiting for knowledge base {knowledge_base_id} to finish creating...")
 
-    # Poll for KB creation status
+    # Poll for KB creation status, quickly at first and then less often
     status = "CREATING"
     start_time = time.time()
+    delay = 2
 
     while status == "CREATING":
         # Get current status
@@ -347,8 +371,9 @@ def create_knowledge_base(kb_name, bedrock, roleArn, vector_store_name, vector_i
         logger.info(f"Current status: {status} (elapsed time: {elapsed_time}s)")
         
         if status == "CREATING":
-            logger.info("Still creating, checking again in 30 seconds...")
-            time.sleep(30)
+            logger.info(f"Still creating, checking again in {delay} seconds...")
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
         else:
             break
 
@@ -356,6 +381,33 @@ def create_knowledge_base(kb_name, bedrock, roleArn, vector_store_name, vector_i
 
     return knowledge_base_id
 
+def _create_knowledge_base_request(kb_name, bedrock, roleArn, vector_store_name, vector_index_name):
+    # Create the Knowledge Base
+    return bedrock.create_knowledge_base(
+        name=kb_name,
+        description='Amazon Bedrock Knowledge Bases with S3 Vector Store',
+        roleArn=roleArn,
+        knowledgeBaseConfiguration={
+            'type': 'VECTOR',
+            'vectorKnowledgeBaseConfiguration': {
+                # Specify the embedding model to use
+                'embeddingModelArn': f'arn:aws:bedrock:{region_name}::foundation-model/amazon.titan-embed-text-v2:0',
+                'embeddingModelConfiguration': {
+                    'bedrockEmbeddingModelConfiguration': {
+                        'dimensions': 1024,  # Should match the vector_dimension we defined earlier
+                        'embeddingDataType': 'FLOAT32'
+                    }
+                },
+            },
+        },
+        storageConfiguration={
+            'type': 'S3_VECTORS',
+            's3VectorsConfiguration': {
+                'indexArn': f'arn:aws:s3vectors:{region_name}:{account_id}:bucket/{vector_store_name}/index/{vector_index_name}',
+            },
+        }
+    )
+
 def create_s3_data_source(bedrock, knowledge_base_id, bucket_name ):
     # Create the data source
     data_source_response = bedrock.create_data_source(
@@ -386,7 +438,114 @@ def create_s3_data_source(bedrock, knowledge_base_id, bucket_name ):
     return datasource_id
     
 
+def wait_for_ingestion_job(bedrock, knowledge_base_id, datasource_id, ingestion_job_id, max_delay=30):
+    """Poll an ingestion job until it finishes, quickly at first and then less often"""
+    start_time = time.time()
+    delay = 2
+    while True:
+        response = bedrock.get_ingestion_job(
+            dataSourceId=datasource_id,
+            knowledgeBaseId=knowledge_base_id,
+            ingestionJobId=ingestion_job_id
+        )
+        job = response['ingestionJob']
+        status = job['status']
+        stats = job['statistics']
+        elapsed_time = int(time.time() - start_time)
+        logger.info(f"Status: {status} (elapsed time: {elapsed_time}s), "
+                    f"documents scanned: {stats['numberOfDocumentsScanned']}, "
+                    f"indexed: {stats['numberOfNewDocumentsIndexed']}, "
+                    f"failed: {stats['numberOfDocumentsFailed']}")
+        if status not in ("STARTING", "IN_PROGRESS"):
+            return job
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
 ### FUNCTIONS TO POPULATE S3 VECTOR KNOWLEDGE BASE WITH 10-K DOCUMENTS ### 
+class RateLimiter:
+    """Spaces out calls across threads so that at most `rate` calls start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+sec_rate_limiter = RateLimiter(SEC_REQUESTS_PER_SECOND)
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Returns one S3 client shared by all upload threads (boto3 clients are thread safe)"""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client('s3')
+        return _s3_client
+
+
+class IngestionManifest:
+    """
+    Local record of the filings uploaded to S3, with their content hash and ETag.
+    Saved after every change, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    def get(self, accession_no: str) -> Optional[Dict]:
+        with self.lock:
+            return self.entries.get(accession_no)
+
+    def record(self, accession_no: str, entry: Dict):
+        with self.lock:
+            self.entries[accession_no] = entry
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def file_sha256(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def is_uploaded(s3_bucket: str, entry: Optional[Dict]) -> bool:
+    """Checks that a manifest entry still matches the object in S3 with a single HEAD request"""
+    if not entry or entry.get('bucket') != s3_bucket:
+        return False
+    try:
+        response = get_s3_client().head_object(Bucket=s3_bucket, Key=entry['s3_key'])
+    except ClientError:
+        return False
+    return response.get('ETag') == entry.get('etag')
+
+
+def get_local_filing_path(filing: Dict, symbol: str) -> Path:
+    year = filing['periodOfReport'][:4]
+    filename = f"{symbol}_{year}_{filing['periodOfReport']}_10K.html"
+    return Path('./temp_10k') / year / symbol / filename
+
+
 def download_filing(url: str, filing: Dict, symbol: str) -> str:
     """Download filing using sec-api render API"""
 
@@ -394,19 +553,18 @@ def download_filing(url: str, filing: Dict, symbol: str) -> str:
 
     try:
         # Use render API to get the HTML content
+        sec_rate_limiter.wait()
         html_content = render_api.get_filing(url)
         
         # Create filename and directory
-        year = filing['periodOfReport'][:4]
-        filename = f"{symbol}_{year}_{filing['periodOfReport']}_10K.html"
+        local_file_path = get_local_filing_path(filing, symbol)
+        local_file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        local_dir = Path('./temp_10k') / year / symbol
-        local_dir.mkdir(parents=True, exist_ok=True)
-        local_file_path = local_dir / filename
-        
-        # Save to file
-        with open(local_file_path, 'w', encoding='utf-8') as f:
+        # Save to file, via a temporary file so a partial download is never mistaken for a complete one
+        tmp_path = local_file_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
+        os.replace(tmp_path, local_file_path)
         
         logger.info(f"Downloaded: {local_file_path}")
         return str(local_file_path)
@@ -415,20 +573,21 @@ def download_filing(url: str, filing: Dict, symbol: str) -> str:
         logger.error(f"Error downloading filing {filing['accessionNo']}: {e}")
         return None
 
-def upload_to_s3(s3_bucket, local_file_path: str, symbol: str, year: str) -> bool:
+def upload_to_s3(s3_bucket, local_file_path: str, symbol: str, year: str, sha256: str = None) -> Optional[str]:
     """
-    Upload file to S3 with organized structure
+    Upload file to S3 with organized structure. Large files are uploaded in parallel parts.
     
     Args:
         local_file_path: Path to local file
         symbol: Company symbol
         year: Filing year
+        sha256: Optional content hash stored as object metadata
         
     Returns:
-        True if successful, False otherwise
+        The S3 key if successful, None otherwise
     """
 
-    s3_client = boto3.client('s3')
+    s3_client = get_s3_client()
 
     try:
         filename = Path(local_file_path).name
@@ -436,26 +595,30 @@ def upload_to_s3(s3_bucket, local_file_path: str, symbol: str, year: str) -> boo
         
         logger.info(f"Uploading to S3: s3://{s3_bucket}/{s3_key}")
         
+        metadata = {
+            'company-symbol': symbol,
+            'filing-year': year,
+            'document-type': '10K'
+        }
+        if sha256:
+            metadata['sha256'] = sha256
         s3_client.upload_file(
             local_file_path,
             s3_bucket,
             s3_key,
             ExtraArgs={
                 'ContentType': 'text/html',
-                'Metadata': {
-                    'company-symbol': symbol,
-                    'filing-year': year,
-                    'document-type': '10K'
-                }
-            }
+                'Metadata': metadata
+            },
+            Config=S3_TRANSFER_CONFIG
         )
         
         logger.info(f"Successfully uploaded: {s3_key}")
-        return True
+        return s3_key
         
     except Exception as e:
         logger.error(f"Error uploading {local_file_path} to S3: {e}")
-        return False
+        return None
 
 def cleanup_local_file(file_path: str):
     """Remove local file after successful upload"""
@@ -465,29 +628,76 @@ def cleanup_local_file(file_path: str):
     except Exception as e:
         logger.warning(f"Could not clean up {file_path}: {e}")
 
-def process_company(bucket_name, symbol: str, years_back: int = 5) -> Dict:
+def process_filing(bucket_name, symbol: str, filing: Dict, manifest: IngestionManifest) -> str:
     """
-    Process all 10K filings for a single company
+    Download and upload one filing, skipping the work already done by an earlier run.
+    
+    Returns:
+        'skipped' if the filing was already in S3, 'uploaded' if it was uploaded now
+    Raises:
+        RuntimeError if the filing could not be downloaded or uploaded
+    """
+    accession_no = filing['accessionNo']
+    year = filing['periodOfReport'][:4]
+    entry = manifest.get(accession_no)
+    if is_uploaded(bucket_name, entry):
+        logger.info(f"Skipping {symbol} {year} filing {accession_no}, already uploaded")
+        return 'skipped'
+
+    # Reuse a complete local copy from an earlier run instead of downloading it again
+    local_file_path = get_local_filing_path(filing, symbol)
+    if local_file_path.exists():
+        local_file_path = str(local_file_path)
+    else:
+        url = filing['linkToFilingDetails']
+        logger.info(f"Downloading filing {url}")
+        local_file_path = download_filing(url, filing, symbol)
+        if not local_file_path:
+            raise RuntimeError(f"Failed to download filing {accession_no}")
+
+    sha256 = file_sha256(local_file_path)
+    s3_key = upload_to_s3(bucket_name, local_file_path, symbol, year, sha256)
+    if not s3_key:
+        raise RuntimeError(f"Failed to upload {local_file_path}")
+    etag = get_s3_client().head_object(Bucket=bucket_name, Key=s3_key)['ETag']
+    manifest.record(accession_no, {
+        'symbol': symbol,
+        'year': year,
+        'bucket': bucket_name,
+        's3_key': s3_key,
+        'sha256': sha256,
+        'etag': etag,
+        'uploaded_at': datetime.now().isoformat(),
+    })
+    return 'uploaded'
+
+def process_company(bucket_name, symbol: str, years_back: int = 5, manifest: IngestionManifest = None, executor: ThreadPoolExecutor = None) -> Dict:
+    """
+    Process all 10K filings for a single company, downloading and uploading filings concurrently
     
     Args:
         symbol: Company stock symbol
         years_back: Number of years to look back
+        manifest: Manifest of filings already uploaded (loaded from MANIFEST_PATH if not given)
+        executor: Thread pool to run the filings on (a new one if not given)
         
     Returns:
         Dictionary with processing results
     """
     logger.info(f"Processing company: {symbol}")
+    manifest = manifest or IngestionManifest()
 
     results = {
         'symbol': symbol,
         'total_filings': 0,
         'downloaded': 0,
         'uploaded': 0,
+        'skipped': 0,
         'errors': []
     }
     
     # Get 10K filings
-    filings = get_filings(symbol)
+    filings = get_filings(symbol, years_back)
     
     results['total_filings'] = len(filings)
     
@@ -499,59 +709,47 @@ def process_company(bucket_name, symbol: str, years_back: int = 5) -> Dict:
         results['errors'].append(error_msg)
         return results
     
-    # Process each filing
-    for filing in filings:
-        logger.info(f"Downloding filings")
-        try:
-            print(f"Filing type: {type(filing)}, Filing value: {filing}")
-            url = filing['linkToFilingDetails']
-            # Download filing
-            logger.info(f"Downloading filing {url}")
-            local_file_path = download_filing(url, filing, symbol)
-            if local_file_path:
-                results['downloaded'] += 1
-                
-                # Upload to S3
-                year = filing['periodOfReport'][:4]
-                if upload_to_s3(bucket_name, local_file_path, symbol, year):
-                    results['uploaded'] += 1
-                    # Clean up local file after successful upload
-                    #cleanup_local_file(local_file_path)
+    # Process the filings concurrently
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=INGESTION_MAX_WORKERS)
+    try:
+        futures = {
+            executor.submit(process_filing, bucket_name, symbol, filing, manifest): filing
+            for filing in filings
+        }
+        for future in as_completed(futures):
+            filing = futures[future]
+            try:
+                if future.result() == 'skipped':
+                    results['skipped'] += 1
                 else:
-                    results['errors'].append(f"Failed to upload {local_file_path}")
-            else:
-                results['errors'].append(f"Failed to download filing {filing['accessionNo']}")
-                
-        except Exception as e:
-            error_msg = f"Error processing filing {filing['accessionNo']}: {e}"
-            logger.error(error_msg)
-            results['errors'].append(error_msg)
+                    results['downloaded'] += 1
+                    results['uploaded'] += 1
+            except Exception as e:
+                error_msg = f"Error processing filing {filing['accessionNo']}: {e}"
+                logger.error(error_msg)
+                results['errors'].append(error_msg)
+    finally:
+        if own_executor:
+            executor.shutdown()
     
     return results
 
 def get_filings(symbol: str, years_back: int = 5) -> Dict:
     """
-    Process all 10K filings for a single company
+    Query the 10K filings of a single company
     
     Args:
         symbol: Company stock symbol
         years_back: Number of years to look back
         
     Returns:
-        Dictionary with processing results
+        List of filings
     """
-    logger.info(f"Processing company: {symbol}")
+    logger.info(f"Querying filings for company: {symbol}")
     
     # Initialize SEC API client (get free API key from sec-api.io)
     query_api = QueryApi(api_key=SEC_API_KEY)
-    
-    results = {
-        'symbol': symbol,
-        'total_filings': 0,
-        'downloaded': 0,
-        'uploaded': 0,
-        'errors': []
-    }
 
     query = {
         "query": { "query_string": { 
@@ -561,18 +759,19 @@ def get_filings(symbol: str, years_back: int = 5) -> Dict:
         "size": f"{years_back}"  # return last 
     }
 
+    sec_rate_limiter.wait()
     response = query_api.get_filings(query)
-    print(json.dumps(response["filings"][0], indent=2))
-    results['total_filings'] = len(response["filings"])
     return response["filings"]
 
-def process_companies(bucket_name, symbols: List[str], api_key: str,  years_back: int = 5) -> Dict:
+def process_companies(bucket_name, symbols: List[str], api_key: str,  years_back: int = 5, manifest_path: str = MANIFEST_PATH) -> Dict:
     """
-    Process multiple companies
+    Process multiple companies concurrently. Filings already uploaded according to the manifest are skipped,
+    so an interrupted or repeated run only processes what is missing.
     
     Args:
         symbols: List of company symbols
         years_back: Number of years to look back
+        manifest_path: Path of the ingestion manifest
         
     Returns:
         Dictionary with overall results
@@ -583,48 +782,56 @@ def process_companies(bucket_name, symbols: List[str], api_key: str,  years_back
     logger.info(f"\n📊 Processing {len(symbols)} companies for 10K reports...")
     
     SEC_API_KEY = api_key
+    manifest = IngestionManifest(manifest_path)
 
     overall_results = {
         'companies_processed': 0,
         'total_filings_found': 0,
         'total_downloaded': 0,
         'total_uploaded': 0,
+        'total_skipped': 0,
         'company_results': {},
         'start_time': datetime.now().isoformat(),
         'end_time': None
     }
     
-    for i, symbol in enumerate(symbols, 1):
-        try:
-            logger.info(f"\n[{i}/{len(symbols)}] Processing {symbol}...")
-            results = process_company(bucket_name, symbol, years_back)
-            overall_results['company_results'][symbol] = results
-            overall_results['companies_processed'] += 1
-            overall_results['total_filings_found'] += results['total_filings']
-            overall_results['total_downloaded'] += results['downloaded']
-            overall_results['total_uploaded'] += results['uploaded']
-            
-            # Progress update
-            success_rate = f"{results['uploaded']}/{results['total_filings']}" if results['total_filings'] > 0 else "0/0"
-            logger.info(f"✅ {symbol}: {success_rate} reports uploaded to S3")
-            
-            if results['errors']:
-                logger.info(f"⚠️  {symbol}: {len(results['errors'])} errors occurred")
-            
-            # Rate limiting between companies
-            time.sleep(1)
-            
-        except Exception as e:
-            error_msg = f"Error processing company {symbol}: {e}"
-            logger.error(error_msg)
-            logger.info(f"❌ {symbol}: Processing failed - {e}")
-            overall_results['company_results'][symbol] = {
-                'symbol': symbol,
-                'total_filings': 0,
-                'downloaded': 0,
-                'uploaded': 0,
-                'errors': [error_msg]
-            }
+    # Companies share one pool for their filings; the SEC rate limiter is shared by every thread
+    with ThreadPoolExecutor(max_workers=INGESTION_MAX_WORKERS) as filing_executor, \
+            ThreadPoolExecutor(max_workers=min(len(symbols), 4) or 1) as company_executor:
+        futures = {
+            company_executor.submit(process_company, bucket_name, symbol, years_back, manifest, filing_executor): symbol
+            for symbol in symbols
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            try:
+                results = future.result()
+                overall_results['company_results'][symbol] = results
+                overall_results['companies_processed'] += 1
+                overall_results['total_filings_found'] += results['total_filings']
+                overall_results['total_downloaded'] += results['downloaded']
+                overall_results['total_uploaded'] += results['uploaded']
+                overall_results['total_skipped'] += results['skipped']
+                
+                # Progress update
+                success_rate = f"{results['uploaded'] + results['skipped']}/{results['total_filings']}" if results['total_filings'] > 0 else "0/0"
+                logger.info(f"[{i}/{len(symbols)}] ✅ {symbol}: {success_rate} reports in S3 ({results['skipped']} already uploaded)")
+                
+                if results['errors']:
+                    logger.info(f"⚠️  {symbol}: {len(results['errors'])} errors occurred")
+                
+            except Exception as e:
+                error_msg = f"Error processing company {symbol}: {e}"
+                logger.error(error_msg)
+                logger.info(f"❌ {symbol}: Processing failed - {e}")
+                overall_results['company_results'][symbol] = {
+                    'symbol': symbol,
+                    'total_filings': 0,
+                    'downloaded': 0,
+                    'uploaded': 0,
+                    'skipped': 0,
+                    'errors': [error_msg]
+                }
     
     overall_results['end_time'] = datetime.now().isoformat()
     
@@ -711,15 +918,27 @@ def fetch_traces(langfuse=None, batch_size=10, lookback_hours=24,  tags=None,):
     print(f"Fetched {len(traces)} traces")
     return traces
 
-def process_traces(langfuse, traces):
-    """Process traces into samples for RAGAS evaluation"""
+def process_traces(langfuse, traces, cache_path=TRACE_CACHE_PATH, max_workers=TRACE_MAX_WORKERS, only_new=False):
+    """
+    Process traces into samples for RAGAS evaluation.
+    Observations are fetched for several traces at once, and traces harvested by an earlier run
+    are read from the local cache instead of Langfuse. With only_new=True, cached traces are
+    left out of the samples, so each run evaluates only the traces it has not seen before.
+    """
     single_turn_samples = []
     multi_turn_samples = []
     trace_sample_mapping = []
-    
+
+    cached_ids = set(load_trace_cache(cache_path)) if only_new else set()
+    traces = [trace for trace in traces if trace.id not in cached_ids]
+    if cached_ids:
+        print(f"Skipping already evaluated traces, {len(traces)} new traces to process")
+
+    components_by_trace = harvest_traces(langfuse, traces, cache_path, max_workers)
+
     for trace in traces:
         # Extract components
-        components = extract_span_components(langfuse,trace)
+        components = components_by_trace[trace.id]
         
         # Add tool usage information to the trace for evaluation
         tool_info = ""
@@ -759,6 +978,83 @@ def process_traces(langfuse, traces):
         "trace_sample_mapping": trace_sample_mapping
     }
 
+def harvest_traces(langfuse, traces, cache_path=TRACE_CACHE_PATH, max_workers=TRACE_MAX_WORKERS):
+    """
+    Extract the components of every trace, fetching observations for up to max_workers traces at once.
+    Traces found in the cache at cache_path are not fetched again; pass cache_path=None to disable the cache.
+    Returns a dictionary of components by trace ID
+    """
+    cached = load_trace_cache(cache_path)
+    components_by_trace = {trace.id: cached[trace.id] for trace in traces if trace.id in cached}
+    missing = [trace for trace in traces if trace.id not in cached]
+    print(f"Harvesting {len(missing)} traces ({len(components_by_trace)} from cache)")
+
+    harvested = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(extract_span_components, langfuse, trace): trace for trace in missing}
+            for future in as_completed(futures):
+                trace = futures[future]
+                components = future.result()
+                components_by_trace[trace.id] = components
+                # Traces still running or whose observations could not be fetched are harvested again next time
+                if components.pop("complete"):
+                    harvested[trace.id] = components
+
+    if cache_path and harvested:
+        save_trace_cache(cache_path, harvested)
+    return components_by_trace
+
+def _encode_cache_value(value):
+    """JSON default for the trace cache: datetimes are tagged so they are read back as datetimes"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    # Anything else JSON cannot represent is cached as its string form
+    return str(value)
+
+def _decode_cache_value(obj):
+    if set(obj) == {"__datetime__"}:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+def load_trace_cache(cache_path=TRACE_CACHE_PATH):
+    """
+    Load the components of harvested traces, by trace ID.
+    Values are read back with the types they were harvested with, except for values that are
+    neither JSON types nor datetimes, which come back as strings.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    df = pd.read_parquet(cache_path)
+    return {
+        row["trace_id"]: {field: json.loads(row[field], object_hook=_decode_cache_value) for field in TRACE_COMPONENT_FIELDS}
+        for row in df.to_dict("records")
+    }
+
+def save_trace_cache(cache_path, components_by_trace):
+    """Add harvested traces to the cache, replacing the file atomically"""
+    new_rows = pd.DataFrame([
+        {"trace_id": trace_id, **{field: json.dumps(components[field], default=_encode_cache_value) for field in TRACE_COMPONENT_FIELDS}}
+        for trace_id, components in components_by_trace.items()
+    ])
+    if os.path.exists(cache_path):
+        existing = pd.read_parquet(cache_path)
+        new_rows = pd.concat([existing[~existing["trace_id"].isin(new_rows["trace_id"])], new_rows], ignore_index=True)
+    tmp_path = f"{cache_path}.tmp"
+    new_rows.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+
+def fetch_trace_observations(langfuse, trace_id, page_size=OBSERVATIONS_PAGE_SIZE):
+    """Fetch all observations of a trace with paginated list calls, instead of one call per observation"""
+    observations = []
+    page = 1
+    while True:
+        response = langfuse.api.observations.get_many(trace_id=trace_id, page=page, limit=page_size)
+        observations.extend(response.data)
+        if page >= response.meta.total_pages:
+            return observations
+        page += 1
+
 def extract_span_components(langfuse, trace):
     """Extract user queries, agent responses, retrieved contexts 
     and tool usage from a Langfuse trace"""
@@ -766,6 +1062,7 @@ def extract_span_components(langfuse, trace):
     agent_responses = []
     retrieved_contexts = []
     tool_usages = []
+    complete = False
 
     # Get basic information from trace
     if hasattr(trace, 'input') and trace.input is not None:
@@ -785,26 +1082,27 @@ def extract_span_components(langfuse, trace):
 
     # Try to get contexts from observations and tool usage details
     try:
-        for obsID in trace.observations:
-            print (f"Getting Observation {obsID}")
-            observations = langfuse.api.observations.get(obsID)
-
-            for obs in observations:
-                # Extract tool usage information
-                if hasattr(obs, 'name') and obs.name:
-                    tool_name = str(obs.name)
-                    tool_input = obs.input if hasattr(obs, 'input') and obs.input else None
-                    tool_output = obs.output if hasattr(obs, 'output') and obs.output else None
-                    tool_usages.append({
-                        "name": tool_name,
-                        "input": tool_input,
-                        "output": tool_output
-                    })
-                    # Specifically capture retrieved contexts
-                    if 'retrieve' in tool_name.lower() and tool_output:
-                        retrieved_contexts.append(str(tool_output))
+        observations = fetch_trace_observations(langfuse, trace.id)
+        observations.sort(key=lambda obs: obs.start_time)
+
+        for obs in observations:
+            # Extract tool usage information
+            if hasattr(obs, 'name') and obs.name:
+                tool_name = str(obs.name)
+                tool_input = obs.input if hasattr(obs, 'input') and obs.input else None
+                tool_output = obs.output if hasattr(obs, 'output') and obs.output else None
+                tool_usages.append({
+                    "name": tool_name,
+                    "input": tool_input,
+                    "output": tool_output
+                })
+                # Specifically capture retrieved contexts
+                if 'retrieve' in tool_name.lower() and tool_output:
+                    retrieved_contexts.append(str(tool_output))
+        # A trace without output is still running, and may get more observations
+        complete = bool(agent_responses)
     except Exception as e:
-        print(f"Error fetching observations: {e}")
+        print(f"Error fetching observations for trace {trace.id}: {e}")
 
     # Extract tool names from metadata if available
     if hasattr(trace, 'metadata') and trace.metadata:
@@ -817,7 +1115,8 @@ def extract_span_components(langfuse, trace):
         "agent_responses": agent_responses,
         "retrieved_contexts": retrieved_contexts,
         "tool_usages": tool_usages,
-        "available_tools": available_tools if 'available_tools' in locals() else []
+        "available_tools": available_tools if 'available_tools' in locals() else [],
+        "complete": complete
     }
 
 def save_results_to_csv(rag_df=None, conv_df=None, output_dir="evaluation_results"):
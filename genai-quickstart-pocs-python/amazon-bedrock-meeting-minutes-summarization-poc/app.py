@@ -15,7 +15,7 @@ from io import StringIO
 import re
 from transcribe_util import Transcribe
 from s3_util import S3
-from llm import BedrockModelHandler
+from llm import get_responses
 #Configure bucket where temporary transcriptions are uploaded
 S3_BUCKET_NAME = "<YOUR BUCKET NAME>"
 #Supported LLMs
@@ -31,62 +31,50 @@ TEXT_EXTENSIONS = ["txt"]
 
 def process_file():
     """
-    Process uploaded file and generate the summary and update the text area of streamlit app.
+    Process uploaded file, generate the result of every task from one transcript and update the text area of streamlit app.
     :return: None
     """
     result = ""
+    st.session_state["results"] = {}
     if st.session_state.file_input is not None:
         __session = boto3.session.Session()
-        transcribe = Transcribe(__session)
         #Remove speical characters from file
         file_name, file_extension = get_file_extention(st.session_state.file_input.name)
         st.session_state["file_name_out"] = "{}_summary.txt".format(file_name)
         if file_name is not None:
            # check if extensions are part of auido extensions 
             if file_extension.lower() in AUDIO_EXTENSIONS:
-                job_name = transcribe.get_job_name(file_name)
-                 # check if transcirption already present 
-                if job_name in transcribe.get_transcribe_jobs_list():
-                    # if transcription already present get the transcription text
-                    transcript_text = transcribe.get_transcribe_text(job_name)
-                    if transcript_text is not None:
-                        if transcript_text !="":
-                            result = BedrockModelHandler(__session, selected_model, str(transcript_text), option).get_response()   
-                        else:
-                            result ="ERROR : Meeting audio/video file does not produce any transcript. Please verify file "
-                    else:
-                        result = "ERROR : in Transcription job "
+                transcribe = Transcribe(__session)
+                s3 = S3(__session, S3_BUCKET_NAME)
+                # reuse the cached transcript or existing job for this recording, or transcribe it
+                transcript_text = transcribe.get_transcript(st.session_state.file_input.getvalue(), file_extension, s3)
+                if transcript_text is None:
+                    result = "ERROR : in Transcription job "
+                elif transcript_text == "":
+                    result ="ERROR : Meeting audio/video file does not produce any transcript. Please verify file "
                 else:
-                    # if transcription is not present upload file on S3 bucket and get the URI
-                    bytes_data = st.session_state.file_input.getvalue()
-                    s3 = S3(__session, S3_BUCKET_NAME)
-                    # Temporarily upload file on S3 bucket for transcription
-                    file_uri = s3.upload_media_file_on_s3(bytes_data, job_name, file_extension)
-                    if file_uri is not None:
-                        transcribe.transcribe_file(job_name, file_uri, file_extension)
-                        transcript_text = transcribe.get_transcribe_text(job_name)
-                        if transcript_text is not None : 
-                            if transcript_text !="":
-                                result = BedrockModelHandler(__session, selected_model, str(transcript_text), option).get_response()   
-                                # Delete uploaded file on S3 bucket
-                                s3.delete_media_file_from_s3(job_name, file_extension)
-                            else:
-                                result ="ERROR : Meeting audio/video file does not produce any transcript. Please verify file "
-                        # If transcirption is not succesful there is an error
-                        else:
-                            result = "ERROR : in Transcription job "   
-
-                            
-            # check if extensions are part of auido extensions                 
+                    st.session_state["results"] = get_responses(__session, selected_model, str(transcript_text), SUPPORTED_TASKS)
+                    result = st.session_state["results"][st.session_state.task]
+            # check if extensions are part of text extensions
             elif file_extension.lower() in TEXT_EXTENSIONS:
                 stringio = StringIO(st.session_state.file_input.getvalue().decode("utf-8"))
                 string_data = stringio.read()
-                result = BedrockModelHandler(__session, selected_model, str(string_data), option).get_response()      
+                st.session_state["results"] = get_responses(__session, selected_model, str(string_data), SUPPORTED_TASKS)
+                result = st.session_state["results"][st.session_state.task]
             else:
                 result = "Error : Invalid file format {}".format(file_extension)
     # update summary in textarea result
     st.session_state["result"] = result
 
+
+def show_task_result():
+    """
+    Show the result of the selected task; every task was generated when the file was processed.
+    :return: None
+    """
+    if st.session_state.get("results"):
+        st.session_state["result"] = st.session_state["results"][st.session_state.task]
+
 # STREAMLIT APP ==============================================================================
 
 st.set_page_config(layout="wide")
@@ -94,7 +82,7 @@ st.set_page_config(layout="wide")
 st.title(f""":rainbow[Amazon Bedrock Meeting Minutes Summarization]""")
 # set modle selection box
 selected_model = st.selectbox('Select Model', SUPPORTED_MODLES)
-option = st.selectbox('Select Task',SUPPORTED_TASKS)
+option = st.selectbox('Select Task',SUPPORTED_TASKS, key='task', on_change=show_task_result)
 uploaded_file = st.file_uploader("Upload Meeting Recording", key='file_input' ,on_change=process_file)
 
 
@@ -1,7 +1,43 @@
 """
 This module handles logic to interact with LLM using Amazon Bedrock API
 """
+import hashlib
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+#Responses already generated, keyed by model, task and transcript hash
+_responses = {}
+_responses_lock = threading.Lock()
+
+
+def get_responses(_session, model_name, transcript, tasks):
+    """
+    Run every task on the same transcript concurrently, reusing responses generated before
+    for the same model, task and transcript.
+    :param _session: boto3 session.
+    :param model_name: FM model name.
+    :param transcript: Meeting transcript text.
+    :param tasks: list of tasks, e.g. Summarize and NotesAction.
+    :return: dictionary of task to model response.
+    """
+    transcript_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+    # boto3 sessions are not thread safe, so the client is created before fanning out
+    bedrock = _session.client(service_name='bedrock-runtime')
+
+    def get_response(task):
+        key = (model_name, task, transcript_hash)
+        with _responses_lock:
+            if key in _responses:
+                return _responses[key]
+        response = BedrockModelHandler(_session, model_name, transcript, task, bedrock).get_response()
+        with _responses_lock:
+            _responses[key] = response
+        return response
+
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        return dict(zip(tasks, executor.map(get_response, tasks)))
+
 
 
 class BedrockModelHandler():
@@ -9,17 +45,19 @@ class BedrockModelHandler():
     This class provided an abstraction layer for invoking the Bedrock Model for
     Summarizing or ActionNotes tasks. 
     """
-    def __init__(self, _session, model_name, prompt, task):
+    def __init__(self, _session, model_name, prompt, task, bedrock_client=None):
         """
         :param _session: boto3 session.
         :param model_name: FM model name.
         :param prompt: Meeting trasncript text  to summarize.
         :param task: summarize or notes action.
+        :param bedrock_client: optional bedrock-runtime client to reuse.
         """
         self.model_name = model_name
         self._session = _session
         self.prompt = prompt
         self.task = task
+        self.bedrock_client = bedrock_client
     
     def get_response(self):
         """
@@ -34,7 +72,7 @@ class BedrockModelHandler():
         """
         if self.task == "Summarize":
             self.prompt = "Summarize the meeting transcript:"+self.prompt
-        elif self.task == "ActionNotes":
+        elif self.task in ("NotesAction", "ActionNotes"):
             self.prompt = "Create List of action items from the meeting transcript:"+self.prompt
 
     def __get_model(self):
@@ -43,7 +81,7 @@ class BedrockModelHandler():
         currently supported only anthropic.claude-v2 and anthropic.claude-3-sonnet
         return: Model class instance
         """
-        bedrock = self._session.client(service_name='bedrock-runtime')
+        bedrock = self.bedrock_client or self._session.client(service_name='bedrock-runtime')
         if self.model_name == "anthropic.claude-v2":
             return ClaudeV2(self.prompt, bedrock)
         elif self.model_name == "anthropic.claude-3-sonnet":
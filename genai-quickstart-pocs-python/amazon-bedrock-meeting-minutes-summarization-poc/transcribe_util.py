@@ -1,63 +1,56 @@
 """
-This utility module manages interactions with the Amazon Transcribe service, including retrieving transcription job history
-and initiating transcription jobs or getting transcribed text
+This utility module manages interactions with the Amazon Transcribe service, including looking up transcription jobs,
+initiating transcription jobs and getting transcribed text.
+Jobs are named after the content of the recording, so the same recording is only ever transcribed once,
+and transcripts are cached locally so repeat uploads do not call Amazon Transcribe at all.
 """
+import hashlib
+import os
 import requests
 import time
 
+#Directory where completed transcripts are cached, keyed by job name
+TRANSCRIPT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", "transcripts")
+
 
 class Transcribe:
     """
     This class provided an abstraction layer for interacting with Amazon Transcribe Service
 
-    """ 
-    def __init__(self, _session):
+    """
+    def __init__(self, _session, cache_dir=TRANSCRIPT_CACHE_DIR):
         """
         Initialize the Transcribe class.
         :param _session: boto3 session.
+        :param cache_dir: directory where transcripts are cached.
         """
         self.transcribe_client = _session.client("transcribe")
+        self.cache_dir = cache_dir
         self.job_name = None
 
-    def get_job_name(self, file_name):
+    def get_job_name(self, file_binary_data):
         """
-        The name of the transcription job follows this convention: the letters 
-        "GA" are appended as prefix to original file name.
-        :param file: file name.
+        The name of the transcription job follows this convention: the letters
+        "GA" are appended as prefix to the SHA-256 hash of the recording, so renamed
+        copies of a recording share a job and different recordings never collide.
+        :param file_binary_data: recording bytes.
         :return: job_name.
         """
-        #Append GA to file_name for identification purpose
-        self.job_name = "{}_{}".format("GA", file_name)
-        return "{}_{}".format("GA", file_name)
-
-    def get_transcribe_jobs_list(self):
-        """
-        returns list of completed transcribe job names
-        """
-        jobs_list = []
-        response = self.transcribe_client.list_transcription_jobs()
-        ts = response["TranscriptionJobSummaries"]
-        next_token = None
-        #iterate over all transcription summaries
-        for jobs in ts:
-            #if transcription job has completed status append to list
-            if jobs["TranscriptionJobStatus"] == "COMPLETED":
-                jobs_list.append(jobs["TranscriptionJobName"])
-        if "NextToken" in response.keys():
-            next_token = response["NextToken"]
-        #iterate over additional pages if next token is present in response
-        while next_token is not None:
-            response = self.transcribe_client.list_transcription_jobs(NextToken = next_token)
-            ts = response["TranscriptionJobSummaries"]
-            for jobs in ts:
-                #if transcription job has completed status append to list
-                if jobs["TranscriptionJobStatus"] == "COMPLETED":
-                    jobs_list.append(jobs["TranscriptionJobName"])          
-            if "NextToken" in response.keys():
-                next_token = response["NextToken"]
-            else:
-                next_token =None
-        return jobs_list
+        self.job_name = "{}_{}".format("GA", hashlib.sha256(file_binary_data).hexdigest())
+        return self.job_name
+
+    def get_transcription_job(self, job_name):
+        """
+        Look up a single transcription job by name.
+        :param job_name: Transcribe job Name.
+        :return: TranscriptionJob dictionary, or None if the job does not exist.
+        """
+        try:
+            response = self.transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+        except self.transcribe_client.exceptions.BadRequestException:
+            # Amazon Transcribe reports unknown job names as a bad request
+            return None
+        return response["TranscriptionJob"]
 
     def transcribe_file(self, job_name, file_uri, file_extension):
         """
@@ -73,36 +66,101 @@ class Transcribe:
             MediaFormat=file_extension,
             LanguageCode="en-US",
         )
-        #set the job name 
+        #set the job name
         self.job_name = job_name
 
-    def get_transcribe_text(self, job_name):
+    def wait_for_job(self, job_name, max_wait=600, initial_delay=1, max_delay=15):
+        """
+        Wait for a transcription job to finish, polling quickly at first and backing off
+        for long recordings.
+        :param job_name: Transcribe job Name.
+        :param max_wait: maximum number of seconds to wait.
+        :return: TranscriptionJob dictionary once COMPLETED or FAILED, or None on timeout.
+        """
+        deadline = time.monotonic() + max_wait
+        delay = initial_delay
+        while True:
+            job = self.get_transcription_job(job_name)
+            if job is not None and job["TranscriptionJobStatus"] in ("COMPLETED", "FAILED"):
+                return job
+            if time.monotonic() + delay > deadline:
+                return None
+            time.sleep(delay)
+            delay = min(max_delay, delay * 1.5)
+
+    def get_transcribe_text(self, job_name, max_wait=600):
         """
         :param job_name: Transcribe job Name.
-        :return: transcribed text for specific job.
+        :param max_wait: maximum number of seconds to wait for the job.
+        :return: transcribed text for specific job, or None if the job failed or timed out.
         """
-        transcript = None
         self.job_name = job_name
-        max_tries = 60
-        #Check the status of TranscriptionJob is completed 
-        # Keep checking the status for 60 iteration with each 5 second pause
-        while max_tries > 0:
-            max_tries -= 1
-            job = self.transcribe_client.get_transcription_job(TranscriptionJobName = self.job_name)
-            job_status = job["TranscriptionJob"]["TranscriptionJobStatus"]
-            if job_status == "COMPLETED":
-                #if TranscriptionJob is completed get transcript and break the loop
-                response = self.transcribe_client.get_transcription_job(
-                    TranscriptionJobName=self.job_name
-                )
-                url = response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]
-                #geth trasncript by requesting url
-                r = requests.get(url, timeout=30)
-                transcript = r.json()["results"]["transcripts"][0]["transcript"]
-                break
-            # Sleep for 5 seconds before retrying
-            time.sleep(5)
+        transcript = self.load_cached_transcript(job_name)
+        if transcript is not None:
+            return transcript
+
+        job = self.wait_for_job(job_name, max_wait=max_wait)
+        if job is None or job["TranscriptionJobStatus"] != "COMPLETED":
+            return None
+        url = job["Transcript"]["TranscriptFileUri"]
+        #get transcript by requesting url
+        r = requests.get(url, timeout=30)
+        transcript = r.json()["results"]["transcripts"][0]["transcript"]
+        self.save_cached_transcript(job_name, transcript)
         return transcript
-    
 
+    def get_transcript(self, file_binary_data, file_extension, s3):
+        """
+        Get the transcript of a recording: from the local cache, from an existing job for the
+        same recording, or by uploading it to S3 and starting a new job.
+        :param file_binary_data: recording bytes.
+        :param file_extension: extension of the recording.
+        :param s3: S3 helper used to upload the recording temporarily.
+        :return: transcribed text, or None if transcription failed.
+        """
+        job_name = self.get_job_name(file_binary_data)
+        transcript = self.load_cached_transcript(job_name)
+        if transcript is not None:
+            return transcript
+
+        job = self.get_transcription_job(job_name)
+        if job is not None and job["TranscriptionJobStatus"] == "FAILED":
+            # A failed job keeps its name, so remove it before trying again
+            self.transcribe_client.delete_transcription_job(TranscriptionJobName=job_name)
+            job = None
+        if job is not None:
+            # The recording was transcribed before, or is being transcribed now
+            return self.get_transcribe_text(job_name)
+
+        # Temporarily upload file on S3 bucket for transcription
+        file_uri = s3.upload_media_file_on_s3(file_binary_data, job_name, file_extension)
+        if file_uri is None:
+            return None
+        try:
+            self.transcribe_file(job_name, file_uri, file_extension)
+            return self.get_transcribe_text(job_name)
+        finally:
+            # Delete uploaded file on S3 bucket
+            s3.delete_media_file_from_s3(job_name, file_extension)
+
+    def get_cache_path(self, job_name):
+        return os.path.join(self.cache_dir, "{}.txt".format(job_name))
+
+    def load_cached_transcript(self, job_name):
+        """
+        :param job_name: Transcribe job Name.
+        :return: cached transcript, or None if not cached.
+        """
+        cache_path = self.get_cache_path(job_name)
+        if not os.path.exists(cache_path):
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
 
+    def save_cached_transcript(self, job_name, transcript):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        #write to a temporary file first so a partial transcript is never read back
+        cache_path = self.get_cache_path(job_name)
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(transcript)
+        os.replace(cache_path + ".tmp", cache_path)
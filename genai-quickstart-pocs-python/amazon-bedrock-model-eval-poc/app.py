@@ -6,11 +6,14 @@ from logic import (
     aggregate_q_and_a_records,
     generate_bedrock_prompts_q_and_a,
     generate_bedrock_prompts,
-    get_download_data,
+    iter_jsonl_shards,
+    format_build_rate,
+    MODEL_EVALUATION_MAX_RECORDS,
 )
 import streamlit as st
 import pandas as pd
 import math
+import time
 
 
 prompt_instructions = [
@@ -165,8 +168,10 @@ def get_q_and_a_form_data(headers, csv_data, answer_choices_format):
                 form_fields["category"]: "category",
             }
         )
+        start_time = time.perf_counter()
         data = aggregate_q_and_a_records(data)
         data = generate_bedrock_prompts_q_and_a(data, answer_choices_format)
+        details_form.write(format_build_rate(len(csv_data), time.perf_counter() - start_time))
         details_form.update(
             label="Q&A Mapping Complete", expanded=False, state="complete"
         )
@@ -267,6 +272,7 @@ def get_form_data_with_checkboxes(
                 form_fields[category] = True
             data = select_columns(csv_data, [k for k, v in form_fields.items() if v])
             print(f"data from selected columns {data}")
+            start_time = time.perf_counter()
             if prompt_type == "TextSummarization":
                 data = generate_bedrock_prompts(
                     data,
@@ -292,6 +298,7 @@ def get_form_data_with_checkboxes(
                     "Classify the text within <text> tag using the categories in the <categories> tag.",
                     categories_input=categories_input,
                 )
+            details_form.write(format_build_rate(len(csv_data), time.perf_counter() - start_time))
             details_form.update(
                 label="Text Summarization Mapping Complete",
                 expanded=False,
@@ -378,7 +385,7 @@ def main():
         with st.status("Data Mapping Complete. Create files.", expanded=True):
             st.subheader("Data Mapping Complete")
             total_records = len(data)
-            batch_size = 1000
+            batch_size = MODEL_EVALUATION_MAX_RECORDS
             st.write(f"Prompts Generated: {total_records}")
             st.write(
                 f"Download the prompt dataset {'file' if total_records <= batch_size else 'files'} to use within Amazon Bedrock Model Evaluator."
@@ -392,10 +399,9 @@ def main():
                     "You have more than 1,000 prompts. Model Evaluator only supports 1,000 prompts per evaluation. To ensure files are generated in a way that is supported"
                     + "by Model Evaluator, multiple files will be created, with a maximum of 1,000 prompts per file."
                 )
-            for batch_idx in range(math.ceil(total_records / batch_size)):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, total_records)
-                batch_data = data.iloc[start_idx:end_idx]
+            for batch_idx, batch_data in enumerate(
+                iter_jsonl_shards(data, max_records=batch_size)
+            ):
                 append_file_text = f"_{batch_idx}" if len(data) > batch_size else ""
                 append_button_text = (
                     f" ({batch_idx+1} of {math.ceil(total_records/batch_size)})"
@@ -404,7 +410,7 @@ def main():
                 )
                 st.download_button(
                     f"Download Formatted Prompt Dataset{append_button_text}",
-                    data=get_download_data(batch_data),
+                    data=batch_data,
                     file_name=f"formatted_prompts_{prompt_type}{append_file_text}.jsonl",
                     key=f"formatted_prompts_{prompt_type}{append_file_text}.jsonl",
                     mime="application/json",
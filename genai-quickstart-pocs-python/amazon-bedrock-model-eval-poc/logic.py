@@ -1,6 +1,9 @@
 import csv
+import io
 import warnings
+from functools import lru_cache
 from bs4 import MarkupResemblesLocatorWarning, BeautifulSoup
+import numpy as np
 import pandas as pd
 
 # Ignore MarkupResemblesLocatorWarning that is printed due to short size and shape of possible HTML
@@ -13,6 +16,12 @@ evaluation_type = {
     "Classification": "Classification",
 }
 
+# Model Evaluator accepts at most this many prompts per dataset
+MODEL_EVALUATION_MAX_RECORDS = 1000
+# Bedrock batch inference limits per input file
+BATCH_INFERENCE_MAX_RECORDS = 50000
+BATCH_INFERENCE_MAX_BYTES = 1024 * 1024 * 1024
+
 evaluation_type_value = {
     "Q&A": "QAndA",
     "Text Summarization": "TextSummarization",
@@ -58,25 +67,39 @@ def aggregate_q_and_a_records(df: pd.DataFrame):
     Returns:
         pandas.DataFrame: The transformed DataFrame.
     """
-    # Create a dictionary of answer information for each question_id
-    data = {}
-    for _, row in df.iterrows():
-        question_id = row.get("question_id", None)
-        if question_id not in data:
-            data[question_id] = {"question": row["question"], "answers": []}
-            # Add any other columns to the data dictionary
-            for col in df.columns:
-                if col not in ["question", "answer", "is_correct"]:
-                    data[question_id][col] = row[col]
-
-        data[question_id]["answers"].append(
-            {"answer": row["answer"], "is_correct": row["is_correct"]}
-        )
-        if row["is_correct"]:
-            data[question_id]["correct_answer"] = row["answer"]
+    # Number each question_id in order of first appearance (missing IDs form one group)
+    codes, question_ids = pd.factorize(df["question_id"], use_na_sentinel=False)
+
+    # The first row of each question supplies the question and the other columns
+    other_columns = [col for col in df.columns if col not in ["question", "answer", "is_correct"]]
+    first_rows = df.drop_duplicates("question_id", keep="first")
+    output_df = pd.DataFrame(
+        {"question": first_rows["question"].to_numpy()},
+        index=pd.Index(question_ids, name=None),
+    )
 
-    # Convert the dictionary to a DataFrame
-    output_df = pd.DataFrame.from_dict(data, orient="index")
+    # Split the answers into one list per question, keeping the row order within each question
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.cumsum(np.bincount(codes, minlength=len(question_ids)))[:-1]
+    answer_records = np.array(
+        [
+            {"answer": answer, "is_correct": is_correct}
+            for answer, is_correct in zip(df["answer"].tolist(), df["is_correct"].tolist())
+        ],
+        dtype=object,
+    )
+    # With no rows, np.split still returns one (empty) group, so keep one group per question
+    groups = np.split(answer_records[order], boundaries)[:len(question_ids)]
+    output_df["answers"] = [group.tolist() for group in groups]
+
+    for col in other_columns:
+        output_df[col] = first_rows[col].to_numpy()
+
+    # The last correct answer of each question is the reference answer
+    is_correct = df["is_correct"].astype(bool).to_numpy()
+    correct_rows = pd.Series(df["answer"].to_numpy()[is_correct], index=codes[is_correct])
+    correct_rows = correct_rows[~correct_rows.index.duplicated(keep="last")]
+    output_df["correct_answer"] = correct_rows.reindex(range(len(question_ids))).to_numpy()
     return output_df
 
 
@@ -123,8 +146,18 @@ def strip_html(html):
     elif type(html) != str:
         return html
     else:
-        soup = BeautifulSoup(html, "html.parser").decode('utf-8')
-        return str(soup.replace('\n', ' ').replace('\r', '').strip())
+        return _strip_html_text(html)
+
+
+@lru_cache(maxsize=65536)
+def _strip_html_text(text: str) -> str:
+    """
+    Strips HTML tags from a string. Values repeat a lot in evaluation datasets (answer
+    choices, categories), so results are cached, and text without markup skips parsing.
+    """
+    if "<" in text or "&" in text:
+        text = BeautifulSoup(text, "html.parser").get_text()
+    return text.replace("\n", " ").replace("\r", "").strip()
 
 
 def format_answer_value(
@@ -199,32 +232,33 @@ def generate_bedrock_prompts_q_and_a(
     Returns:
         list[dict]: The generated prompts.
     """
-    prompts = []
-    for _, row in data.iterrows():
-        prompt = {
-            "prompt": (
-                f"<question>{strip_html(row['question'])}</question>\n"
-                + "\n".join(
-                    format_answer_value(
-                        answer_data["answer"], answer_choices_format, idx
-                    )
-                    for idx, answer_data in enumerate(row["answers"])
-                )
-                + "<instructions>"
-                + (
-                    f"\nPlease response with the correct {answer_choices_format} and answer value"
-                    if answer_choices_format
-                    else "\nPlease respond with the correct answer choice value."
-                )
-                + "</instructions>"
-            ),
-            "referenceResponse": format_correct_answer_value(
-                row["correct_answer"], answer_choices_format, row["answers"]
-            ),
-            "category": row["category"],
+    instructions = (
+        "<instructions>"
+        + (
+            f"\nPlease response with the correct {answer_choices_format} and answer value"
+            if answer_choices_format
+            else "\nPlease respond with the correct answer choice value."
+        )
+        + "</instructions>"
+    )
+    questions = data["question"].map(strip_html).astype(str)
+    answer_choices = [
+        "\n".join(
+            format_answer_value(answer_data["answer"], answer_choices_format, idx)
+            for idx, answer_data in enumerate(answers)
+        )
+        for answers in data["answers"]
+    ]
+    return pd.DataFrame(
+        {
+            "prompt": ("<question>" + questions + "</question>\n" + answer_choices + instructions).to_numpy(),
+            "referenceResponse": [
+                format_correct_answer_value(correct_answer, answer_choices_format, answers)
+                for correct_answer, answers in zip(data["correct_answer"], data["answers"])
+            ],
+            "category": data["category"].to_numpy(),
         }
-        prompts.append(prompt)
-    return pd.DataFrame.from_records(prompts)
+    )
 
 
 def generate_bedrock_prompts(
@@ -254,16 +288,16 @@ def generate_bedrock_prompts(
         data = data.rename(columns={category: "category"})
     elif category and categories_input:
         data.insert(0, "category", data["referenceResponse"])
+    # Strip each column once, then join the columns of every row with newlines
+    stripped_columns = [
+        data[col].astype(str).map(_strip_html_text) for col in included_columns
+    ]
     data.insert(
         0,
         "prompt",
-        data[included_columns]
-        .astype(str)
-        .apply(
-            lambda x: strip_html(x),
-            axis=1,
-        )
-        .apply("\n".join, axis=1),
+        stripped_columns[0].str.cat(stripped_columns[1:], sep="\n")
+        if stripped_columns
+        else "",
     )
     data["prompt"] = (
         "<text>"
@@ -284,3 +318,69 @@ def get_download_data(dataframe: pd.DataFrame):
 
     """
     return dataframe.to_json(orient="records", lines=True)
+
+
+def iter_jsonl_shards(
+    dataframe: pd.DataFrame,
+    max_records: int = MODEL_EVALUATION_MAX_RECORDS,
+    max_bytes: int = BATCH_INFERENCE_MAX_BYTES,
+    chunk_size: int = 10000,
+):
+    """
+    Serializes the dataframe to JSON Lines in chunks and yields it as shards that stay within
+    the record and size limits, so the whole dataset is never held as one string.
+
+    Args:
+        dataframe (pd.DataFrame): The prompt dataset.
+        max_records (int): Maximum number of records per shard.
+        max_bytes (int): Maximum size of a shard in bytes.
+        chunk_size (int): Number of rows serialized at a time.
+
+    Yields:
+        bytes: The JSON Lines content of each shard.
+    """
+    shard = io.BytesIO()
+    shard_records = 0
+    for start in range(0, len(dataframe), chunk_size):
+        chunk = dataframe.iloc[start : start + chunk_size]
+        lines = chunk.to_json(orient="records", lines=True).encode("utf-8").splitlines(keepends=True)
+        for line in lines:
+            if shard_records and (
+                shard_records >= max_records or shard.tell() + len(line) > max_bytes
+            ):
+                yield shard.getvalue()
+                shard = io.BytesIO()
+                shard_records = 0
+            shard.write(line if line.endswith(b"\n") else line + b"\n")
+            shard_records += 1
+    if shard_records:
+        yield shard.getvalue()
+
+
+def write_jsonl_shards(
+    dataframe: pd.DataFrame,
+    path_prefix: str,
+    max_records: int = BATCH_INFERENCE_MAX_RECORDS,
+    max_bytes: int = BATCH_INFERENCE_MAX_BYTES,
+) -> list[str]:
+    """
+    Writes the dataframe to JSON Lines files named <path_prefix>_<n>.jsonl, sharded to the given limits.
+
+    Returns:
+        list[str]: The paths of the files written.
+    """
+    paths = []
+    for idx, shard in enumerate(iter_jsonl_shards(dataframe, max_records, max_bytes)):
+        path = f"{path_prefix}_{idx}.jsonl"
+        with open(path, "wb") as file:
+            file.write(shard)
+        paths.append(path)
+    return paths
+
+
+def format_build_rate(rows: int, seconds: float) -> str:
+    """
+    Returns a short report of how fast rows were processed.
+    """
+    rate = rows / seconds if seconds > 0 else float("inf")
+    return f"Processed {rows:,} rows in {seconds:.2f}s ({rate:,.0f} rows/sec)"
@@ -0,0 +1,47 @@
+import io
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic import aggregate_q_and_a_records  # noqa: E402
+
+
+def read_csv(text):
+    return pd.read_csv(io.StringIO(text))
+
+
+class TestAggregateQAndARecords(unittest.TestCase):
+    def test_groups_answers_by_question_in_order(self):
+        df = read_csv(
+            "question_id,question,answer,is_correct,category\n"
+            "1,Capital of France?,Paris,True,geography\n"
+            "2,2 + 2?,5,False,math\n"
+            "1,Capital of France?,Lyon,False,geography\n"
+            "2,2 + 2?,4,True,math\n"
+        )
+
+        output = aggregate_q_and_a_records(df)
+
+        self.assertEqual(output.index.tolist(), [1, 2])
+        self.assertEqual(output["question"].tolist(), ["Capital of France?", "2 + 2?"])
+        self.assertEqual(
+            output.loc[1, "answers"],
+            [{"answer": "Paris", "is_correct": True}, {"answer": "Lyon", "is_correct": False}],
+        )
+        self.assertEqual(output["correct_answer"].tolist(), ["Paris", "4"])
+        self.assertEqual(output["category"].tolist(), ["geography", "math"])
+
+    def test_header_only_csv_gives_an_empty_frame(self):
+        df = read_csv("question_id,question,answer,is_correct\n")
+
+        output = aggregate_q_and_a_records(df)
+
+        self.assertTrue(output.empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
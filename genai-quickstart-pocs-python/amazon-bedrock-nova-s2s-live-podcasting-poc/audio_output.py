@@ -0,0 +1,224 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""Jitter-buffered audio playback for Nova Sonic responses.
+
+Response audio is split into fixed frames and appended to a deque, which is
+safe for one producer and one consumer without locks. A dedicated playback
+thread pops frames and makes blocking writes to the output device, so the
+event loop never waits on the sound card.
+
+- Playback of each utterance starts once the jitter buffer holds the target
+  amount of audio. The target grows after every underrun and shrinks again
+  after utterances that play cleanly.
+- Barge-in bumps a generation counter and clears the buffer. Frames from an
+  older generation are never written, so playback stops within one frame.
+- A failed device write drops that frame and is counted in the metrics;
+  playback carries on with the next frame.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Silence between two chunks longer than this starts a new utterance instead of counting as an underrun
+UTTERANCE_GAP = 0.5
+# Recent samples kept for the latency metrics
+LATENCY_WINDOW = 100
+
+
+class AudioOutputMetrics:
+    """Counters and latency samples for an AudioPlayer."""
+
+    def __init__(self):
+        self.chunks_received = 0
+        self.bytes_received = 0
+        self.frames_played = 0
+        self.bytes_played = 0
+        self.frames_discarded = 0
+        self.underruns = 0
+        self.flushes = 0
+        self.utterances = 0
+        self.write_errors = 0
+        self.last_write_error = None
+        self.time_to_first_audio = deque(maxlen=LATENCY_WINDOW)
+        self.prebuffer_delay = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self):
+        def average_ms(samples):
+            return round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0
+
+        return {
+            'chunksReceived': self.chunks_received,
+            'bytesReceived': self.bytes_received,
+            'framesPlayed': self.frames_played,
+            'bytesPlayed': self.bytes_played,
+            'framesDiscarded': self.frames_discarded,
+            'underruns': self.underruns,
+            'flushes': self.flushes,
+            'utterances': self.utterances,
+            'writeErrors': self.write_errors,
+            'lastWriteError': self.last_write_error,
+            'timeToFirstAudioMs': average_ms(self.time_to_first_audio),
+            'lastTimeToFirstAudioMs': round(self.time_to_first_audio[-1] * 1000, 2) if self.time_to_first_audio else 0.0,
+            'prebufferDelayMs': average_ms(self.prebuffer_delay),
+        }
+
+
+class NullAudioDevice:
+    """Output device that discards audio in real time. Useful for tests and headless runs."""
+
+    def __init__(self, sample_rate=24000, sample_width=2):
+        self.bytes_per_second = sample_rate * sample_width
+        self.bytes_written = 0
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append((time.monotonic(), bytes(data)))
+        self.bytes_written += len(data)
+        time.sleep(len(data) / self.bytes_per_second)
+
+
+class AudioPlayer:
+    """Plays 16-bit PCM on a dedicated thread through a jitter buffer.
+
+    :param write: blocking function that writes PCM to the device, e.g. a PyAudio stream's write
+    :param sample_rate: output sample rate in Hz
+    :param frame_bytes: bytes per device write; also the barge-in granularity
+    :param min_buffer_ms: smallest jitter buffer target
+    :param max_buffer_ms: largest jitter buffer target
+    :param buffer_step_ms: how much the target grows after an underrun
+    """
+
+    def __init__(self, write, sample_rate=24000, sample_width=2, frame_bytes=2048,
+                 min_buffer_ms=60, max_buffer_ms=400, buffer_step_ms=40):
+        self.write = write
+        self.frame_bytes = frame_bytes
+        self.bytes_per_second = sample_rate * sample_width
+        frame_ms = frame_bytes / self.bytes_per_second * 1000
+        self.min_frames = max(1, round(min_buffer_ms / frame_ms))
+        self.max_frames = max(self.min_frames, round(max_buffer_ms / frame_ms))
+        self.step_frames = max(1, round(buffer_step_ms / frame_ms))
+        self.target_frames = self.min_frames
+        self.metrics = AudioOutputMetrics()
+
+        # (generation, frame) pairs; appended by the event loop, popped by the playback thread
+        self._frames = deque()
+        self._generation = 0
+        self._data_ready = threading.Event()
+        self._first_enqueue_at = None
+        self._request_at = None
+        self._thread = None
+        self._running = False
+
+    @property
+    def buffered_ms(self):
+        """Audio currently waiting in the jitter buffer, in milliseconds."""
+        return len(self._frames) * self.frame_bytes / self.bytes_per_second * 1000
+
+    def mark_request(self):
+        """Mark the moment a response was requested; the next utterance reports time-to-first-audio from here."""
+        if self._request_at is None:
+            self._request_at = time.monotonic()
+
+    def enqueue(self, audio_bytes):
+        """Queue response audio for playback."""
+        if not audio_bytes:
+            return
+        if not self._frames:
+            self._first_enqueue_at = time.monotonic()
+        generation = self._generation
+        for i in range(0, len(audio_bytes), self.frame_bytes):
+            self._frames.append((generation, audio_bytes[i:i + self.frame_bytes]))
+        self.metrics.chunks_received += 1
+        self.metrics.bytes_received += len(audio_bytes)
+        self._data_ready.set()
+
+    def flush(self):
+        """Drop everything queued or playing (barge-in)."""
+        self._generation += 1
+        self.metrics.frames_discarded += len(self._frames)
+        self._frames.clear()
+        self._request_at = None
+        self.metrics.flushes += 1
+
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="audio-playback", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the playback thread after at most one more frame."""
+        if not self._thread:
+            return
+        self._running = False
+        self._data_ready.set()
+        self._thread.join()
+        self._thread = None
+
+    def _ready(self):
+        """Whether enough audio is buffered to start (or resume) an utterance."""
+        if len(self._frames) >= self.target_frames:
+            return True
+        # Responses shorter than the target start once they have waited as long as the target
+        first = self._first_enqueue_at
+        return bool(self._frames) and first is not None and \
+            time.monotonic() - first >= self.target_frames * self.frame_bytes / self.bytes_per_second
+
+    def _run(self):
+        playing = False
+        played_generation = None
+        starved_at = None
+        underruns_this_utterance = 0
+        while self._running:
+            if not playing:
+                self._data_ready.clear()
+                if not self._ready():
+                    # Sleep until audio arrives; poll briefly only while a short response is pending
+                    self._data_ready.wait(0.005 if self._frames else 0.5)
+                    continue
+                try:
+                    next_generation = self._frames[0][0]
+                except IndexError:
+                    # Flushed by a barge-in while waiting
+                    continue
+                playing = True
+                now = time.monotonic()
+                first = self._first_enqueue_at or now
+                if starved_at is not None and next_generation == played_generation \
+                        and first - starved_at < UTTERANCE_GAP:
+                    # The stream ran dry mid-utterance: buffer more from now on
+                    self.metrics.underruns += 1
+                    underruns_this_utterance += 1
+                    self.target_frames = min(self.max_frames, self.target_frames + self.step_frames)
+                else:
+                    if starved_at is not None and underruns_this_utterance == 0:
+                        self.target_frames = max(self.min_frames, self.target_frames - 1)
+                    underruns_this_utterance = 0
+                    self.metrics.utterances += 1
+                    self.metrics.prebuffer_delay.append(now - first)
+                    if self._request_at is not None:
+                        self.metrics.time_to_first_audio.append(now - self._request_at)
+                        self._request_at = None
+
+            try:
+                generation, frame = self._frames.popleft()
+            except IndexError:
+                playing = False
+                starved_at = time.monotonic()
+                continue
+            if generation != self._generation:
+                self.metrics.frames_discarded += 1
+                continue
+
+            try:
+                self.write(frame)
+            except Exception as e:
+                # e.g. an OSError from PyAudio; losing one frame beats ending playback for the session
+                self.metrics.write_errors += 1
+                self.metrics.last_write_error = repr(e)
+                continue
+            played_generation = generation
+            self.metrics.frames_played += 1
+            self.metrics.bytes_played += len(frame)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""Benchmark the guardrails against their previous multi-pass implementations.
+
+Compares, on a simulated streamed response:
+- re-scrubbing the accumulated text with four separate regexes after every chunk
+- scrubbing each chunk with PiiStreamScrubber
+and the per-keyword topic check against the single-pass matcher.
+
+Usage: python3 benchmark_guardrails.py [--chunks N] [--chunk-size N]
+"""
+import argparse
+import re
+import time
+
+from guardrails import AWS_KEYWORDS, PiiStreamScrubber, is_valid_aws_topic, scrub_pii
+
+# Previous implementations, kept here as the baseline
+_ACCESS_KEY_RE = re.compile(r"\bAKIA[A-Z0-9]{16}\b")
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}")
+_PHONE_RE = re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b")
+_ACCOUNT_ID_RE = re.compile(r"\b\d{12}\b")
+
+
+def scrub_pii_multipass(text):
+    text = _ACCESS_KEY_RE.sub("[access-key redacted]", text)
+    text = _EMAIL_RE.sub("[email redacted]", text)
+    text = _PHONE_RE.sub("[phone redacted]", text)
+    text = _ACCOUNT_ID_RE.sub("[account-id redacted]", text)
+    return text
+
+
+def is_valid_aws_topic_multipass(topic):
+    topic_lower = topic.lower()
+    return any(kw in topic_lower for kw in AWS_KEYWORDS)
+
+
+SAMPLE = ("Today we look at how Lambda and DynamoDB fit together. If you have questions, "
+          "reach out to podcast-team@example.com or call 555-123-4567. ")
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def benchmark_pii(num_chunks, chunk_size):
+    text = (SAMPLE * (num_chunks * chunk_size // len(SAMPLE) + 1))[:num_chunks * chunk_size]
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def rescrub_accumulated():
+        accumulated = ""
+        scrubbed = ""
+        for chunk in chunks:
+            accumulated += chunk
+            scrubbed = scrub_pii_multipass(accumulated)
+        return scrubbed
+
+    def stream():
+        scrubber = PiiStreamScrubber()
+        return "".join(scrubber.feed(chunk) for chunk in chunks) + scrubber.flush()
+
+    expected, multipass_time = _timed(rescrub_accumulated)
+    streamed, stream_time = _timed(stream)
+    assert streamed == scrub_pii(text) == expected, "streamed output differs from one-shot scrub"
+
+    print(f"PII scrubbing: {len(chunks)} chunks of {chunk_size} chars ({len(text):,} chars)")
+    print(f"  multi-pass re-scrub of accumulated text: {multipass_time * 1000:8.2f} ms")
+    print(f"  PiiStreamScrubber:                       {stream_time * 1000:8.2f} ms "
+          f"({multipass_time / stream_time:.1f}x)")
+
+
+def benchmark_topics(iterations=20000):
+    topics = ["Best pizza in New York", "How to train a dog", "Tell me about S3 versioning",
+              "Knowledge bases for retrieval"]
+
+    def run(check):
+        for _ in range(iterations):
+            for topic in topics:
+                check(topic)
+
+    _, multipass_time = _timed(lambda: run(is_valid_aws_topic_multipass))
+    _, single_time = _timed(lambda: run(is_valid_aws_topic))
+    checks = iterations * len(topics)
+    print(f"Topic validation: {checks:,} checks")
+    print(f"  per-keyword substring search: {multipass_time / checks * 1e6:6.2f} us/check")
+    print(f"  single-pass matcher:          {single_time / checks * 1e6:6.2f} us/check "
+          f"({multipass_time / single_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000, help="number of streamed text chunks")
+    parser.add_argument("--chunk-size", type=int, default=24, help="characters per chunk")
+    args = parser.parse_args()
+
+    benchmark_pii(args.chunks, args.chunk_size)
+    benchmark_topics()
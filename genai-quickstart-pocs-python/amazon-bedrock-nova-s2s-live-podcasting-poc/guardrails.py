@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT-0
 """Guardrails for the live podcast application — topic validation and PII filtering."""
 import re
+import string
 
 # ---------------------------------------------------------------------------
 # AWS Topic Validation
@@ -21,26 +22,91 @@ AWS_KEYWORDS = [
 ]
 
 
+def _trie_pattern(words) -> str:
+    """Build a regex matching any of the words, with shared prefixes factored into a trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a word
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+# All keywords in one trie-shaped pattern, so a topic is scanned once instead of once per keyword
+_AWS_KEYWORD_RE = re.compile(_trie_pattern(AWS_KEYWORDS))
+
+
 def is_valid_aws_topic(topic: str) -> bool:
     """Return True if the topic contains at least one AWS-related keyword (case-insensitive)."""
-    topic_lower = topic.lower()
-    return any(kw in topic_lower for kw in AWS_KEYWORDS)
+    return _AWS_KEYWORD_RE.search(topic.lower()) is not None
 
 
 # ---------------------------------------------------------------------------
 # PII Output Filtering
 # ---------------------------------------------------------------------------
 
-_ACCESS_KEY_RE = re.compile(r"\bAKIA[A-Z0-9]{16}\b")
-_EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}")
-_PHONE_RE = re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b")
-_ACCOUNT_ID_RE = re.compile(r"\b\d{12}\b")
+# One combined pattern, tried in priority order at each position, so text is scanned once
+_PII_RE = re.compile(
+    r"(?P<access_key>\bAKIA[A-Z0-9]{16}\b)"
+    r"|(?P<email>[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,})"
+    r"|(?P<phone>\b\d{3}[-.]?\d{3}[-.]?\d{4}\b)"
+    r"|(?P<account_id>\b\d{12}\b)"
+)
+_PII_REPLACEMENTS = {
+    "access_key": "[access-key redacted]",
+    "email": "[email redacted]",
+    "phone": "[phone redacted]",
+    "account_id": "[account-id redacted]",
+}
+
+# Every PII match consists only of these characters, so text after the last other character is complete
+_PII_CHARS = string.ascii_letters + string.digits + "_.+@-"
+# Longest run of PII characters held back between chunks; anything longer is scrubbed and released
+MAX_CARRY_CHARS = 256
+
+
+def _redact(match: re.Match) -> str:
+    return _PII_REPLACEMENTS[match.lastgroup]
 
 
 def scrub_pii(text: str) -> str:
     """Replace PII patterns in text with redaction placeholders."""
-    text = _ACCESS_KEY_RE.sub("[access-key redacted]", text)
-    text = _EMAIL_RE.sub("[email redacted]", text)
-    text = _PHONE_RE.sub("[phone redacted]", text)
-    text = _ACCOUNT_ID_RE.sub("[account-id redacted]", text)
-    return text
+    return _PII_RE.sub(_redact, text)
+
+
+class PiiStreamScrubber:
+    """Scrubs PII from text that arrives in chunks, e.g. streamed model output.
+
+    A match can span a chunk boundary, so the trailing run of characters that
+    could still be part of PII is carried over to the next chunk instead of
+    being released. Everything before it is scrubbed and returned immediately.
+    The carry is capped at MAX_CARRY_CHARS, so each chunk costs time
+    proportional to its own length rather than to the text seen so far.
+    """
+
+    def __init__(self, max_carry: int = MAX_CARRY_CHARS):
+        self.max_carry = max_carry
+        self._carry = ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the scrubbed text that is now safe to release."""
+        text = self._carry + chunk
+        split = len(text.rstrip(_PII_CHARS))
+        if len(text) - split > self.max_carry:
+            split = len(text)
+        self._carry = text[split:]
+        return scrub_pii(text[:split])
+
+    def flush(self) -> str:
+        """Return whatever is still carried over, scrubbed. Call at the end of the stream."""
+        text, self._carry = self._carry, ""
+        return scrub_pii(text)
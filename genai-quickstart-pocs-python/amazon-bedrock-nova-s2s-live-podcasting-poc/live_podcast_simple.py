@@ -17,7 +17,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from nova_sonic_client import BedrockStreamManager, SilentAudioStreamer
-from guardrails import is_valid_aws_topic, scrub_pii
+from guardrails import is_valid_aws_topic, PiiStreamScrubber
 
 app = Flask(__name__)
 
@@ -133,6 +133,9 @@ def generate():
                 unique_text = []
                 unique_audio = []
                 audio_count = 0
+                # PII is scrubbed as text streams in, so it never reaches logs or the next prompt
+                pii_scrubber = PiiStreamScrubber()
+                scrubbed_text = []
                 
                 def capture(event):
                     nonlocal audio_count
@@ -144,7 +147,9 @@ def generate():
                                 if text not in seen_text_chunks:
                                     seen_text_chunks.add(text)
                                     unique_text.append(text)
-                                    print(f"  📝 Text chunk #{len(unique_text)}: {text[:30]}...")
+                                    safe_text = pii_scrubber.feed(text)
+                                    scrubbed_text.append(safe_text)
+                                    print(f"  📝 Text chunk #{len(unique_text)}: {safe_text[:30]}...")
                         
                         # Capture only unique audio (by hash)
                         if 'audioOutput' in event['event']:
@@ -179,7 +184,8 @@ def generate():
                         stable_count = 0
                         last_chunk_count = current_count
                 
-                # Use all unique text (deduplication works for text)
+                # Use all unique text (deduplication works for text), with PII already scrubbed
+                scrubbed_text.append(pii_scrubber.flush())
                 text_parts = unique_text
                 
                 # Use all unique audio (hash deduplication should handle duplicates)
@@ -189,7 +195,7 @@ def generate():
                 
                 # Process response
                 if text_parts:
-                    bot_response = ''.join(text_parts).strip()
+                    bot_response = ''.join(scrubbed_text).strip()
                 else:
                     bot_response = f"{speaker} thinking..."
                 
@@ -199,9 +205,6 @@ def generate():
                 else:
                     previous_tiffany = bot_response
                 
-                # Scrub any PII from the response before streaming
-                bot_response = scrub_pii(bot_response)
-                
                 print(f"💬 {speaker}: {bot_response}")
                 
                 # Play audio in background (non-blocking)
@@ -19,6 +19,8 @@ from aws_sdk_bedrock_runtime.client import BedrockRuntimeClient, InvokeModelWith
 from aws_sdk_bedrock_runtime.models import InvokeModelWithBidirectionalStreamInputChunk, BidirectionalInputPayloadPart
 from aws_sdk_bedrock_runtime.config import Config
 from smithy_aws_core.identity.environment import EnvironmentCredentialsResolver
+from audio_input import AudioInputPipeline
+from audio_output import AudioPlayer
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
@@ -195,17 +197,18 @@ class BedrockStreamManager:
         self.region = region
         self.input_subject = Subject()
         self.output_subject = Subject()
-        self.audio_subject = Subject()
+        # Paced audio input, created when the audio content starts
+        self.audio_input = None
         
         self.response_task = None
         self.stream_response = None
         self.is_active = False
-        self.barge_in = False
         self.bedrock_client = None
         self.scheduler = None
         
-        # Audio playback components
+        # Audio playback components; audio is queued until a player is attached
         self.audio_output_queue = asyncio.Queue()
+        self.audio_player = None
 
         # Text response components
         self.display_assistant_text = False
@@ -274,14 +277,6 @@ class BedrockStreamManager:
                 on_error=lambda e: debug_print(f"Input stream error: {e}")
             )
             
-            # Set up subscription for audio chunks
-            self.audio_subject.pipe(
-                ops.subscribe_on(self.scheduler)
-            ).subscribe(
-                on_next=lambda audio_data: asyncio.create_task(self._handle_audio_input(audio_data)),
-                on_error=lambda e: debug_print(f"Audio stream error: {e}")
-            )
-            
             debug_print("Stream initialized successfully")
             return self
         except Exception as e:
@@ -292,13 +287,14 @@ class BedrockStreamManager:
             raise
     
     async def send_raw_event(self, event_json):
-        """Send a raw event JSON to the Bedrock stream."""
+        """Send a raw event JSON (str, or already encoded bytes) to the Bedrock stream."""
         if not self.stream_response or not self.is_active:
             debug_print("Stream not initialized or closed")
             return
         
+        event_bytes = event_json.encode('utf-8') if isinstance(event_json, str) else event_json
         event = InvokeModelWithBidirectionalStreamInputChunk(
-            value=BidirectionalInputPayloadPart(bytes_=event_json.encode('utf-8'))
+            value=BidirectionalInputPayloadPart(bytes_=event_bytes)
         )
         
         try:
@@ -317,10 +313,22 @@ class BedrockStreamManager:
                 traceback.print_exc()
             self.input_subject.on_error(e)
     
-    async def send_audio_content_start_event(self):
-        """Send a content start event to the Bedrock stream."""
+    async def send_audio_content_start_event(self, silence_when_idle=False):
+        """Send a content start event to the Bedrock stream and start the paced audio input."""
         content_start_event = self.CONTENT_START_EVENT % (self.prompt_name, self.audio_content_name)
         await self.send_raw_event(content_start_event)
+
+        if self.audio_input is None:
+            self.audio_input = AudioInputPipeline(
+                self.send_raw_event,
+                self.prompt_name,
+                self.audio_content_name,
+                sample_rate=INPUT_SAMPLE_RATE,
+                frame_ms=CHUNK_SIZE * 1000 / INPUT_SAMPLE_RATE,
+                silence_when_idle=silence_when_idle,
+                on_metrics=lambda metrics: debug_print(f"Audio input metrics: {metrics}")
+            )
+            self.audio_input.start()
     
     async def send_text_content_start_event(self):
         """Send a text content start event to the Bedrock stream."""
@@ -333,6 +341,9 @@ class BedrockStreamManager:
             debug_print("Stream is not active")
             return
         
+        if self.audio_player:
+            self.audio_player.mark_request()
+
         # Send text content start event
         await self.send_text_content_start_event()
         
@@ -350,36 +361,27 @@ class BedrockStreamManager:
         content_end_event = self.CONTENT_END_EVENT % (self.prompt_name, self.text_content_name)
         await self.send_raw_event(content_end_event)
     
-    async def _handle_audio_input(self, data):
-        """Process audio input before sending it to the stream."""
-        audio_bytes = data.get('audio_bytes')
-        if not audio_bytes:
-            debug_print("No audio bytes received")
-            return
-        
-        try:
-            # Ensure the audio is properly formatted
-            debug_print(f"Processing audio chunk of size {len(audio_bytes)} bytes")
-            
-            # Base64 encode the audio data
-            blob = base64.b64encode(audio_bytes)
-            audio_event = self.AUDIO_EVENT_TEMPLATE % (self.prompt_name, self.audio_content_name, blob.decode('utf-8'))
-            
-            # Send the event directly
-            await self.send_raw_event(audio_event)
-        except Exception as e:
-            debug_print(f"Error processing audio: {e}")
-            if DEBUG:
-                import traceback
-                traceback.print_exc()
-    
     def add_audio_chunk(self, audio_bytes):
-        """Add an audio chunk to the stream."""
-        self.audio_subject.on_next({
-            'audio_bytes': audio_bytes,
-            'prompt_name': self.prompt_name,
-            'content_name': self.audio_content_name
-        })
+        """Add an audio chunk to the paced input buffer. Safe to call from the audio callback thread."""
+        if self.audio_input:
+            self.audio_input.push(audio_bytes)
+
+    def attach_audio_player(self, player):
+        """Send audio output straight to a player, starting with anything already queued."""
+        while not self.audio_output_queue.empty():
+            player.enqueue(self.audio_output_queue.get_nowait())
+        self.audio_player = player
+
+    def detach_audio_player(self):
+        """Queue audio output again instead of playing it."""
+        self.audio_player = None
+
+    def interrupt_audio_output(self):
+        """Barge-in: drop all audio that has not been played yet."""
+        while not self.audio_output_queue.empty():
+            self.audio_output_queue.get_nowait()
+        if self.audio_player:
+            self.audio_player.flush()
     
     async def send_audio_content_end_event(self):
         """Send a content end event to the Bedrock stream."""
@@ -387,6 +389,11 @@ class BedrockStreamManager:
             debug_print("Stream is not active")
             return
         
+        # Send any buffered audio before ending the content
+        if self.audio_input:
+            await self.audio_input.stop()
+            self.audio_input = None
+
         content_end_event = self.CONTENT_END_EVENT % (self.prompt_name, self.audio_content_name)
         await self.send_raw_event(content_end_event)
         debug_print("Audio ended")
@@ -416,6 +423,8 @@ class BedrockStreamManager:
         """Send text input with a new content name for proper multi-turn conversation."""
         # Generate new content name for each text input
         new_text_content_name = str(uuid.uuid4())
+        if self.audio_player:
+            self.audio_player.mark_request()
         
         # Send text content start event
         content_start_event = self.TEXT_CONTENT_START_EVENT_INTERACTIVE % (
@@ -481,7 +490,10 @@ class BedrockStreamManager:
                                     if '{ "interrupted" : true }' in text_content:
                                         if DEBUG:
                                             print("Barge-in detected. Stopping audio output.")
-                                        self.barge_in = True
+                                        self.interrupt_audio_output()
+                                    elif self.role == "USER" and self.audio_player:
+                                        # The user's turn was recognized; time-to-first-audio starts here
+                                        self.audio_player.mark_request()
 
                                     # Disabled debug output for cleaner logs
                                     # if (self.role == "ASSISTANT" and self.display_assistant_text):
@@ -494,7 +506,10 @@ class BedrockStreamManager:
                                 elif 'audioOutput' in json_data['event']:
                                     audio_content = json_data['event']['audioOutput']['content']
                                     audio_bytes = base64.b64decode(audio_content)
-                                    await self.audio_output_queue.put(audio_bytes)
+                                    if self.audio_player:
+                                        self.audio_player.enqueue(audio_bytes)
+                                    else:
+                                        await self.audio_output_queue.put(audio_bytes)
                             
                             self.output_subject.on_next(json_data)
                         except json.JSONDecodeError:
@@ -526,7 +541,6 @@ class BedrockStreamManager:
 
         # Complete the subjects
         self.input_subject.on_completed()
-        self.audio_subject.on_completed()
 
         # Cancel response task after stream is properly closed
         if self.response_task and not self.response_task.done():
@@ -544,6 +558,20 @@ class BedrockStreamManager:
                 pass
         print("Stream closed")
 
+async def play_audio_output(stream_manager, output_stream, is_running, metrics_interval=10):
+    """Play the stream manager's audio output through a jitter-buffered playback thread while is_running()."""
+    player = AudioPlayer(output_stream.write, sample_rate=OUTPUT_SAMPLE_RATE, frame_bytes=CHUNK_SIZE * 2)
+    player.start()
+    stream_manager.attach_audio_player(player)
+    try:
+        while is_running():
+            await asyncio.sleep(metrics_interval)
+            debug_print(f"Audio output metrics: {player.metrics.to_dict()}")
+    finally:
+        stream_manager.detach_audio_player()
+        # Wait for the frame being written so the output stream can be closed safely
+        await asyncio.get_event_loop().run_in_executor(None, player.stop)
+
 class AudioStreamer:
     """Handles continuous microphone input and audio output using separate streams."""
     
@@ -591,78 +619,15 @@ class AudioStreamer:
         )
 
     def input_callback(self, in_data, frame_count, time_info, status):
-        """Callback function that schedules audio processing in the asyncio event loop"""
+        """Callback function that buffers microphone audio for the paced sender"""
         if self.is_streaming and in_data:
-            # Schedule the task in the event loop
-            asyncio.run_coroutine_threadsafe(
-                self.process_input_audio(in_data), 
-                self.loop
-            )
+            # Buffer directly; the paced sender picks it up on the event loop
+            self.stream_manager.add_audio_chunk(in_data)
         return (None, pyaudio.paContinue)
 
-    async def process_input_audio(self, audio_data):
-        """Process a single audio chunk directly"""
-        try:
-            # Send audio to Bedrock immediately
-            self.stream_manager.add_audio_chunk(audio_data)
-        except Exception as e:
-            if self.is_streaming:
-                print(f"Error processing input audio: {e}")
-    
     async def play_output_audio(self):
-        """Play audio responses from Nova Sonic"""
-        while self.is_streaming:
-            try:
-                # Check for barge-in flag
-                if self.stream_manager.barge_in:
-                    # Clear the audio queue
-                    while not self.stream_manager.audio_output_queue.empty():
-                        try:
-                            self.stream_manager.audio_output_queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                    self.stream_manager.barge_in = False
-                    # Small sleep after clearing
-                    await asyncio.sleep(0.05)
-                    continue
-                
-                # Get audio data from the stream manager's queue
-                audio_data = await asyncio.wait_for(
-                    self.stream_manager.audio_output_queue.get(),
-                    timeout=0.1
-                )
-                
-                if audio_data and self.is_streaming:
-                    # Write directly to the output stream in smaller chunks
-                    chunk_size = CHUNK_SIZE  # Use the same chunk size as the stream
-                    
-                    # Write the audio data in chunks to avoid blocking too long
-                    for i in range(0, len(audio_data), chunk_size):
-                        if not self.is_streaming:
-                            break
-                        
-                        end = min(i + chunk_size, len(audio_data))
-                        chunk = audio_data[i:end]
-                        
-                        # Create a new function that captures the chunk by value
-                        def write_chunk(data):
-                            return self.output_stream.write(data)
-                        
-                        # Pass the chunk to the function
-                        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
-                        
-                        # Brief yield to allow other tasks to run
-                        await asyncio.sleep(0.001)
-                    
-            except asyncio.TimeoutError:
-                # No data available within timeout, just continue
-                continue
-            except Exception as e:
-                if self.is_streaming:
-                    print(f"Error playing output audio: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                await asyncio.sleep(0.05)
+        """Play audio responses from Nova Sonic on a dedicated playback thread"""
+        await play_audio_output(self.stream_manager, self.output_stream, lambda: self.is_streaming)
     
     async def start_streaming(self):
         """Start streaming audio."""
@@ -734,7 +699,6 @@ class SilentAudioStreamer(AudioStreamer):
         self.stream_manager = stream_manager
         self.is_streaming = False
         self.loop = asyncio.get_event_loop()
-        self.silent_task = None
         
         # Initialize PyAudio for output only (no microphone input)
         debug_print("SilentAudioStreamer Initializing PyAudio...")
@@ -759,37 +723,17 @@ class SilentAudioStreamer(AudioStreamer):
         
         print("Starting silent audio streaming for text mode...")
         
-        # Send audio content start event
-        await time_it_async("send_audio_content_start_event", lambda: self.stream_manager.send_audio_content_start_event())
+        # Send audio content start event; the paced input fills idle frames with precomputed silence
+        await time_it_async("send_audio_content_start_event", lambda: self.stream_manager.send_audio_content_start_event(silence_when_idle=True))
         
         self.is_streaming = True
         
-        # Start silent audio input task and audio output task
-        self.silent_task = asyncio.create_task(self._send_silent_audio())
+        # Start audio output task
         self.output_task = asyncio.create_task(self.play_output_audio())
         
         # Small delay to ensure streaming is established
         await asyncio.sleep(0.1)
     
-    async def _send_silent_audio(self):
-        """Send continuous silent audio chunks."""
-        # Create silent audio chunk (16-bit PCM, 16kHz, mono)
-        silent_chunk_size = CHUNK_SIZE * 2  # 2 bytes per sample for 16-bit
-        silent_chunk = b'\x00' * silent_chunk_size
-        
-        while self.is_streaming:
-            try:
-                # Send silent audio chunk
-                self.stream_manager.add_audio_chunk(silent_chunk)
-                
-                # Wait for next chunk (maintain ~16kHz sample rate) - reduced delay for better responsiveness
-                await asyncio.sleep(0.01)  # 10ms instead of calculated delay
-                
-            except Exception as e:
-                if self.is_streaming:
-                    debug_print(f"Error sending silent audio: {e}")
-                break
-
     async def stop_streaming(self):
         """Stop streaming silent audio."""
         if not self.is_streaming:
@@ -799,9 +743,6 @@ class SilentAudioStreamer(AudioStreamer):
 
         # Cancel the tasks
         tasks = []
-        if self.silent_task and not self.silent_task.done():
-            tasks.append(self.silent_task)
-        
         if hasattr(self, 'output_task') and not self.output_task.done():
             tasks.append(self.output_task)
         
@@ -871,78 +812,15 @@ class MixedModeHandler:
         debug_print("output audio stream opened")
 
     def input_callback(self, in_data, frame_count, time_info, status):
-        """Callback function that schedules audio processing in the asyncio event loop"""
+        """Callback function that buffers microphone audio for the paced sender"""
         if self.is_active and in_data:
-            # Schedule the task in the event loop
-            asyncio.run_coroutine_threadsafe(
-                self.process_input_audio(in_data), 
-                self.loop
-            )
+            # Buffer directly; the paced sender picks it up on the event loop
+            self.stream_manager.add_audio_chunk(in_data)
         return (None, pyaudio.paContinue)
 
-    async def process_input_audio(self, audio_data):
-        """Process a single audio chunk directly"""
-        try:
-            # Send audio to Bedrock immediately
-            self.stream_manager.add_audio_chunk(audio_data)
-        except Exception as e:
-            if self.is_active:
-                print(f"Error processing input audio: {e}")
-    
     async def play_output_audio(self):
-        """Play audio responses from Nova Sonic"""
-        while self.is_active:
-            try:
-                # Check for barge-in flag
-                if self.stream_manager.barge_in:
-                    # Clear the audio queue
-                    while not self.stream_manager.audio_output_queue.empty():
-                        try:
-                            self.stream_manager.audio_output_queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                    self.stream_manager.barge_in = False
-                    # Small sleep after clearing
-                    await asyncio.sleep(0.05)
-                    continue
-                
-                # Get audio data from the stream manager's queue
-                audio_data = await asyncio.wait_for(
-                    self.stream_manager.audio_output_queue.get(),
-                    timeout=0.1
-                )
-                
-                if audio_data and self.is_active:
-                    # Write directly to the output stream in smaller chunks
-                    chunk_size = CHUNK_SIZE  # Use the same chunk size as the stream
-                    
-                    # Write the audio data in chunks to avoid blocking too long
-                    for i in range(0, len(audio_data), chunk_size):
-                        if not self.is_active:
-                            break
-                        
-                        end = min(i + chunk_size, len(audio_data))
-                        chunk = audio_data[i:end]
-                        
-                        # Create a new function that captures the chunk by value
-                        def write_chunk(data):
-                            return self.output_stream.write(data)
-                        
-                        # Pass the chunk to the function
-                        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
-                        
-                        # Brief yield to allow other tasks to run
-                        await asyncio.sleep(0.001)
-                    
-            except asyncio.TimeoutError:
-                # No data available within timeout, just continue
-                continue
-            except Exception as e:
-                if self.is_active:
-                    print(f"Error playing output audio: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                await asyncio.sleep(0.05)
+        """Play audio responses from Nova Sonic on a dedicated playback thread"""
+        await play_audio_output(self.stream_manager, self.output_stream, lambda: self.is_active)
     
     async def handle_text_input(self):
         """Handle text input in mixed mode."""
@@ -986,7 +864,7 @@ class MixedModeHandler:
                 elif user_input.strip() == '' and self.waiting_for_response:
                     # Interrupt current response
                     print("\n[Interrupting assistant response...]")
-                    self.stream_manager.barge_in = True
+                    self.stream_manager.interrupt_audio_output()
                     self.waiting_for_response = False
                     continue
                 elif user_input.strip() == '':
@@ -1040,78 +918,15 @@ class MixedModeHandler:
         debug_print("output audio stream opened")
 
     def input_callback(self, in_data, frame_count, time_info, status):
-        """Callback function that schedules audio processing in the asyncio event loop"""
+        """Callback function that buffers microphone audio for the paced sender"""
         if self.is_active and in_data:
-            # Schedule the task in the event loop
-            asyncio.run_coroutine_threadsafe(
-                self.process_input_audio(in_data), 
-                self.loop
-            )
+            # Buffer directly; the paced sender picks it up on the event loop
+            self.stream_manager.add_audio_chunk(in_data)
         return (None, pyaudio.paContinue)
 
-    async def process_input_audio(self, audio_data):
-        """Process a single audio chunk directly"""
-        try:
-            # Send audio to Bedrock immediately
-            self.stream_manager.add_audio_chunk(audio_data)
-        except Exception as e:
-            if self.is_active:
-                print(f"Error processing input audio: {e}")
-    
     async def play_output_audio(self):
-        """Play audio responses from Nova Sonic"""
-        while self.is_active:
-            try:
-                # Check for barge-in flag
-                if self.stream_manager.barge_in:
-                    # Clear the audio queue
-                    while not self.stream_manager.audio_output_queue.empty():
-                        try:
-                            self.stream_manager.audio_output_queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                    self.stream_manager.barge_in = False
-                    # Small sleep after clearing
-                    await asyncio.sleep(0.05)
-                    continue
-                
-                # Get audio data from the stream manager's queue
-                audio_data = await asyncio.wait_for(
-                    self.stream_manager.audio_output_queue.get(),
-                    timeout=0.1
-                )
-                
-                if audio_data and self.is_active:
-                    # Write directly to the output stream in smaller chunks
-                    chunk_size = CHUNK_SIZE  # Use the same chunk size as the stream
-                    
-                    # Write the audio data in chunks to avoid blocking too long
-                    for i in range(0, len(audio_data), chunk_size):
-                        if not self.is_active:
-                            break
-                        
-                        end = min(i + chunk_size, len(audio_data))
-                        chunk = audio_data[i:end]
-                        
-                        # Create a new function that captures the chunk by value
-                        def write_chunk(data):
-                            return self.output_stream.write(data)
-                        
-                        # Pass the chunk to the function
-                        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
-                        
-                        # Brief yield to allow other tasks to run
-                        await asyncio.sleep(0.001)
-                    
-            except asyncio.TimeoutError:
-                # No data available within timeout, just continue
-                continue
-            except Exception as e:
-                if self.is_active:
-                    print(f"Error playing output audio: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                await asyncio.sleep(0.05)
+        """Play audio responses from Nova Sonic on a dedicated playback thread"""
+        await play_audio_output(self.stream_manager, self.output_stream, lambda: self.is_active)
     
     async def start_mixed_mode(self):
         """Start mixed mode with both audio streaming and text input."""
@@ -1259,7 +1074,7 @@ class TextInputHandler:
                 elif user_input.strip() == '' and self.waiting_for_response:
                     # Interrupt current response
                     print("\n[Interrupting assistant response...]")
-                    self.stream_manager.barge_in = True
+                    self.stream_manager.interrupt_audio_output()
                     self.waiting_for_response = False
                     continue
                 elif user_input.strip() == '':
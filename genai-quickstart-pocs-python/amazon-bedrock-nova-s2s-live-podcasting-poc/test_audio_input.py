@@ -0,0 +1,89 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""Tests for the paced audio input pipeline."""
+import asyncio
+import base64
+import json
+
+from audio_input import AudioInputPipeline
+
+
+class _Recorder:
+    """Collects every event sent by a pipeline."""
+
+    def __init__(self):
+        self.events = []
+
+    async def send(self, event_bytes):
+        self.events.append(json.loads(event_bytes))
+
+    def pcm(self):
+        return b"".join(base64.b64decode(e["event"]["audioInput"]["content"]) for e in self.events)
+
+
+def _pipeline(recorder, **kwargs):
+    return AudioInputPipeline(recorder.send, "prompt-1", "content-1", frame_ms=10, **kwargs)
+
+
+def test_events_are_valid_audio_input_json():
+    async def run():
+        recorder = _Recorder()
+        pipeline = _pipeline(recorder)
+        pipeline.start()
+        pipeline.push(b"\x01\x02" * 160)
+        await asyncio.sleep(0.05)
+        await pipeline.stop()
+        return recorder
+
+    recorder = asyncio.run(run())
+    event = recorder.events[0]["event"]["audioInput"]
+    assert event["promptName"] == "prompt-1"
+    assert event["contentName"] == "content-1"
+    assert recorder.pcm() == b"\x01\x02" * 160
+
+
+def test_buffered_chunks_are_coalesced_in_order():
+    async def run():
+        recorder = _Recorder()
+        pipeline = _pipeline(recorder, max_batch_ms=100)
+        for i in range(5):
+            pipeline.push(bytes([i]) * 320)
+        pipeline.start()
+        await asyncio.sleep(0.03)
+        await pipeline.stop()
+        return recorder, pipeline
+
+    recorder, pipeline = asyncio.run(run())
+    assert len(recorder.events) == 1
+    assert recorder.pcm() == b"".join(bytes([i]) * 320 for i in range(5))
+    assert pipeline.metrics.to_dict()["chunksReceived"] == 5
+
+
+def test_oldest_audio_is_dropped_when_buffer_is_full():
+    recorder = _Recorder()
+    # 100 ms at 16 kHz, 16-bit = 3200 bytes of buffer
+    pipeline = _pipeline(recorder, max_buffer_ms=100)
+    for i in range(20):
+        pipeline.push(bytes([i]) * 320)
+
+    metrics = pipeline.metrics.to_dict()
+    assert metrics["chunksDropped"] == 10
+    pcm, captured = pipeline._drain(10_000)
+    assert pcm == b"".join(bytes([i]) * 320 for i in range(10, 20))
+    assert len(captured) == 10
+
+
+def test_silence_is_paced_in_real_time():
+    async def run():
+        recorder = _Recorder()
+        pipeline = _pipeline(recorder, silence_when_idle=True)
+        pipeline.start()
+        await asyncio.sleep(0.2)
+        await pipeline.stop()
+        return recorder
+
+    recorder = asyncio.run(run())
+    # One 10 ms frame per tick, never a burst
+    assert 10 <= len(recorder.events) <= 22
+    assert set(recorder.pcm()) == {0}
+    assert len(recorder.pcm()) == len(recorder.events) * 320
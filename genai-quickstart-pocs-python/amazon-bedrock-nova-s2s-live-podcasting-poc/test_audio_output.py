@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""Tests for jitter-buffered audio playback, using a null audio device."""
+import time
+
+import pytest
+
+from audio_output import AudioPlayer, NullAudioDevice
+
+# 20 ms frames at 24 kHz, 16-bit mono
+FRAME_BYTES = 960
+
+
+@pytest.fixture
+def device():
+    return NullAudioDevice()
+
+
+@pytest.fixture
+def player(device):
+    player = AudioPlayer(device.write, frame_bytes=FRAME_BYTES, min_buffer_ms=60, max_buffer_ms=300)
+    player.start()
+    yield player
+    player.stop()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_plays_all_audio_in_order(player, device):
+    audio = b"".join(bytes([i]) * FRAME_BYTES for i in range(10))
+    player.enqueue(audio)
+    _wait_for(lambda: device.bytes_written == len(audio))
+    assert b"".join(data for _, data in device.writes) == audio
+    assert player.metrics.underruns == 0
+
+
+def test_short_response_below_target_still_plays(player, device):
+    player.enqueue(b"\x01" * FRAME_BYTES)
+    _wait_for(lambda: device.bytes_written == FRAME_BYTES)
+
+
+def test_time_to_first_audio_is_measured_from_request(player, device):
+    player.mark_request()
+    time.sleep(0.05)
+    player.enqueue(b"\x01" * FRAME_BYTES * 5)
+    _wait_for(lambda: device.bytes_written > 0)
+    metrics = player.metrics.to_dict()
+    assert metrics["utterances"] == 1
+    assert metrics["lastTimeToFirstAudioMs"] >= 50
+
+
+def test_underruns_grow_the_jitter_buffer(player, device):
+    initial_target = player.target_frames
+    # One 20 ms frame every 40 ms keeps running dry mid-utterance
+    for _ in range(8):
+        player.enqueue(b"\x01" * FRAME_BYTES)
+        time.sleep(0.04)
+    _wait_for(lambda: device.bytes_written == 8 * FRAME_BYTES)
+    assert player.metrics.underruns > 0
+    assert player.target_frames > initial_target
+    assert player.target_frames <= player.max_frames
+
+
+def test_flush_stops_playback_within_a_frame(player, device):
+    player.enqueue(b"\x01" * FRAME_BYTES * 50)
+    _wait_for(lambda: device.bytes_written > 0)
+    flushed_at = time.monotonic()
+    player.flush()
+    time.sleep(0.1)
+    # At most the frame already being written when flush() was called
+    late_writes = [t for t, _ in device.writes if t > flushed_at]
+    assert len(late_writes) <= 1
+    assert player.metrics.frames_discarded > 0
+
+    player.enqueue(b"\x02" * FRAME_BYTES * 3)
+    _wait_for(lambda: device.writes[-1][1][0] == 2)
+
+
+def test_write_error_drops_the_frame_and_keeps_playing(device):
+    def flaky_write(data):
+        if data[0] == 2:
+            raise OSError("Output underflowed")
+        device.write(data)
+
+    player = AudioPlayer(flaky_write, frame_bytes=FRAME_BYTES, min_buffer_ms=60, max_buffer_ms=300)
+    player.start()
+    try:
+        player.enqueue(b"".join(bytes([i]) * FRAME_BYTES for i in range(1, 5)))
+        _wait_for(lambda: device.bytes_written == 3 * FRAME_BYTES)
+    finally:
+        player.stop()
+    assert [data[0] for _, data in device.writes] == [1, 3, 4]
+    metrics = player.metrics.to_dict()
+    assert metrics["writeErrors"] == 1
+    assert "Output underflowed" in metrics["lastWriteError"]
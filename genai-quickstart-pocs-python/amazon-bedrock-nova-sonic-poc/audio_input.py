@@ -0,0 +1,206 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""Real-time paced audio input pipeline for Nova Sonic bidirectional streams.
+
+Microphone (or silence) audio is written into a bounded ring buffer from any
+thread. A single sender task wakes on a monotonic clock at the PCM frame rate,
+coalesces whatever is buffered into one audioInput event, base64-encodes it
+once and sends it. Upstream bandwidth and CPU therefore stay constant no
+matter how bursty the producer is:
+
+- If the producer falls behind, the tick is skipped (or filled with silence).
+- If the sender falls behind, the oldest audio is dropped once the buffer is
+  full, so latency stays bounded instead of growing without limit.
+"""
+
+import asyncio
+import base64
+import threading
+import time
+from collections import deque
+
+# Recent per-chunk latencies kept for the percentile metrics
+LATENCY_WINDOW = 500
+
+
+class AudioInputMetrics:
+    """Counters and latency samples for an AudioInputPipeline."""
+
+    def __init__(self):
+        self.chunks_received = 0
+        self.bytes_received = 0
+        self.chunks_dropped = 0
+        self.bytes_dropped = 0
+        self.events_sent = 0
+        self.bytes_sent = 0
+        self.silence_events_sent = 0
+        self.late_ticks = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            'chunksReceived': self.chunks_received,
+            'bytesReceived': self.bytes_received,
+            'chunksDropped': self.chunks_dropped,
+            'bytesDropped': self.bytes_dropped,
+            'eventsSent': self.events_sent,
+            'bytesSent': self.bytes_sent,
+            'silenceEventsSent': self.silence_events_sent,
+            'lateTicks': self.late_ticks,
+            'latencyP50Ms': percentile(0.50),
+            'latencyP95Ms': percentile(0.95),
+            'latencyMaxMs': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+
+
+class AudioInputPipeline:
+    """Paces, batches and sends 16-bit PCM audio as Nova Sonic audioInput events.
+
+    :param send_event: coroutine function that sends one encoded event (bytes)
+    :param prompt_name: promptName of the audio content
+    :param content_name: contentName of the audio content
+    :param sample_rate: input PCM sample rate in Hz
+    :param frame_ms: sender tick; use the capture buffer duration so one chunk is sent per tick
+    :param max_buffer_ms: ring buffer capacity; older audio is dropped beyond this
+    :param max_batch_ms: largest amount of audio coalesced into one event
+    :param silence_when_idle: send a precomputed silence frame on ticks with no audio
+    :param on_metrics: optional callback(metrics_dict) invoked every metrics_interval seconds
+    """
+
+    def __init__(self, send_event, prompt_name, content_name, sample_rate=16000, sample_width=2,
+                 frame_ms=32, max_buffer_ms=2000, max_batch_ms=256, silence_when_idle=False,
+                 on_metrics=None, metrics_interval=10.0):
+        self.send_event = send_event
+        self.interval = frame_ms / 1000
+        self.bytes_per_second = sample_rate * sample_width
+        self.sample_width = sample_width
+        self.max_buffer_bytes = self._align(self.bytes_per_second * max_buffer_ms // 1000)
+        self.max_batch_bytes = self._align(self.bytes_per_second * max_batch_ms // 1000)
+        self.silence_when_idle = silence_when_idle
+        self.on_metrics = on_metrics
+        self.metrics_interval = metrics_interval
+        self.metrics = AudioInputMetrics()
+
+        # Everything around the base64 payload is fixed for the content, so it is encoded once
+        self._event_prefix = (
+            '{"event":{"audioInput":{"promptName":"%s","contentName":"%s","content":"' % (prompt_name, content_name)
+        ).encode('utf-8')
+        self._event_suffix = b'"}}}'
+        frame_bytes = self._align(int(self.bytes_per_second * self.interval))
+        self._silence_event = self._encode(bytes(frame_bytes))
+
+        # Ring buffer of (capture time, pcm bytes); written from the audio thread, read by the sender
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._lock = threading.Lock()
+        self._task = None
+        self._running = False
+
+    def _align(self, num_bytes):
+        return max(self.sample_width, num_bytes - num_bytes % self.sample_width)
+
+    def _encode(self, pcm):
+        return self._event_prefix + base64.b64encode(pcm) + self._event_suffix
+
+    def push(self, audio_bytes):
+        """Buffer a chunk of PCM audio. Safe to call from any thread, including audio callbacks."""
+        if not audio_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.metrics.chunks_received += 1
+            self.metrics.bytes_received += len(audio_bytes)
+            self._buffer.append((now, audio_bytes))
+            self._buffered_bytes += len(audio_bytes)
+            # Drop the oldest audio rather than let latency grow
+            while self._buffered_bytes > self.max_buffer_bytes and len(self._buffer) > 1:
+                _, dropped = self._buffer.popleft()
+                self._buffered_bytes -= len(dropped)
+                self.metrics.chunks_dropped += 1
+                self.metrics.bytes_dropped += len(dropped)
+
+    def _drain(self, max_bytes):
+        """Coalesce up to max_bytes of buffered audio. Returns (pcm, capture times)."""
+        parts = []
+        captured = []
+        size = 0
+        with self._lock:
+            while self._buffer and (not parts or size + len(self._buffer[0][1]) <= max_bytes):
+                captured_at, chunk = self._buffer.popleft()
+                self._buffered_bytes -= len(chunk)
+                parts.append(chunk)
+                captured.append(captured_at)
+                size += len(chunk)
+        return b''.join(parts), captured
+
+    async def _send(self, pcm, captured):
+        event = self._encode(pcm)
+        await self.send_event(event)
+        sent_at = time.monotonic()
+        self.metrics.events_sent += 1
+        self.metrics.bytes_sent += len(event)
+        self.metrics.latencies.extend(sent_at - captured_at for captured_at in captured)
+
+    async def _run(self):
+        next_tick = time.monotonic()
+        next_report = next_tick + self.metrics_interval
+        while self._running:
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif -delay > self.interval:
+                # Fell more than a tick behind: resynchronize instead of sending a burst
+                self.metrics.late_ticks += 1
+                next_tick = time.monotonic()
+
+            pcm, captured = self._drain(self.max_batch_bytes)
+            try:
+                if pcm:
+                    await self._send(pcm, captured)
+                elif self.silence_when_idle:
+                    await self.send_event(self._silence_event)
+                    self.metrics.silence_events_sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sending audio input: {e}")
+
+            if self.on_metrics and next_tick >= next_report:
+                next_report = next_tick + self.metrics_interval
+                self.on_metrics(self.metrics.to_dict())
+
+    def start(self):
+        """Start the sender task on the running event loop."""
+        if self._task:
+            return
+        self._running = True
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self, flush=True):
+        """Stop the sender task, optionally sending any audio still buffered."""
+        if not self._task:
+            return
+        self._running = False
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if flush:
+            while True:
+                pcm, captured = self._drain(self.max_batch_bytes)
+                if not pcm:
+                    break
+                await self._send(pcm, captured)
+        if self.on_metrics:
+            self.on_metrics(self.metrics.to_dict())
@@ -0,0 +1,74 @@
+"""
+Availability - Date-range booking calendars used to answer availability queries.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+
+def to_date(value) -> date:
+    """Return the calendar date of a datetime or date value."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def stay_dates(check_in=None, check_out=None) -> Tuple[date, date]:
+    """
+    Normalize a stay to [check_in, check_out) calendar dates.
+
+    Missing or invalid dates default to a one night stay starting today.
+    """
+    if not isinstance(check_in, (datetime, date)):
+        check_in = date.today()
+    check_in = to_date(check_in)
+    if not isinstance(check_out, (datetime, date)) or to_date(check_out) <= check_in:
+        check_out = check_in + timedelta(days=1)
+    return check_in, to_date(check_out)
+
+
+class RoomCalendar:
+    """
+    Bookings of a single room, kept sorted by check-in date.
+
+    Bookings never overlap, so both the check-in and check-out lists are
+    sorted and an overlap check is a binary search: O(log n) per room.
+    """
+
+    def __init__(self):
+        self._starts: List[date] = []
+        self._ends: List[date] = []
+        self._reservation_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def is_free(self, start: date, end: date, ignore_reservation_id: Optional[str] = None) -> bool:
+        """Check that no booking overlaps the nights [start, end)."""
+        # First booking that checks out after the requested check-in
+        i = bisect_right(self._ends, start)
+        while i < len(self._starts) and self._starts[i] < end:
+            if self._reservation_ids[i] != ignore_reservation_id:
+                return False
+            i += 1
+        return True
+
+    def book(self, start: date, end: date, reservation_id: str) -> None:
+        """Add a booking for the nights [start, end)."""
+        if not self.is_free(start, end):
+            raise ValueError("Room is already booked for the specified dates")
+        i = bisect_left(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._reservation_ids.insert(i, reservation_id)
+
+    def release(self, start: date, reservation_id: str) -> None:
+        """Remove a booking previously added with book()."""
+        i = bisect_left(self._starts, start)
+        while i < len(self._starts) and self._starts[i] == start:
+            if self._reservation_ids[i] == reservation_id:
+                del self._starts[i]
+                del self._ends[i]
+                del self._reservation_ids[i]
+                return
+            i += 1
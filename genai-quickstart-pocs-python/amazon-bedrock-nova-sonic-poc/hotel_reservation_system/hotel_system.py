@@ -8,6 +8,8 @@ from typing import Dict, List, Optional
 from enum import Enum
 import jsonpickle
 
+from .availability import RoomCalendar, stay_dates, to_date
+
 class RoomType(str, Enum):
     STANDARD: str = "Standard"
     DELUXE: str = "Deluxe"
@@ -28,7 +30,6 @@ class Room:
     room_id: str
     room_type: RoomType
     rate: float
-    occupied: bool = False
     def toJSON(self):
         #return a JSON serialized verion of this object, and have the datetime fields printed out in iso format
         return jsonpickle.encode(self, unpicklable=False)
@@ -68,29 +69,74 @@ class Hotel:
         self.city = city
         self.rooms: List[Room] = []
         self.reservations: Dict[str, Reservation] = {}
-        
+        # Rooms grouped by type and a booking calendar per room
+        self.rooms_by_type: Dict[RoomType, List[Room]] = {}
+        self.calendars: Dict[str, RoomCalendar] = {}
 
     def add_room(self, room: Room) -> None:
         self.rooms.append(room)
+        self.rooms_by_type.setdefault(RoomType(room.room_type), []).append(room)
+        self.calendars[room.room_id] = RoomCalendar()
+
+    def is_room_available(self, room: Room, check_in=None, check_out=None,
+                          ignore_reservation_id: Optional[str] = None) -> bool:
+        start, end = stay_dates(check_in, check_out)
+        return self.calendars[room.room_id].is_free(start, end, ignore_reservation_id)
+
+    def iter_available_rooms(self, room_type: Optional[RoomType] = None,
+                             check_in: datetime = None,
+                             check_out: datetime = None):
+        """
+        Yields every room free for the nights between check_in and check_out, grouped by room type.
+        Without dates, rooms free tonight are returned.
+        """
+        start, end = stay_dates(check_in, check_out)
+        # room_type may be a RoomType or its string value; unknown types match nothing
+        room_types = [RoomType.fromString(room_type)] if room_type else list(self.rooms_by_type)
+        for current_type in room_types:
+            for room in self.rooms_by_type.get(current_type, []):
+                if self.calendars[room.room_id].is_free(start, end):
+                    yield room
 
     def get_available_rooms(self, room_type: Optional[RoomType] = None, 
                           check_in: datetime = None, 
                           check_out: datetime = None) -> List[Room]:
-        #print("In hotel_system.get_available_rooms")
-        # Implementation to check room availability
-        # Find one room per type
+        # Find one available room per type, stopping at the first free room of each type
+        room_types = [room_type] if room_type else list(self.rooms_by_type)
         available_rooms = []
-        type_found = []
-        for room in self.rooms:
-            if not room.occupied \
-            and (room_type is None or room.room_type == room_type) \
-            and room.room_type.value not in type_found:
+        for current_type in room_types:
+            room = next(self.iter_available_rooms(current_type, check_in, check_out), None)
+            if room is not None:
                 available_rooms.append(room)
-                type_found.append(room.room_type.value)
-                #print("Found room of type {}".format(room.room_type))
-
-        #print("Done processing in hotel_system.get_available_rooms")
         return available_rooms
+
+    def count_available_rooms(self, room_type: Optional[RoomType] = None,
+                              check_in: datetime = None,
+                              check_out: datetime = None) -> Dict[str, int]:
+        """
+        Returns the number of rooms of each type free for the whole stay.
+        """
+        counts = {current_type.value: 0 for current_type in self.rooms_by_type
+                  if room_type is None or current_type == room_type}
+        for room in self.iter_available_rooms(room_type, check_in, check_out):
+            counts[room.room_type.value] += 1
+        return counts
+
+    def book_room(self, reservation: Reservation) -> None:
+        """
+        Blocks the reservation's room for its stay and records the reservation.
+        """
+        self.calendars[reservation.room.room_id].book(
+            to_date(reservation.check_in), to_date(reservation.check_out), reservation.reservation_id)
+        self.reservations[reservation.reservation_id] = reservation
+
+    def release_room(self, reservation: Reservation) -> None:
+        """
+        Frees the reservation's room for its stay. The reservation itself is kept.
+        """
+        self.calendars[reservation.room.room_id].release(
+            to_date(reservation.check_in), reservation.reservation_id)
+
     def get_name(self):
         return self.name
 
@@ -98,8 +144,65 @@ class HotelSystem:
     def __init__(self):
         self.hotels: Dict[str, Hotel] = {}
         self.guests: Dict[str, Guest] = {}
+        # Secondary indexes over the reservations of every hotel
+        self.reservations: Dict[str, Reservation] = {}
+        self.reservation_hotels: Dict[str, Hotel] = {}
+        self.guest_reservations: Dict[str, List[str]] = {}
         self._initialize_sample_data()
 
+    def add_reservation(self, hotel: Hotel, reservation: Reservation) -> None:
+        """
+        Books the reservation's room in the hotel and indexes the reservation by id and guest id.
+        """
+        hotel.book_room(reservation)
+        self.reservations[reservation.reservation_id] = reservation
+        self.reservation_hotels[reservation.reservation_id] = hotel
+        self.guest_reservations.setdefault(reservation.guest.guest_id, []).append(reservation.reservation_id)
+
+    def find_reservation(self, reservation_id: str):
+        """
+        Returns the (hotel, reservation) pair for a reservation id, or (None, None) if not found.
+        """
+        reservation = self.reservations.get(reservation_id)
+        if reservation is None:
+            return None, None
+        return self.reservation_hotels[reservation_id], reservation
+
+    def get_available_rooms(self, room_type: Optional[RoomType] = None,
+                            check_in: datetime = None, check_out: datetime = None) -> List[Room]:
+        """
+        Returns one available room per type in every city for the given dates.
+        """
+        available_rooms = []
+        for hotel in self.hotels.values():
+            available_rooms.extend(hotel.get_available_rooms(room_type, check_in, check_out))
+        return available_rooms
+
+    def get_availability(self, check_in: datetime = None, check_out: datetime = None,
+                         cities: Optional[List[str]] = None,
+                         room_type: Optional[RoomType] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the number of available rooms by city and room type for a date range.
+        
+        Args:
+            check_in (datetime): First night of the stay
+            check_out (datetime): Check out date (the last night is the day before)
+            cities (Optional[List[str]]): Cities to include, all cities if not set
+            room_type (Optional[RoomType]): Optional room type to filter results
+            
+        Returns:
+            Dict[str, Dict[str, int]]: Available room counts keyed by city, then room type
+            
+        Raises:
+            KeyError: If one of the specified cities is not found in the system
+        """
+        cities = cities if cities is not None else list(self.hotels)
+        for city in cities:
+            if city not in self.hotels:
+                raise KeyError(f"No hotels found in city: {city}")
+        return {city: self.hotels[city].count_available_rooms(room_type, check_in, check_out)
+                for city in cities}
+
     def get_all_hotels(self) -> List[Dict[str, str]]:
         """
         Returns a list of all hotels in the system with their details.
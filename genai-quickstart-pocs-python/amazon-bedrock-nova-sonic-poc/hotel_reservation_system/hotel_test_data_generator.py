@@ -5,7 +5,7 @@ or other complex reservation tasks.
 """
 from datetime import datetime, timedelta
 import random  # nosec B311 - random used for test/sample data generation
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from faker import Faker
 
@@ -84,6 +84,10 @@ class HotelTestDataGenerator:
         """Get available rooms based on type and city"""
         return self.hotel_system.get_available_rooms_by_city_and_date(city, room_type, check_in, check_out)
 
+    def get_availability(self, check_in: datetime, check_out: datetime, cities: Optional[List[str]] = None, room_type: Optional[RoomType] = None) -> Dict[str, Dict[str, int]]:
+        """Get the number of available rooms by city and room type for a date range"""
+        return self.hotel_system.get_availability(check_in, check_out, cities, room_type)
+
 
     def get_all_hotels(self) -> List[dict]:
         """
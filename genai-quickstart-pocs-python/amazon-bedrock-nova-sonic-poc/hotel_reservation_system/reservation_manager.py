@@ -38,49 +38,56 @@ class ReservationManager:
             total_cost=total_cost
         )
 
-        room.occupied = True
-        hotel.reservations[reservation.reservation_id] = reservation
+        self.hotel_system.add_reservation(hotel, reservation)
         return reservation
 
     def modify_reservation(self,
                          reservation_id: str,
                          new_check_in: Optional[datetime] = None,
                          new_check_out: Optional[datetime] = None) -> Optional[Reservation]:
-        for hotel in self.hotel_system.hotels.values():
-            if reservation_id in hotel.reservations:
-                reservation = hotel.reservations[reservation_id]
-                if reservation.status == "CANCELLED":
-                    raise ValueError("Cannot modify a cancelled reservation")
+        hotel, reservation = self.hotel_system.find_reservation(reservation_id)
+        if not reservation:
+            raise ValueError("Reservation not found")
+        if reservation.status == "CANCELLED":
+            raise ValueError("Cannot modify a cancelled reservation")
 
-                if new_check_in:
-                    reservation.check_in = new_check_in
-                if new_check_out:
-                    reservation.check_out = new_check_out
+        check_in = new_check_in or reservation.check_in
+        check_out = new_check_out or reservation.check_out
+        if check_out <= check_in:
+            raise ValueError("Check out must be after check in")
 
-                # Recalculate total cost
-                nights = (reservation.check_out - reservation.check_in).days
-                reservation.total_cost = reservation.room.rate * nights
-                return reservation
+        # Keep the same room if it is free for the new dates, otherwise move
+        # the guest to another room of the same type
+        room = reservation.room
+        if not hotel.is_room_available(room, check_in, check_out, ignore_reservation_id=reservation_id):
+            available_rooms = hotel.get_available_rooms(room.room_type, check_in, check_out)
+            if not available_rooms:
+                raise ValueError(f"No {room.room_type.value} rooms available for the specified dates")
+            room = available_rooms[0]
 
-        raise ValueError("Reservation not found")
+        hotel.release_room(reservation)
+        reservation.room = room
+        reservation.check_in = check_in
+        reservation.check_out = check_out
+        hotel.book_room(reservation)
+
+        # Recalculate total cost
+        nights = (reservation.check_out - reservation.check_in).days
+        reservation.total_cost = reservation.room.rate * nights
+        return reservation
 
     def cancel_reservation(self, reservation_id: str) -> bool:
-        for hotel in self.hotel_system.hotels.values():
-            if reservation_id in hotel.reservations:
-                reservation = hotel.reservations[reservation_id]
-                if reservation.status == "CHECKED_IN":
-                    raise ValueError("Cannot cancel a reservation after check-in")
-                
-                reservation.status = "CANCELLED"
-                reservation.room.occupied = False
-                return True
-                
-        raise ValueError("Reservation not found")
+        hotel, reservation = self.hotel_system.find_reservation(reservation_id)
+        if not reservation:
+            raise ValueError("Reservation not found")
+        if reservation.status == "CHECKED_IN":
+            raise ValueError("Cannot cancel a reservation after check-in")
+
+        if reservation.status != "CANCELLED":
+            hotel.release_room(reservation)
+        reservation.status = "CANCELLED"
+        return True
 
     def get_guest_reservations(self, guest_id: str) -> List[Reservation]:
-        guest_reservations = []
-        for hotel in self.hotel_system.hotels.values():
-            for reservation in hotel.reservations.values():
-                if reservation.guest.guest_id == guest_id:
-                    guest_reservations.append(reservation)
-        return guest_reservations
\ No newline at end of file
+        return [self.hotel_system.reservations[reservation_id]
+                for reservation_id in self.hotel_system.guest_reservations.get(guest_id, [])]
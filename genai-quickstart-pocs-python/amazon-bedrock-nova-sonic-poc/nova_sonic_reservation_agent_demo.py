@@ -32,6 +32,8 @@ from aws_sdk_bedrock_runtime.client import BedrockRuntimeClient, InvokeModelWith
 from aws_sdk_bedrock_runtime.models import InvokeModelWithBidirectionalStreamInputChunk, BidirectionalInputPayloadPart
 from aws_sdk_bedrock_runtime.config import Config, HTTPAuthSchemeResolver, SigV4AuthScheme
 from smithy_aws_core.credentials_resolvers.environment import EnvironmentCredentialsResolver
+from audio_input import AudioInputPipeline
+from audio_output import AudioPlayer
 
 
 # Suppress warnings
@@ -474,17 +476,17 @@ class BedrockStreamManager:
         self.region = region
         
         # Replace RxPy subjects with asyncio queues
-        self.audio_input_queue = asyncio.Queue()
+        # Audio input is paced by AudioInputPipeline, created when the audio content starts
+        self.audio_input = None
         self.audio_output_queue = asyncio.Queue()
         self.output_queue = asyncio.Queue()
         
         self.response_task = None
         self.stream_response = None
         self.is_active = False
-        self.barge_in = False
         self.bedrock_client = None
         
-        # Audio playback components
+        # Audio playback components; audio is queued until a player is attached
         self.audio_player = None
         
         # Text response components
@@ -550,9 +552,6 @@ class BedrockStreamManager:
             # Start listening for responses
             self.response_task = asyncio.create_task(self._process_responses())
             
-            # Start processing audio input
-            asyncio.create_task(self._process_audio_input())
-            
             # Wait a bit to ensure everything is set up
             await asyncio.sleep(0.1)
             
@@ -564,13 +563,14 @@ class BedrockStreamManager:
             raise
     
     async def send_raw_event(self, event_json):
-        """Send a raw event JSON to the Bedrock stream."""
+        """Send a raw event JSON (str, or already encoded bytes) to the Bedrock stream."""
         if not self.stream_response or not self.is_active:
             debug_print("Stream not initialized or closed")
             return
        
+        event_bytes = event_json.encode('utf-8') if isinstance(event_json, str) else event_json
         event = InvokeModelWithBidirectionalStreamInputChunk(
-            value=BidirectionalInputPayloadPart(bytes_=event_json.encode('utf-8'))
+            value=BidirectionalInputPayloadPart(bytes_=event_bytes)
         )
         
         try:
@@ -593,48 +593,48 @@ class BedrockStreamManager:
                 traceback.print_exc()
     
     async def send_audio_content_start_event(self):
-        """Send a content start event to the Bedrock stream."""
+        """Send a content start event to the Bedrock stream and start the paced audio input."""
         content_start_event = self.CONTENT_START_EVENT % (self.prompt_name, self.audio_content_name)
         await self.send_raw_event(content_start_event)
+
+        if self.audio_input is None:
+            self.audio_input = AudioInputPipeline(
+                self.send_raw_event,
+                self.prompt_name,
+                self.audio_content_name,
+                sample_rate=INPUT_SAMPLE_RATE,
+                frame_ms=CHUNK_SIZE * 1000 / INPUT_SAMPLE_RATE,
+                on_metrics=lambda metrics: debug_print(f"Audio input metrics: {metrics}")
+            )
+            self.audio_input.start()
     
-    async def _process_audio_input(self):
-        """Process audio input from the queue and send to Bedrock."""
-        while self.is_active:
-            try:
-                # Get audio data from the queue
-                data = await self.audio_input_queue.get()
-                
-                audio_bytes = data.get('audio_bytes')
-                if not audio_bytes:
-                    debug_print("No audio bytes received")
-                    continue
-                
-                # Base64 encode the audio data
-                blob = base64.b64encode(audio_bytes)
-                audio_event = self.AUDIO_EVENT_TEMPLATE % (
-                    self.prompt_name, 
-                    self.audio_content_name, 
-                    blob.decode('utf-8')
-                )
-                
-                # Send the event
-                await self.send_raw_event(audio_event)
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                debug_print(f"Error processing audio: {e}")
-                if DEBUG:
-                    import traceback
-                    traceback.print_exc()
-    
+    async def stop_audio_input(self):
+        """Send any buffered audio and stop the paced audio input."""
+        if self.audio_input:
+            await self.audio_input.stop()
+            self.audio_input = None
+
     def add_audio_chunk(self, audio_bytes):
-        """Add an audio chunk to the queue."""
-        self.audio_input_queue.put_nowait({
-            'audio_bytes': audio_bytes,
-            'prompt_name': self.prompt_name,
-            'content_name': self.audio_content_name
-        })
+        """Add an audio chunk to the paced input buffer. Safe to call from the audio callback thread."""
+        if self.audio_input:
+            self.audio_input.push(audio_bytes)
+
+    def attach_audio_player(self, player):
+        """Send audio output straight to a player, starting with anything already queued."""
+        while not self.audio_output_queue.empty():
+            player.enqueue(self.audio_output_queue.get_nowait())
+        self.audio_player = player
+
+    def detach_audio_player(self):
+        """Queue audio output again instead of playing it."""
+        self.audio_player = None
+
+    def interrupt_audio_output(self):
+        """Barge-in: drop all audio that has not been played yet."""
+        while not self.audio_output_queue.empty():
+            self.audio_output_queue.get_nowait()
+        if self.audio_player:
+            self.audio_player.flush()
     
     async def send_audio_content_end_event(self):
         """Send a content end event to the Bedrock stream."""
@@ -642,6 +642,7 @@ class BedrockStreamManager:
             debug_print("Stream is not active")
             return
         
+        await self.stop_audio_input()
         content_end_event = self.CONTENT_END_EVENT % (self.prompt_name, self.audio_content_name)
         await self.send_raw_event(content_end_event)
         debug_print("Audio ended")
@@ -722,7 +723,10 @@ class BedrockStreamManager:
                                     if '{ "interrupted" : true }' in text_content:
                                         if DEBUG:
                                             print("Barge-in detected. Stopping audio output.")
-                                        self.barge_in = True
+                                        self.interrupt_audio_output()
+                                    elif role == "USER" and self.audio_player:
+                                        # The guest's turn was recognized; time-to-first-audio starts here
+                                        self.audio_player.mark_request()
 
                                     if (role == "ASSISTANT" and self.display_assistant_text):
                                         print(f"Assistant: {text_content}")
@@ -732,7 +736,10 @@ class BedrockStreamManager:
                                 elif 'audioOutput' in json_data['event']:
                                     audio_content = json_data['event']['audioOutput']['content']
                                     audio_bytes = base64.b64decode(audio_content)
-                                    await self.audio_output_queue.put(audio_bytes)
+                                    if self.audio_player:
+                                        self.audio_player.enqueue(audio_bytes)
+                                    else:
+                                        await self.audio_output_queue.put(audio_bytes)
                                 elif 'toolUse' in json_data['event']:
                                     self.toolUseContent = json_data['event']['toolUse']
                                     self.toolName = json_data['event']['toolUse']['toolName']
@@ -933,6 +940,7 @@ class BedrockStreamManager:
         if not self.is_active:
             return
        
+        await self.stop_audio_input()
         self.is_active = False
         if self.response_task and not self.response_task.done():
             self.response_task.cancel()
@@ -983,78 +991,25 @@ class AudioStreamer:
         debug_print("output audio stream opened")
 
     def input_callback(self, in_data, frame_count, time_info, status):
-        """Callback function that schedules audio processing in the asyncio event loop"""
+        """Callback function that buffers microphone audio for the paced sender"""
         if self.is_streaming and in_data:
-            # Schedule the task in the event loop
-            asyncio.run_coroutine_threadsafe(
-                self.process_input_audio(in_data), 
-                self.loop
-            )
+            # Buffer directly; the paced sender picks it up on the event loop
+            self.stream_manager.add_audio_chunk(in_data)
         return (None, pyaudio.paContinue)
 
-    async def process_input_audio(self, audio_data):
-        """Process a single audio chunk directly"""
-        try:
-            # Send audio to Bedrock immediately
-            self.stream_manager.add_audio_chunk(audio_data)
-        except Exception as e:
-            if self.is_streaming:
-                print(f"Error processing input audio: {e}")
-    
     async def play_output_audio(self):
-        """Play audio responses from Nova Sonic"""
-        while self.is_streaming:
-            try:
-                # Check for barge-in flag
-                if self.stream_manager.barge_in:
-                    # Clear the audio queue
-                    while not self.stream_manager.audio_output_queue.empty():
-                        try:
-                            self.stream_manager.audio_output_queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                    self.stream_manager.barge_in = False
-                    # Small sleep after clearing
-                    await asyncio.sleep(0.05)
-                    continue
-                
-                # Get audio data from the stream manager's queue
-                audio_data = await asyncio.wait_for(
-                    self.stream_manager.audio_output_queue.get(),
-                    timeout=0.1
-                )
-                
-                if audio_data and self.is_streaming:
-                    # Write directly to the output stream in smaller chunks
-                    chunk_size = CHUNK_SIZE  # Use the same chunk size as the stream
-                    
-                    # Write the audio data in chunks to avoid blocking too long
-                    for i in range(0, len(audio_data), chunk_size):
-                        if not self.is_streaming:
-                            break
-                        
-                        end = min(i + chunk_size, len(audio_data))
-                        chunk = audio_data[i:end]
-                        
-                        # Create a new function that captures the chunk by value
-                        def write_chunk(data):
-                            return self.output_stream.write(data)
-                        
-                        # Pass the chunk to the function
-                        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
-                        
-                        # Brief yield to allow other tasks to run
-                        await asyncio.sleep(0.001)
-                    
-            except asyncio.TimeoutError:
-                # No data available within timeout, just continue
-                continue
-            except Exception as e:
-                if self.is_streaming:
-                    print(f"Error playing output audio: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                await asyncio.sleep(0.05)
+        """Play audio responses from Nova Sonic on a dedicated, jitter-buffered playback thread"""
+        player = AudioPlayer(self.output_stream.write, sample_rate=OUTPUT_SAMPLE_RATE, frame_bytes=CHUNK_SIZE * 2)
+        player.start()
+        self.stream_manager.attach_audio_player(player)
+        try:
+            while self.is_streaming:
+                await asyncio.sleep(10)
+                debug_print(f"Audio output metrics: {player.metrics.to_dict()}")
+        finally:
+            self.stream_manager.detach_audio_player()
+            # Wait for the frame being written so the output stream can be closed safely
+            await asyncio.get_event_loop().run_in_executor(None, player.stop)
     
     async def start_streaming(self):
         """Start streaming audio."""
@@ -1074,7 +1029,6 @@ class AudioStreamer:
             self.input_stream.start_stream()
         
         # Start processing tasks
-        #self.input_task = asyncio.create_task(self.process_input_audio())
         self.output_task = asyncio.create_task(self.play_output_audio())
         
         # Wait for user to press Enter to stop
@@ -122,5 +122,45 @@ def test_hotel_system():
     except KeyError as e:
         print(f"\nExpected error when searching non-existent city: {str(e)}")
 
+def test_date_range_availability():
+    test_generator = HotelTestDataGenerator()
+    guest = test_generator.create_guest(
+        name="Jane Doe",
+        email="jane.doe@example.com",
+        phone="123-555-0000",
+        address="1 Ocean Dr"
+    )
+    city = "Miami"
+    check_in = datetime.now() + timedelta(days=10)
+    check_out = check_in + timedelta(days=3)
+
+    # Book every Presidential suite in the city for the stay
+    before = test_generator.get_availability(check_in, check_out, cities=[city])
+    num_rooms = before[city][RoomType.PRESIDENTIAL.value]
+    reservations = [
+        test_generator.create_reservation(guest, city, RoomType.PRESIDENTIAL, check_in, check_out)
+        for _ in range(num_rooms)
+    ]
+    assert test_generator.get_availability(check_in, check_out, cities=[city])[city][RoomType.PRESIDENTIAL.value] == 0
+    assert not test_generator.get_available_rooms_by_city_and_date(city, RoomType.PRESIDENTIAL, check_in, check_out)
+    try:
+        test_generator.create_reservation(guest, city, RoomType.PRESIDENTIAL, check_in, check_out)
+        assert False, "Expected the city to be fully booked"
+    except ValueError as e:
+        print(f"\nExpected error when fully booked: {str(e)}")
+
+    # Back-to-back stays do not overlap
+    assert test_generator.get_available_rooms_by_city_and_date(city, RoomType.PRESIDENTIAL, check_out, check_out + timedelta(days=2))
+    assert test_generator.get_available_rooms_by_city_and_date(city, RoomType.PRESIDENTIAL, check_in - timedelta(days=2), check_in)
+
+    # Extending a stay keeps the room when it is free, cancelling frees it
+    extended = test_generator.modify_reservation(reservations[0].reservation_id, new_check_out=check_out + timedelta(days=1))
+    assert extended.room.room_id == reservations[0].room.room_id
+    test_generator.cancel_reservation(reservations[1].reservation_id)
+    assert test_generator.get_availability(check_in, check_out, cities=[city])[city][RoomType.PRESIDENTIAL.value] == 1
+    assert len(test_generator.get_guest_reservations(guest.guest_id)) == num_rooms
+    print(f"\nDate range availability in {city}: {test_generator.get_availability(check_in, check_out, cities=[city])}")
+
 if __name__ == "__main__":
     test_hotel_system()
+    test_date_range_availability()
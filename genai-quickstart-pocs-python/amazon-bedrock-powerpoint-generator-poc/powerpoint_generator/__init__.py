@@ -25,7 +25,9 @@ from .research import (
 
 from .documents import load_documents
 
-from .powerpoint import generate_powerpoint_file
+from .pipeline import DagExecutor, generate_presentation_content
+
+from .powerpoint import PowerPointBuilder, generate_powerpoint_file
 import time
 
 
@@ -82,46 +84,24 @@ def generate_powerpoint(
         background_documents=background_documents,
     )
 
-    if callback and research_wikipedia:
-        callback("Researching about each section")
-    sections_with_research = research_details_for_sections(
-        sections_to_research,
-        write_callback=write_callback,
-        research_wikipedia=research_wikipedia,
-    )
-
-    if callback:
-        callback("Generating base details for each slide in each section")
-    sections_with_base_slides = generate_base_slides_for_sections(
+    if write_callback:
+        write_callback(
+            "Researching and generating the slides of every section, in parallel"
+        )
+    builder = PowerPointBuilder(topic, [section.title for section in sections_to_research])
+    generate_presentation_content(
         topic,
         additional_info,
-        sections_with_research,
+        sections_to_research,
+        builder,
+        callback=callback,
         write_callback=write_callback,
         background_documents=background_documents,
-    )
-
-    if callback and research_wikipedia:
-        callback("Researching details for every slide in each section")
-    sections_with_base_slides_and_research = research_slides_in_sections(
-        sections_with_base_slides,
-        write_callback=write_callback,
         research_wikipedia=research_wikipedia,
     )
-
-    if callback:
-        callback("Generating detailed content for slides in each section")
-    complete_sections_with_slides = generate_detailed_content_for_slides_in_sections(
-        topic,
-        additional_info,
-        sections_with_base_slides_and_research,
-        write_callback=write_callback,
-        background_documents=background_documents,
-    )
     if callback:
         callback("Generating PowerPoint file")
-    file_path = generate_powerpoint_file(
-        topic, complete_sections_with_slides, write_callback=write_callback
-    )
+    file_path = builder.save()
     logger.info(f"PowerPoint presentation generated!")
     end_time = time.time()
     logger.info(f"Total time taken: {end_time - start_time} seconds")
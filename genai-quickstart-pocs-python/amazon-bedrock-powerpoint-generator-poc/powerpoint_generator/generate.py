@@ -8,6 +8,7 @@ from .models import (
     SectionWithResearch,
     SectionWithBaseContentSlides,
     SectionWithBaseContentSlidesWithResearch,
+    SlideWithBaseContentAndResearch,
     LLMResponseCompleteSlideContent,
     CompleteSectionWithSlides,
     CompleteSlideContent,
@@ -155,7 +156,24 @@ def generate_base_slides_for_sections(
     if write_callback:
         write_callback("Generating base slide content for sections")
     logger.info("Generating slides base content for sections")
+    chain, input_arguments = base_slides_chain(topic, additional_info, background_documents)
+    section_titles = [s.title for s in sections]
     slides_with_base_content = []
+    logger.info("Starting base slide generation for sections.")
+    for section in sections:
+        if write_callback:
+            write_callback(f"Generating base slides for {section.title}")
+        slides_with_base_content.append(
+            generate_base_slides_for_section(chain, input_arguments, section, section_titles)
+        )
+
+    return slides_with_base_content
+
+
+def base_slides_chain(topic: str, additional_info: str, background_documents: list = None):
+    """
+    Build the chain that generates the base slides of a section, with the input arguments shared by all sections.
+    """
     parser = PydanticOutputParser(pydantic_object=LLMResponseSectionBaseSlides)
     input_arguments = {
         "topic": topic,
@@ -215,28 +233,29 @@ def generate_base_slides_for_sections(
     )
     llm = ChatBedrockConverse(model="anthropic.claude-3-haiku-20240307-v1:0")
     chain = prompt | llm | parser
-    logger.info("Starting base slide generation for sections.")
-    for section in sections:
-        logger.info(f"Generating base slides for {section.title}")
-        if write_callback:
-            write_callback(f"Generating base slides for {section.title}")
+    return chain, input_arguments
 
-        section_input_arguments = input_arguments
-        section_input_arguments["section_title"] = section.title
-        section_input_arguments["background_research"] = section.research
-        section_input_arguments["section_titles"] = ", ".join([s.title for s in sections])
-        section_response: LLMResponseSectionBaseSlides = chain.invoke(
-            section_input_arguments
-        )
-        slides_with_base_content.append(
-            SectionWithBaseContentSlides(
-                title=section.title,
-                research_query=section.research_query,
-                slides=section_response.section_slides,
-            )
-        )
 
-    return slides_with_base_content
+def generate_base_slides_for_section(
+    chain, input_arguments: dict, section: SectionWithResearch, section_titles: list[str]
+) -> SectionWithBaseContentSlides:
+    """
+    Generate the base slides of one section. Safe to call concurrently for different sections.
+    """
+    logger.info(f"Generating base slides for {section.title}")
+    section_input_arguments = input_arguments.copy()
+    section_input_arguments["section_title"] = section.title
+    section_input_arguments["background_research"] = section.research
+    section_input_arguments["section_titles"] = ", ".join(section_titles)
+    section_response: LLMResponseSectionBaseSlides = chain.invoke(
+        section_input_arguments
+    )
+    return SectionWithBaseContentSlides(
+        title=section.title,
+        research_query=section.research_query,
+        research=section.research,
+        slides=section_response.section_slides,
+    )
 
 
 def generate_detailed_content_for_slides_in_sections(
@@ -252,6 +271,36 @@ def generate_detailed_content_for_slides_in_sections(
     logger.info("Generating detailed content for slides in sections")
     if write_callback:
         write_callback("Generating detailed content for slides in sections")
+    chain, input_arguments = slide_content_chain(topic, additional_info, background_documents)
+    updated_sections: list[CompleteSectionWithSlides] = []
+    for section in sections:
+        logger.info(f"Generating content for section: {section.title}")
+        if write_callback:
+            write_callback(f"Generating content for slides in section {section.title}")
+        slides_with_content: list[CompleteSlideContent] = []
+        for slide in section.slides:
+            if write_callback:
+                write_callback(f"Generating content for slide {slide.title}")
+            slides_with_content.append(
+                generate_detailed_content_for_slide(chain, input_arguments, section, slide)
+            )
+        updated_sections.append(
+            CompleteSectionWithSlides(
+                title=section.title,
+                research=section.research,
+                slides=slides_with_content,
+            )
+        )
+    if write_callback:
+        write_callback("Content generated for all slides in all sections!")
+    logger.info("Content generated for all slides in all sections!")
+    return updated_sections
+
+
+def slide_content_chain(topic: str, additional_info: str, background_documents: list = None):
+    """
+    Build the chain that generates the detailed content of a slide, with the input arguments shared by all slides.
+    """
     parser = PydanticOutputParser(pydantic_object=LLMResponseCompleteSlideContent)
     llm = ChatBedrockConverse(model="anthropic.claude-3-haiku-20240307-v1:0")
     input_arguments = {
@@ -323,42 +372,29 @@ def generate_detailed_content_for_slides_in_sections(
         input_variables=input_arguments.keys(),
     )
     chain = prompt | llm | parser
-    updated_sections: list[CompleteSectionWithSlides] = []
-    for section in sections:
-        logger.info(f"Generating content for section: {section.title}")
-        if write_callback:
-            write_callback(f"Generating content for slides in section {section.title}")
-        slides_with_content: list[CompleteSlideContent] = []
-        for slide in section.slides:
-            logger.info(
-                f"Section {section.title}: Generating slide content for {slide.title}"
-            )
-            if write_callback:
-                write_callback(f"Generating content for slide {slide.title}")
-            section_arguments = input_arguments.copy()
-            section_arguments["section_title"] = section.title
-            section_arguments["section_research"] = section.research_query
-            section_arguments["slide_title"] = slide.title
-            slide_content: LLMResponseCompleteSlideContent = chain.invoke(
-                section_arguments
-            )
-            slides_with_content.append(
-                CompleteSlideContent(
-                    main_content=slide_content.main_content,
-                    presenter_notes=slide_content.presenter_notes,
-                    research_query=slide.research_query,
-                    title=slide.title,
-                    section=section,
-                )
-            )
-        updated_sections.append(
-            CompleteSectionWithSlides(
-                title=section.title,
-                research=section.research,
-                slides=slides_with_content,
-            )
-        )
-    if write_callback:
-        write_callback("Content generated for all slides in all sections!")
-    logger.info("Content generated for all slides in all sections!")
-    return updated_sections
+    return chain, input_arguments
+
+
+def generate_detailed_content_for_slide(
+    chain,
+    input_arguments: dict,
+    section: SectionWithBaseContentSlidesWithResearch,
+    slide: SlideWithBaseContentAndResearch,
+) -> CompleteSlideContent:
+    """
+    Generate the main content and presenter notes of one slide. Safe to call concurrently for different slides.
+    """
+    logger.info(f"Section {section.title}: Generating slide content for {slide.title}")
+    section_arguments = input_arguments.copy()
+    section_arguments["section_title"] = section.title
+    section_arguments["section_research"] = section.research_query
+    section_arguments["slide_title"] = slide.title
+    section_arguments["slide_research"] = slide.research
+    slide_content: LLMResponseCompleteSlideContent = chain.invoke(section_arguments)
+    return CompleteSlideContent(
+        main_content=slide_content.main_content,
+        presenter_notes=slide_content.presenter_notes,
+        research_query=slide.research_query,
+        title=slide.title,
+        section=section,
+    )
@@ -0,0 +1,176 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .generate import (
+    base_slides_chain,
+    generate_base_slides_for_section,
+    slide_content_chain,
+    generate_detailed_content_for_slide,
+)
+from .models import (
+    LLMResponseSlide,
+    CompleteSectionWithSlides,
+    SectionWithBaseContentSlidesWithResearch,
+)
+from .powerpoint import PowerPointBuilder
+from .research import research_section, research_slide
+
+# Maximum number of LLM and Wikipedia calls running at the same time
+MAX_CONCURRENCY = int(os.environ.get("POWERPOINT_MAX_CONCURRENCY", 8))
+
+logger = logging.getLogger(__name__)
+
+
+class DagExecutor:
+    """
+    Runs a graph of tasks on a thread pool. A task starts as soon as the tasks it depends on
+    have finished, and receives their results as arguments.
+
+    on_done callbacks run on the thread that called run(), so they may update the UI and add
+    new tasks to the graph.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENCY):
+        self.max_workers = max_workers
+        self.results = {}
+        self._waiting = {}  # key -> (fn, deps, on_done)
+        self._ready = []
+
+    def add(self, key, fn, deps=(), on_done=None) -> None:
+        """
+        Add a task: fn(*results of deps) runs once all deps are done, then on_done(result).
+        """
+        if key in self.results or key in self._waiting:
+            raise ValueError(f"Task {key} already exists")
+        self._waiting[key] = (fn, tuple(deps), on_done)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        for key, (fn, deps, on_done) in list(self._waiting.items()):
+            if all(dep in self.results for dep in deps):
+                del self._waiting[key]
+                self._ready.append((key, fn, deps, on_done))
+
+    def run(self) -> dict:
+        """
+        Run every task, including tasks added while running, and return the results by key.
+        The first task to fail cancels the tasks that have not started and re-raises its error.
+        """
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while self._ready or running:
+                    while self._ready:
+                        key, fn, deps, on_done = self._ready.pop(0)
+                        future = executor.submit(fn, *(self.results[dep] for dep in deps))
+                        running[future] = (key, on_done)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key, on_done = running.pop(future)
+                        self.results[key] = future.result()
+                        if on_done:
+                            on_done(self.results[key])
+                    self._schedule()
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        if self._waiting:
+            raise ValueError(f"Tasks with unmet dependencies: {list(self._waiting)}")
+        return self.results
+
+
+def generate_presentation_content(
+    topic: str,
+    additional_info: str,
+    sections: list[LLMResponseSlide],
+    builder: PowerPointBuilder,
+    callback=None,
+    write_callback=None,
+    background_documents: list = None,
+    research_wikipedia: bool = True,
+) -> list[CompleteSectionWithSlides]:
+    """
+    Research and generate every section and slide, running independent steps concurrently:
+
+    section research -> base slides for the section -> for each slide: slide research -> slide content
+
+    Each finished slide is reported to write_callback, and each finished section is added to the builder.
+    """
+    base_chain, base_arguments = base_slides_chain(topic, additional_info, background_documents)
+    content_chain, content_arguments = slide_content_chain(topic, additional_info, background_documents)
+    section_titles = [section.title for section in sections]
+    completed_sections: list = [None] * len(sections)
+    slides_done = {"completed": 0, "total": 0}
+    dag = DagExecutor()
+
+    def report_progress():
+        if callback:
+            callback(
+                f"Generated {slides_done['completed']} of {slides_done['total']} slides "
+                f"({sum(section is not None for section in completed_sections)} of {len(sections)} sections complete)"
+            )
+
+    def complete_section(index: int, section: CompleteSectionWithSlides) -> None:
+        completed_sections[index] = section
+        builder.add_section(index, section)
+        if write_callback:
+            write_callback(f"Section complete: {section.title}")
+
+    def add_slide_tasks(index: int, base_section) -> None:
+        slides = base_section.slides
+        if write_callback:
+            write_callback(
+                f"Slides planned for {base_section.title}: {', '.join(slide.title for slide in slides)}"
+            )
+        section = SectionWithBaseContentSlidesWithResearch(
+            title=base_section.title,
+            research_query=base_section.research_query,
+            research=base_section.research,
+        )
+        slides_done["total"] += len(slides)
+        if not slides:
+            complete_section(index, CompleteSectionWithSlides(title=section.title, slides=[]))
+            return
+
+        slide_contents: list = [None] * len(slides)
+
+        def slide_done(position: int, slide_content) -> None:
+            slide_contents[position] = slide_content
+            slides_done["completed"] += 1
+            if write_callback:
+                write_callback(f"Slide ready: {slide_content.title} ({section.title})")
+            if all(content is not None for content in slide_contents):
+                complete_section(index, CompleteSectionWithSlides(title=section.title, slides=slide_contents))
+            report_progress()
+
+        for position, slide in enumerate(slides):
+            dag.add(
+                ("slide_research", index, position),
+                lambda slide=slide: research_slide(slide, research_wikipedia),
+            )
+            dag.add(
+                ("slide_content", index, position),
+                lambda researched_slide: generate_detailed_content_for_slide(
+                    content_chain, content_arguments, section, researched_slide
+                ),
+                deps=[("slide_research", index, position)],
+                on_done=lambda slide_content, position=position: slide_done(position, slide_content),
+            )
+        report_progress()
+
+    for index, section in enumerate(sections):
+        dag.add(("section_research", index), lambda section=section: research_section(section, research_wikipedia))
+        dag.add(
+            ("base_slides", index),
+            lambda researched_section: generate_base_slides_for_section(
+                base_chain, base_arguments, researched_section, section_titles
+            ),
+            deps=[("section_research", index)],
+            on_done=lambda base_section, index=index: add_slide_tasks(index, base_section),
+        )
+
+    logger.info(f"Generating {len(sections)} sections with up to {dag.max_workers} concurrent calls")
+    dag.run()
+    logger.info("Content generated for all slides in all sections!")
+    return completed_sections
@@ -16,47 +16,78 @@ AGENDA_SLIDE_LAYOUT = 0
 logger = logging.getLogger(__name__)
 
 
-def generate_powerpoint_file(topic: str, presentation_content: list[CompleteSectionWithSlides], write_callback=None) -> str:
+class PowerPointBuilder:
     """
-    Generates the PowerPoint Presentation file using the generated and researched content.
+    Builds the presentation incrementally: the title and agenda slides are added up front,
+    and each section is added as soon as all of its slides are complete.
+    Sections may complete in any order; they are placed in agenda order.
     """
-    logger.info("Generating PowerPoint file")
-    if write_callback:
-        write_callback("Generating PowerPoint file")
-    preso = Presentation(os.path.join(os.path.dirname(__file__), "template.pptx"))
-    content_layout = preso.slide_layouts[CONTENT_SLIDE_LAYOUT]
-    title_slide_layout = preso.slide_layouts[TITLE_SLIDE_LAYOUT]
-    agenda_slide_layout = preso.slide_layouts[AGENDA_SLIDE_LAYOUT]
-    section_header_slide_layout = preso.slide_layouts[SECTION_HEADER_SLIDE_LAYOUT]
-    logger.info("Adding title slide")
-    title_slide = preso.slides.add_slide(title_slide_layout)
-    title_slide.shapes.placeholders[0].text = topic
-    logger.info("Adding agenda slide")
-    agenda_items = [section.title for section in presentation_content]
-    agenda_slide = preso.slides.add_slide(agenda_slide_layout)
-    agenda_slide.shapes.title.text = "Agenda"
-    agenda_slide.shapes.placeholders[1].text = "\n".join(agenda_items)
-    for section in presentation_content:
+
+    def __init__(self, topic: str, section_titles: list[str]):
+        self.topic = topic
+        self.preso = Presentation(os.path.join(os.path.dirname(__file__), "template.pptx"))
+        self.content_layout = self.preso.slide_layouts[CONTENT_SLIDE_LAYOUT]
+        self.section_header_slide_layout = self.preso.slide_layouts[SECTION_HEADER_SLIDE_LAYOUT]
+        self.pending_sections: dict[int, CompleteSectionWithSlides] = {}
+        self.next_section = 0
+        logger.info("Adding title slide")
+        title_slide = self.preso.slides.add_slide(self.preso.slide_layouts[TITLE_SLIDE_LAYOUT])
+        title_slide.shapes.placeholders[0].text = topic
+        logger.info("Adding agenda slide")
+        agenda_slide = self.preso.slides.add_slide(self.preso.slide_layouts[AGENDA_SLIDE_LAYOUT])
+        agenda_slide.shapes.title.text = "Agenda"
+        agenda_slide.shapes.placeholders[1].text = "\n".join(section_titles)
+
+    def add_section(self, index: int, section: CompleteSectionWithSlides) -> None:
+        """
+        Add a completed section; it is written once every section before it has been written.
+        """
+        self.pending_sections[index] = section
+        while self.next_section in self.pending_sections:
+            self._write_section(self.pending_sections.pop(self.next_section))
+            self.next_section += 1
+
+    def _write_section(self, section: CompleteSectionWithSlides) -> None:
         logger.info(f"Adding section headers: {section.title}")
-        section_header_slide = preso.slides.add_slide(section_header_slide_layout)
+        section_header_slide = self.preso.slides.add_slide(self.section_header_slide_layout)
         section_header_slide.shapes.title.text = section.title
         for slide in section.slides:
             logger.info(f"Adding slide: {slide.title}")
-            content_slide = preso.slides.add_slide(content_layout)
-            content_slide.shapes.title.text = topic
+            content_slide = self.preso.slides.add_slide(self.content_layout)
+            content_slide.shapes.title.text = self.topic
             content_slide.shapes.placeholders[0].text = slide.title
             content_slide.shapes.placeholders[1].text = "\n".join(slide.main_content.split(">>"))
             notes_paragraph = content_slide.notes_slide.notes_text_frame.add_paragraph()
             notes_paragraph.text = slide.presenter_notes
 
-    conclusion_slide = preso.slides.add_slide(section_header_slide_layout)
-    conclusion_slide.shapes.placeholders[0].text = "Thank You!"
-    file_path = os.path.join(os.path.dirname(__file__), f"{uuid4()}.pptx")
-    preso.save(file_path)
+    def save(self) -> str:
+        """
+        Add the closing slide and save the presentation.
+        """
+        if self.pending_sections:
+            raise ValueError(f"Section {self.next_section} was never added")
+        conclusion_slide = self.preso.slides.add_slide(self.section_header_slide_layout)
+        conclusion_slide.shapes.placeholders[0].text = "Thank You!"
+        file_path = os.path.join(os.path.dirname(__file__), f"{uuid4()}.pptx")
+        self.preso.save(file_path)
+        logger.info(f"File saved to: {file_path}")
+        return file_path
+
+
+def generate_powerpoint_file(topic: str, presentation_content: list[CompleteSectionWithSlides], write_callback=None) -> str:
+    """
+    Generates the PowerPoint Presentation file using the generated and researched content.
+    """
+    logger.info("Generating PowerPoint file")
+    if write_callback:
+        write_callback("Generating PowerPoint file")
+    builder = PowerPointBuilder(topic, [section.title for section in presentation_content])
+    for index, section in enumerate(presentation_content):
+        builder.add_section(index, section)
+    file_path = builder.save()
     logger.info("PowerPoint file generated successfully!")
     if write_callback:
         write_callback("PowerPoint file generated successfully!")
-    logger.info(f"File saved to: {file_path}")
     return file_path
 
 def delete_file(file_path: str):
@@ -1,4 +1,7 @@
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from langchain_core.documents import Document
 from langchain_community.retrievers import WikipediaRetriever
 from .models import (
@@ -12,6 +15,72 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Number of Wikipedia queries whose results are kept in memory
+MAX_CACHED_QUERIES = 256
+
+_retriever = None
+_research_cache: "OrderedDict[str, Future]" = OrderedDict()
+_research_cache_lock = threading.Lock()
+
+
+def search_wikipedia(query: str) -> list[Document]:
+    """
+    Query Wikipedia, reusing the result of an earlier identical query.
+    Concurrent calls with the same query wait for a single request instead of repeating it.
+    """
+    global _retriever
+    key = query.strip().lower()
+    with _research_cache_lock:
+        future = _research_cache.get(key)
+        if future is not None:
+            _research_cache.move_to_end(key)
+            owner = False
+        else:
+            future = Future()
+            _research_cache[key] = future
+            if len(_research_cache) > MAX_CACHED_QUERIES:
+                _research_cache.popitem(last=False)
+            if _retriever is None:
+                _retriever = WikipediaRetriever()
+            owner = True
+
+    if owner:
+        try:
+            future.set_result(_retriever.invoke(query))
+        except Exception as e:
+            # Failed queries are not cached, so a later call tries again
+            with _research_cache_lock:
+                if _research_cache.get(key) is future:
+                    del _research_cache[key]
+            future.set_exception(e)
+    else:
+        logger.info(f"Using cached Wikipedia research for query: {query}")
+    return future.result()
+
+
+def research_section(section: LLMResponseSlide, research_wikipedia: bool = True) -> SectionWithResearch:
+    """
+    Research one section. Safe to call concurrently.
+    """
+    logger.info(f"Researching details for section: {section.title}")
+    return SectionWithResearch(
+        title=section.title,
+        research_query=section.research_query,
+        research=search_wikipedia(section.research_query) if research_wikipedia else [],
+    )
+
+
+def research_slide(slide: LLMResponseSlide, research_wikipedia: bool = True) -> SlideWithBaseContentAndResearch:
+    """
+    Research one slide. Safe to call concurrently.
+    """
+    logger.info(f"Researching details for slide: {slide.title}")
+    return SlideWithBaseContentAndResearch(
+        research=search_wikipedia(slide.research_query) if research_wikipedia else [],
+        research_query=slide.research_query,
+        title=slide.title,
+    )
+
 
 def research_topic_background(
     research_query: str, write_callback=None, research_wikipedia: bool = True
@@ -22,8 +91,7 @@ def research_topic_background(
                 f"Querying Wikipedia for Topic Background with query {research_query}"
             )
         logger.info(f"Querying Wikipedia for Topic Background; {research_query}")
-        retriever = WikipediaRetriever()
-        background_research = retriever.invoke(research_query)
+        background_research = search_wikipedia(research_query)
         logger.info("Topic Background research retrieved.")
         return background_research
     else:
@@ -44,18 +112,9 @@ def research_details_for_sections(
             write_callback("Researching details for sections")
         updated_sections = []
         for section in sections:
-            logger.info(f"Researching details for section: {section.title}")
             if write_callback:
                 write_callback(f"Researching details for section: {section.title}")
-            retriever = WikipediaRetriever()
-            details = retriever.invoke(section.research_query)
-            updated_sections.append(
-                SectionWithResearch(
-                    title=section.title,
-                    research_query=section.research_query,
-                    research=details,
-                )
-            )
+            updated_sections.append(research_section(section))
         logger.info("Details researched for all sections!")
         if write_callback:
             write_callback("Details researched for all sections")
@@ -94,16 +153,7 @@ def research_slides_in_sections(
             for slide in section.slides:
                 if write_callback:
                     write_callback(f"Researching details for slide: {slide.title}")
-                logger.info(f"Researching details for slide: {slide.title}")
-                retriever = WikipediaRetriever()
-                details = retriever.invoke(slide.research_query)
-                slides_with_research.append(
-                    SlideWithBaseContentAndResearch(
-                        research=details,
-                        research_query=slide.research_query,
-                        title=slide.title,
-                    )
-                )
+                slides_with_research.append(research_slide(slide))
             updated_sections.append(
                 SectionWithBaseContentSlidesWithResearch(
                     title=section.title,
@@ -3,6 +3,7 @@ import boto3
 import botocore
 import json
 from typing import Union, List
+from amazon_bedrock_translation.translation_engine import TranslationEngine, TranslationMemory
 
 #################
 # Initial Setup #
@@ -10,7 +11,8 @@ from typing import Union, List
 
 # Initialize boto3 clients
 session = boto3.Session()
-config = botocore.config.Config(connect_timeout=300, read_timeout=300)
+# Adaptive retries back off and rate limit on the client when Bedrock throttles
+config = botocore.config.Config(connect_timeout=300, read_timeout=300, retries={'mode': 'adaptive', 'max_attempts': 10})
 bedrock = session.client('bedrock')
 bedrock_runtime = session.client('bedrock-runtime','us-east-1',config = config)
 translate = session.client('translate')
@@ -55,67 +57,27 @@ def lst_models():
         byInferenceType='ON_DEMAND'
     )['modelSummaries']
 
-def transl_txt_bedrock(input_txt: Union[str, List[str]], src_lang, tgt_lang, model_id):
+# Segments translated before are served from the translation memory instead of Bedrock.
+# Created on first use and shared by all sessions, so importing this module does not create the memory file
+@st.cache_resource
+def get_translation_engine():
+    return TranslationEngine(bedrock_runtime, memory=TranslationMemory())
+
+def transl_txt_bedrock(input_txt: Union[str, List[str]], src_lang, tgt_lang, model_id, on_progress=None, return_stats=False):
+    """
+    Translates a text or a list of texts (e.g. the pages of a file).
+    Lines are batched into concurrent Bedrock requests, and lines translated before are reused.
+    on_progress(translated segments, total segments) is called as batches complete.
+    Returns the translation (a str for a single text, otherwise a list), and the TranslationStats if return_stats.
+    """
     if isinstance(input_txt, str):
         input_txt = [input_txt]
-    outputs = []
-    for txt in input_txt:
-        ##Setup Prompt
-        prompt = f"""    
-            Human:
-            Task: Translate the given text from the source language to the target language.
-
-            Source language: {src_lang}
-            Target language: {tgt_lang}
-            
-            Text to translate: {txt}
-            
-            Translation steps:
-            1. Identify the source and target languages
-            2. Understand the meaning of the input text in the source language
-            3. Convert the text into the target language while preserving the original meaning
-            4. Review the translation for accuracy, fluency, and context
-
-            Only output the translated text
-            
-            <translated_text>
-            </translated_text>
-
-            Assistant:
-        """
-
-        body=json.dumps(
-            {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 10000,
-                "temperature":0,
-                "top_k":250,
-                "top_p":0.5,
-                "stop_sequences":[],
-                "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ],
-            }  
-        )  
-
-        #Run Inference
-        modelId = model_id  # change this to use a different version from the model provider if you want to switch 
-        accept = "application/json"
-        contentType = "application/json"
-
-        response = bedrock_runtime.invoke_model(body=body, modelId=modelId, accept=accept, contentType=contentType)
-        response_body = json.loads(response.get('body').read())
-        llmOutput = response_body.get("content")[0]["text"]
-        outputs.append(parse_xml(llmOutput, "translated_text"))
+    outputs, stats = get_translation_engine().translate_texts(input_txt, src_lang, tgt_lang, model_id, on_progress)
 
     if len(outputs) == 1:
-        return outputs[0]
-    
+        outputs = outputs[0]
+    if return_stats:
+        return outputs, stats
     return outputs
 
 #Translates chat messages to the target language using Bedrock"""
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+# Approximate input tokens per batch request; small enough to keep responses fast, large enough to amortise the prompt
+MAX_BATCH_TOKENS = int(os.environ.get("TRANSLATION_MAX_BATCH_TOKENS", 2000))
+# Number of batch requests sent to Bedrock at the same time
+MAX_CONCURRENCY = int(os.environ.get("TRANSLATION_MAX_CONCURRENCY", 8))
+# Upper bound on requests started per minute across all threads
+REQUESTS_PER_MINUTE = int(os.environ.get("TRANSLATION_REQUESTS_PER_MINUTE", 120))
+# Translated segments are stored here and reused for every later translation of the same segment
+TRANSLATION_MEMORY_PATH = os.environ.get(
+    "TRANSLATION_MEMORY_PATH",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "amazon-bedrock-translation-poc",
+        "translation_memory.sqlite3",
+    ),
+)
+
+# Lines longer than this are split at sentence boundaries, then at spaces, so a single segment always fits in one response
+MAX_SEGMENT_CHARS = 2000
+# Upper bound on max_tokens of a batch request
+MAX_OUTPUT_TOKENS = 10000
+# Rough characters-per-token ratio used to size batches and max_tokens
+CHARS_PER_TOKEN = 3
+
+
+def normalize_segment(text):
+    """
+    Normalize a segment for the translation memory key: Unicode NFC and collapsed whitespace
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TranslationMemory:
+    """
+    Persistent store of translated segments, keyed by source language, target language,
+    model and normalized segment. Safe to use from several threads.
+    """
+
+    def __init__(self, path=TRANSLATION_MEMORY_PATH):
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def key(src_lang, tgt_lang, model_id, segment):
+        return hashlib.sha256(
+            "\n".join([src_lang, tgt_lang, model_id, normalize_segment(segment)]).encode("utf-8")
+        ).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Returns:
+            dict: Translation by key, for the keys found in the memory
+        """
+        keys = list(keys)
+        found = {}
+        with self.lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, translations):
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation) VALUES (?, ?)",
+                translations.items(),
+            )
+            self.connection.commit()
+
+
+@dataclass
+class TranslationStats:
+    segments: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def segments_per_second(self):
+        return self.segments / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def hit_rate(self):
+        return self.cache_hits / self.segments if self.segments else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.segments} segments in {self.elapsed:.1f}s ({self.segments_per_second:.1f} segments/sec), "
+            f"{self.hit_rate:.0%} from translation memory, {self.requests} Bedrock requests"
+        )
+
+
+def split_at_spaces(text):
+    """
+    Split text longer than MAX_SEGMENT_CHARS into chunks of at most MAX_SEGMENT_CHARS, at the last space where possible
+    """
+    chunks = []
+    while len(text) > MAX_SEGMENT_CHARS:
+        cut = text.rfind(" ", 0, MAX_SEGMENT_CHARS)
+        if cut <= 0:
+            cut = MAX_SEGMENT_CHARS
+        chunks.append(text[:cut])
+        text = text[cut:]
+    chunks.append(text)
+    return chunks
+
+
+def split_segments(text):
+    """
+    Split text into lines, and long lines into sentences, keeping everything needed to put it back together.
+    Returns:
+        list: Pieces of the text; each piece is either a str kept as is (line breaks, whitespace)
+              or a (leading whitespace, segment, trailing whitespace) tuple to translate
+    """
+    pieces = []
+    for line in re.split(r"(\n+)", text):
+        parts = re.split(r"(?<=[.!?])(\s+)", line) if len(line) > MAX_SEGMENT_CHARS else [line]
+        for piece in (chunk for part in parts for chunk in split_at_spaces(part)):
+            if not piece.strip():
+                if piece:
+                    pieces.append(piece)
+                continue
+            stripped = piece.strip()
+            start = piece.index(stripped)
+            pieces.append((piece[:start], stripped, piece[start + len(stripped):]))
+    return pieces
+
+
+def pack_batches(segments, max_tokens=MAX_BATCH_TOKENS):
+    """
+    Group segments, in order, into batches of at most max_tokens estimated tokens.
+    A segment larger than max_tokens is sent in a batch of its own.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for segment in segments:
+        tokens = estimate_tokens(segment)
+        if batch and batch_tokens + tokens > max_tokens:
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(segment)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def build_batch_prompt(segments, src_lang, tgt_lang):
+    numbered = "\n".join(
+        f'<segment id="{i}">{segment}</segment>' for i, segment in enumerate(segments, 1)
+    )
+    return f"""
+        Task: Translate each of the given text segments from the source language to the target language.
+
+        Source language: {src_lang}
+        Target language: {tgt_lang}
+
+        Segments to translate:
+        <segments>
+        {numbered}
+        </segments>
+
+        Translation steps:
+        1. Identify the source and target languages
+        2. Understand the meaning of each segment in the source language, using the other segments as context
+        3. Convert each segment into the target language while preserving the original meaning
+        4. Review the translation for accuracy, fluency, and context
+
+        Output every segment, in order, as <translation id="N">translated text</translation> with the id of its segment.
+        Only output the translations
+    """
+
+
+def parse_batch_response(text, count):
+    """
+    Returns:
+        list: Translations in segment order, or None if any segment is missing
+    """
+    translations = {
+        int(match.group(1)): match.group(2).strip()
+        for match in re.finditer(r'<translation id="(\d+)">(.*?)</translation>', text, re.DOTALL)
+    }
+    if any(i not in translations for i in range(1, count + 1)):
+        return None
+    return [translations[i] for i in range(1, count + 1)]
+
+
+class TranslationEngine:
+    """
+    Translates many segments with Bedrock: segments are deduplicated, served from the translation memory
+    when possible, and the rest are packed into token-bounded batches that are translated concurrently
+    under a rate limit. Results are reassembled in the original order.
+    """
+
+    def __init__(
+        self,
+        bedrock_runtime,
+        memory=None,
+        max_batch_tokens=MAX_BATCH_TOKENS,
+        max_concurrency=MAX_CONCURRENCY,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+    ):
+        self.bedrock_runtime = bedrock_runtime
+        self.memory = memory
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        # Requests are spaced out across threads to stay under requests_per_minute
+        self.request_interval = 60.0 / requests_per_minute
+        self.next_request_time = time.monotonic()
+        self.request_lock = threading.Lock()
+
+    def translate_texts(self, texts, src_lang, tgt_lang, model_id, on_progress=None):
+        """
+        Translate a list of texts, each of which may span many lines.
+        Args:
+            on_progress: optional callback(translated segments, total segments), called on the calling thread
+        Returns:
+            tuple: (list of translated texts in input order, TranslationStats)
+        """
+        start_time = time.monotonic()
+        stats = TranslationStats()
+        split_texts = [split_segments(text) for text in texts]
+        segments = [piece[1] for pieces in split_texts for piece in pieces if isinstance(piece, tuple)]
+        stats.segments = len(segments)
+
+        # Each distinct segment is translated once, from the memory if it has been translated before
+        keys = {segment: TranslationMemory.key(src_lang, tgt_lang, model_id, segment) for segment in segments}
+        by_key = self.memory.get_many(set(keys.values())) if self.memory else {}
+        stats.cache_hits = sum(keys[segment] in by_key for segment in segments)
+
+        pending = list(dict.fromkeys(segment for segment in segments if keys[segment] not in by_key))
+        occurrences = Counter(segments)
+        done_segments = stats.cache_hits
+        if on_progress:
+            on_progress(done_segments, stats.segments)
+
+        if pending:
+            batches = pack_batches(pending, self.max_batch_tokens)
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = {
+                    executor.submit(self.translate_batch, batch, src_lang, tgt_lang, model_id): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    translations, requests = future.result()
+                    stats.requests += requests
+                    translated = {keys[segment]: translation for segment, translation in zip(batch, translations)}
+                    by_key.update(translated)
+                    if self.memory:
+                        self.memory.put_many(translated)
+                    done_segments += sum(occurrences[segment] for segment in batch)
+                    if on_progress:
+                        on_progress(done_segments, stats.segments)
+
+        outputs = [
+            "".join(
+                piece if isinstance(piece, str) else piece[0] + by_key[keys[piece[1]]] + piece[2]
+                for piece in pieces
+            )
+            for pieces in split_texts
+        ]
+        stats.elapsed = time.monotonic() - start_time
+        return outputs, stats
+
+    def translate_batch(self, segments, src_lang, tgt_lang, model_id):
+        """
+        Translate a batch in one request. If the response is cut off or misses a segment,
+        the batch is split in half and each half is translated again.
+        Returns:
+            tuple: (list of translations in segment order, number of requests made)
+        """
+        translations = self.invoke(segments, src_lang, tgt_lang, model_id)
+        if translations is not None:
+            return translations, 1
+        if len(segments) == 1:
+            raise ValueError(f"Bedrock did not return a translation for segment: {segments[0][:100]}")
+        middle = len(segments) // 2
+        first, first_requests = self.translate_batch(segments[:middle], src_lang, tgt_lang, model_id)
+        second, second_requests = self.translate_batch(segments[middle:], src_lang, tgt_lang, model_id)
+        return first + second, 1 + first_requests + second_requests
+
+    def wait_for_request_slot(self):
+        with self.request_lock:
+            now = time.monotonic()
+            start = max(now, self.next_request_time)
+            self.next_request_time = start + self.request_interval
+        time.sleep(start - now)
+
+    def invoke(self, segments, src_lang, tgt_lang, model_id):
+        prompt = build_batch_prompt(segments, src_lang, tgt_lang)
+        # Leave room for translations longer than their source, plus the tags around them
+        max_tokens = min(MAX_OUTPUT_TOKENS, 3 * sum(estimate_tokens(segment) for segment in segments) + 20 * len(segments) + 100)
+        body = json.dumps(
+            {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "temperature": 0,
+                "top_k": 250,
+                "top_p": 0.5,
+                "stop_sequences": [],
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt},
+                        ],
+                    }
+                ],
+            }
+        )
+        self.wait_for_request_slot()
+        response = self.bedrock_runtime.invoke_model(
+            body=body, modelId=model_id, accept="application/json", contentType="application/json"
+        )
+        response_body = json.loads(response.get("body").read())
+        if response_body.get("stop_reason") == "max_tokens":
+            return None
+        return parse_batch_response(response_body.get("content")[0]["text"], len(segments))
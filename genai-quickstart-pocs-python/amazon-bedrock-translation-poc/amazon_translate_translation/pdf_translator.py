@@ -1,11 +1,20 @@
 import boto3
-import io
+import botocore
+import os
 import fitz
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of translation requests sent at the same time
+MAX_CONCURRENCY = int(os.environ.get("PDF_TRANSLATE_MAX_CONCURRENCY", 10))
+
+# Adaptive retries back off and rate limit on the client when the services throttle
+CLIENT_CONFIG = botocore.config.Config(retries={'mode': 'adaptive', 'max_attempts': 10})
 
 class PDFTranslator:
-    def __init__(self):
-        self.translate_client = boto3.client('translate')
-        self.bedrock_client = boto3.client('bedrock-runtime')
+    def __init__(self, translate_client=None, bedrock_client=None, max_concurrency=MAX_CONCURRENCY):
+        self.translate_client = translate_client or boto3.client('translate', config=CLIENT_CONFIG)
+        self.bedrock_client = bedrock_client or boto3.client('bedrock-runtime', config=CLIENT_CONFIG)
+        self.max_concurrency = max_concurrency
         
         self.languages = {
             'English': 'en',
@@ -18,45 +27,61 @@ class PDFTranslator:
         }
 
     def batch_translate(self, texts, source_lang, target_lang, use_bedrock=False, batch_size=10):
+        """
+        Translate a list of texts, returning the translations in the same order.
+        Each distinct text is translated once, and texts without letters (numbers, symbols) are kept as they are.
+        """
         print(f"Translating {len(texts)} segments from {source_lang} to {target_lang}...")
         if not texts:
             return []
+
+        unique_texts = list(dict.fromkeys(
+            text for text in texts if any(char.isalpha() for char in text)
+        ))
+        print(f"{len(unique_texts)} distinct segments to translate")
         
         if use_bedrock:
-            return self._batch_translate_with_bedrock(texts, source_lang, target_lang, batch_size)
-        return self._batch_translate_with_translate(texts, source_lang, target_lang)
+            unique_translations = self._batch_translate_with_bedrock(unique_texts, source_lang, target_lang, batch_size)
+        else:
+            unique_translations = self._batch_translate_with_translate(unique_texts, source_lang, target_lang)
+        translated = dict(zip(unique_texts, unique_translations))
+        return [translated.get(text, text) for text in texts]
 
     def _batch_translate_with_translate(self, texts, source_lang, target_lang):
+        # Amazon Translate translates one text per real-time request, so requests are sent concurrently
         print("Using Amazon Translate...")
-        translations = []
-        for text in texts:
-            if not text.strip():
-                translations.append(text)
-                continue
-            
-            try:
-                response = self.translate_client.translate_text(
-                    Text=text,
-                    SourceLanguageCode=source_lang,
-                    TargetLanguageCode=target_lang
-                )
-                translations.append(response['TranslatedText'])
-            except Exception as e:
-                print(f"Translation error: {str(e)}")
-                translations.append(text)
-                
-        return translations
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(
+                lambda text: self._translate_with_translate(text, source_lang, target_lang), texts
+            ))
+
+    def _translate_with_translate(self, text, source_lang, target_lang):
+        if not text.strip():
+            return text
+        try:
+            response = self.translate_client.translate_text(
+                Text=text,
+                SourceLanguageCode=source_lang,
+                TargetLanguageCode=target_lang
+            )
+            return response['TranslatedText']
+        except Exception as e:
+            print(f"Translation error: {str(e)}")
+            return text
 
     def _batch_translate_with_bedrock(self, texts, source_lang, target_lang, batch_size):
         print("Using Amazon Bedrock...")
-        translations = []
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            batch_translations = executor.map(
+                lambda batch: self._translate_batch_with_bedrock(batch, source_lang, target_lang), batches
+            )
+            return [translation for batch in batch_translations for translation in batch]
+
+    def _translate_batch_with_bedrock(self, batch, source_lang, target_lang):
+        combined_text = "\n---\n".join(batch)
         
-        for i in range(0, len(texts), batch_size):
-            print(f"Translating batch {i + 1}-{min(i + batch_size, len(texts))}...")
-            batch = texts[i:i + batch_size]
-            combined_text = "\n---\n".join(batch)
-            
-            prompt = f"""Human: Translate the following text segments from {source_lang} to {target_lang}.
+        prompt = f"""Human: Translate the following text segments from {source_lang} to {target_lang}.
             Do not translate symbols like '#', '$', etc. within a sentence/translation - return the symbols as they are or properly
             incorporate the symbol into the translated text. 
             There may be codes like 'C-137' or 'R2-D2' that should not be translated and returned as they are.
@@ -68,32 +93,32 @@ separated by '---'.
 Respond with the translations and no outher output text.
 
 Assistant:"""
+        
+        try:
+            response = self.bedrock_client.converse(
+                modelId="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "text": prompt
+                            }
+                        ]
+                    }
+                ]
+            )
+            response_body = response
+            response_output = response_body['output']['message']['content'][0]['text']
+            batch_translations = [t.strip() for t in response_output.strip().split("---")]
+            if len(batch_translations) != len(batch):
+                # A missing or extra separator would shift every later translation onto the wrong text
+                raise ValueError(f"expected {len(batch)} segments, got {len(batch_translations)}")
+            return batch_translations
             
-            try:
-                response = self.bedrock_client.converse(
-                    modelId="us.anthropic.claude-3-5-haiku-20241022-v1:0",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "text": prompt
-                                }
-                            ]
-                        }
-                    ]
-                )
-                response_body = response
-                response_output = response_body['output']['message']['content'][0]['text']
-                print(f"Bedrock response output: {response_output}")
-                batch_translations = response_output.strip().split("---")
-                translations.extend([t.strip() for t in batch_translations])
-                
-            except Exception as e:
-                print(f"Bedrock translation error: {str(e)}")
-                translations.extend(batch)  # Use original text on error
-                
-        return translations
+        except Exception as e:
+            print(f"Bedrock translation error: {str(e)}")
+            return batch  # Use original text on error
 
     def extract_text_and_positions(self, pdf_bytes):
         text_data = []
@@ -102,7 +127,8 @@ Assistant:"""
         try:
             for page_num in range(len(doc)):
                 page = doc[page_num]
-                dict_data = page.get_text("dict", sort=True)
+                # Image blocks are not needed, so their pixel data is not loaded
+                dict_data = page.get_text("dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES, sort=True)
                 
                 for block in dict_data["blocks"]:
                     if "lines" not in block:
@@ -129,98 +155,115 @@ Assistant:"""
     def create_translated_pdf(self, original_pdf_bytes, text_positions, translations):
         print("Creating translated PDF...")
         doc = fitz.open(stream=original_pdf_bytes, filetype="pdf")
+        metrics = FontMetrics(fitz.Font("helv"))
         
         try:
-            # First pass: Apply all white rectangles
-            for page_num in range(len(doc)):
+            for page_num, indices in index_by_page(text_positions).items():
                 page = doc[page_num]
-                for pos in text_positions:
-                    if pos['page'] == page_num:
-                        # Calculate exact text dimensions from bbox
-                        text_height = pos['bbox'][3] - pos['bbox'][1]
-                        text_width = pos['bbox'][2] - pos['bbox'][0]
-                        
-                        # Create precise white rectangle for text coverage
-                        rect = fitz.Rect(
-                            pos['bbox'][0],  # x0
-                            pos['bbox'][1],  # y0
-                            pos['bbox'][0] + text_width,  # x1
-                            pos['bbox'][1] + text_height  # y1
-                        )
-                        
-                        # Draw precise white rectangle
-                        page.draw_rect(rect, color=(1, 1, 1), fill=(1, 1, 1))
-            
-            # Second pass: Place all translated text
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                for pos, trans in zip(text_positions, translations):
-                    if pos['page'] == page_num:
-                        available_width = pos['bbox'][2] - pos['bbox'][0]
-                        available_height = pos['bbox'][3] - pos['bbox'][1]
-                        font_size = pos['font_size']
-                        
-                        try:
-                            # Create text writer
-                            tw = fitz.TextWriter(page.rect)
-                            font = fitz.Font("helv")
-                            text_width = font.text_length(trans, fontsize=font_size)
-                            
-                            # Rest of text placement logic remains the same
-                            if text_width > available_width:
-                                scaling_factor = available_width / text_width
-                                font_size = max(6, font_size * scaling_factor)
-                            
-                            # If text is still too wide, try wrapping
-                            if font.text_length(trans, fontsize=font_size) > available_width:
-                                words = trans.split()
-                                lines = []
-                                current_line = []
-                                
-                                for word in words:
-                                    test_line = ' '.join(current_line + [word])
-                                    if font.text_length(test_line, fontsize=font_size) <= available_width:
-                                        current_line.append(word)
-                                    else:
-                                        if current_line:
-                                            lines.append(' '.join(current_line))
-                                            current_line = [word]
-                                        else:
-                                            lines.append(word)
-                                            current_line = []
-                                
-                                if current_line:
-                                    lines.append(' '.join(current_line))
-                                
-                                # Calculate vertical spacing
-                                line_height = font_size * 1.2
-                                total_height = line_height * len(lines)
-                                
-                                # Center text block vertically
-                                start_y = pos['y'] + (available_height - total_height) / 2
-                                
-                                # Write each line using TextWriter
-                                for i, line in enumerate(lines):
-                                    y_pos = start_y + (i * line_height)
-                                    tw.append((pos['x'], y_pos), line, font=font, fontsize=font_size)
-                            else:
-                                # Single line - center vertically
-                                y_pos = pos['y'] + (available_height - font_size) / 2
-                                tw.append((pos['x'], y_pos), trans, font=font, fontsize=font_size)
-                            
-                            # Write all text to page
-                            tw.write_text(page)
-                            
-                        except Exception as e:
-                            print(f"Error placing text: {str(e)}")
-                            # Fallback to simple text insertion
-                            page.insert_text(
-                                (pos['x'], pos['y']),
-                                trans,
-                                fontsize=font_size
-                            )
+
+                # Cover the original text of the page with white rectangles, drawn as one shape
+                shape = page.new_shape()
+                for i in indices:
+                    shape.draw_rect(fitz.Rect(text_positions[i]['bbox']))
+                shape.finish(color=(1, 1, 1), fill=(1, 1, 1))
+                shape.commit()
+
+                # Place the translated text of the page, written in one go
+                tw = fitz.TextWriter(page.rect)
+                for i in indices:
+                    self._place_text(page, tw, metrics, text_positions[i], translations[i])
+                tw.write_text(page)
             
-            output_stream = io.BytesIO(doc.tobytes())
-            return output_stream.getvalue()
+            return doc.tobytes()
         finally:
-            doc.close()
\ No newline at end of file
+            doc.close()
+
+    def _place_text(self, page, tw, metrics, pos, trans):
+        available_width = pos['bbox'][2] - pos['bbox'][0]
+        available_height = pos['bbox'][3] - pos['bbox'][1]
+        font_size = pos['font_size']
+        
+        try:
+            text_width = metrics.text_length(trans, fontsize=font_size)
+            
+            if text_width > available_width:
+                scaling_factor = available_width / text_width
+                font_size = max(6, font_size * scaling_factor)
+            
+            # If text is still too wide, try wrapping
+            if metrics.text_length(trans, fontsize=font_size) > available_width:
+                words = trans.split()
+                lines = []
+                current_line = []
+                
+                for word in words:
+                    test_line = ' '.join(current_line + [word])
+                    if metrics.text_length(test_line, fontsize=font_size) <= available_width:
+                        current_line.append(word)
+                    else:
+                        if current_line:
+                            lines.append(' '.join(current_line))
+                            current_line = [word]
+                        else:
+                            lines.append(word)
+                            current_line = []
+                
+                if current_line:
+                    lines.append(' '.join(current_line))
+                
+                # Calculate vertical spacing
+                line_height = font_size * 1.2
+                total_height = line_height * len(lines)
+                
+                # Center text block vertically
+                start_y = pos['y'] + (available_height - total_height) / 2
+                
+                # Write each line using TextWriter
+                for i, line in enumerate(lines):
+                    y_pos = start_y + (i * line_height)
+                    tw.append((pos['x'], y_pos), line, font=metrics.font, fontsize=font_size)
+            else:
+                # Single line - center vertically
+                y_pos = pos['y'] + (available_height - font_size) / 2
+                tw.append((pos['x'], y_pos), trans, font=metrics.font, fontsize=font_size)
+            
+        except Exception as e:
+            print(f"Error placing text: {str(e)}")
+            # Fallback to simple text insertion
+            page.insert_text(
+                (pos['x'], pos['y']),
+                trans,
+                fontsize=font_size
+            )
+
+
+class FontMetrics:
+    """
+    Measures text with a font, caching the width of each character.
+    fitz.Font.text_length encodes every character on each call, which dominates rendering time on large documents.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.char_widths = {}
+
+    def text_length(self, text, fontsize):
+        total = 0.0
+        for char in text:
+            width = self.char_widths.get(char)
+            if width is None:
+                width = self.char_widths[char] = self.font.text_length(char, fontsize=1)
+            total += width
+        return total * fontsize
+
+
+def index_by_page(text_positions):
+    """
+    Group span indices by page in a single pass over the spans.
+    Returns:
+        dict: page number -> indices into text_positions, in order
+    """
+    spans_by_page = {}
+    for i, pos in enumerate(text_positions):
+        spans_by_page.setdefault(pos['page'], []).append(i)
+    return spans_by_page
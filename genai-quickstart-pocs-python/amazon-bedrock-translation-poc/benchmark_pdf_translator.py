@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark PDF translation against the previous implementation on a generated many-page PDF.
+
+Compares:
+- translating every span with one sequential Amazon Translate call against
+  deduplicated, concurrent calls (Amazon Translate is simulated with a fixed latency)
+- rendering with a scan of all spans for every page, twice, against the
+  per-page span index with a single redact-and-insert pass per page
+
+Usage: python3 benchmark_pdf_translator.py [--pages N] [--lines N] [--latency SECONDS]
+"""
+import argparse
+import time
+import tracemalloc
+
+import fitz
+
+from amazon_translate_translation.pdf_translator import PDFTranslator
+
+
+class SimulatedTranslateClient:
+    """Stands in for Amazon Translate, with a fixed latency per request"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.requests = 0
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode):
+        self.requests += 1
+        time.sleep(self.latency)
+        return {'TranslatedText': Text.upper()}
+
+
+def generate_pdf(pages, lines_per_page):
+    """A PDF whose pages share a header and footer, with numbered body lines"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 40), "Example Corp. Confidential - Internal Use Only", fontsize=9)
+        for line in range(lines_per_page):
+            page.insert_text((72, 70 + line * 14), f"Line {line} of the report body, section {page_num % 20}.", fontsize=10)
+        page.insert_text((72, 800), f"Page {page_num + 1}", fontsize=9)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+# Previous implementations, kept here as the baseline
+def translate_sequential(client, texts, source_lang, target_lang):
+    translations = []
+    for text in texts:
+        if not text.strip():
+            translations.append(text)
+            continue
+        response = client.translate_text(Text=text, SourceLanguageCode=source_lang, TargetLanguageCode=target_lang)
+        translations.append(response['TranslatedText'])
+    return translations
+
+
+def create_translated_pdf_scan(original_pdf_bytes, text_positions, translations):
+    doc = fitz.open(stream=original_pdf_bytes, filetype="pdf")
+    try:
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            for pos in text_positions:
+                if pos['page'] == page_num:
+                    page.draw_rect(fitz.Rect(pos['bbox']), color=(1, 1, 1), fill=(1, 1, 1))
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            for pos, trans in zip(text_positions, translations):
+                if pos['page'] == page_num:
+                    tw = fitz.TextWriter(page.rect)
+                    font = fitz.Font("helv")
+                    available_width = pos['bbox'][2] - pos['bbox'][0]
+                    available_height = pos['bbox'][3] - pos['bbox'][1]
+                    font_size = pos['font_size']
+                    text_width = font.text_length(trans, fontsize=font_size)
+                    if text_width > available_width:
+                        font_size = max(6, font_size * available_width / text_width)
+                    font.text_length(trans, fontsize=font_size)
+                    y_pos = pos['y'] + (available_height - font_size) / 2
+                    tw.append((pos['x'], y_pos), trans, font=font, fontsize=font_size)
+                    tw.write_text(page)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def timed(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated seconds per translate request")
+    args = parser.parse_args()
+
+    pdf_bytes = generate_pdf(args.pages, args.lines)
+    baseline_client = SimulatedTranslateClient(args.latency)
+    client = SimulatedTranslateClient(args.latency)
+    translator = PDFTranslator(translate_client=client, bedrock_client=object())
+
+    text_positions, extract_time, extract_peak = timed(translator.extract_text_and_positions, pdf_bytes)
+    texts = [pos['text'] for pos in text_positions]
+    print(f"{args.pages} pages, {len(text_positions)} spans, extracted in {extract_time:.2f}s (peak {extract_peak:.1f} MiB)")
+
+    baseline_translations, baseline_translate_time, _ = timed(translate_sequential, baseline_client, texts, 'en', 'es')
+    translations, translate_time, _ = timed(translator.batch_translate, texts, 'en', 'es')
+    assert translations == baseline_translations
+    print(f"translate, sequential:             {baseline_translate_time:7.2f}s ({baseline_client.requests} requests)")
+    print(f"translate, deduplicated+concurrent: {translate_time:7.2f}s ({client.requests} requests)")
+
+    _, baseline_render_time, baseline_peak = timed(create_translated_pdf_scan, pdf_bytes, text_positions, translations)
+    _, render_time, peak = timed(translator.create_translated_pdf, pdf_bytes, text_positions, translations)
+    print(f"render, scan all spans per page:    {baseline_render_time:7.2f}s (peak {baseline_peak:.1f} MiB)")
+    print(f"render, per-page index:             {render_time:7.2f}s (peak {peak:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -61,12 +61,24 @@ if uploaded_file is not None:
     with st.expander("Extracted text from file", expanded=False):
         st.write(file_contents)
     with st.spinner('Translating...'):
+        progress_bar = st.progress(0.0, text="Translating...")
+
+        def show_progress(done, total):
+            progress_bar.progress(done / total if total else 1.0, text=f"Translated {done} of {total} segments")
+
         # Translate user prompt Amazon Bedrock
-        translate_output = transl_txt_bedrock(
+        translate_output, stats = transl_txt_bedrock(
             file_contents,
             st.session_state.src_lang['LanguageCode'],
             st.session_state.tgt_lang['LanguageCode'],
-            st.session_state.model['modelId']
+            st.session_state.model['modelId'],
+            on_progress=show_progress,
+            return_stats=True
+        )
+        progress_bar.empty()
+        st.caption(
+            f"{stats.segments} segments translated at {stats.segments_per_second:.1f} segments/sec, "
+            f"{stats.hit_rate:.0%} served from the translation memory"
         )
         
 